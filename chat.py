@@ -58,10 +58,14 @@ def main():
             print("Exiting...")
             break
 
-        # Run the thread and handle required actions
+        # Run the thread, handle required actions and print the answer as it streams in
         try:
-            flexiai.create_and_monitor_run(assistant_id, thread_id, user_message)
-            
+            print(f"{ASSISTANT_ROLE_NAME}: ", end="", flush=True)
+            for event in flexiai.stream_run(assistant_id, thread_id, user_message):
+                if event['type'] == 'text_delta':
+                    print(event['text'], end="", flush=True)
+            print()
+
             # Retrieve messages dynamically after the run
             retrieved_messages_after_run = flexiai.retrieve_messages_dynamically(
                 thread_id, order='asc', limit=20, retrieve_all=False, last_retrieved_id=last_retrieved_id
@@ -1,4 +1,6 @@
 # flexiai/__init__.py
 from flexiai.core.flexiai_client import FlexiAI
+from flexiai.core.flexiai_async_client import AsyncFlexiAI
+from flexiai.core.flexi_managers.tool_executor import ToolFunction
 
-__all__ = ['FlexiAI']
+__all__ = ['FlexiAI', 'AsyncFlexiAI', 'ToolFunction']
@@ -18,6 +18,19 @@ class Config(BaseSettings):
     AZURE_OPENAI_API_VERSION: str
     CREDENTIAL_TYPE: str
     USER_PROJECT_ROOT_DIR: str
+    OPENAI_REQUESTS_PER_MINUTE: int = 0
+    OPENAI_BASE_URL: str = ""
+    THREAD_POOL_SIZE: int = 0
+    THREAD_POOL_MAX_AGE: int = 3600
+    THREAD_LEASE_MAX_THREADS: int = 0
+    THREAD_LEASE_TTL: int = 1800
+    STATE_BACKEND_PATH: str = ""
+    PROCESSED_CONTENT_MAX_BYTES: int = 0
+    PROCESSED_CONTENT_MAX_KEY_BYTES: int = 0
+    PROCESSED_CONTENT_TTL: int = 0
+    PROCESSED_CONTENT_COMPRESS_BYTES: int = 0
+    PROCESSED_CONTENT_SPILL_BYTES: int = 0
+    PROCESSED_CONTENT_SPILL_DIR: str = ""
     
     class Config:
         env_file = ".env"
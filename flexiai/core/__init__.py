@@ -1,8 +1,10 @@
 # flexiai/core/__init__.py
 from flexiai.core.flexiai_client import FlexiAI
+from flexiai.core.flexiai_async_client import AsyncFlexiAI
 from flexiai.core.flexi_managers.multi_agent_system import MultiAgentSystemManager
 
 __all__ = [
     'FlexiAI',
+    'AsyncFlexiAI',
     'MultiAgentSystemManager',
 ]
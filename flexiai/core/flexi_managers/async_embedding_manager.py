@@ -0,0 +1,103 @@
+# flexiai/core/flexi_managers/async_embedding_manager.py
+import asyncio
+import numpy as np
+import faiss
+from openai import OpenAIError
+
+
+class AsyncEmbeddingManager:
+    """
+    AsyncEmbeddingManager is the asyncio counterpart of EmbeddingManager. The chunks of a text,
+    and the texts of a batch, are embedded concurrently.
+
+    Attributes:
+        client (AsyncOpenAI or AsyncAzureOpenAI): The asynchronous client for interacting with OpenAI or Azure OpenAI services.
+        logger (logging.Logger): The logger for logging information and errors.
+    """
+
+    def __init__(self, client, logger):
+        """
+        Initializes the AsyncEmbeddingManager with the asynchronous OpenAI client and logger.
+
+        Args:
+            client (object): The asynchronous OpenAI client instance.
+            logger (logging.Logger): The logger instance for logging information.
+        """
+        self.client = client
+        self.logger = logger
+
+
+    async def create_embeddings(self, text, model="text-embedding-ada-002", chunk_size=1000):
+        """
+        Creates embeddings for the given text using OpenAI's embedding model.
+        Text is split into chunks if it exceeds the chunk size.
+
+        Args:
+            text (str): The text to create embeddings for.
+            model (str): The model to use for creating embeddings. Default is "text-embedding-ada-002".
+            chunk_size (int): The maximum number of tokens in each chunk.
+
+        Returns:
+            np.ndarray: The mean of the chunk embeddings, or None if the embedding failed.
+        """
+        try:
+            if not isinstance(text, str) or len(text.strip()) == 0:
+                self.logger.error(f"Invalid text input for embedding: {text}")
+                return None
+
+            tokens = text.split()
+            chunks = [' '.join(tokens[i:i + chunk_size]) for i in range(0, len(tokens), chunk_size)]
+            self.logger.info(f"Text split into {len(chunks)} chunks for embedding.")
+
+            responses = await asyncio.gather(*(self.client.embeddings.create(input=chunk, model=model) for chunk in chunks))
+            embeddings = [response.data[0].embedding for response in responses]
+
+            self.logger.info("Embeddings created successfully.")
+            return np.mean(embeddings, axis=0)
+
+        except OpenAIError as e:
+            self.logger.error(f"OpenAI error during embedding creation: {str(e)}", exc_info=True)
+            return None
+        except Exception as e:
+            self.logger.error(f"Unexpected error during embedding creation: {str(e)}", exc_info=True)
+            return None
+
+
+    async def create_embeddings_for_faiss(self, texts, model="text-embedding-ada-002", chunk_size=1000):
+        """
+        Create embeddings for a list of texts and add them to a FAISS index.
+
+        Args:
+            texts (list of str): List of texts to create embeddings for.
+            model (str): The model to use for creating embeddings. Default is "text-embedding-ada-002".
+            chunk_size (int): The maximum number of tokens in each chunk.
+
+        Returns:
+            tuple: A tuple containing the FAISS index and the list of successfully embedded texts.
+        """
+        self.logger.info("Starting the embedding creation process.")
+        results = await asyncio.gather(*(self.create_embeddings(text, model=model, chunk_size=chunk_size) for text in texts))
+
+        embeddings = []
+        successful_texts = []
+        for text, embedding in zip(texts, results):
+            if embedding is not None:
+                embeddings.append(embedding)
+                successful_texts.append(text)
+            else:
+                self.logger.warning(f"Failed to create embedding for text: {str(text)[:50]}...")
+
+        if not embeddings:
+            self.logger.error("No valid embeddings were created. Check your texts and embedding function.")
+            raise ValueError("No valid embeddings were created. Check your texts and embedding function.")
+
+        try:
+            embeddings_array = np.array(embeddings).astype('float32')
+            index = faiss.IndexFlatL2(len(embeddings[0]))
+            index.add(embeddings_array)
+            self.logger.info(f"Number of vectors in FAISS index: {index.ntotal}")
+        except Exception as e:
+            self.logger.error(f"Error creating or adding embeddings to FAISS index: {str(e)}")
+            raise
+
+        return index, successful_texts
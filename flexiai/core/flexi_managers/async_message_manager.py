@@ -0,0 +1,432 @@
+# flexiai/core/flexi_managers/async_message_manager.py
+import asyncio
+import time
+from openai import OpenAIError
+from flexiai.core.flexi_managers.message_manager import MAX_THREAD_CREATION_MESSAGES
+from flexiai.core.flexi_managers.message_record import cut_to_byte_budget, extract_text
+
+
+class AsyncMessageManager:
+    """
+    AsyncMessageManager is the asyncio counterpart of MessageManager. It adds and retrieves
+    thread messages using the asynchronous OpenAI or Azure OpenAI client.
+
+    Attributes:
+        client (AsyncOpenAI or AsyncAzureOpenAI): The asynchronous client for interacting with OpenAI or Azure OpenAI services.
+        logger (logging.Logger): The logger for logging information and errors.
+        rate_limiter (TokenBucket): The limiter shared with the other users of the client, if any.
+    """
+
+    def __init__(self, client, logger, rate_limiter=None):
+        """
+        Initializes the AsyncMessageManager class.
+
+        Args:
+            client (object): The asynchronous OpenAI client instance.
+            logger (object): The logger instance.
+            rate_limiter (TokenBucket, optional): Throttles the message API calls. Defaults to no throttling.
+        """
+        self.client = client
+        self.logger = logger
+        self.rate_limiter = rate_limiter
+
+
+    async def _throttle(self):
+        # Waits for the shared rate limiter, if any, before an API request
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire_async()
+
+
+    async def add_user_message(self, thread_id, user_message):
+        """
+        Adds a user message to a specified thread.
+
+        Args:
+            thread_id (str): The ID of the thread.
+            user_message (str): The user's message content.
+
+        Returns:
+            object: The message object that was added to the thread.
+
+        Raises:
+            OpenAIError: If the API call to add a user message fails.
+            Exception: If an unexpected error occurs.
+        """
+        try:
+            await self._throttle()
+            message = await self.client.beta.threads.messages.create(
+                thread_id=thread_id,
+                role="user",
+                content=user_message
+            )
+            self.logger.info(f"Added user message with ID: {message.id}")
+            return message
+        except OpenAIError as e:
+            self.logger.error(f"Failed to add a user message to the thread {thread_id}: {str(e)}", exc_info=True)
+            raise
+        except Exception as e:
+            self.logger.error(f"An unexpected error occurred while adding a user message to thread {thread_id}: {str(e)}", exc_info=True)
+            raise
+
+
+    async def retrieve_messages(self, thread_id, order='desc', limit=20):
+        """
+        Retrieves messages from a specified thread.
+
+        Args:
+            thread_id (str): The ID of the thread.
+            order (str, optional): The order in which to retrieve messages, either 'asc' or 'desc'. Defaults to 'desc'.
+            limit (int, optional): The number of messages to retrieve. Defaults to 20.
+
+        Returns:
+            list: A list of dictionaries containing the message ID, role, and content of each message.
+
+        Raises:
+            OpenAIError: If the API call to retrieve messages fails.
+            Exception: If an unexpected error occurs.
+        """
+        try:
+            await self._throttle()
+            response = await self.client.beta.threads.messages.list(thread_id=thread_id, order=order, limit=limit)
+            if not response.data:
+                self.logger.info("No data found in the response or no messages.")
+                return []
+
+            self.logger.info(f"Retrieved {len(response.data)} messages from thread {thread_id}")
+            formatted_messages = []
+            for message in response.data[::-1]:
+                formatted_messages.append({
+                    'message_id': message.id,
+                    'role': message.role,
+                    'content': extract_text(message)
+                })
+
+            return formatted_messages
+        except OpenAIError as e:
+            self.logger.error(f"Failed to fetch messages for thread {thread_id}: {str(e)}", exc_info=True)
+            raise
+        except Exception as e:
+            self.logger.error(f"An unexpected error occurred while fetching messages for thread {thread_id}: {str(e)}", exc_info=True)
+            raise
+
+
+    async def retrieve_message_object(self, thread_id, order='asc', limit=20):
+        """
+        Retrieves message objects from a specified thread.
+
+        Args:
+            thread_id (str): The ID of the thread.
+            order (str, optional): The order in which to retrieve messages, either 'asc' or 'desc'. Defaults to 'asc'.
+            limit (int, optional): The number of messages to retrieve. Defaults to 20.
+
+        Returns:
+            list: A list of message objects.
+
+        Raises:
+            OpenAIError: If the API call to retrieve messages fails.
+            Exception: If an unexpected error occurs.
+        """
+        try:
+            await self._throttle()
+            response = await self.client.beta.threads.messages.list(thread_id=thread_id, order=order, limit=limit)
+            if not response.data:
+                self.logger.info("No data found in the response or no messages.")
+                return []
+            return response.data
+        except OpenAIError as e:
+            self.logger.error(f"Failed to fetch messages for thread {thread_id}: {str(e)}", exc_info=True)
+            raise
+        except Exception as e:
+            self.logger.error(f"An unexpected error occurred while fetching messages for thread {thread_id}: {str(e)}", exc_info=True)
+            raise
+
+
+    async def add_messages_dynamically(self, thread_id, messages, role=None, metadata=None):
+        """
+        Adds multiple messages to a specified thread dynamically with optional metadata.
+        The messages are added one after the other, use `add_messages_bulk` to send many at once.
+
+        Args:
+            thread_id (str): The ID of the thread.
+            messages (list): A list of dictionaries where each dictionary contains:
+                - content (str): The content of the message.
+                - metadata (dict, optional): Metadata to include with the message.
+            role (str, optional): The role of the message sender. Defaults to None.
+            metadata (dict, optional): Metadata to include with each message if not provided in individual messages.
+
+        Returns:
+            list: A list of message objects that were added to the thread.
+
+        Raises:
+            OpenAIError: If the API call to add a message fails. The following messages aren't added.
+            Exception: If an unexpected error occurs.
+        """
+        added_messages = []
+        for message in messages:
+            try:
+                await self._throttle()
+                message_obj = await self.client.beta.threads.messages.create(
+                    thread_id=thread_id, **self._message_params(message, role, metadata)
+                )
+                self.logger.info(f"Added message with ID: {message_obj.id}")
+                added_messages.append(message_obj)
+            except OpenAIError as e:
+                self.logger.error(f"Failed to add message to thread {thread_id}: {str(e)}", exc_info=True)
+                raise
+            except Exception as e:
+                self.logger.error(f"An unexpected error occurred while adding message to thread {thread_id}: {str(e)}", exc_info=True)
+                raise
+        return added_messages
+
+
+    async def add_messages_bulk(self, thread_id, messages, role=None, metadata=None, max_concurrency=8, stagger=0.02):
+        """
+        Adds many messages to a thread with as few sequential round trips as possible.
+        See MessageManager.add_messages_bulk.
+
+        Args:
+            thread_id (str): The ID of the thread, or None to create a new thread with the messages.
+            messages (list): A list of dictionaries with the `content` and optional `metadata` of each message.
+            role (str, optional): The role of the message sender. Defaults to 'user'.
+            metadata (dict, optional): Metadata to include with each message if not provided in individual messages.
+            max_concurrency (int, optional): The maximum number of requests in flight. Defaults to 8.
+            stagger (float, optional): The delay, in seconds, between the start of two requests. Defaults to 0.02.
+
+        Returns:
+            dict: The `thread_id`, the message objects added in order (`messages`), the `errors`,
+                a list of dictionaries with the `index` of the failed message and its `error`, and
+                whether the messages are known to be in order in the thread (`ordered`).
+
+        Raises:
+            OpenAIError: If the thread creation fails.
+            Exception: If an unexpected error occurs while creating the thread.
+        """
+        params = [self._message_params(message, role, metadata) for message in messages]
+        results = [None] * len(params)
+        errors = []
+        ordered = True
+
+        start = 0
+        if thread_id is None:
+            thread_id = await self._create_thread_with_messages(params[:MAX_THREAD_CREATION_MESSAGES], results)
+            start = min(len(params), MAX_THREAD_CREATION_MESSAGES)
+
+        pending = list(range(start, len(params)))
+        if len(pending) == 1:
+            await self._create_message(thread_id, params, results, errors, pending[0])
+        elif pending:
+            started = time.monotonic()
+            semaphore = asyncio.Semaphore(max_concurrency)
+
+            async def create(position, index):
+                async with semaphore:
+                    delay = started + position * stagger - time.monotonic()
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    await self._create_message(thread_id, params, results, errors, index)
+
+            await asyncio.gather(*(create(position, index) for position, index in enumerate(pending)))
+            ordered = await self._restore_order(thread_id, params, results, pending)
+
+        errors.sort(key=lambda error: error['index'])
+        added = [message for message in results if message is not None]
+        self.logger.info(f"Added {len(added)} messages to thread {thread_id} ({len(errors)} failed)")
+        return {'thread_id': thread_id, 'messages': added, 'errors': errors, 'ordered': ordered}
+
+
+    def _message_params(self, message, role, metadata):
+        return {
+            'role': role if role else 'user',  # Use 'user' as default role if not specified
+            'content': message.get('content'),
+            'metadata': message.get('metadata', metadata or {})
+        }
+
+
+    async def _create_thread_with_messages(self, params, results):
+        try:
+            await self._throttle()
+            thread = await self.client.beta.threads.create(messages=params)
+            if params:
+                await self._throttle()
+                response = await self.client.beta.threads.messages.list(thread_id=thread.id, order='asc', limit=len(params))
+                results[:len(response.data)] = response.data
+            self.logger.info(f"Created thread {thread.id} with {len(params)} messages")
+            return thread.id
+        except OpenAIError as e:
+            self.logger.error(f"Failed to create a thread with {len(params)} messages: {str(e)}", exc_info=True)
+            raise
+        except Exception as e:
+            self.logger.error(f"An unexpected error occurred while creating a thread with {len(params)} messages: {str(e)}", exc_info=True)
+            raise
+
+
+    async def _create_message(self, thread_id, params, results, errors, index):
+        try:
+            await self._throttle()
+            results[index] = await self.client.beta.threads.messages.create(thread_id=thread_id, **params[index])
+        except Exception as e:
+            self.logger.error(f"Failed to add message {index} to thread {thread_id}: {str(e)}", exc_info=True)
+            errors.append({'index': index, 'error': e})
+
+
+    async def _restore_order(self, thread_id, params, results, indexes):
+        # Checks that the concurrently created messages landed in order and moves the misplaced ones
+        # to the end of the thread, returns whether the order is known to be right
+        added = [index for index in indexes if results[index] is not None]
+        expected = [results[index].id for index in added]
+        try:
+            observed = await self._list_message_ids(thread_id, set(expected))
+        except Exception as e:
+            self.logger.warning(f"Couldn't verify the order of the messages added to thread {thread_id}: {str(e)}")
+            return False
+
+        mismatch = next((position for position, (a, b) in enumerate(zip(expected, observed)) if a != b), None)
+        if mismatch is None:
+            return True
+
+        misplaced = added[mismatch:]
+        self.logger.warning(f"{len(misplaced)} messages reached thread {thread_id} out of order, adding them again")
+        for index in misplaced:
+            original = results[index]
+            try:
+                await self._throttle()
+                results[index] = await self.client.beta.threads.messages.create(thread_id=thread_id, **params[index])
+            except Exception as e:
+                # The original stays in the thread, so no message is lost, only left out of order
+                self.logger.error(f"Failed to add message {index} to thread {thread_id} again, the order can't be restored: {str(e)}", exc_info=True)
+                return False
+            try:
+                await self._throttle()
+                await self.client.beta.threads.messages.delete(original.id, thread_id=thread_id)
+            except Exception as e:
+                self.logger.error(f"Failed to remove misplaced message {original.id} from thread {thread_id}, it is duplicated: {str(e)}", exc_info=True)
+                return False
+        return True
+
+
+    async def _list_message_ids(self, thread_id, message_ids):
+        # Returns the given message IDs in the order the thread holds them, reading from the newest message
+        found = []
+        params = {'order': 'desc', 'limit': 100}
+        while len(found) < len(message_ids):
+            await self._throttle()
+            response = await self.client.beta.threads.messages.list(thread_id=thread_id, **params)
+            found.extend(message.id for message in response.data if message.id in message_ids)
+            if not response.has_more:
+                break
+            params['after'] = response.last_id
+        return found[::-1]
+
+
+    async def retrieve_messages_dynamically(self, thread_id, order='asc', limit=20, retrieve_all=False, last_retrieved_id=None):
+        """
+        Retrieves messages from a specified thread dynamically.
+
+        Args:
+            thread_id (str): The ID of the thread from which to retrieve messages.
+            order (str, optional): The order in which to retrieve messages, either 'asc' or 'desc'. Defaults to 'asc'.
+            limit (int, optional): The maximum number of messages to retrieve in a single request. Defaults to 20.
+            retrieve_all (bool, optional): Whether to retrieve all messages in the thread. Defaults to False.
+            last_retrieved_id (str, optional): The ID of the last retrieved message to fetch messages after it. Defaults to None.
+
+        Returns:
+            list: A list of message objects retrieved from the thread.
+
+        Raises:
+            OpenAIError: If the API call to retrieve messages fails.
+            Exception: If an unexpected error occurs.
+        """
+        all_messages = []
+        params = {'order': order, 'limit': limit}
+        if last_retrieved_id:
+            params['after'] = last_retrieved_id
+
+        while True:
+            try:
+                await self._throttle()
+                response = await self.client.beta.threads.messages.list(thread_id=thread_id, **params)
+                if not response.data:
+                    self.logger.info("No data found in the response or no messages.")
+                    return all_messages
+
+                all_messages.extend(response.data)
+
+                if not retrieve_all or not response.has_more:
+                    break
+
+                # Update the params to get the next set of messages
+                params['after'] = response.last_id
+
+            except OpenAIError as e:
+                self.logger.error(f"Failed to fetch messages for thread {thread_id}: {str(e)}", exc_info=True)
+                raise
+            except Exception as e:
+                self.logger.error(f"An unexpected error occurred while fetching messages for thread {thread_id}: {str(e)}", exc_info=True)
+                raise
+
+        return all_messages
+
+
+    async def iter_messages(self, thread_id, order='asc', page_size=100, after=None, max_items=None, max_bytes=None):
+        """
+        Iterates asynchronously over the messages of a thread, page by page, without holding the
+        whole history. The next page is fetched while the caller processes the current one.
+        See MessageManager.iter_messages.
+
+        Args:
+            thread_id (str): The ID of the thread.
+            order (str, optional): The order of the messages, either 'asc' or 'desc'. Defaults to 'asc'.
+            page_size (int, optional): The number of messages per request, at most 100. Defaults to 100.
+            after (str, optional): Start after this message ID.
+            max_items (int, optional): Stop after this many messages. Defaults to no limit.
+            max_bytes (int, optional): Stop once the text of the messages yielded reaches this many bytes.
+                The message reaching it is still yielded. Defaults to no limit.
+
+        Yields:
+            Message: The message objects, in the requested order.
+
+        Raises:
+            OpenAIError: If the API call to list the messages fails.
+            Exception: If an unexpected error occurs.
+        """
+        if (max_items is not None and max_items <= 0) or (max_bytes is not None and max_bytes <= 0):
+            return
+
+        async def fetch(cursor, remaining):
+            params = {'order': order, 'limit': page_size if remaining is None else min(page_size, remaining)}
+            if cursor is not None:
+                params['after'] = cursor
+            await self._throttle()
+            return await self.client.beta.threads.messages.list(thread_id=thread_id, **params)
+
+        task = asyncio.ensure_future(fetch(after, max_items))
+        remaining = max_items
+        remaining_bytes = max_bytes
+        try:
+            while task is not None:
+                try:
+                    response = await task
+                except OpenAIError as e:
+                    self.logger.error(f"Failed to fetch messages for thread {thread_id}: {str(e)}", exc_info=True)
+                    raise
+                except Exception as e:
+                    self.logger.error(f"An unexpected error occurred while fetching messages for thread {thread_id}: {str(e)}", exc_info=True)
+                    raise
+
+                page = response.data
+                if remaining is not None:
+                    page = page[:remaining]
+                    remaining -= len(page)
+                if remaining_bytes is not None:
+                    page, remaining_bytes = cut_to_byte_budget(page, remaining_bytes)
+                more = (
+                    response.has_more and page and (remaining is None or remaining > 0)
+                    and (remaining_bytes is None or remaining_bytes > 0)
+                )
+                # Fetch the next page while the caller goes through this one
+                task = asyncio.ensure_future(fetch(page[-1].id, remaining)) if more else None
+                for message in page:
+                    yield message
+        finally:
+            if task is not None:
+                task.cancel()
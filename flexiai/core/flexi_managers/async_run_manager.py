@@ -0,0 +1,421 @@
+# flexiai/core/flexi_managers/async_run_manager.py
+import asyncio
+import json
+import time
+from openai import OpenAIError
+from flexiai.core.flexi_managers.run_monitor import AsyncRunMonitor
+from flexiai.core.flexi_managers.tool_executor import ToolExecutor
+from flexiai.core.flexi_managers.tool_cache import ToolResultCache
+from flexiai.core.utils.tracing import create_tracer
+
+
+class AsyncRunManager:
+    """
+    AsyncRunManager is the asyncio counterpart of RunManager. It creates and monitors runs
+    using the asynchronous OpenAI or Azure OpenAI client, so a single event loop can drive
+    many conversations at once.
+
+    Tool calls of a run are always executed concurrently: coroutine functions are awaited
+    on the event loop and regular functions run in the bounded pool of the tool executor.
+
+    Attributes:
+        client (AsyncOpenAI or AsyncAzureOpenAI): The asynchronous client for interacting with OpenAI or Azure OpenAI services.
+        logger (logging.Logger): The logger for logging information and errors.
+        message_manager (AsyncMessageManager): The manager used to add messages to threads.
+        run_monitor (AsyncRunMonitor): The monitor used to poll runs with adaptive backoff.
+        tool_executor (ToolExecutor): The executor running the tool calls under the concurrency limits.
+        tool_cache (ToolResultCache): The opt-in memoization of tool results.
+        tracer (Tracer): Records the structured events of the runs and tool calls.
+    """
+
+    def __init__(self, client, logger, message_manager, polling_policy=None, tool_executor=None, run_registry=None, tool_cache=None, run_timeout=None, rate_limiter=None, tracer=None):
+        """
+        Initializes the AsyncRunManager.
+
+        Args:
+            client (object): The asynchronous OpenAI client instance.
+            logger (logging.Logger): The logger instance.
+            message_manager (AsyncMessageManager): The manager used to add messages to threads.
+            polling_policy (PollingPolicy, optional): The backoff used while monitoring runs.
+            tool_executor (ToolExecutor, optional): The executor running the tool calls. A default one is created if omitted.
+            run_registry (ActiveRunRegistry, optional): The registry of the last known run status per thread.
+            tool_cache (ToolResultCache, optional): The cache of tool results. A default one, with caching disabled for every function, is created if omitted.
+            run_timeout (float, optional): How long, in seconds, a monitored run may take before it is cancelled. Tool calls are bounded by the same deadline.
+            rate_limiter (TokenBucket, optional): The limiter shared by the users of the client. Run API calls aren't throttled if omitted.
+            tracer (Tracer, optional): Records the structured events of the runs and tool calls. Defaults to a tracer logging to `logger`.
+        """
+        self.client = client
+        self.logger = logger
+        self.message_manager = message_manager
+        self.personal_function_mapping = {}
+        self.assistant_function_mapping = {}
+        self.tracer = tracer or create_tracer(logger)
+        self.run_monitor = AsyncRunMonitor(client, logger, polling_policy, registry=run_registry, rate_limiter=rate_limiter, tracer=self.tracer)
+        self.tool_executor = tool_executor or ToolExecutor(logger)
+        self.tool_cache = tool_cache or ToolResultCache(logger)
+        self.run_timeout = run_timeout
+        self.logger.info("AsyncRunManager initialized.")
+
+
+    def update_function_mappings(self, personal_function_mapping, assistant_function_mapping):
+        """
+        Updates the function mappings for personal and assistant functions.
+        """
+        self.personal_function_mapping = personal_function_mapping
+        self.assistant_function_mapping = assistant_function_mapping
+        self.logger.info(f"AsyncRunManager updated with personal functions: {list(personal_function_mapping.keys())}")
+        self.logger.info(f"AsyncRunManager updated with assistant functions: {list(assistant_function_mapping.keys())}")
+
+
+    async def create_and_monitor_run(self, assistant_id, thread_id, user_message=None, role=None, metadata=None):
+        """
+        Creates and runs a thread with the specified assistant, optionally adding a user message,
+        and monitors its status until completion or failure.
+
+        Args:
+            assistant_id (str): The ID of the assistant.
+            thread_id (str): The ID of the thread.
+            user_message (str, optional): The user's message content to add before creating the run.
+            role (str, optional): The role of the message sender. Defaults to 'user'.
+            metadata (dict, optional): Metadata to include with the message.
+
+        Returns:
+            object: The final run object.
+
+        Raises:
+            OpenAIError: If any API call within this function fails.
+            Exception: If an unexpected error occurs.
+        """
+        try:
+            self.logger.info(f"Starting a new run for thread {thread_id} with assistant {assistant_id}")
+
+            await self.wait_for_run_completion(thread_id)
+
+            if user_message:
+                messages_to_add = [{"content": user_message, "metadata": metadata}]
+                await self.run_monitor.call_on_idle_thread(
+                    thread_id, lambda: self.message_manager.add_messages_dynamically(thread_id, messages_to_add, role)
+                )
+
+            run = await self._create_run(thread_id, assistant_id)
+            run = await self.monitor_run(run, assistant_id, thread_id)
+
+            if run.status == 'completed':
+                self.logger.info(f"Run {run.id} completed successfully for thread {thread_id}")
+            else:
+                self.logger.error(f"Run {run.id} failed with status: {run.status}")
+
+            return run
+
+        except OpenAIError as e:
+            self.logger.error(f"Failed to run thread ID {thread_id} with assistant ID {assistant_id}: {str(e)}", exc_info=True)
+            raise
+        except Exception as e:
+            self.logger.error(f"An unexpected error occurred while running thread ID {thread_id} with assistant ID {assistant_id}: {str(e)}", exc_info=True)
+            raise
+
+
+    async def create_run(self, assistant_id, thread_id):
+        """
+        Creates and runs a thread with the specified assistant, monitoring its status
+        until completion or failure.
+
+        Args:
+            assistant_id (str): The ID of the assistant.
+            thread_id (str): The ID of the thread.
+
+        Returns:
+            object: The run object if successful, None otherwise.
+
+        Raises:
+            OpenAIError: If any API call within this function fails.
+            Exception: If an unexpected error occurs.
+        """
+        try:
+            self.logger.info(f"Starting a new run for thread {thread_id} with assistant {assistant_id}")
+
+            await self.wait_for_run_completion(thread_id)
+
+            run = await self._create_run(thread_id, assistant_id)
+            run = await self.monitor_run(run, assistant_id, thread_id)
+
+            if run.status == 'completed':
+                self.logger.info(f"Run {run.id} completed successfully for thread {thread_id}")
+                return run
+            else:
+                self.logger.error(f"Run {run.id} failed with status: {run.status}")
+                return None
+        except OpenAIError as e:
+            self.logger.error(f"An error occurred during thread run for thread {thread_id} with assistant {assistant_id}: {str(e)}", exc_info=True)
+            raise
+        except Exception as e:
+            self.logger.error(f"An unexpected error occurred during thread run for thread {thread_id} with assistant {assistant_id}: {str(e)}", exc_info=True)
+            raise
+
+
+    async def create_advanced_run(self, assistant_id, thread_id, user_message):
+        """
+        Creates and runs a thread with the specified assistant and user message,
+        monitoring its status until completion or failure.
+
+        Args:
+            assistant_id (str): The ID of the assistant.
+            thread_id (str): The ID of the thread.
+            user_message (str): The user's message content.
+
+        Returns:
+            object: The final run object.
+
+        Raises:
+            OpenAIError: If any API call within this function fails.
+            Exception: If an unexpected error occurs.
+        """
+        try:
+            self.logger.info(f"Starting a new run for thread {thread_id} with assistant {assistant_id}")
+
+            await self.wait_for_run_completion(thread_id)
+            await self.run_monitor.call_on_idle_thread(thread_id, lambda: self.message_manager.add_user_message(thread_id, user_message))
+
+            run = await self._create_run(thread_id, assistant_id)
+            run = await self.monitor_run(run, assistant_id, thread_id)
+
+            if run.status == 'completed':
+                self.logger.info(f"Run {run.id} completed successfully for thread {thread_id}")
+            else:
+                self.logger.error(f"Run {run.id} failed with status: {run.status}")
+
+            return run
+        except OpenAIError as e:
+            self.logger.error(f"An error occurred during thread run for thread {thread_id} with assistant {assistant_id}: {str(e)}", exc_info=True)
+            raise
+        except Exception as e:
+            self.logger.error(f"An unexpected error occurred during thread run for thread {thread_id} with assistant {assistant_id}: {str(e)}", exc_info=True)
+            raise
+
+
+    async def wait_for_run_completion(self, thread_id):
+        """
+        Waits for any active runs in the thread to complete.
+
+        Args:
+            thread_id (str): The ID of the thread.
+
+        Raises:
+            OpenAIError: If an error occurs when interacting with the OpenAI API.
+            Exception: If an unexpected error occurs during the process.
+        """
+        try:
+            self.logger.info(f"Checking for active runs in thread {thread_id}")
+            await self.run_monitor.wait_for_idle_thread(thread_id)
+        except OpenAIError as e:
+            self.logger.error(f"Failed to retrieve thread runs for thread {thread_id}: {str(e)}", exc_info=True)
+            raise
+        except Exception as e:
+            self.logger.error(f"An unexpected error occurred while waiting for run completion in thread {thread_id}: {str(e)}", exc_info=True)
+            raise
+
+
+    async def monitor_run(self, run, assistant_id, thread_id):
+        """
+        Monitors a run with adaptive polling until it leaves the active statuses,
+        handling any required actions along the way. The run is cancelled once the
+        run timeout, if any, has elapsed.
+
+        Args:
+            run (Run): The run object returned when the run was created.
+            assistant_id (str): The ID of the assistant.
+            thread_id (str): The ID of the thread.
+
+        Returns:
+            object: The final run object.
+        """
+        deadline = time.monotonic() + self.run_timeout if self.run_timeout is not None else None
+
+        async def on_requires_action(current_run):
+            await self.handle_requires_action(current_run, assistant_id, thread_id, deadline)
+
+        return await self.run_monitor.monitor_run(run, thread_id, on_requires_action=on_requires_action, deadline=deadline)
+
+
+    async def _create_run(self, thread_id, assistant_id):
+        async def create():
+            await self.run_monitor.throttle()
+            return await self.client.beta.threads.runs.create(thread_id=thread_id, assistant_id=assistant_id)
+
+        return await self.run_monitor.call_on_idle_thread(thread_id, create)
+
+
+    def mark_thread_idle(self, thread_id):
+        """
+        Records that a thread has no active run, so the next run on it starts without listing its runs.
+        Meant for threads that were just created.
+
+        Args:
+            thread_id (str): The ID of the thread.
+        """
+        self.run_monitor.registry.mark_idle(thread_id)
+
+
+    def get_poll_count(self, run_id):
+        """
+        Returns how many status checks a monitored run needed.
+
+        Args:
+            run_id (str): The ID of the run.
+
+        Returns:
+            int: The number of checks, or None if the run wasn't monitored by this manager.
+        """
+        return self.run_monitor.get_poll_count(run_id)
+
+
+    async def handle_requires_action(self, run, assistant_id, thread_id, deadline=None):
+        """
+        Handles the required actions for a given run by executing the tool calls concurrently
+        and submitting their outputs.
+
+        Args:
+            run (Run): The run object containing the required action.
+            assistant_id (str): The ID of the assistant handling the action.
+            thread_id (str): The ID of the thread in which the action is being handled.
+            deadline (float, optional): The time.monotonic() value by which the tool calls must be done.
+
+        Raises:
+            OpenAIError: If there is an error interacting with the OpenAI API.
+            Exception: For any general exceptions that occur during the processing of tool outputs.
+        """
+        self.tracer.event('run.requires_action', run_id=run.id, assistant_id=assistant_id, thread_id=thread_id)
+
+        if run.status != "requires_action":
+            self.logger.info(f"No required action for this run ID: {run.id}")
+            return
+
+        tool_outputs = await self.collect_tool_outputs(run, deadline)
+
+        try:
+            await self.run_monitor.throttle()
+            await self.client.beta.threads.runs.submit_tool_outputs(
+                thread_id=thread_id,
+                run_id=run.id,
+                tool_outputs=tool_outputs
+            )
+            self.tracer.event('run.tool_outputs_submitted', run_id=run.id, tool_outputs=len(tool_outputs))
+        except OpenAIError as e:
+            self.logger.error(f"OpenAI API error when submitting tool outputs for run ID {run.id} in thread {thread_id} with assistant {assistant_id}: {str(e)}", exc_info=True)
+            raise
+        except Exception as e:
+            self.logger.error(f"General error when submitting tool outputs for run ID {run.id} in thread {thread_id} with assistant {assistant_id}: {str(e)}", exc_info=True)
+            raise
+
+
+    async def collect_tool_outputs(self, run, deadline=None):
+        """
+        Executes the tool calls required by a run concurrently and builds the tool outputs to submit.
+        A tool call that times out gets an error output, so the model can carry on without it.
+
+        Args:
+            run (Run): The run object containing the required action.
+            deadline (float, optional): The time.monotonic() value by which the tool calls must be done.
+
+        Returns:
+            list: A list of dictionaries with the `tool_call_id` and the JSON encoded `output`.
+        """
+        tool_calls = run.required_action.submit_tool_outputs.tool_calls
+        with self.tool_executor.deadline_scope(deadline):
+            results = await asyncio.gather(
+                *(self.execute_task(tool_call.function.name, json.loads(tool_call.function.arguments)) for tool_call in tool_calls),
+                return_exceptions=True
+            )
+
+        tool_outputs = []
+        for tool_call, result in zip(tool_calls, results):
+            if isinstance(result, Exception):
+                output = {"status": False, "message": str(result), "result": None}
+            else:
+                output = {"status": True, "message": "Success", "result": result}
+            tool_outputs.append({"tool_call_id": tool_call.id, "output": json.dumps(output)})
+        return tool_outputs
+
+
+    def determine_action_type(self, function_name):
+        """
+        Determines the action type for a given function name.
+
+        Args:
+            function_name (str): The name of the function.
+
+        Returns:
+            str: The action type, either "call_assistant" or "personal_function".
+        """
+        return "call_assistant" if function_name.endswith("_assistant") else "personal_function"
+
+
+    async def execute_task(self, function_name, parameters):
+        """
+        Executes a task for a given function name and parameters. Coroutine functions are awaited
+        and regular functions run in the tool executor's thread pool so they don't block the event loop.
+
+        Args:
+            function_name (str): The name of the function to execute.
+            parameters (dict): The parameters to pass to the function.
+
+        Returns:
+            object: The result of the function execution.
+
+        Raises:
+            ValueError: If the function is not found or not callable.
+            Exception: If an error occurs during the function execution.
+        """
+        self.tracer.event('tool.call', function_name=function_name, parallel=True, arguments=parameters)
+        if function_name in self.personal_function_mapping:
+            func = self.personal_function_mapping[function_name]
+        elif function_name in self.assistant_function_mapping:
+            func = self.assistant_function_mapping[function_name]
+        else:
+            error_message = f"Function {function_name} not found in mapping."
+            self.logger.error(error_message)
+            raise ValueError(error_message)
+
+        if not callable(func):
+            error_message = f"Function {function_name} is not callable."
+            self.logger.error(error_message)
+            raise ValueError(error_message)
+
+        try:
+            result = await self.tool_cache.get_or_call_async(
+                function_name, parameters, lambda: self.tool_executor.execute_async(function_name, func, parameters)
+            )
+            self.tracer.event('tool.completed', function_name=function_name, parallel=True, result=result)
+            return result
+        except Exception as e:
+            self.logger.error(f"Error executing task {function_name}: {str(e)}", exc_info=True)
+            raise
+
+
+    async def assistant_transformer(self, thread_id, new_assistant_id):
+        """
+        Attaches a new assistant to an existing thread and runs the thread to speak with the new assistant.
+
+        Args:
+            thread_id (str): The ID of the existing thread.
+            new_assistant_id (str): The ID of the new assistant to attach.
+
+        Returns:
+            object: The final run object indicating the result of the interaction.
+
+        Raises:
+            OpenAIError: If any API call fails.
+            Exception: If an unexpected error occurs.
+        """
+        try:
+            self.logger.info(f"Attaching new assistant ID: {new_assistant_id} to thread ID: {thread_id}")
+            run = await self._create_run(thread_id, new_assistant_id)
+            run = await self.monitor_run(run, new_assistant_id, thread_id)
+            self.logger.info(f"Final status of run {run.id} for thread {thread_id}: {run.status}")
+            return run
+        except OpenAIError as e:
+            self.logger.error(f"Failed to run thread ID {thread_id} with new assistant ID {new_assistant_id}: {str(e)}", exc_info=True)
+            raise
+        except Exception as e:
+            self.logger.error(f"An unexpected error occurred while running thread ID {thread_id} with new assistant ID {new_assistant_id}: {str(e)}", exc_info=True)
+            raise
@@ -0,0 +1,462 @@
+# flexiai/core/flexi_managers/content_store.py
+import itertools
+import os
+import pickle
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from collections import OrderedDict, deque
+
+
+# The processed content is split into this many independently locked shards, by to_assistant_id
+CONTENT_SHARDS = 16
+
+
+class _StoredContent:
+    # One piece of content: the object itself, or its encoded bytes when compressed or spilled to disk
+    __slots__ = ('id', 'key', 'size', 'memory', 'expires_at', 'value', 'is_text', 'compressed', 'path')
+
+    def __init__(self, id, key, size, expires_at, value):
+        self.id = id
+        self.key = key
+        self.size = size
+        self.memory = size
+        self.expires_at = expires_at
+        self.value = value
+        self.is_text = isinstance(value, str)
+        self.compressed = False
+        self.path = None
+
+
+    def load(self):
+        if self.path is None and not self.compressed:
+            return self.value
+        if self.path is not None:
+            with open(self.path, 'rb') as f:
+                data = f.read()
+        else:
+            data = self.value
+        if self.compressed:
+            data = zlib.decompress(data)
+        return data.decode('utf-8') if self.is_text else pickle.loads(data)
+
+
+class _ContentShard:
+    # The processed content directed to the assistants hashed to one shard
+    __slots__ = ('lock', 'contents', 'senders')
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        # Structure: {(from_assistant_id, to_assistant_id): deque([_StoredContent, ...])}
+        self.contents = {}
+        # Structure: {to_assistant_id: {from_assistant_id: None, ...}}, the senders in the order they first saved content
+        self.senders = {}
+
+
+class ProcessedContentStore:
+    """
+    ProcessedContentStore keeps the processed content assistants leave for each other, within
+    memory bounds, for the InMemoryStateBackend.
+
+    The content is split into shards by to_assistant_id, each with its own lock and an index of the
+    senders with pending content, so independent assistants don't contend and loading the content of
+    an assistant only touches the items returned.
+
+    Content that nobody loads doesn't stay forever:
+        - With `ttl`, content expires that many seconds after it was saved. Expired content is never
+          returned, and a background sweeper drops it every `sweep_interval` seconds.
+        - With `max_key_bytes`, the oldest content of a (from_assistant_id, to_assistant_id) pair is
+          evicted when the content of the pair uses more memory than that.
+        - With `max_total_bytes`, the oldest content of the store is evicted when all the content uses
+          more memory than that.
+    A single piece of content larger than a memory cap is rejected when saved rather than evicted
+    right away, unless it is spilled to disk.
+
+    Content of at least `compress_threshold` bytes is kept zlib compressed, and content of at least
+    `spill_threshold` bytes is written to a file of `spill_dir` and only read back when loaded. Text is
+    measured by its UTF-8 encoding, other objects by their pickled form; spilled content doesn't count
+    towards the memory caps.
+
+    Attributes:
+        logger (logging.Logger): The logger for logging information and errors.
+        max_key_bytes (int): The memory cap of the content of a (from_assistant_id, to_assistant_id) pair.
+        max_total_bytes (int): The memory cap of all the content.
+        ttl (float): The time, in seconds, after which saved content expires.
+        compress_threshold (int): The size from which content is compressed.
+        spill_threshold (int): The size from which content is written to disk.
+        spill_dir (str): The directory of the spilled content.
+        sweep_interval (float): The time, in seconds, between two sweeps of the expired content.
+    """
+
+    def __init__(
+        self, logger, max_key_bytes=None, max_total_bytes=None, ttl=None, compress_threshold=None,
+        spill_threshold=None, spill_dir=None, sweep_interval=60.0
+    ):
+        """
+        Initializes the ProcessedContentStore. Every limit is disabled by default.
+
+        Args:
+            logger (logging.Logger): The logger instance.
+            max_key_bytes (int, optional): The memory cap of the content of a pair of assistants.
+            max_total_bytes (int, optional): The memory cap of all the content.
+            ttl (float, optional): The time after which saved content expires.
+            compress_threshold (int, optional): The size from which content is compressed.
+            spill_threshold (int, optional): The size from which content is written to disk.
+            spill_dir (str, optional): The directory of the spilled content. Defaults to a temporary directory,
+                removed by `close`.
+            sweep_interval (float, optional): The time between two sweeps of the expired content. Defaults to 60.
+        """
+        self.logger = logger
+        self.max_key_bytes = max_key_bytes
+        self.max_total_bytes = max_total_bytes
+        self.ttl = ttl
+        self.compress_threshold = compress_threshold
+        self.spill_threshold = spill_threshold
+        self.spill_dir = spill_dir
+        self.sweep_interval = sweep_interval
+        self._owns_spill_dir = spill_dir is None
+        self._shards = [_ContentShard() for _ in range(CONTENT_SHARDS)]
+        self._ids = itertools.count()
+        # Every stored content in the order it was saved, oldest first: {id: (shard, key)}. Lock order: shard, then this lock.
+        self._order = OrderedDict()
+        self._key_memory = {}
+        self._stats = {
+            'saved': 0, 'loaded': 0, 'expired': 0, 'evicted': 0, 'rejected': 0, 'compressed': 0, 'spilled': 0,
+            'memory_bytes': 0, 'disk_bytes': 0
+        }
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._sweeper = None
+
+
+    def save(self, from_assistant_id, to_assistant_id, content):
+        """
+        Appends processed content directed from one assistant to another, then evicts the oldest
+        content beyond the memory caps.
+
+        Args:
+            from_assistant_id (str): The ID of the assistant the content originates from.
+            to_assistant_id (str): The ID of the assistant the content is directed to.
+            content (object): The content, text or a picklable object.
+
+        Returns:
+            bool: False if the content was rejected because it alone uses more memory than a cap.
+        """
+        key = (from_assistant_id, to_assistant_id)
+        stored = self._encode(key, content)
+        # Saved, it would only evict everything else of its pair or of the store, then itself
+        caps = [cap for cap in (self.max_key_bytes, self.max_total_bytes) if cap is not None]
+        if caps and stored.memory > min(caps):
+            with self._lock:
+                self._stats['rejected'] += 1
+            self.logger.warning(
+                f"Rejected processed content from {from_assistant_id} to {to_assistant_id}: "
+                f"its {stored.memory} bytes exceed the {min(caps)} bytes memory cap."
+            )
+            return False
+
+        shard = self._shard(to_assistant_id)
+        evicted = []
+        with shard.lock:
+            shard.contents.setdefault(key, deque()).append(stored)
+            shard.senders.setdefault(to_assistant_id, {})[from_assistant_id] = None
+            with self._lock:
+                self._order[stored.id] = (shard, key)
+                self._account(stored, 1)
+                self._stats['saved'] += 1
+                key_memory = self._key_memory.get(key, 0)
+            if self.max_key_bytes is not None and key_memory > self.max_key_bytes:
+                evicted = self._evict_key(shard, key, key_memory - self.max_key_bytes)
+        self._start_sweeper()
+        self._release(evicted, 'evicted', f"the {self.max_key_bytes} bytes cap of the content from {from_assistant_id} to {to_assistant_id}")
+
+        if self.max_total_bytes is not None:
+            evicted = self._evict_oldest()
+            self._release(evicted, 'evicted', f"the {self.max_total_bytes} bytes cap of the processed content")
+        return True
+
+
+    def pop(self, from_assistant_id, to_assistant_id):
+        """
+        Removes and returns the content directed from one assistant to another.
+
+        Args:
+            from_assistant_id (str): The ID of the assistant the content originates from.
+            to_assistant_id (str): The ID of the assistant the content is directed to.
+
+        Returns:
+            list: The content not expired, in the order it was saved.
+        """
+        key = (from_assistant_id, to_assistant_id)
+        shard = self._shard(to_assistant_id)
+        with shard.lock:
+            items = shard.contents.pop(key, None)
+            if items is None:
+                return []
+            senders = shard.senders[to_assistant_id]
+            del senders[from_assistant_id]
+            if not senders:
+                del shard.senders[to_assistant_id]
+            self._forget(items)
+        return self._load(items)
+
+
+    def pop_all(self, to_assistant_id):
+        """
+        Removes and returns the content directed to an assistant from every other one.
+
+        Args:
+            to_assistant_id (str): The ID of the assistant the content is directed to.
+
+        Returns:
+            list: The content not expired, grouped by sender in the order the senders first saved content.
+        """
+        shard = self._shard(to_assistant_id)
+        items = []
+        with shard.lock:
+            for sender in shard.senders.pop(to_assistant_id, {}):
+                items.extend(shard.contents.pop((sender, to_assistant_id)))
+            self._forget(items)
+        return self._load(items)
+
+
+    def snapshot(self):
+        """
+        Returns the content not loaded yet, without removing it.
+
+        Returns:
+            dict: The content not expired, per (from_assistant_id, to_assistant_id).
+        """
+        now = time.monotonic()
+        snapshot = {}
+        for shard in self._shards:
+            with shard.lock:
+                for key, items in shard.contents.items():
+                    contents = [item.load() for item in items if item.expires_at is None or item.expires_at > now]
+                    if contents:
+                        snapshot[key] = contents
+        return snapshot
+
+
+    def sweep(self):
+        """
+        Drops the expired content. Called periodically by the sweeper when the store has a `ttl`.
+
+        Returns:
+            int: The number of pieces of content dropped.
+        """
+        if self.ttl is None:
+            return 0
+        now = time.monotonic()
+        expired = []
+        while True:
+            with self._lock:
+                # Saved in order with the same ttl, so the oldest content expires first
+                if not self._order:
+                    break
+                item_id, (shard, key) = next(iter(self._order.items()))
+            with shard.lock:
+                item = self._find_oldest(shard, key, item_id)
+                if item is None:
+                    continue
+                if item.expires_at > now:
+                    break
+                self._remove(shard, item)
+            expired.append(item)
+        self._release(expired, 'expired', f"their {self.ttl} seconds time to live")
+        return len(expired)
+
+
+    def get_stats(self):
+        """
+        Returns the metrics of the store.
+
+        Returns:
+            dict: The number of pieces of content stored (`items`), the `memory_bytes` and `disk_bytes`
+                they use, and the counts of content `saved`, `loaded`, `expired`, `evicted`, `rejected`,
+                `compressed` and `spilled` so far.
+        """
+        with self._lock:
+            return dict(self._stats, items=len(self._order))
+
+
+    def close(self):
+        """
+        Stops the sweeper, drops the content and removes the spilled files.
+        """
+        self._closed.set()
+        if self._sweeper is not None and self._sweeper is not threading.current_thread():
+            self._sweeper.join()
+        for shard in self._shards:
+            with shard.lock:
+                items = [item for key_items in shard.contents.values() for item in key_items]
+                shard.contents.clear()
+                shard.senders.clear()
+                self._forget(items)
+            for item in items:
+                self._unlink(item)
+        if self._owns_spill_dir and self.spill_dir is not None:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+
+    def _encode(self, key, content):
+        try:
+            data = content.encode('utf-8') if isinstance(content, str) else pickle.dumps(content, protocol=pickle.HIGHEST_PROTOCOL)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            # Kept as is, without compression nor spilling
+            data = None
+        size = len(data) if data is not None else sys.getsizeof(content)
+        expires_at = time.monotonic() + self.ttl if self.ttl is not None else None
+        stored = _StoredContent(next(self._ids), key, size, expires_at, content)
+        if data is None:
+            return stored
+
+        if self.compress_threshold is not None and size >= self.compress_threshold:
+            compressed = zlib.compress(data)
+            if len(compressed) < size:
+                data, stored.compressed = compressed, True
+        if self.spill_threshold is not None and size >= self.spill_threshold:
+            stored.path = self._spill(stored.id, data)
+            stored.value, stored.memory = None, 0
+        elif stored.compressed:
+            stored.value, stored.memory = data, len(data)
+        return stored
+
+
+    def _spill(self, item_id, data):
+        if self.spill_dir is None:
+            self.spill_dir = tempfile.mkdtemp(prefix="flexiai-content-")
+        else:
+            os.makedirs(self.spill_dir, exist_ok=True)
+        path = os.path.join(self.spill_dir, f"{os.getpid()}-{item_id}.bin")
+        with open(path, 'wb') as f:
+            f.write(data)
+        return path
+
+
+    def _account(self, item, sign):
+        # Called with the lock held
+        self._stats['memory_bytes'] += sign * item.memory
+        self._key_memory[item.key] = self._key_memory.get(item.key, 0) + sign * item.memory
+        if not self._key_memory[item.key]:
+            del self._key_memory[item.key]
+        if item.path is not None:
+            self._stats['disk_bytes'] += sign * item.size
+        if sign > 0:
+            self._stats['compressed'] += item.compressed
+            self._stats['spilled'] += item.path is not None
+
+
+    def _forget(self, items):
+        # Called with the shard lock held, for items removed from the shard
+        with self._lock:
+            for item in items:
+                self._order.pop(item.id, None)
+                self._account(item, -1)
+
+
+    def _remove(self, shard, item):
+        # Called with the shard lock held: removes the oldest item of its key
+        items = shard.contents[item.key]
+        items.popleft()
+        if not items:
+            del shard.contents[item.key]
+            from_assistant_id, to_assistant_id = item.key
+            senders = shard.senders[to_assistant_id]
+            del senders[from_assistant_id]
+            if not senders:
+                del shard.senders[to_assistant_id]
+        self._forget([item])
+
+
+    def _evict_key(self, shard, key, excess):
+        # Called with the shard lock held
+        evicted = []
+        while excess > 0 and key in shard.contents:
+            item = shard.contents[key][0]
+            self._remove(shard, item)
+            evicted.append(item)
+            excess -= item.memory
+        return evicted
+
+
+    def _evict_oldest(self):
+        evicted = []
+        while True:
+            with self._lock:
+                if self._stats['memory_bytes'] <= self.max_total_bytes or not self._order:
+                    break
+                item_id, (shard, key) = next(iter(self._order.items()))
+            with shard.lock:
+                item = self._find_oldest(shard, key, item_id)
+                if item is not None:
+                    self._remove(shard, item)
+                    evicted.append(item)
+        return evicted
+
+
+    def _find_oldest(self, shard, key, item_id):
+        # Called with the shard lock held: the oldest item is the first of its key, unless it was removed meanwhile
+        with self._lock:
+            if item_id not in self._order:
+                return None
+        items = shard.contents.get(key)
+        return items[0] if items and items[0].id == item_id else None
+
+
+    def _load(self, items):
+        now = time.monotonic()
+        contents, expired = [], []
+        for item in items:
+            if item.expires_at is not None and item.expires_at <= now:
+                expired.append(item)
+                continue
+            contents.append(item.load())
+            self._unlink(item)
+        with self._lock:
+            self._stats['loaded'] += len(contents)
+        self._release(expired, 'expired', f"their {self.ttl} seconds time to live")
+        return contents
+
+
+    def _release(self, items, reason, cause):
+        if not items:
+            return
+        for item in items:
+            self._unlink(item)
+        with self._lock:
+            self._stats[reason] += len(items)
+        self.logger.warning(f"Dropped {len(items)} pieces of processed content ({sum(item.size for item in items)} bytes) past {cause}.")
+
+
+    def _unlink(self, item):
+        if item.path is not None:
+            try:
+                os.remove(item.path)
+            except OSError:
+                pass
+
+
+    def _start_sweeper(self):
+        if self.ttl is None or self._sweeper is not None:
+            return
+        with self._lock:
+            if self._sweeper is not None or self._closed.is_set():
+                return
+            self._sweeper = threading.Thread(target=self._sweep_periodically, name="flexiai-content-sweeper", daemon=True)
+            self._sweeper.start()
+
+
+    def _sweep_periodically(self):
+        while not self._closed.wait(self.sweep_interval):
+            try:
+                self.sweep()
+            except Exception as e:
+                self.logger.error(f"Failed to sweep the expired processed content: {str(e)}", exc_info=True)
+
+
+    def _shard(self, to_assistant_id):
+        return self._shards[hash(to_assistant_id) % CONTENT_SHARDS]
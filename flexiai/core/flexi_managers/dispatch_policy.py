@@ -0,0 +1,155 @@
+# flexiai/core/flexi_managers/dispatch_policy.py
+import threading
+
+
+class DispatchPolicy:
+    """
+    DispatchPolicy decides whether the tool calls a run requires are executed sequentially or in parallel.
+
+    The policy keeps an exponentially weighted moving average of the observed execution time of
+    each function and estimates the wall clock time of a batch both ways: sequentially, the calls
+    add up; in parallel, the batch takes as long as its slowest call plus the cost of dispatching it
+    to the event loop and the worker threads. The cheaper plan wins, so two slow network calls run
+    concurrently while a batch of trivial in-memory functions runs one after the other.
+
+    Functions without history are assumed to take `default_latency`. The recorded times only cover
+    the execution of the functions, not the time spent waiting for a concurrency slot, so a busy
+    executor doesn't make a function look slower than it is. Sequential batches run inline on the
+    thread handling the run (see ToolExecutor.execute), which is what makes them cheaper.
+
+    The default overheads are rough figures for CPython on a current machine: handing a batch to the
+    background event loop and waiting for its result costs around 1 to 2 milliseconds, and each call
+    adds a task plus a hop through the thread pool, a few hundred microseconds. They only need to be
+    right to an order of magnitude; pass your own values when the process runs on much slower hardware,
+    or to force a mode (a huge `parallel_overhead` always runs batches sequentially, a huge negative one
+    always in parallel).
+
+    The policy picks between inline and threaded execution for the whole batch; process execution is
+    deliberately not one of its choices. Whether a function runs in the process pool stays a property
+    of the function itself (see ToolFunction), since only picklable, self-contained functions can move
+    to another process, and a policy can't tell which ones are. Process functions go to the process
+    pool in either mode, and their recorded times include the round trip to the worker process, so
+    both estimates account for it.
+
+    Attributes:
+        logger (logging.Logger): The logger for logging information and errors.
+        default_latency (float): The estimated execution time, in seconds, of a function without history.
+        parallel_overhead (float): The fixed cost, in seconds, of dispatching a batch in parallel.
+        call_overhead (float): The additional cost, in seconds, per call dispatched in parallel.
+        alpha (float): The weight of the latest observation in the moving average.
+    """
+
+    SEQUENTIAL = 'sequential'
+    PARALLEL = 'parallel'
+
+    DEFAULT_LATENCY = 0.05
+    PARALLEL_OVERHEAD = 0.002
+    CALL_OVERHEAD = 0.0005
+
+    def __init__(self, logger, default_latency=DEFAULT_LATENCY, parallel_overhead=PARALLEL_OVERHEAD, call_overhead=CALL_OVERHEAD, alpha=0.2):
+        """
+        Initializes the DispatchPolicy.
+
+        Args:
+            logger (logging.Logger): The logger instance.
+            default_latency (float, optional): The estimate of functions without history. Defaults to 0.05.
+            parallel_overhead (float, optional): The fixed cost of a parallel batch. Defaults to 0.002.
+            call_overhead (float, optional): The cost per call of a parallel batch. Defaults to 0.0005.
+            alpha (float, optional): The weight of the latest observation, between 0 and 1. Defaults to 0.2.
+        """
+        if not 0 < alpha <= 1:
+            raise ValueError("alpha must be between 0 (excluded) and 1.")
+        self.logger = logger
+        self.default_latency = default_latency
+        self.parallel_overhead = parallel_overhead
+        self.call_overhead = call_overhead
+        self.alpha = alpha
+        self._latencies = {}
+        self._observations = {}
+        self._decisions = {self.SEQUENTIAL: 0, self.PARALLEL: 0}
+        self._lock = threading.Lock()
+
+
+    def record(self, function_name, duration):
+        """
+        Adds an observed execution time to the history of a function.
+
+        Args:
+            function_name (str): The name of the function.
+            duration (float): The execution time in seconds.
+        """
+        with self._lock:
+            previous = self._latencies.get(function_name)
+            if previous is None:
+                self._latencies[function_name] = duration
+            else:
+                self._latencies[function_name] = previous + self.alpha * (duration - previous)
+            self._observations[function_name] = self._observations.get(function_name, 0) + 1
+
+
+    def estimate(self, function_name):
+        """
+        Returns the estimated execution time of a function.
+
+        Args:
+            function_name (str): The name of the function.
+
+        Returns:
+            float: The moving average of its execution time, or `default_latency` without history.
+        """
+        with self._lock:
+            return self._latencies.get(function_name, self.default_latency)
+
+
+    def choose(self, function_names):
+        """
+        Chooses how to execute a batch of tool calls: SEQUENTIAL runs the calls one after the other,
+        inline on the calling thread, and PARALLEL runs them concurrently in the thread pool. Calls
+        of functions marked `executor="process"` run in the process pool either way.
+
+        Args:
+            function_names (list): The name of the function of each tool call in the batch.
+
+        Returns:
+            dict: The chosen `mode` (SEQUENTIAL or PARALLEL) and the estimated wall clock time
+                of the batch executed `sequential`ly and in `parallel`, in seconds.
+        """
+        estimates = [self.estimate(function_name) for function_name in function_names]
+        sequential = sum(estimates)
+        parallel = max(estimates, default=0.0) + self.parallel_overhead + self.call_overhead * len(estimates)
+        mode = self.PARALLEL if len(estimates) > 1 and parallel < sequential else self.SEQUENTIAL
+        with self._lock:
+            self._decisions[mode] += 1
+        return {'mode': mode, 'sequential': sequential, 'parallel': parallel}
+
+
+    def reset(self, function_name=None):
+        """
+        Forgets the history of a function, or of every function.
+
+        Args:
+            function_name (str, optional): The name of the function. Defaults to every function.
+        """
+        with self._lock:
+            if function_name is None:
+                self._latencies.clear()
+                self._observations.clear()
+            else:
+                self._latencies.pop(function_name, None)
+                self._observations.pop(function_name, None)
+
+
+    def get_stats(self):
+        """
+        Returns the learned latencies and the decisions taken so far.
+
+        Returns:
+            dict: The `latencies` and `observations` per function name, and the number of batches
+                dispatched per mode (`decisions`).
+        """
+        with self._lock:
+            return {
+                'latencies': dict(self._latencies),
+                'observations': dict(self._observations),
+                'decisions': dict(self._decisions)
+            }
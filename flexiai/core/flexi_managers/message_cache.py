@@ -0,0 +1,292 @@
+# flexiai/core/flexi_managers/message_cache.py
+import threading
+import time
+from collections import OrderedDict
+from flexiai.core.flexi_managers.message_record import MessageRecord
+
+
+class _ThreadMessages:
+    # The cached history of one thread
+    __slots__ = ('messages', 'positions', 'pending', 'complete', 'synced_at', 'changed_at')
+
+    def __init__(self, complete):
+        self.messages = []
+        self.positions = {}
+        self.pending = OrderedDict()
+        self.complete = complete
+        # The time.monotonic() values of the last sync and of the last known change
+        self.synced_at = None
+        self.changed_at = None
+
+
+    @property
+    def cursor(self):
+        return self.messages[-1].id if self.messages else None
+
+
+class MessageCache:
+    """
+    MessageCache keeps the recent history of the most recently used threads, so readers get
+    it from memory and only the messages added since the last sync are fetched. Messages are
+    kept as MessageRecords, built once when a message enters the cache.
+
+    The messages of a thread are kept in order, up to the last one that is complete: that message
+    is the cursor the next sync lists from (with `after`). A message still being written by a run
+    isn't cached, so it is fetched again until it is complete. Messages added through the
+    MessageManager are visible right away as pending, and take their final place in the history
+    when the next sync sees them, so their text is never extracted twice.
+
+    Only runs add messages behind the MessageManager's back, and the RunManager marks the threads
+    it runs as stale when a run starts and when it ends. A thread synced less than `max_age` seconds
+    ago and not marked since is therefore read without any request. The window bounds how long
+    messages added by runs of other processes (or of the AsyncRunManager) can go unnoticed.
+
+    Changes made to messages outside of the MessageManager (edits, deletions by another process)
+    aren't noticed; call `invalidate` to drop a thread that was changed elsewhere.
+
+    Attributes:
+        max_threads (int): The number of threads kept, least recently used first evicted.
+        max_messages (int): The number of messages kept per thread, oldest first evicted.
+        max_age (float): How long, in seconds, a synced thread is read without syncing it again.
+    """
+
+    def __init__(self, max_threads=256, max_messages=500, max_age=1.0):
+        """
+        Initializes the MessageCache.
+
+        Args:
+            max_threads (int, optional): The number of threads kept. Defaults to 256.
+            max_messages (int, optional): The number of messages kept per thread. Defaults to 500.
+            max_age (float, optional): How long a synced thread is read without syncing it again.
+                0 syncs on every read. Defaults to 1.
+        """
+        if max_threads < 1 or max_messages < 1:
+            raise ValueError("max_threads and max_messages must be at least 1.")
+        if max_age < 0:
+            raise ValueError("max_age can't be negative.")
+        self.max_threads = max_threads
+        self.max_messages = max_messages
+        self.max_age = max_age
+        self._threads = OrderedDict()
+        self._stats = {'hits': 0, 'misses': 0, 'fresh_reads': 0, 'synced_messages': 0, 'evicted_threads': 0}
+        self._lock = threading.Lock()
+
+
+    def get_cursor(self, thread_id):
+        """
+        Returns where the next sync of a thread starts.
+
+        Args:
+            thread_id (str): The ID of the thread.
+
+        Returns:
+            tuple: Whether the thread is cached (bool) and the ID of its last cached message (str or None).
+                A thread whose history is cached but whose start isn't known must be loaded again.
+        """
+        with self._lock:
+            entry = self._threads.get(thread_id)
+            if entry is None or (entry.cursor is None and not entry.complete):
+                self._stats['misses'] += 1
+                return False, None
+            self._stats['hits'] += 1
+            return True, entry.cursor
+
+
+    def load(self, thread_id, messages, complete):
+        """
+        Replaces the cached history of a thread.
+
+        Args:
+            thread_id (str): The ID of the thread.
+            messages (list): The latest message objects (or records) of the thread, oldest first.
+            complete (bool): Whether `messages` starts at the beginning of the thread.
+        """
+        with self._lock:
+            entry = _ThreadMessages(complete)
+            entry.synced_at = time.monotonic()
+            self._threads[thread_id] = entry
+            self._threads.move_to_end(thread_id)
+            self._append(entry, messages)
+            self._evict()
+
+
+    def merge(self, thread_id, messages):
+        """
+        Appends the messages listed after the cursor of a thread.
+
+        Args:
+            thread_id (str): The ID of the thread.
+            messages (list): The message objects (or records) following the cursor, oldest first.
+        """
+        with self._lock:
+            entry = self._threads.get(thread_id)
+            if entry is None:
+                return
+            self._threads.move_to_end(thread_id)
+            self._append(entry, messages)
+
+
+    def mark_synced(self, thread_id, started):
+        """
+        Records that the history of a thread was brought up to date.
+
+        Args:
+            thread_id (str): The ID of the thread.
+            started (float): The time.monotonic() value when the sync started. A thread marked as
+                stale since then stays stale.
+        """
+        with self._lock:
+            entry = self._threads.get(thread_id)
+            if entry is not None and (entry.changed_at is None or entry.changed_at < started):
+                entry.synced_at = started
+
+
+    def mark_stale(self, thread_id):
+        """
+        Records that a thread may have new messages, so the next read syncs it.
+
+        Args:
+            thread_id (str): The ID of the thread.
+        """
+        with self._lock:
+            entry = self._threads.get(thread_id)
+            if entry is not None:
+                entry.synced_at = None
+                entry.changed_at = time.monotonic()
+
+
+    def is_fresh(self, thread_id):
+        """
+        Tells whether the cached history of a thread can be read without syncing it.
+
+        Args:
+            thread_id (str): The ID of the thread.
+
+        Returns:
+            bool: True if the thread was synced less than `max_age` seconds ago and not marked as stale since.
+        """
+        with self._lock:
+            entry = self._threads.get(thread_id)
+            if entry is None or entry.synced_at is None or time.monotonic() - entry.synced_at >= self.max_age:
+                return False
+            self._stats['fresh_reads'] += 1
+            return True
+
+
+    def add_written(self, thread_id, message):
+        """
+        Makes a message added through the MessageManager visible before the next sync.
+
+        Args:
+            thread_id (str): The ID of the thread.
+            message (Message): The message object returned by the API.
+        """
+        with self._lock:
+            entry = self._threads.get(thread_id)
+            if entry is not None and message.id not in entry.positions:
+                entry.pending[message.id] = self._record(message)
+                if len(entry.pending) > self.max_messages:
+                    entry.pending.popitem(last=False)
+
+
+    def remove(self, thread_id, message_id):
+        """
+        Removes a deleted message from the cache.
+
+        Args:
+            thread_id (str): The ID of the thread.
+            message_id (str): The ID of the deleted message.
+        """
+        with self._lock:
+            entry = self._threads.get(thread_id)
+            if entry is None:
+                return
+            entry.pending.pop(message_id, None)
+            if message_id in entry.positions:
+                entry.messages = [message for message in entry.messages if message.id != message_id]
+                entry.positions = {message.id: position for position, message in enumerate(entry.messages)}
+
+
+    def get_messages(self, thread_id, after=None):
+        """
+        Returns the cached history of a thread, followed by the messages written since the last sync.
+
+        Args:
+            thread_id (str): The ID of the thread.
+            after (str, optional): Only return the messages following this message ID.
+
+        Returns:
+            tuple: The MessageRecords, oldest first (list), and whether they start at the beginning
+                of the thread (or right after `after`) (bool). None if the thread isn't cached or
+                `after` isn't in the cache.
+        """
+        with self._lock:
+            entry = self._threads.get(thread_id)
+            if entry is None:
+                return None
+            self._threads.move_to_end(thread_id)
+            if after is None:
+                return entry.messages + list(entry.pending.values()), entry.complete
+            if after in entry.positions:
+                return entry.messages[entry.positions[after] + 1:] + list(entry.pending.values()), True
+            pending = list(entry.pending)
+            if after in pending:
+                return list(entry.pending.values())[pending.index(after) + 1:], True
+            return None
+
+
+    def invalidate(self, thread_id=None):
+        """
+        Drops the cached history of a thread, or of every thread.
+
+        Args:
+            thread_id (str, optional): The ID of the thread. Defaults to every thread.
+        """
+        with self._lock:
+            if thread_id is None:
+                self._threads.clear()
+            else:
+                self._threads.pop(thread_id, None)
+
+
+    def get_stats(self):
+        """
+        Returns the cache counters.
+
+        Returns:
+            dict: The `threads` cached, the sync `hits` (incremental syncs) and `misses` (full loads),
+                the `fresh_reads` served without a sync, the number of `synced_messages` and of `evicted_threads`.
+        """
+        with self._lock:
+            return dict(self._stats, threads=len(self._threads))
+
+
+    def _append(self, entry, messages):
+        # Called with the lock held
+        for message in messages:
+            if getattr(message, 'status', None) == 'in_progress':
+                # Still being written by a run: fetch it again on the next sync
+                break
+            if message.id in entry.positions:
+                continue
+            message = entry.pending.pop(message.id, None) or self._record(message)
+            entry.positions[message.id] = len(entry.messages)
+            entry.messages.append(message)
+            self._stats['synced_messages'] += 1
+
+        overflow = len(entry.messages) - self.max_messages
+        if overflow > 0:
+            entry.messages = entry.messages[overflow:]
+            entry.positions = {message.id: position for position, message in enumerate(entry.messages)}
+            entry.complete = False
+
+
+    def _record(self, message):
+        return message if isinstance(message, MessageRecord) else MessageRecord.from_message(message)
+
+
+    def _evict(self):
+        # Called with the lock held
+        while len(self._threads) > self.max_threads:
+            self._threads.popitem(last=False)
+            self._stats['evicted_threads'] += 1
@@ -1,19 +1,37 @@
 # flexiai/core/flexi_managers/message_manager.py
+import time
+from concurrent.futures import ThreadPoolExecutor
 from openai import OpenAIError
+from flexiai.core.flexi_managers.message_cache import MessageCache
+from flexiai.core.flexi_managers.message_record import MessageRecord, cut_to_byte_budget, extract_text
+
+
+# The Assistants API accepts at most this many messages when creating a thread
+MAX_THREAD_CREATION_MESSAGES = 32
 
 
 class MessageManager:
     
-    def __init__(self, client, logger):
+    def __init__(self, client, logger, message_cache=None, rate_limiter=None):
         """
         Initializes the MessageManager class.
 
         Args:
             client (object): The OpenAI client instance.
             logger (object): The logger instance.
+            message_cache (MessageCache, optional): The cache of the thread histories. A default one is created if omitted.
+            rate_limiter (TokenBucket, optional): The limiter shared by the users of the client. Message API calls aren't throttled if omitted.
         """
         self.client = client
         self.logger = logger
+        self.message_cache = message_cache or MessageCache()
+        self.rate_limiter = rate_limiter
+
+
+    def _throttle(self):
+        # Waits for the shared rate limiter, if any, before an API request
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
 
 
     def add_user_message(self, thread_id, user_message):
@@ -33,11 +51,13 @@ class MessageManager:
         """
         try:
             # self.logger.info(f"Adding user message to thread {thread_id}: {user_message}")
+            self._throttle()
             message = self.client.beta.threads.messages.create(
                 thread_id=thread_id,
                 role="user",
                 content=user_message
             )
+            self.message_cache.add_written(thread_id, message)
             self.logger.info(f"Added user message with ID: {message.id}")
             return message
         except OpenAIError as e:
@@ -50,7 +70,9 @@ class MessageManager:
 
     def retrieve_messages(self, thread_id, order='desc', limit=20):
         """
-        Retrieves messages from a specified thread.
+        Retrieves messages from a specified thread. The history is served from the message
+        cache, which only fetches the messages added since the last sync, and none at all while
+        the thread is fresh (see `MessageCache`).
 
         Args:
             thread_id (str): The ID of the thread.
@@ -65,33 +87,21 @@ class MessageManager:
             Exception: If an unexpected error occurs.
         """
         try:
-            params = {'order': order, 'limit': limit}
-            response = self.client.beta.threads.messages.list(thread_id=thread_id, **params)
-            if not response.data:
+            records = self._read_cached(thread_id, order, limit)
+            if records is None:
+                params = {'order': order, 'limit': limit}
+                self._throttle()
+                messages = self.client.beta.threads.messages.list(thread_id=thread_id, **params).data
+                records = [MessageRecord.from_message(message) for message in messages]
+            if not records:
                 self.logger.info("No data found in the response or no messages.")
                 return []
 
-            self.logger.info(f"Retrieved {len(response.data)} messages from thread {thread_id}")
-            messages = response.data[::-1]
-            formatted_messages = []
-
-            for message in messages:
-                message_id = message.id
-                role = message.role
-                content_blocks = message.content
-                content_value = " ".join([
-                    block.text.value for block in content_blocks if hasattr(block, 'text') and hasattr(block.text, 'value')
-                ])
-
-                # self.logger.info(f"Message ID: {message_id}, Role: {role}, Content: {content_blocks}")
-
-                formatted_messages.append({
-                    'message_id': message_id,
-                    'role': role,
-                    'content': content_value
-                })
-
-            return formatted_messages
+            self.logger.info(f"Retrieved {len(records)} messages from thread {thread_id}")
+            return [
+                {'message_id': record.id, 'role': record.role, 'content': record.text}
+                for record in records[::-1]
+            ]
         except OpenAIError as e:
             self.logger.error(f"Failed to fetch messages for thread {thread_id}: {str(e)}", exc_info=True)
             raise
@@ -104,6 +114,11 @@ class MessageManager:
         """
         Retrieves message objects from a specified thread.
 
+        Always lists the messages from the API: the cache keeps the text of the messages, not the
+        full message objects (content blocks, annotations, attachments, metadata) returned here.
+        Callers that only need the role and text should use `retrieve_message_records` or
+        `retrieve_messages`, which are served from the cache.
+
         Args:
             thread_id (str): The ID of the thread.
             order (str, optional): The order in which to retrieve messages, either 'asc' or 'desc'. Defaults to 'asc'.
@@ -118,6 +133,7 @@ class MessageManager:
         """
         try:
             params = {'order': order, 'limit': limit}
+            self._throttle()
             response = self.client.beta.threads.messages.list(thread_id=thread_id, **params)
             if not response.data:
                 self.logger.info("No data found in the response or no messages.")
@@ -134,26 +150,83 @@ class MessageManager:
             raise
 
 
+    def sync_messages(self, thread_id):
+        """
+        Brings the cached history of a thread up to date. A thread that isn't cached yet gets its
+        latest messages loaded, otherwise only the messages after the cached ones are listed.
+        The thread is then fresh for the cache's `max_age`, unless a run marks it as stale.
+
+        Args:
+            thread_id (str): The ID of the thread.
+
+        Raises:
+            OpenAIError: If the API call to list the messages fails.
+        """
+        started = time.monotonic()
+        cached, cursor = self.message_cache.get_cursor(thread_id)
+        if not cached:
+            self._throttle()
+            response = self.client.beta.threads.messages.list(
+                thread_id=thread_id, order='desc', limit=min(self.message_cache.max_messages, 100)
+            )
+            self.message_cache.load(thread_id, response.data[::-1], complete=not response.has_more)
+            return
+
+        params = {'order': 'asc', 'limit': 100}
+        if cursor is not None:
+            params['after'] = cursor
+        while True:
+            self._throttle()
+            response = self.client.beta.threads.messages.list(thread_id=thread_id, **params)
+            self.message_cache.merge(thread_id, response.data)
+            if not response.has_more or not response.data:
+                break
+            params['after'] = response.last_id
+        self.message_cache.mark_synced(thread_id, started)
+
+
+    def _read_cached(self, thread_id, order, limit, after=None, retrieve_all=False):
+        # Answers a message listing from the cache, in the order the API would. None when the cache can't.
+        if not self.message_cache.is_fresh(thread_id):
+            self.sync_messages(thread_id)
+        cached = self.message_cache.get_messages(thread_id, after if order == 'asc' else None)
+        if cached is None:
+            return None
+        messages, from_start = cached
+
+        if order == 'asc':
+            if not from_start:
+                return None
+            return messages if retrieve_all else messages[:limit]
+
+        if after is not None:
+            ids = [message.id for message in messages]
+            if after not in ids:
+                return None
+            messages = messages[:ids.index(after)]
+        messages = messages[::-1]
+        if retrieve_all or len(messages) < limit:
+            # The older messages must all be cached to answer
+            return messages if from_start else None
+        return messages[:limit]
+
+
     def process_and_print_messages(self, messages):
         """
         Processes and prints the role and content of each message.
 
         Args:
-            messages (list): The list of message objects.
+            messages (list): The list of message objects or MessageRecords.
         """
         for message in messages:
             role = "Assistant" if message.role == "assistant" else "User"
-            content_blocks = message.content
-            content_value = " ".join([
-                block.text.value for block in content_blocks if hasattr(block, 'text') and hasattr(block.text, 'value')
-            ])
-
-            print(f"{role}: {content_value}")
+            print(f"{role}: {extract_text(message)}")
 
 
     def add_messages_dynamically(self, thread_id, messages, role=None, metadata=None):
         """
         Adds multiple messages to a specified thread dynamically with optional metadata.
+        The messages are added one after the other, use `add_messages_bulk` to send many at once.
 
         Args:
             thread_id (str): The ID of the thread.
@@ -167,21 +240,17 @@ class MessageManager:
             list: A list of message objects that were added to the thread.
 
         Raises:
-            OpenAIError: If the API call to add a message fails.
+            OpenAIError: If the API call to add a message fails. The following messages aren't added.
             Exception: If an unexpected error occurs.
         """
         added_messages = []
         for message in messages:
-            content = message.get('content')
-            message_metadata = message.get('metadata', metadata or {})
             try:
-                # self.logger.info(f"Adding message to thread {thread_id}: {content}")
+                self._throttle()
                 message_obj = self.client.beta.threads.messages.create(
-                    thread_id=thread_id,
-                    role=role if role else 'user',  # Use 'user' as default role if not specified
-                    content=content,
-                    metadata=message_metadata
+                    thread_id=thread_id, **self._message_params(message, role, metadata)
                 )
+                self.message_cache.add_written(thread_id, message_obj)
                 self.logger.info(f"Added message with ID: {message_obj.id}")
                 added_messages.append(message_obj)
             except OpenAIError as e:
@@ -193,10 +262,169 @@ class MessageManager:
         return added_messages
 
 
+    def add_messages_bulk(self, thread_id, messages, role=None, metadata=None, max_concurrency=8, stagger=0.02):
+        """
+        Adds many messages to a thread with as few sequential round trips as possible.
+
+        Without a thread ID, a new thread is created along with its first messages in a single call.
+        Otherwise the messages are created concurrently, each request being sent `stagger` seconds
+        after the previous one so they reach the API in order while their round trips overlap. The
+        API orders messages by arrival, so the order is then checked with a single listing, and the
+        messages from the first misplaced one onwards are added again one by one. A misplaced message
+        is only deleted once its copy was added, so the IDs of the moved messages change. If a copy
+        can't be added, the remaining messages are left where they are and `ordered` is False.
+
+        A message that can't be added doesn't abort the batch: its error is reported instead.
+
+        Args:
+            thread_id (str): The ID of the thread, or None to create a new thread with the messages.
+            messages (list): A list of dictionaries where each dictionary contains:
+                - content (str): The content of the message.
+                - metadata (dict, optional): Metadata to include with the message.
+            role (str, optional): The role of the message sender. Defaults to 'user'.
+            metadata (dict, optional): Metadata to include with each message if not provided in individual messages.
+            max_concurrency (int, optional): The maximum number of requests in flight. Defaults to 8.
+            stagger (float, optional): The delay, in seconds, between the start of two requests. Defaults to 0.02.
+
+        Returns:
+            dict: The `thread_id`, the message objects added in order (`messages`), the `errors`,
+                a list of dictionaries with the `index` of the failed message and its `error`, and
+                whether the messages are known to be in order in the thread (`ordered`).
+
+        Raises:
+            OpenAIError: If the thread creation fails.
+            Exception: If an unexpected error occurs while creating the thread.
+        """
+        params = [self._message_params(message, role, metadata) for message in messages]
+        results = [None] * len(params)
+        errors = []
+        ordered = True
+
+        start = 0
+        if thread_id is None:
+            thread_id = self._create_thread_with_messages(params[:MAX_THREAD_CREATION_MESSAGES], results)
+            start = min(len(params), MAX_THREAD_CREATION_MESSAGES)
+
+        pending = list(range(start, len(params)))
+        if len(pending) == 1:
+            self._create_message(thread_id, params, results, errors, pending[0])
+        elif pending:
+            started = time.monotonic()
+
+            def create(position, index):
+                delay = started + position * stagger - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                self._create_message(thread_id, params, results, errors, index)
+
+            with ThreadPoolExecutor(max_workers=min(max_concurrency, len(pending)), thread_name_prefix="flexiai-messages") as pool:
+                for future in [pool.submit(create, position, index) for position, index in enumerate(pending)]:
+                    future.result()
+            ordered = self._restore_order(thread_id, params, results, pending)
+
+        errors.sort(key=lambda error: error['index'])
+        added = [message for message in results if message is not None]
+        for index in pending:
+            if results[index] is not None:
+                self.message_cache.add_written(thread_id, results[index])
+        self.logger.info(f"Added {len(added)} messages to thread {thread_id} ({len(errors)} failed)")
+        return {'thread_id': thread_id, 'messages': added, 'errors': errors, 'ordered': ordered}
+
+
+    def _message_params(self, message, role, metadata):
+        return {
+            'role': role if role else 'user',  # Use 'user' as default role if not specified
+            'content': message.get('content'),
+            'metadata': message.get('metadata', metadata or {})
+        }
+
+
+    def _create_thread_with_messages(self, params, results):
+        try:
+            self._throttle()
+            thread = self.client.beta.threads.create(messages=params)
+            if params:
+                self._throttle()
+                created = self.client.beta.threads.messages.list(thread_id=thread.id, order='asc', limit=len(params)).data
+                results[:len(created)] = created
+                self.message_cache.load(thread.id, created, complete=True)
+            self.logger.info(f"Created thread {thread.id} with {len(params)} messages")
+            return thread.id
+        except OpenAIError as e:
+            self.logger.error(f"Failed to create a thread with {len(params)} messages: {str(e)}", exc_info=True)
+            raise
+        except Exception as e:
+            self.logger.error(f"An unexpected error occurred while creating a thread with {len(params)} messages: {str(e)}", exc_info=True)
+            raise
+
+
+    def _create_message(self, thread_id, params, results, errors, index):
+        try:
+            self._throttle()
+            results[index] = self.client.beta.threads.messages.create(thread_id=thread_id, **params[index])
+        except Exception as e:
+            self.logger.error(f"Failed to add message {index} to thread {thread_id}: {str(e)}", exc_info=True)
+            errors.append({'index': index, 'error': e})
+
+
+    def _restore_order(self, thread_id, params, results, indexes):
+        # Checks that the concurrently created messages landed in order and moves the misplaced ones
+        # to the end of the thread, returns whether the order is known to be right
+        added = [index for index in indexes if results[index] is not None]
+        expected = [results[index].id for index in added]
+        try:
+            observed = self._list_message_ids(thread_id, set(expected))
+        except Exception as e:
+            self.logger.warning(f"Couldn't verify the order of the messages added to thread {thread_id}: {str(e)}")
+            return False
+
+        mismatch = next((position for position, (a, b) in enumerate(zip(expected, observed)) if a != b), None)
+        if mismatch is None:
+            return True
+
+        misplaced = added[mismatch:]
+        self.logger.warning(f"{len(misplaced)} messages reached thread {thread_id} out of order, adding them again")
+        for index in misplaced:
+            original = results[index]
+            try:
+                self._throttle()
+                results[index] = self.client.beta.threads.messages.create(thread_id=thread_id, **params[index])
+            except Exception as e:
+                # The original stays in the thread, so no message is lost, only left out of order
+                self.logger.error(f"Failed to add message {index} to thread {thread_id} again, the order can't be restored: {str(e)}", exc_info=True)
+                return False
+            try:
+                self._throttle()
+                self.client.beta.threads.messages.delete(original.id, thread_id=thread_id)
+            except Exception as e:
+                self.logger.error(f"Failed to remove misplaced message {original.id} from thread {thread_id}, it is duplicated: {str(e)}", exc_info=True)
+                return False
+            self.message_cache.remove(thread_id, original.id)
+        return True
+
+
+    def _list_message_ids(self, thread_id, message_ids):
+        # Returns the given message IDs in the order the thread holds them, reading from the newest message
+        found = []
+        params = {'order': 'desc', 'limit': 100}
+        while len(found) < len(message_ids):
+            self._throttle()
+            response = self.client.beta.threads.messages.list(thread_id=thread_id, **params)
+            found.extend(message.id for message in response.data if message.id in message_ids)
+            if not response.has_more:
+                break
+            params['after'] = response.last_id
+        return found[::-1]
+
+
     def retrieve_messages_dynamically(self, thread_id, order='asc', limit=20, retrieve_all=False, last_retrieved_id=None):
         """
         Retrieves messages from a specified thread dynamically.
 
+        Like `retrieve_message_object`, always lists the messages from the API, since it returns
+        the full message objects the cache doesn't keep. `retrieve_message_records` takes the same
+        arguments and is served from the cache.
+
         Args:
             thread_id (str): The ID of the thread from which to retrieve messages.
             order (str, optional): The order in which to retrieve messages, either 'asc' or 'desc'. Defaults to 'asc'.
@@ -219,6 +447,7 @@ class MessageManager:
 
         while has_more:
             try:
+                self._throttle()
                 response = self.client.beta.threads.messages.list(thread_id=thread_id, **params)
                 if not response.data:
                     self.logger.info("No data found in the response or no messages.")
@@ -243,3 +472,105 @@ class MessageManager:
                 raise
 
         return all_messages
+
+
+    def retrieve_message_records(self, thread_id, order='asc', limit=20, retrieve_all=False, last_retrieved_id=None):
+        """
+        Retrieves the MessageRecords of a specified thread, from the message cache when it holds them.
+        Takes the same arguments as `retrieve_messages_dynamically`, without building message objects
+        or walking their content again for the messages already cached.
+
+        Args:
+            thread_id (str): The ID of the thread from which to retrieve messages.
+            order (str, optional): The order in which to retrieve messages, either 'asc' or 'desc'. Defaults to 'asc'.
+            limit (int, optional): The maximum number of messages to retrieve. Defaults to 20.
+            retrieve_all (bool, optional): Whether to retrieve all messages in the thread. Defaults to False.
+            last_retrieved_id (str, optional): The ID of the last retrieved message to fetch messages after it. Defaults to None.
+
+        Returns:
+            list: A list of MessageRecords.
+
+        Raises:
+            OpenAIError: If the API call to retrieve messages fails.
+            Exception: If an unexpected error occurs.
+        """
+        try:
+            records = self._read_cached(thread_id, order, limit, last_retrieved_id, retrieve_all)
+        except OpenAIError as e:
+            self.logger.error(f"Failed to fetch messages for thread {thread_id}: {str(e)}", exc_info=True)
+            raise
+        if records is not None:
+            return records
+
+        messages = self.retrieve_messages_dynamically(thread_id, order, limit, retrieve_all, last_retrieved_id)
+        return [MessageRecord.from_message(message) for message in messages]
+
+
+    def iter_messages(self, thread_id, order='asc', page_size=100, after=None, max_items=None, max_bytes=None):
+        """
+        Iterates over the messages of a thread, page by page, without holding the whole history.
+
+        Messages are yielded as soon as their page arrives. While the caller processes a page,
+        the next one is already being fetched in the background, so at most two pages are held
+        in memory at any time: `page_size` bounds the memory used. `max_items` and `max_bytes`
+        bound the total the caller goes through, and no page is fetched past them. Closing the
+        iterator early cancels the pending fetch.
+
+        Args:
+            thread_id (str): The ID of the thread.
+            order (str, optional): The order of the messages, either 'asc' or 'desc'. Defaults to 'asc'.
+            page_size (int, optional): The number of messages per request, at most 100. Defaults to 100.
+            after (str, optional): Start after this message ID.
+            max_items (int, optional): Stop after this many messages. Defaults to no limit.
+            max_bytes (int, optional): Stop once the text of the messages yielded reaches this many bytes.
+                The message reaching it is still yielded. Defaults to no limit.
+
+        Yields:
+            Message: The message objects, in the requested order.
+
+        Raises:
+            OpenAIError: If the API call to list the messages fails.
+            Exception: If an unexpected error occurs.
+        """
+        if (max_items is not None and max_items <= 0) or (max_bytes is not None and max_bytes <= 0):
+            return
+
+        def fetch(cursor, remaining):
+            params = {'order': order, 'limit': page_size if remaining is None else min(page_size, remaining)}
+            if cursor is not None:
+                params['after'] = cursor
+            self._throttle()
+            return self.client.beta.threads.messages.list(thread_id=thread_id, **params)
+
+        pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="flexiai-pages")
+        future = pool.submit(fetch, after, max_items)
+        remaining = max_items
+        remaining_bytes = max_bytes
+        try:
+            while future is not None:
+                try:
+                    response = future.result()
+                except OpenAIError as e:
+                    self.logger.error(f"Failed to fetch messages for thread {thread_id}: {str(e)}", exc_info=True)
+                    raise
+                except Exception as e:
+                    self.logger.error(f"An unexpected error occurred while fetching messages for thread {thread_id}: {str(e)}", exc_info=True)
+                    raise
+
+                page = response.data
+                if remaining is not None:
+                    page = page[:remaining]
+                    remaining -= len(page)
+                if remaining_bytes is not None:
+                    page, remaining_bytes = cut_to_byte_budget(page, remaining_bytes)
+                more = (
+                    response.has_more and page and (remaining is None or remaining > 0)
+                    and (remaining_bytes is None or remaining_bytes > 0)
+                )
+                # Fetch the next page while the caller goes through this one
+                future = pool.submit(fetch, page[-1].id, remaining) if more else None
+                yield from page
+        finally:
+            if future is not None:
+                future.cancel()
+            pool.shutdown(wait=False)
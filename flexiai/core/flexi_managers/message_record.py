@@ -0,0 +1,109 @@
+# flexiai/core/flexi_managers/message_record.py
+
+
+def extract_text(message):
+    """
+    Returns the text of a message, whether it is a MessageRecord or a message object of the SDK.
+
+    Args:
+        message (MessageRecord or Message): The message.
+
+    Returns:
+        str: The text blocks of the message joined with spaces.
+    """
+    if isinstance(message, MessageRecord):
+        return message.text
+    return " ".join([
+        block.text.value for block in message.content or [] if hasattr(block, 'text') and hasattr(block.text, 'value')
+    ])
+
+
+def cut_to_byte_budget(messages, max_bytes):
+    """
+    Keeps the first messages whose text fits in a byte budget. The message reaching the budget
+    is kept too, so a budget that isn't spent yet always lets one more message through.
+
+    Args:
+        messages (list): The messages, MessageRecords or message objects of the SDK.
+        max_bytes (int): The budget, in bytes of UTF-8 text.
+
+    Returns:
+        tuple: The messages kept and the budget left, zero or less once it is spent.
+    """
+    kept = []
+    for message in messages:
+        if max_bytes <= 0:
+            break
+        kept.append(message)
+        max_bytes -= len(extract_text(message).encode('utf-8'))
+    return kept, max_bytes
+
+
+class MessageRecord:
+    """
+    MessageRecord is the compact form of a thread message: the few fields the UI, the console
+    and the message cache use, with the text extracted once from the content blocks.
+
+    Attributes:
+        id (str): The ID of the message.
+        role (str): The role of the sender, 'user' or 'assistant'.
+        created_at (int): The creation time of the message, in seconds since the epoch.
+        run_id (str): The ID of the run that wrote the message, if any.
+        text (str): The text content of the message.
+    """
+
+    __slots__ = ('id', 'role', 'created_at', 'run_id', 'text')
+
+    def __init__(self, id, role, created_at=None, run_id=None, text=""):
+        self.id = id
+        self.role = role
+        self.created_at = created_at
+        self.run_id = run_id
+        self.text = text
+
+
+    @classmethod
+    def from_message(cls, message):
+        """
+        Builds the record of a message object of the SDK.
+
+        Args:
+            message (Message): The message object.
+
+        Returns:
+            MessageRecord: The record.
+        """
+        return cls(
+            message.id, message.role, getattr(message, 'created_at', None), getattr(message, 'run_id', None), extract_text(message)
+        )
+
+
+    def to_dict(self):
+        """
+        Returns the record as a dictionary.
+
+        Returns:
+            dict: The `message_id`, `role`, `content` (the text), `created_at` and `run_id` of the message.
+        """
+        return {
+            'message_id': self.id,
+            'role': self.role,
+            'content': self.text,
+            'created_at': self.created_at,
+            'run_id': self.run_id
+        }
+
+
+    def __eq__(self, other):
+        if not isinstance(other, MessageRecord):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+
+    def __hash__(self):
+        # Equal records share their ID, which never changes once the message exists
+        return hash(self.id)
+
+
+    def __repr__(self):
+        return f"MessageRecord(id={self.id!r}, role={self.role!r}, created_at={self.created_at!r}, run_id={self.run_id!r}, text={self.text!r})"
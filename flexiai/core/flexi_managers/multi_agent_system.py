@@ -1,5 +1,7 @@
 # flexiai/core/flexi_managers/multi_agent_system.py
 import threading
+from flexiai.core.flexi_managers.state_backend import InMemoryStateBackend
+from flexiai.core.flexi_managers.thread_lease import ThreadLeaseManager
 
 
 class MultiAgentSystemManager:
@@ -7,18 +9,28 @@ class MultiAgentSystemManager:
     The MultiAgentSystemManager class is responsible for managing active_threads, their statuses, and processed content.
     It ensures active_threads are properly initialized and maintains their status throughout their lifecycle.
 
+    The threads and the processed content are kept by a StateBackend. The default one keeps them in
+    memory; a SQLiteStateBackend shares them between the worker processes of a server and keeps them
+    across restarts, so the assistants are initialized once. Assistants don't contend with each other:
+    each assistant ID has its own lock for its thread, and the in-memory backend shards the processed
+    content by to_assistant_id.
+
     Attributes:
-        active_threads (dict): A dictionary to store thread information indexed by assistant ID.
-        processed_content_map (dict): A dictionary to store processed content indexed by (from_assistant_id, to_assistant_id).
+        active_threads (dict): A snapshot of the thread information indexed by assistant ID.
+        processed_content_map (dict): A snapshot of the processed content indexed by (from_assistant_id, to_assistant_id).
+        state_backend (StateBackend): Stores the threads and the processed content.
         client (OpenAI or AzureOpenAI): The client for interacting with OpenAI or Azure OpenAI services.
         logger (logging.Logger): The logger for logging information and errors.
         thread_manager (ThreadManager): An instance to manage thread creation and status.
         run_manager (RunManager): An instance to manage the lifecycle and status of runs.
         message_manager (MessageManager): An instance to manage user interactions.
-        lock (threading.Lock): A threading lock to ensure thread-safe operations on shared resources.
+        lock (threading.Lock): A threading lock guarding the creation of the per-assistant locks.
+        thread_leases (ThreadLeaseManager): Leases the threads of the per-session or per-task conversations.
     """
 
-    def __init__(self, client, logger, thread_manager, run_manager, message_manager):
+    def __init__(
+        self, client, logger, thread_manager, run_manager, message_manager, max_threads_per_assistant=16, lease_ttl=1800, state_backend=None
+    ):
         """
         Initializes the MultiAgentSystemManager with the provided client, logger, thread manager, run manager, and message manager.
         
@@ -28,17 +40,38 @@ class MultiAgentSystemManager:
             thread_manager (ThreadManager): An instance to manage thread creation and status.
             run_manager (RunManager): An instance to manage the lifecycle and status of runs.
             message_manager (MessageManager): An instance to manage user interactions.
+            max_threads_per_assistant (int, optional): The maximum number of leased or idle threads per assistant.
+                None for no limit. Defaults to 16.
+            lease_ttl (float, optional): The time, in seconds, after which an unused lease expires. Defaults to 1800.
+            state_backend (StateBackend, optional): Stores the threads and the processed content. Defaults to an InMemoryStateBackend.
         """
-        # Structure: {assistant_id: {'thread_id': str, 'status': str}}
-        self.active_threads = {}
-        # Structure: {(from_assistant_id, to_assistant_id): [processed_content1, processed_content2, ...]}
-        self.processed_content_map = {}
+        self.state_backend = state_backend or InMemoryStateBackend()
+        self._thread_locks = {}
         self.client = client
         self.logger = logger
         self.thread_manager = thread_manager
         self.run_manager = run_manager
         self.message_manager = message_manager
         self.lock = threading.Lock()
+        self.thread_leases = ThreadLeaseManager(
+            thread_manager, logger, max_threads_per_assistant, lease_ttl, on_thread_created=self._mark_thread_idle
+        )
+
+
+    @property
+    def active_threads(self):
+        """
+        dict: A snapshot of the thread information, structure: {assistant_id: {'thread_id': str, 'status': str}}.
+        """
+        return self.state_backend.get_threads()
+
+
+    @property
+    def processed_content_map(self):
+        """
+        dict: A snapshot of the processed content not loaded yet, indexed by (from_assistant_id, to_assistant_id).
+        """
+        return self.state_backend.get_contents()
 
 
     def save_processed_content(self, from_assistant_id, to_assistant_id, processed_content):
@@ -61,19 +94,11 @@ class MultiAgentSystemManager:
             return False
 
         try:
-            # Acquire the lock to ensure thread-safe access to shared resources.
-            with self.lock:
-                # Create a tuple key from the from_assistant_id and to_assistant_id.
-                key = (from_assistant_id, to_assistant_id)
-                
-                # Check if the key is not already in the processed_content_map.
-                if key not in self.processed_content_map:
-                    # If the key is not present, initialize an empty list for it.
-                    self.processed_content_map[key] = []
-                
-                # Append the processed content to the list for the key.
-                self.processed_content_map[key].append(processed_content)
-            
+            # Append the processed content to the content directed from the sender to the recipient.
+            if not self.state_backend.save_content(from_assistant_id, to_assistant_id, processed_content):
+                self.logger.error(f"The state backend rejected the processed content from assistant ID: {from_assistant_id} to assistant ID: {to_assistant_id}.")
+                return False
+
             # Log the storage operation.
             self.logger.info(f"Processed content stored from assistant ID: {from_assistant_id} to assistant ID: {to_assistant_id}.")
             # self.logger.info(f"Stored content: {processed_content}.")
@@ -106,44 +131,21 @@ class MultiAgentSystemManager:
             return []
 
         try:
-            # Acquire the lock to ensure thread-safe access to shared resources.
-            with self.lock:
-                # Initialize an empty list to hold the retrieved content.
-                retrieved_content = []
-
-                if multiple_retrieval:  # Check if multiple_retrieval is set to True.
-                    # List to keep track of keys to be removed.
-                    keys_to_remove = []
-                    
-                    # Retrieve content for all from_assistant_id values directed to the specified to_assistant_id.
-                    for key in list(self.processed_content_map.keys()):  # Iterate over the keys in processed_content_map.
-                        # Check if the key is a valid tuple and matches the to_assistant_id.
-                        if isinstance(key, tuple) and len(key) == 2 and key[1] == to_assistant_id:
-                            # Extend the retrieved_content list with the content.
-                            retrieved_content.extend(self.processed_content_map[key])
-                            # Mark the key for removal.
-                            keys_to_remove.append(key)
-                    
-                    # Remove the marked keys.
-                    for key in keys_to_remove:
-                        del self.processed_content_map[key]  # Delete the key from the dictionary.
-                else:
-                    # Retrieve content for the specified from_assistant_id and to_assistant_id.
-                    key = (from_assistant_id, to_assistant_id)  # Create a tuple key from the from_assistant_id and to_assistant_id.
-                    
-                    # Check if the key is in processed_content_map.
-                    if key in self.processed_content_map:
-                        # Remove the key and get its content.
-                        retrieved_content = self.processed_content_map.pop(key)
-
-                if not retrieved_content:  # Check if no content was retrieved.
-                    self.logger.info(f"No processed content found for from_assistant_id: {from_assistant_id} to assistant ID: {to_assistant_id}.")
-                else:
-                    # Log the retrieved content.
-                    # self.logger.info(f"Retrieved and cleared processed content from assistant ID: {from_assistant_id} to assistant ID: {to_assistant_id}. Content: {retrieved_content}")
-                    self.logger.info(f"Retrieved and cleared processed content from assistant ID: {from_assistant_id} to assistant ID: {to_assistant_id}.")
-                    
-                return retrieved_content
+            if multiple_retrieval:  # Check if multiple_retrieval is set to True.
+                # Retrieve and remove the content directed to the to_assistant_id from every sender.
+                retrieved_content = self.state_backend.pop_all_content(to_assistant_id)
+            else:
+                # Retrieve and remove the content for the specified from_assistant_id and to_assistant_id.
+                retrieved_content = self.state_backend.pop_content(from_assistant_id, to_assistant_id)
+
+            if not retrieved_content:  # Check if no content was retrieved.
+                self.logger.info(f"No processed content found for from_assistant_id: {from_assistant_id} to assistant ID: {to_assistant_id}.")
+            else:
+                # Log the retrieved content.
+                # self.logger.info(f"Retrieved and cleared processed content from assistant ID: {from_assistant_id} to assistant ID: {to_assistant_id}. Content: {retrieved_content}")
+                self.logger.info(f"Retrieved and cleared processed content from assistant ID: {from_assistant_id} to assistant ID: {to_assistant_id}.")
+
+            return retrieved_content
 
         except Exception as e:
             # Log any error that occurs during the process.
@@ -151,6 +153,17 @@ class MultiAgentSystemManager:
             return []
 
 
+    def get_state_stats(self):
+        """
+        Returns the metrics of the state backend, such as the memory used by the processed content
+        and the content evicted or expired so far.
+
+        Returns:
+            dict: The metrics, see `StateBackend.get_stats`.
+        """
+        return self.state_backend.get_stats()
+
+
     def check_for_thread_and_status(self, assistant_id):
         """
         Checks if there is an existing thread for the given assistant ID and retrieves its status.
@@ -161,13 +174,13 @@ class MultiAgentSystemManager:
         Returns:
             tuple: A tuple of (thread_id, status) if the thread exists, otherwise (None, None).
         """
-        with self.lock:
-            if assistant_id in self.active_threads:
-                self.logger.debug(f"Found existing thread for assistant ID: {assistant_id}, Thread ID: {self.active_threads[assistant_id]['thread_id']}, Status: {self.active_threads[assistant_id]['status']}.")
-                return self.active_threads[assistant_id]['thread_id'], self.active_threads[assistant_id]['status']
-            else:
-                self.logger.info(f"No thread found for assistant ID: {assistant_id}.")
-                return None, None
+        thread = self.state_backend.get_thread(assistant_id)
+        if thread is not None:
+            self.logger.debug(f"Found existing thread for assistant ID: {assistant_id}, Thread ID: {thread['thread_id']}, Status: {thread['status']}.")
+            return thread['thread_id'], thread['status']
+        else:
+            self.logger.info(f"No thread found for assistant ID: {assistant_id}.")
+            return None, None
 
 
     def thread_initialization(self, assistant_id):
@@ -181,26 +194,92 @@ class MultiAgentSystemManager:
         Returns:
             str: The thread ID of the newly created or existing thread.
         """
-        with self.lock:
-            if assistant_id not in self.active_threads:
+        # Only the callers initializing the same assistant wait for the thread creation.
+        with self._thread_lock(assistant_id):
+            thread = self.state_backend.get_thread(assistant_id)
+            if thread is None:
                 self.logger.info(f"Attempting to create a new thread for assistant ID: {assistant_id}.")
                 thread_id = self.thread_manager.create_thread().id
                 if thread_id:
-                    self.active_threads[assistant_id] = {
-                        'thread_id': thread_id,
-                        'status': 'initialized'
-                    }
+                    # Another process sharing the state backend may have recorded a thread first
+                    recorded_id = self.state_backend.add_thread(assistant_id, thread_id, 'initialized')['thread_id']
+                    if recorded_id != thread_id:
+                        self.logger.info(f"Thread {recorded_id} was initialized elsewhere for assistant ID: {assistant_id}, deleting thread {thread_id}.")
+                        self.thread_manager.delete_thread(thread_id)
+                        return recorded_id
+                    self.run_manager.mark_thread_idle(thread_id)
                     self.logger.info(f"New thread {thread_id} created and initialized for assistant ID: {assistant_id}.")
                     return thread_id
                 else:
                     self.logger.error(f"Failed to create a new thread for assistant ID: {assistant_id}.")
                     return None
             else:
-                thread_id = self.active_threads[assistant_id]['thread_id']
+                thread_id = thread['thread_id']
                 self.logger.info(f"Thread {thread_id} already exists for assistant ID: {assistant_id}, no new thread created.")
                 return thread_id
 
 
+    def acquire_thread_lease(self, assistant_id, owner=None, timeout=None, thread_id=None):
+        """
+        Leases a thread of the given assistant for a session or a task. Unlike `thread_initialization`,
+        which gives every caller the single thread of the assistant, each owner gets its own thread,
+        so the runs of concurrent users don't queue behind each other.
+
+        Args:
+            assistant_id (str): The unique identifier for the assistant.
+            owner (str, optional): The session or task the lease is bound to. Acquiring again for the
+                same owner returns its current lease, or leases its thread again. Defaults to a new anonymous lease.
+            timeout (float, optional): How long to wait when every thread of the assistant is leased. Defaults to no limit.
+            thread_id (str, optional): The thread the owner already uses, leased again when the manager
+                doesn't know it yet, e.g. after a restart. Defaults to a new thread.
+
+        Returns:
+            ThreadLease: The lease, whose `thread_id` is the thread to use until it is released.
+
+        Raises:
+            TimeoutError: If no thread became available within `timeout`.
+        """
+        return self.thread_leases.acquire(assistant_id, owner, timeout, thread_id)
+
+
+    def release_thread_lease(self, lease, discard=False):
+        """
+        Releases a lease obtained from `acquire_thread_lease`.
+
+        Args:
+            lease (ThreadLease): The lease.
+            discard (bool, optional): Whether to delete the thread instead of handing it to the next caller. Defaults to False.
+        """
+        self.thread_leases.release(lease, discard)
+
+
+    def get_thread_lease_stats(self, assistant_id=None):
+        """
+        Returns the state of the leased thread pools.
+
+        Args:
+            assistant_id (str, optional): The unique identifier for the assistant. Defaults to every assistant.
+
+        Returns:
+            dict: The statistics of the pool of each assistant, see `ThreadLeaseManager.get_stats`.
+        """
+        return self.thread_leases.get_stats(assistant_id)
+
+
+    def _thread_lock(self, assistant_id):
+        # The lock guarding the thread of an assistant, created on first use
+        lock = self._thread_locks.get(assistant_id)
+        if lock is None:
+            with self.lock:
+                lock = self._thread_locks.setdefault(assistant_id, threading.Lock())
+        return lock
+
+
+    def _mark_thread_idle(self, thread_id):
+        if self.run_manager is not None:
+            self.run_manager.mark_thread_idle(thread_id)
+
+
     def initialize_agent(self, assistant_id):
         """
         Initializes an agent for the given assistant ID. If a thread already exists for the assistant ID,
@@ -235,12 +314,10 @@ class MultiAgentSystemManager:
             assistant_id (str): The unique identifier for the assistant.
             new_status (str): The new status to set for the thread.
         """
-        with self.lock:
-            if assistant_id in self.active_threads:
-                self.active_threads[assistant_id]['status'] = new_status
-                self.logger.info(f"Status of thread {self.active_threads[assistant_id]['thread_id']} updated to {new_status} for assistant ID: {assistant_id}.")
-            else:
-                self.logger.info(f"Attempted to update status for a non-existent thread with assistant ID: {assistant_id}.")
+        if self.state_backend.set_thread_status(assistant_id, new_status):
+            self.logger.info(f"Status of the thread updated to {new_status} for assistant ID: {assistant_id}.")
+        else:
+            self.logger.info(f"Attempted to update status for a non-existent thread with assistant ID: {assistant_id}.")
 
 
     def update_assistant_in_thread(self, assistant_id, thread_id):
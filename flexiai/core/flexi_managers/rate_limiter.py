@@ -0,0 +1,148 @@
+# flexiai/core/flexi_managers/rate_limiter.py
+import asyncio
+import threading
+import time
+import weakref
+
+
+class TokenBucket:
+    """
+    TokenBucket limits how many API requests are issued per minute.
+
+    Callers reserve a token before each request and sleep until their reservation is covered,
+    so waiting callers are served in the order they arrived. When the service answers with a
+    429, `pause` holds back every caller sharing the bucket at once instead of letting each
+    worker back off on its own.
+
+    Use `for_client` to share one bucket between all the managers that use the same client.
+
+    Attributes:
+        requests_per_minute (float): The sustained request rate.
+        burst (int): How many requests can be issued at once after an idle period.
+    """
+
+    _shared = weakref.WeakKeyDictionary()
+    _shared_lock = threading.Lock()
+
+    def __init__(self, requests_per_minute, burst=None, clock=time.monotonic):
+        """
+        Initializes the TokenBucket.
+
+        Args:
+            requests_per_minute (float): The sustained request rate.
+            burst (int, optional): The capacity of the bucket. Defaults to one second worth of requests, at least 1.
+            clock (callable, optional): Returns the current time in seconds. Defaults to time.monotonic.
+        """
+        if requests_per_minute <= 0:
+            raise ValueError("requests_per_minute must be positive.")
+        self.requests_per_minute = requests_per_minute
+        self.burst = burst or max(1, int(requests_per_minute / 60))
+        self._rate = requests_per_minute / 60.0
+        self._clock = clock
+        self._tokens = float(self.burst)
+        self._updated_at = clock()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+
+    @classmethod
+    def for_client(cls, client, requests_per_minute, burst=None):
+        """
+        Returns the bucket shared by every user of a client, creating it on first use.
+
+        Args:
+            client (object): The OpenAI client the requests are issued with.
+            requests_per_minute (float): The sustained request rate, used if the bucket is created.
+            burst (int, optional): The capacity of the bucket, used if the bucket is created.
+
+        Returns:
+            TokenBucket: The shared bucket.
+        """
+        with cls._shared_lock:
+            bucket = cls._shared.get(client)
+            if bucket is None:
+                bucket = cls(requests_per_minute, burst)
+                cls._shared[client] = bucket
+            return bucket
+
+
+    def reserve(self, tokens=1):
+        """
+        Takes tokens from the bucket, going into debt if needed.
+
+        Args:
+            tokens (int, optional): The number of tokens. Defaults to 1.
+
+        Returns:
+            float: How long, in seconds, the caller must wait before issuing its request.
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated_at) * self._rate)
+            self._updated_at = now
+            self._tokens -= tokens
+            wait = -self._tokens / self._rate if self._tokens < 0 else 0.0
+            return max(wait, self._paused_until - now)
+
+
+    def acquire(self, tokens=1):
+        """
+        Blocks until the request can be issued.
+
+        Args:
+            tokens (int, optional): The number of tokens. Defaults to 1.
+
+        Returns:
+            float: How long the caller waited, in seconds.
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+    async def acquire_async(self, tokens=1):
+        """
+        Waits, without blocking the event loop, until the request can be issued.
+
+        Args:
+            tokens (int, optional): The number of tokens. Defaults to 1.
+
+        Returns:
+            float: How long the caller waited, in seconds.
+        """
+        wait = self.reserve(tokens)
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+    def pause(self, seconds):
+        """
+        Holds back every caller for a while, typically after a 429 response.
+
+        Args:
+            seconds (float): How long to pause.
+        """
+        with self._lock:
+            self._paused_until = max(self._paused_until, self._clock() + seconds)
+
+
+    @staticmethod
+    def retry_after(error, default=1.0):
+        """
+        Reads how long to wait from a rate limit error.
+
+        Args:
+            error (openai.RateLimitError): The error raised by the client.
+            default (float, optional): The delay used when the response doesn't say. Defaults to 1 second.
+
+        Returns:
+            float: The delay in seconds.
+        """
+        response = getattr(error, 'response', None)
+        headers = getattr(response, 'headers', None) or {}
+        try:
+            return float(headers.get('retry-after', default))
+        except (TypeError, ValueError):
+            return default
@@ -1,20 +1,105 @@
 # flexiai/core/flexi_managers/run_manager.py
 import asyncio
-import time
+import contextlib
 import json
-import nest_asyncio
+import logging
+import threading
+import time
 from openai import OpenAIError
+from flexiai.core.flexi_managers.dispatch_policy import DispatchPolicy
+from flexiai.core.flexi_managers.run_metrics import InMemoryMetricsSink, RunMetrics
+from flexiai.core.flexi_managers.run_monitor import RunMonitor, RunWatch
+from flexiai.core.flexi_managers.run_poller import RunPoller
+from flexiai.core.flexi_managers.tool_executor import ToolExecutor, ToolFunction
+from flexiai.core.flexi_managers.tool_cache import ToolResultCache
+from flexiai.core.utils.tracing import create_tracer
+
+class _StreamDeadline:
+    # Cancels a streamed run when its deadline passes: from a timer while the stream waits for the
+    # next event (the cancellation ends the stream), or when an event arrives after the deadline
+    def __init__(self, run_monitor, thread_id, deadline):
+        self.run_monitor = run_monitor
+        self.thread_id = thread_id
+        self.deadline = deadline
+        self._watch = None
+        self._timer = None
+        self._cancelled = False
+        self._lock = threading.Lock()
+
+
+    def watch(self, run):
+        with self._lock:
+            if self._watch is None:
+                self._watch = RunWatch(run, self.thread_id)
+            else:
+                self._watch.update(run)
+            if self.deadline is None or self._timer is not None:
+                return
+            self._timer = threading.Timer(max(self.deadline - time.monotonic(), 0), self.cancel)
+            self._timer.name = "flexiai-stream-deadline"
+            self._timer.daemon = True
+            self._timer.start()
+
+
+    def expired(self):
+        with self._lock:
+            return self.deadline is not None and self._watch is not None and self._watch.is_active and time.monotonic() >= self.deadline
+
+
+    def cancel(self):
+        # Returns the last known state of the run, cancelled once at most
+        with self._lock:
+            cancel, self._cancelled = not self._cancelled, True
+        if cancel and self._watch.is_active:
+            self.run_monitor.cancel(self._watch)
+        return self._watch.run
+
+
+    def close(self):
+        if self._timer is not None:
+            self._timer.cancel()
+
 
 class RunManager:
-    def __init__(self, client, logger, message_manager, function_registry):
+    def __init__(self, client, logger, message_manager, function_registry, polling_policy=None, tool_executor=None, run_registry=None, tool_cache=None, run_timeout=None, rate_limiter=None, metrics_sink=None, dispatch_policy=None, tracer=None):
         """
         Initializes the RunManager.
+
+        Args:
+            client (object): The OpenAI client instance.
+            logger (logging.Logger): The logger instance.
+            message_manager (MessageManager): The manager used to add messages to threads.
+            function_registry (FunctionRegistry): The registry of core and user functions.
+            polling_policy (PollingPolicy, optional): The backoff used while monitoring runs.
+            tool_executor (ToolExecutor, optional): The executor running the tool calls. A default one is created if omitted.
+            run_registry (ActiveRunRegistry, optional): The registry of the last known run status per thread.
+            tool_cache (ToolResultCache, optional): The cache of tool results. A default one, with caching disabled for every function, is created if omitted.
+            run_timeout (float, optional): How long, in seconds, a monitored run may take before it is cancelled. Tool calls are bounded by the same deadline.
+            rate_limiter (TokenBucket, optional): The limiter shared by the users of the client. Run API calls aren't throttled if omitted.
+            metrics_sink (MetricsSink, optional): Receives the RunMetrics of every run. Defaults to an InMemoryMetricsSink.
+            dispatch_policy (DispatchPolicy, optional): Decides whether a batch of tool calls runs sequentially or in parallel. A default one is created if omitted.
+            tracer (Tracer, optional): Records the structured events of the runs and tool calls. Defaults to a tracer logging to `logger`.
         """
         self.client = client
         self.logger = logger
         self.message_manager = message_manager
+        self.function_registry = function_registry
         self.personal_function_mapping = {}
         self.assistant_function_mapping = {}
+        self.tracer = tracer or create_tracer(logger)
+        self.run_monitor = RunMonitor(client, logger, polling_policy, registry=run_registry, rate_limiter=rate_limiter, tracer=self.tracer)
+        self.run_poller = RunPoller(self.run_monitor, logger)
+        self.tool_executor = tool_executor or ToolExecutor(logger)
+        self.tool_cache = tool_cache or ToolResultCache(logger)
+        self._owns_tool_executor = tool_executor is None
+        self.run_timeout = run_timeout
+        self.metrics_sink = metrics_sink or InMemoryMetricsSink()
+        self.dispatch_policy = dispatch_policy or DispatchPolicy(logger)
+
+        # Long-lived event loop running the asynchronous work, started on first use
+        self._loop = None
+        self._loop_thread = None
+        self._loop_lock = threading.Lock()
 
         # RunManager will not initialize the function_registry immediately. It will be done after initialization.
         self.logger.info("RunManager initialized.")
@@ -24,10 +109,71 @@ class RunManager:
         """
         Initialize the function registry, loading core and user functions.
         """
-        asyncio.run(self.function_registry.initialize_registry())
+        self.run_coroutine(self.function_registry.initialize_registry())
         self.logger.info("RunManager initialized with function mappings.")
 
 
+    def run_coroutine(self, coroutine):
+        """
+        Runs a coroutine on the RunManager's event loop and waits for its result.
+
+        The loop lives in a dedicated thread for the whole lifetime of the RunManager,
+        so loop-bound resources (HTTP pools, semaphores, ...) survive across calls.
+
+        Args:
+            coroutine (coroutine): The coroutine to run.
+
+        Returns:
+            object: The result of the coroutine.
+
+        Raises:
+            RuntimeError: If called from the event loop thread itself, which would deadlock.
+            Exception: Any exception raised by the coroutine.
+        """
+        loop = self._get_event_loop()
+        if threading.current_thread() is self._loop_thread:
+            coroutine.close()
+            raise RuntimeError("A coroutine can't be run synchronously from the RunManager event loop thread.")
+        return asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+
+
+    def close(self):
+        """
+        Stops the run poller and the RunManager's event loop, and shuts down the tool executor it owns.
+        """
+        self.run_poller.shutdown(wait=False)
+
+        with self._loop_lock:
+            loop, thread = self._loop, self._loop_thread
+            self._loop, self._loop_thread = None, None
+
+        if loop is not None:
+            loop.call_soon_threadsafe(loop.stop)
+            if thread is not threading.current_thread():
+                thread.join()
+                loop.close()
+            self.logger.info("RunManager event loop stopped.")
+
+        if self._owns_tool_executor:
+            self.tool_executor.shutdown(wait=False)
+
+
+    def _get_event_loop(self):
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(
+                    target=self._run_event_loop, args=(self._loop,), name="flexiai-run-loop", daemon=True
+                )
+                self._loop_thread.start()
+            return self._loop
+
+
+    def _run_event_loop(self, loop):
+        asyncio.set_event_loop(loop)
+        loop.run_forever()
+
+
     def update_function_mappings(self, personal_function_mapping, assistant_function_mapping):
         """
         Updates the function mappings for personal and assistant functions.
@@ -37,6 +183,11 @@ class RunManager:
         self.logger.info(f"RunManager updated with personal functions: {list(personal_function_mapping.keys())}")
         self.logger.info(f"RunManager updated with assistant functions: {list(assistant_function_mapping.keys())}")
 
+        # Start the worker processes now rather than on the first call of a process function
+        functions = list(personal_function_mapping.values()) + list(assistant_function_mapping.values())
+        if any(isinstance(func, ToolFunction) and func.executor == 'process' for func in functions):
+            self.tool_executor.warm_up()
+
 
     def create_and_monitor_run(self, assistant_id, thread_id, user_message=None, role=None, metadata=None):
         """
@@ -51,39 +202,42 @@ class RunManager:
             metadata (dict, optional): Metadata to include with the message.
 
         Returns:
-            None
+            object: The final run object.
 
         Raises:
             OpenAIError: If any API call within this function fails.
             Exception: If an unexpected error occurs.
         """
         try:
-            self.logger.info(f"Starting a new run for thread {thread_id} with assistant {assistant_id}")
-
-            # Wait for any active run to complete
-            self.wait_for_run_completion(thread_id)
-
-            # Add the user's message to the thread if provided
-            if user_message:
-                messages_to_add = [{"content": user_message, "metadata": metadata}]
-                self.message_manager.add_messages_dynamically(thread_id, messages_to_add, role)
-
-            # Create the run
-            run = self.client.beta.threads.runs.create(thread_id=thread_id, assistant_id=assistant_id)
-
-            # Monitor the status of the run
-            while run.status in ['queued', 'in_progress', 'cancelling', 'requires_action']:
-                self.logger.info(f"Run status: {run.status}")
-                if run.status == 'requires_action':
-                    self.handle_requires_action(run, assistant_id, thread_id)
-                time.sleep(1)  # Wait for 1 second before checking again
-                run = self.client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run.id)
-
-            # Check the final status of the run
-            if run.status == 'completed':
-                self.logger.info(f"Run {run.id} completed successfully for thread {thread_id}")
-            else:
-                self.logger.error(f"Run {run.id} failed with status: {run.status}")
+            with self.track_run('create_and_monitor_run', assistant_id, thread_id) as metrics:
+                self.logger.info(f"Starting a new run for thread {thread_id} with assistant {assistant_id}")
+
+                # Wait for any active run to complete
+                self.wait_for_run_completion(thread_id)
+
+                # Add the user's message to the thread if provided
+                if user_message:
+                    started = time.perf_counter()
+                    messages_to_add = [{"content": user_message, "metadata": metadata}]
+                    self.run_monitor.call_on_idle_thread(
+                        thread_id, lambda: self.message_manager.add_messages_dynamically(thread_id, messages_to_add, role)
+                    )
+                    metrics.message_time = time.perf_counter() - started
+
+                # Create the run
+                run = self._create_run(thread_id, assistant_id, metrics)
+
+                # Monitor the status of the run
+                run = self.monitor_run(run, assistant_id, thread_id, metrics)
+                metrics.finish(run)
+
+                # Check the final status of the run
+                if run.status == 'completed':
+                    self.logger.info(f"Run {run.id} completed successfully for thread {thread_id}")
+                else:
+                    self.logger.error(f"Run {run.id} failed with status: {run.status}")
+
+                return run
 
         except OpenAIError as e:
             self.logger.error(f"Failed to run thread ID {thread_id} with assistant ID {assistant_id}: {str(e)}", exc_info=True)
@@ -93,6 +247,138 @@ class RunManager:
             raise
 
 
+    def stream_run(self, assistant_id, thread_id, user_message=None, role=None, metadata=None):
+        """
+        Creates a run with streaming enabled and yields its events as they arrive,
+        optionally adding a user message first. Required actions are handled with the
+        regular tool dispatch and the run continues through a streamed tool output submission.
+
+        With a run timeout, the run is cancelled once its deadline passes, even while the stream
+        waits for the next event. The stream is then closed and the run polled until it stops, like
+        in `create_and_monitor_run`; its final status is reported in a 'status' event.
+
+        Each yielded event is a dictionary with a `type` key:
+            - 'text_delta': `message_id` and `text` hold a new piece of assistant text.
+            - 'run_step': `event` holds the event name and `step` the run step (or step delta).
+            - 'requires_action': `run` holds the run waiting for tool outputs.
+            - 'status': `status` holds the final status of the run and `run` the final run object.
+            - 'error': `error` holds the error reported by the stream.
+
+        Args:
+            assistant_id (str): The ID of the assistant.
+            thread_id (str): The ID of the thread.
+            user_message (str, optional): The user's message content to add before creating the run.
+            role (str, optional): The role of the message sender. Defaults to 'user'.
+            metadata (dict, optional): Metadata to include with the message.
+
+        Yields:
+            dict: The run events described above.
+
+        Raises:
+            OpenAIError: If any API call within this function fails.
+            Exception: If an unexpected error occurs.
+        """
+        try:
+            with self.track_run('stream_run', assistant_id, thread_id) as metrics:
+                self.logger.info(f"Starting a new streamed run for thread {thread_id} with assistant {assistant_id}")
+
+                # Wait for any active run to complete
+                self.wait_for_run_completion(thread_id)
+
+                # Add the user's message to the thread if provided
+                if user_message:
+                    started = time.perf_counter()
+                    messages_to_add = [{"content": user_message, "metadata": metadata}]
+                    self.run_monitor.call_on_idle_thread(
+                        thread_id, lambda: self.message_manager.add_messages_dynamically(thread_id, messages_to_add, role)
+                    )
+                    metrics.message_time = time.perf_counter() - started
+
+                deadline = self.get_run_deadline()
+
+                # The run state is only known again once the stream reports it
+                self.run_monitor.registry.forget(thread_id)
+                stream = self._create_run(thread_id, assistant_id, metrics, stream=True)
+                stream_deadline = _StreamDeadline(self.run_monitor, thread_id, deadline)
+
+                try:
+                    expired = False
+                    while stream is not None:
+                        next_stream = None
+                        with stream:
+                            for event in stream:
+                                name = event.event
+                                if name.startswith('thread.run.') and not name.startswith('thread.run.step.'):
+                                    stream_deadline.watch(event.data)
+                                if stream_deadline.expired():
+                                    # Leaving the block closes the stream
+                                    expired = True
+                                    break
+
+                                if name == 'thread.message.delta':
+                                    for block in event.data.delta.content or []:
+                                        if block.type == 'text' and block.text and block.text.value:
+                                            yield {'type': 'text_delta', 'message_id': event.data.id, 'text': block.text.value}
+
+                                elif name.startswith('thread.run.step.'):
+                                    yield {'type': 'run_step', 'event': name, 'step': event.data}
+
+                                elif name in ('thread.run.created', 'thread.run.queued', 'thread.run.in_progress'):
+                                    metrics.run_id = event.data.id
+                                    metrics.observe_status(event.data.status)
+
+                                elif name == 'thread.run.requires_action':
+                                    run = event.data
+                                    self.run_monitor.registry.record(thread_id, run.id, run.status)
+                                    metrics.observe_status(run.status)
+                                    metrics.requires_action_rounds += 1
+                                    yield {'type': 'requires_action', 'run': run}
+                                    tool_outputs = self.collect_tool_outputs(run, assistant_id, thread_id, deadline, metrics)
+                                    self.run_monitor.throttle()
+                                    started = time.perf_counter()
+                                    next_stream = self.client.beta.threads.runs.submit_tool_outputs(
+                                        thread_id=thread_id,
+                                        run_id=run.id,
+                                        tool_outputs=tool_outputs,
+                                        stream=True
+                                    )
+                                    metrics.submit_times.append(time.perf_counter() - started)
+                                    self.tracer.event('run.tool_outputs_submitted', run_id=run.id, tool_outputs=len(tool_outputs), streamed=True)
+                                    break
+
+                                elif name in ('thread.run.completed', 'thread.run.failed', 'thread.run.cancelled',
+                                              'thread.run.expired', 'thread.run.incomplete'):
+                                    run = event.data
+                                    self.run_monitor.registry.record(thread_id, run.id, run.status)
+                                    metrics.finish(run)
+                                    if run.status == 'completed':
+                                        self.logger.info(f"Run {run.id} completed successfully for thread {thread_id}")
+                                    else:
+                                        self.logger.error(f"Run {run.id} failed with status: {run.status}")
+                                    yield {'type': 'status', 'status': run.status, 'run': run}
+
+                                elif name == 'error':
+                                    self.logger.error(f"Streamed run for thread {thread_id} reported an error: {event.data}")
+                                    yield {'type': 'error', 'error': event.data}
+
+                        stream = next_stream
+
+                    if expired:
+                        run = self.run_monitor.monitor_run(stream_deadline.cancel(), thread_id, metrics=metrics)
+                        metrics.finish(run)
+                        self.logger.error(f"Run {run.id} passed its deadline and ended with status: {run.status}")
+                        yield {'type': 'status', 'status': run.status, 'run': run}
+                finally:
+                    stream_deadline.close()
+
+        except OpenAIError as e:
+            self.logger.error(f"Failed to stream run for thread ID {thread_id} with assistant ID {assistant_id}: {str(e)}", exc_info=True)
+            raise
+        except Exception as e:
+            self.logger.error(f"An unexpected error occurred while streaming run for thread ID {thread_id} with assistant ID {assistant_id}: {str(e)}", exc_info=True)
+            raise
+
+
     def create_run(self, assistant_id, thread_id):
         """
         Creates and runs a thread with the specified assistant, monitoring its status
@@ -110,32 +396,25 @@ class RunManager:
             Exception: If an unexpected error occurs.
         """
         try:
-            self.logger.info(f"Starting a new run for thread {thread_id} with assistant {assistant_id}")
+            with self.track_run('create_run', assistant_id, thread_id) as metrics:
+                self.logger.info(f"Starting a new run for thread {thread_id} with assistant {assistant_id}")
             
-            # Wait for any active run to complete
-            self.wait_for_run_completion(thread_id)
+                # Wait for any active run to complete
+                self.wait_for_run_completion(thread_id)
             
-            run = self.client.beta.threads.runs.create(
-                thread_id=thread_id, assistant_id=assistant_id
-            )
-
-            # Monitor the status of the run
-            while run.status in ['queued', 'in_progress', 'cancelling', 'requires_action']:
-                self.logger.info(f"Run status: {run.status}")
-                if run.status == 'requires_action':
-                    self.handle_requires_action(run, assistant_id, thread_id)
-                time.sleep(1)  # Wait for 1 second before checking again
-                run = self.client.beta.threads.runs.retrieve(
-                    thread_id=thread_id, run_id=run.id
-                )
+                run = self._create_run(thread_id, assistant_id, metrics)
 
-            # Check the final status of the run
-            if run.status == 'completed':
-                self.logger.info(f"Run {run.id} completed successfully for thread {thread_id}")
-                return run
-            else:
-                self.logger.error(f"Run {run.id} failed with status: {run.status}")
-                return None
+                # Monitor the status of the run
+                run = self.monitor_run(run, assistant_id, thread_id, metrics)
+                metrics.finish(run)
+
+                # Check the final status of the run
+                if run.status == 'completed':
+                    self.logger.info(f"Run {run.id} completed successfully for thread {thread_id}")
+                    return run
+                else:
+                    self.logger.error(f"Run {run.id} failed with status: {run.status}")
+                    return None
         except OpenAIError as e:
             self.logger.error(f"An error occurred during thread run for thread {thread_id} with assistant {assistant_id}: {str(e)}", exc_info=True)
             raise
@@ -154,42 +433,37 @@ class RunManager:
             user_message (str): The user's message content.
 
         Returns:
-            object: The run object if successful, None otherwise.
+            object: The final run object.
 
         Raises:
             OpenAIError: If any API call within this function fails.
             Exception: If an unexpected error occurs.
         """
         try:
-            self.logger.info(f"Starting a new run for thread {thread_id} with assistant {assistant_id}")
+            with self.track_run('create_advanced_run', assistant_id, thread_id) as metrics:
+                self.logger.info(f"Starting a new run for thread {thread_id} with assistant {assistant_id}")
             
-            # Wait for any active run to complete
-            self.wait_for_run_completion(thread_id)
+                # Wait for any active run to complete
+                self.wait_for_run_completion(thread_id)
             
-            # Add the user's message to the thread
-            self.message_manager.add_user_message(thread_id, user_message)
+                # Add the user's message to the thread
+                started = time.perf_counter()
+                self.run_monitor.call_on_idle_thread(thread_id, lambda: self.message_manager.add_user_message(thread_id, user_message))
+                metrics.message_time = time.perf_counter() - started
             
-            run = self.client.beta.threads.runs.create(
-                thread_id=thread_id, assistant_id=assistant_id
-            )
-
-            # Monitor the status of the run
-            while run.status in ['queued', 'in_progress', 'cancelling', 'requires_action']:
-                self.logger.info(f"Run status: {run.status}")
-                if run.status == 'requires_action':
-                    self.handle_requires_action(run, assistant_id, thread_id)
-                time.sleep(1)  # Wait for 1 second before checking again
-                run = self.client.beta.threads.runs.retrieve(
-                    thread_id=thread_id, run_id=run.id
-                )
+                run = self._create_run(thread_id, assistant_id, metrics)
 
-            # Check the final status of the run
-            if run.status == 'completed':
-                self.logger.info(f"Run {run.id} completed successfully for thread {thread_id}")
-            else:
-                self.logger.error(f"Run {run.id} failed with status: {run.status}")
+                # Monitor the status of the run
+                run = self.monitor_run(run, assistant_id, thread_id, metrics)
+                metrics.finish(run)
+
+                # Check the final status of the run
+                if run.status == 'completed':
+                    self.logger.info(f"Run {run.id} completed successfully for thread {thread_id}")
+                else:
+                    self.logger.error(f"Run {run.id} failed with status: {run.status}")
 
-            return run
+                return run
         except OpenAIError as e:
             self.logger.error(f"An error occurred during thread run for thread {thread_id} with assistant {assistant_id}: {str(e)}", exc_info=True)
             raise
@@ -210,16 +484,8 @@ class RunManager:
             Exception: If an unexpected error occurs during the process.
         """
         try:
-            while True:
-                self.logger.info(f"Checking for active runs in thread {thread_id}")
-                runs = self.client.beta.threads.runs.list(thread_id=thread_id)
-                active_runs = [run for run in runs.data if run.status in ["queued", "in_progress", "cancelling"]]
-                if active_runs:
-                    self.logger.info(f"Run {active_runs[0].id} is currently {active_runs[0].status}. Waiting for completion...")
-                    time.sleep(1)  # Wait for 1 second before checking again
-                else:
-                    self.logger.info(f"No active run in thread {thread_id}. Proceeding...")
-                    break
+            self.logger.info(f"Checking for active runs in thread {thread_id}")
+            self.run_monitor.wait_for_idle_thread(thread_id)
         except OpenAIError as e:
             self.logger.error(f"Failed to retrieve thread runs for thread {thread_id}: {str(e)}", exc_info=True)
             raise
@@ -228,7 +494,128 @@ class RunManager:
             raise
             
 
-    def handle_requires_action(self, run, assistant_id, thread_id):
+    def monitor_run(self, run, assistant_id, thread_id, metrics=None):
+        """
+        Monitors a run with adaptive polling until it leaves the active statuses,
+        handling any required actions along the way. The run is cancelled once the
+        run timeout, if any, has elapsed.
+
+        The run is tracked by the shared RunPoller and this method waits on its future. Runs
+        started from inside a tool call are polled inline instead, so they can't wait on poller
+        workers held by the run that called the tool.
+
+        Args:
+            run (Run): The run object returned when the run was created.
+            assistant_id (str): The ID of the assistant.
+            thread_id (str): The ID of the thread.
+            metrics (RunMetrics, optional): The metrics record of the run.
+
+        Returns:
+            object: The final run object.
+        """
+        deadline = self.get_run_deadline()
+        on_requires_action = lambda current_run: self.handle_requires_action(current_run, assistant_id, thread_id, deadline, metrics)
+
+        if self.tool_executor.in_tool_call() or self.run_poller.in_action_handler():
+            return self.run_monitor.monitor_run(run, thread_id, on_requires_action=on_requires_action, deadline=deadline, metrics=metrics)
+
+        future = self.run_poller.watch(run, thread_id, on_requires_action=on_requires_action, deadline=deadline, metrics=metrics)
+        return future.result()
+
+
+    @contextlib.contextmanager
+    def track_run(self, entry_point, assistant_id, thread_id):
+        """
+        Creates the metrics record of a run and hands it to the metrics sink once the block exits.
+        The block is expected to call `metrics.finish(run)` with the final run; if it raises, the
+        record is closed with the error instead. The thread is marked as stale in the message cache
+        when the run starts and when it ends, since the run adds messages to it.
+
+        Args:
+            entry_point (str): The name of the method starting the run.
+            assistant_id (str): The ID of the assistant.
+            thread_id (str): The ID of the thread.
+
+        Yields:
+            RunMetrics: The metrics record of the run.
+        """
+        metrics = RunMetrics(entry_point, assistant_id, thread_id)
+        self.message_manager.message_cache.mark_stale(thread_id)
+        try:
+            yield metrics
+        except BaseException as e:
+            metrics.finish(error=e)
+            raise
+        finally:
+            if metrics.total_time is None:
+                metrics.finish()
+            self.message_manager.message_cache.mark_stale(thread_id)
+            try:
+                self.metrics_sink.record(metrics)
+            except Exception as e:
+                self.logger.warning(f"Failed to record the metrics of run {metrics.run_id}: {str(e)}")
+
+
+    def get_run_metrics(self):
+        """
+        Returns the metrics sink receiving the RunMetrics of every run started by this manager.
+
+        Returns:
+            MetricsSink: The metrics sink.
+        """
+        return self.metrics_sink
+
+
+    def _create_run(self, thread_id, assistant_id, metrics, stream=False):
+        def create():
+            self.run_monitor.throttle()
+            if stream:
+                return self.client.beta.threads.runs.create(thread_id=thread_id, assistant_id=assistant_id, stream=True)
+            return self.client.beta.threads.runs.create(thread_id=thread_id, assistant_id=assistant_id)
+
+        started = time.perf_counter()
+        run = self.run_monitor.call_on_idle_thread(thread_id, create)
+        if not stream:
+            metrics.run_id = run.id
+        metrics.create_time = time.perf_counter() - started
+        return run
+
+
+    def get_run_deadline(self):
+        """
+        Returns the deadline of a run starting now.
+
+        Returns:
+            float: The time.monotonic() value after which the run is cancelled, or None without a run timeout.
+        """
+        return time.monotonic() + self.run_timeout if self.run_timeout is not None else None
+
+
+    def mark_thread_idle(self, thread_id):
+        """
+        Records that a thread has no active run, so the next run on it starts without listing its runs.
+        Meant for threads that were just created.
+
+        Args:
+            thread_id (str): The ID of the thread.
+        """
+        self.run_monitor.registry.mark_idle(thread_id)
+
+
+    def get_poll_count(self, run_id):
+        """
+        Returns how many status checks a monitored run needed.
+
+        Args:
+            run_id (str): The ID of the run.
+
+        Returns:
+            int: The number of checks, or None if the run wasn't monitored by this manager.
+        """
+        return self.run_monitor.get_poll_count(run_id)
+
+
+    def handle_requires_action(self, run, assistant_id, thread_id, deadline=None, metrics=None):
         """
         Handles the required actions for a given run by executing the necessary tool functions either in parallel or sequentially.
 
@@ -236,100 +623,148 @@ class RunManager:
             run (Run): The run object containing the required action.
             assistant_id (str): The ID of the assistant handling the action.
             thread_id (str): The ID of the thread in which the action is being handled.
+            deadline (float, optional): The time.monotonic() value by which the tool calls must be done.
+            metrics (RunMetrics, optional): Receives the tool execution times and the submit latency.
 
         Raises:
             OpenAIError: If there is an error interacting with the OpenAI API.
             Exception: For any general exceptions that occur during the processing of tool outputs.
         """
-        self.logger.info(f"Handling required action for run ID: {run.id} with assistant ID: {assistant_id}.")
-
-        # Automatically determine whether to use parallel processing
-        use_parallel = len(run.required_action.submit_tool_outputs.tool_calls) > 2
+        self.tracer.event('run.requires_action', run_id=run.id, assistant_id=assistant_id, thread_id=thread_id)
 
         if run.status == "requires_action":
-            tool_calls = run.required_action.submit_tool_outputs.tool_calls
-            tasks = []
+            if metrics is not None:
+                metrics.requires_action_rounds += 1
+            tool_outputs = self.collect_tool_outputs(run, assistant_id, thread_id, deadline, metrics)
 
-            for tool_call in tool_calls:
-                function_name = tool_call.function.name
-                arguments = json.loads(tool_call.function.arguments)
+            try:
+                self.run_monitor.throttle()
+                started = time.perf_counter()
+                self.client.beta.threads.runs.submit_tool_outputs(
+                    thread_id=thread_id,
+                    run_id=run.id,
+                    tool_outputs=tool_outputs
+                )
+                if metrics is not None:
+                    metrics.submit_times.append(time.perf_counter() - started)
+                self.tracer.event('run.tool_outputs_submitted', run_id=run.id, tool_outputs=len(tool_outputs))
+            except OpenAIError as e:
+                self.logger.error(f"OpenAI API error when submitting tool outputs for run ID {run.id} in thread {thread_id} with assistant {assistant_id}: {str(e)}", exc_info=True)
+                raise
+            except Exception as e:
+                self.logger.error(f"General error when submitting tool outputs for run ID {run.id} in thread {thread_id} with assistant {assistant_id}: {str(e)}", exc_info=True)
+                raise
+        else:
+            self.logger.info(f"No required action for this run ID: {run.id}")
 
-                self.logger.info(f"Function Name: {function_name}, Arguments: {arguments}")
 
-                tasks.append({
-                    'function_name': function_name,
-                    'parameters': arguments
-                })
+    def collect_tool_outputs(self, run, assistant_id, thread_id, deadline=None, metrics=None):
+        """
+        Executes the tool calls required by a run, either in parallel or sequentially as
+        chosen by the dispatch policy, and builds the tool outputs to submit. A tool call that times out gets an error
+        output, so the model can carry on without it.
 
-            tool_outputs = []
-            if use_parallel:
-                try:
-                    results = self.call_parallel_functions(tasks)
-
-                    for tool_call, result in zip(tool_calls, results):
-                        if isinstance(result, Exception):
-                            tool_output = {
-                                "tool_call_id": tool_call.id,
-                                "output": json.dumps({"status": False, "message": str(result), "result": None})
-                            }
-                        else:
-                            tool_output = {
-                                "tool_call_id": tool_call.id,
-                                "output": json.dumps({"status": True, "message": "Success", "result": result})
-                            }
-
-                        tool_outputs.append(tool_output)
-                except OpenAIError as e:
-                    self.logger.error(f"OpenAI API error when submitting tool outputs for run ID {run.id} in thread {thread_id} with assistant {assistant_id}: {str(e)}", exc_info=True)
-                    raise
-                except Exception as e:
-                    self.logger.error(f"General error when submitting tool outputs for run ID {run.id} in thread {thread_id} with assistant {assistant_id}: {str(e)}", exc_info=True)
-                    raise
-            else:
-                for tool_call in tool_calls:
-                    function_name = tool_call.function.name
-                    arguments = json.loads(tool_call.function.arguments)
+        Args:
+            run (Run): The run object containing the required action.
+            assistant_id (str): The ID of the assistant handling the action.
+            thread_id (str): The ID of the thread in which the action is being handled.
+            deadline (float, optional): The time.monotonic() value by which the tool calls must be done.
+            metrics (RunMetrics, optional): Receives the execution time of each tool call.
+
+        Returns:
+            list: A list of dictionaries with the `tool_call_id` and the JSON encoded `output`.
+
+        Raises:
+            Exception: If the parallel execution of the tool calls fails as a whole.
+        """
+        tool_calls = run.required_action.submit_tool_outputs.tool_calls
+
+        # Pick the execution plan the observed function latencies say is faster
+        plan = self.dispatch_policy.choose([tool_call.function.name for tool_call in tool_calls])
+        use_parallel = plan['mode'] == DispatchPolicy.PARALLEL
+        self.tracer.event(
+            'tool.dispatch', logging.INFO, run_id=run.id, tool_calls=len(tool_calls), mode=plan['mode'],
+            sequential_estimate=round(plan['sequential'], 4), parallel_estimate=round(plan['parallel'], 4)
+        )
+        if metrics is not None:
+            metrics.dispatch_modes.append(plan['mode'])
+
+        tasks = []
+        for tool_call in tool_calls:
+            function_name = tool_call.function.name
+            arguments = json.loads(tool_call.function.arguments)
+
+            tasks.append({
+                'function_name': function_name,
+                'parameters': arguments
+            })
+
+        tool_outputs = []
+        if use_parallel:
+            try:
+                results = self.call_parallel_functions(tasks, deadline, metrics)
+
+                for tool_call, result in zip(tool_calls, results):
+                    if isinstance(result, Exception):
+                        tool_output = {
+                            "tool_call_id": tool_call.id,
+                            "output": json.dumps({"status": False, "message": str(result), "result": None})
+                        }
+                    else:
+                        tool_output = {
+                            "tool_call_id": tool_call.id,
+                            "output": json.dumps({"status": True, "message": "Success", "result": result})
+                        }
 
-                    self.logger.info(f">>> Function Name: '{function_name}' >>> Arguments: {arguments}")
+                    tool_outputs.append(tool_output)
+            except OpenAIError as e:
+                self.logger.error(f"OpenAI API error when submitting tool outputs for run ID {run.id} in thread {thread_id} with assistant {assistant_id}: {str(e)}", exc_info=True)
+                raise
+            except Exception as e:
+                self.logger.error(f"General error when submitting tool outputs for run ID {run.id} in thread {thread_id} with assistant {assistant_id}: {str(e)}", exc_info=True)
+                raise
+        else:
+            with self.tool_executor.deadline_scope(deadline):
+                for tool_call, task in zip(tool_calls, tasks):
+                    function_name = task['function_name']
+                    arguments = task['parameters']
 
                     action_type = self.determine_action_type(function_name)
 
+                    # The plan is only sequential for cheap calls: run them on this thread, skipping the pool
+                    timing = {}
+                    started = time.perf_counter()
                     try:
                         if action_type == "call_assistant":
-                            self.logger.info(f"Calling another assistant with arguments: {arguments}")
-                            result = self.call_assistant_with_arguments(function_name, **arguments)
+                            result = self._call_assistant(function_name, arguments, inline=True, timing=timing)
                         else:
-                            self.logger.info(f"Executing personal function with arguments: {arguments}")
-                            result = self.execute_personal_function_with_arguments(function_name, **arguments)
+                            result = self._execute_personal_function(function_name, arguments, inline=True, timing=timing)
 
                         tool_output = {
                             "tool_call_id": tool_call.id,
                             "output": json.dumps({"status": True, "message": "Success", "result": result})
                         }
+                        succeeded = True
                     except Exception as e:
                         tool_output = {
                             "tool_call_id": tool_call.id,
                             "output": json.dumps({"status": False, "message": str(e), "result": None})
                         }
                         self.logger.error(f"Error executing tool call {tool_call.id}: {str(e)}", exc_info=True)
+                        succeeded = False
+
+                    self._record_tool(metrics, function_name, timing.get('duration', time.perf_counter() - started), succeeded)
 
                     tool_outputs.append(tool_output)
 
-            try:
-                self.client.beta.threads.runs.submit_tool_outputs(
-                    thread_id=thread_id,
-                    run_id=run.id,
-                    tool_outputs=tool_outputs
-                )
-                self.logger.info(f"Successfully submitted tool outputs for run ID: {run.id}")
-            except OpenAIError as e:
-                self.logger.error(f"OpenAI API error when submitting tool outputs for run ID {run.id} in thread {thread_id} with assistant {assistant_id}: {str(e)}", exc_info=True)
-                raise
-            except Exception as e:
-                self.logger.error(f"General error when submitting tool outputs for run ID {run.id} in thread {thread_id} with assistant {assistant_id}: {str(e)}", exc_info=True)
-                raise
-        else:
-            self.logger.info(f"No required action for this run ID: {run.id}")
+        return tool_outputs
+
+
+    def _record_tool(self, metrics, function_name, duration, succeeded):
+        # Feeds the execution time to the dispatch policy and to the metrics of the run
+        self.dispatch_policy.record(function_name, duration)
+        if metrics is not None:
+            metrics.record_tool(function_name, duration, succeeded)
 
 
     def determine_action_type(self, function_name):
@@ -342,12 +777,11 @@ class RunManager:
         Returns:
             str: The action type, either "call_assistant" or "personal_function".
         """
-        self.logger.info(f"Determining action type for function: {function_name}")
         if function_name.endswith("_assistant"):
             action_type = "call_assistant"
         else:
             action_type = "personal_function"
-        self.logger.info(f"Action type for function {function_name}: {action_type}")
+        self.tracer.event('tool.action_type', function_name=function_name, action_type=action_type)
         return action_type
 
 
@@ -362,12 +796,22 @@ class RunManager:
         Returns:
             object: The result of the function execution.
         """
-        self.logger.info(f"Attempting to execute function: {function_name} with arguments: {arguments}")
+        return self._execute_personal_function(function_name, arguments)
+
+
+    def _execute_personal_function(self, function_name, arguments, inline=False, timing=None):
+        # Looks up and executes a personal function, see ToolExecutor.execute for `inline` and `timing`
+        self.tracer.event('tool.call', function_name=function_name, action_type="personal_function", arguments=arguments)
         func = self.personal_function_mapping.get(function_name, None)
         if callable(func):
             try:
-                result = func(**arguments)
-                self.logger.info(f"Personal Function {function_name} executed.")
+                result = self.tool_cache.get_or_call(
+                    function_name, arguments,
+                    lambda: self.tool_executor.execute(
+                        function_name, func, arguments, run_coroutine=self.run_coroutine, inline=inline, timing=timing
+                    )
+                )
+                self.tracer.event('tool.completed', function_name=function_name, result=result)
                 return result
             except Exception as e:
                 self.logger.error(f"Error executing {function_name}: {str(e)}", exc_info=True)
@@ -391,12 +835,22 @@ class RunManager:
         Raises:
             ValueError: If the function is not defined.
         """
-        self.logger.info(f"Attempting to dispatch an assistant using the function: {function_name} with arguments: {arguments}")
+        return self._call_assistant(function_name, arguments)
+
+
+    def _call_assistant(self, function_name, arguments, inline=False, timing=None):
+        # Looks up and executes an assistant function, see ToolExecutor.execute for `inline` and `timing`
+        self.tracer.event('tool.call', function_name=function_name, action_type="call_assistant", arguments=arguments)
         func = self.assistant_function_mapping.get(function_name, None)
         if callable(func):
             try:
-                result = func(**arguments)
-                # self.logger.info(f"Call Assistant Function {function_name} executed.")
+                result = self.tool_cache.get_or_call(
+                    function_name, arguments,
+                    lambda: self.tool_executor.execute(
+                        function_name, func, arguments, run_coroutine=self.run_coroutine, inline=inline, timing=timing
+                    )
+                )
+                self.tracer.event('tool.completed', function_name=function_name, result=result)
                 return result
             except Exception as e:
                 self.logger.error(f"Error executing {function_name}: {str(e)}", exc_info=True)
@@ -407,12 +861,15 @@ class RunManager:
             raise ValueError(error_message)
 
 
-    async def parallel_tool_calls(self, tasks):
+    async def parallel_tool_calls(self, tasks, nested=False, deadline=None, metrics=None):
         """
         Executes tool calls in parallel.
 
         Args:
             tasks (list): A list of task dictionaries containing function names and parameters.
+            nested (bool, optional): Whether the calls are issued from inside another tool call.
+            deadline (float, optional): The time.monotonic() value by which the calls must be done.
+            metrics (RunMetrics, optional): Receives the execution time of each call.
 
         Returns:
             list: A list of results from the parallel execution of tool calls.
@@ -422,11 +879,12 @@ class RunManager:
         """
         
         async def call_function(task):
+            timing = {}
+            started = time.perf_counter()
+            succeeded = False
             try:
-                self.logger.info(f"==== Starting Parallel Tool Call ====")
-                self.logger.info(f"Calling function {task['function_name']} with parameters: {task['parameters']}")
-                response = await self.execute_task(task['function_name'], task['parameters'])
-                self.logger.info(f"Function {task['function_name']} completed with response: {response}")
+                response = await self.execute_task(task['function_name'], task['parameters'], nested, timing)
+                succeeded = True
                 return response
             except OpenAIError as e:
                 self.logger.error(f"Error calling function {task['function_name']}: {str(e)}", exc_info=True)
@@ -434,18 +892,24 @@ class RunManager:
             except Exception as e:
                 self.logger.error(f"Unexpected error calling function {task['function_name']}: {str(e)}", exc_info=True)
                 raise
+            finally:
+                self._record_tool(metrics, task['function_name'], timing.get('duration', time.perf_counter() - started), succeeded)
 
-        results = await asyncio.gather(*(call_function(task) for task in tasks), return_exceptions=True)
+        with self.tool_executor.deadline_scope(deadline):
+            results = await asyncio.gather(*(call_function(task) for task in tasks), return_exceptions=True)
         return results
 
 
-    async def execute_task(self, function_name, parameters):
+    async def execute_task(self, function_name, parameters, nested=False, timing=None):
         """
-        Executes a task for a given function name and parameters.
+        Executes a task for a given function name and parameters. Coroutine functions are awaited
+        and regular functions run in the thread pool of the tool executor.
 
         Args:
             function_name (str): The name of the function to execute.
             parameters (dict): The parameters to pass to the function.
+            nested (bool, optional): Whether the task is issued from inside another tool call.
+            timing (dict, optional): Receives the time the function itself ran, see ToolExecutor.execute_async.
 
         Returns:
             object: The result of the function execution.
@@ -454,7 +918,7 @@ class RunManager:
             ValueError: If the function is not found or not callable.
             Exception: If an error occurs during the function execution.
         """
-        self.logger.info(f"Executing task for function: {function_name} with parameters: {parameters}")
+        self.tracer.event('tool.call', function_name=function_name, parallel=True, arguments=parameters)
         if function_name in self.personal_function_mapping:
             func = self.personal_function_mapping[function_name]
         elif function_name in self.assistant_function_mapping:
@@ -466,8 +930,11 @@ class RunManager:
 
         if callable(func):
             try:
-                result = await func(**parameters) if asyncio.iscoroutinefunction(func) else func(**parameters)
-                self.logger.info(f"Task {function_name} executed successfully.")
+                result = await self.tool_cache.get_or_call_async(
+                    function_name, parameters,
+                    lambda: self.tool_executor.execute_async(function_name, func, parameters, nested=nested, timing=timing)
+                )
+                self.tracer.event('tool.completed', function_name=function_name, parallel=True, result=result)
                 return result
             except Exception as e:
                 error_message = f"Error executing task {function_name}: {str(e)}"
@@ -479,12 +946,14 @@ class RunManager:
             raise ValueError(error_message)
 
 
-    def call_parallel_functions(self, tasks):
+    def call_parallel_functions(self, tasks, deadline=None, metrics=None):
         """
-        Calls functions in parallel using asyncio.
+        Calls functions in parallel on the RunManager's event loop.
 
         Args:
             tasks (list): A list of task dictionaries containing function names and parameters.
+            deadline (float, optional): The time.monotonic() value by which the calls must be done.
+            metrics (RunMetrics, optional): Receives the execution time of each call.
 
         Returns:
             list: A list of results from the parallel execution of functions.
@@ -493,8 +962,8 @@ class RunManager:
             Exception: If an unexpected error occurs during the parallel execution.
         """
         try:
-            nest_asyncio.apply()
-            return asyncio.run(self.parallel_tool_calls(tasks))
+            nested = self.tool_executor.in_tool_call()
+            return self.run_coroutine(self.parallel_tool_calls(tasks, nested, deadline, metrics))
         except Exception as e:
             self.logger.error(f"An error occurred during parallel function execution: {str(e)}", exc_info=True)
             raise
@@ -516,28 +985,20 @@ class RunManager:
             Exception: If an unexpected error occurs.
         """
         try:
-            # Attach the new assistant to the thread
-            self.logger.info(f"Attaching new assistant ID: {new_assistant_id} to thread ID: {thread_id}")
-            run = self.client.beta.threads.runs.create(thread_id=thread_id, assistant_id=new_assistant_id)
-            self.logger.info(f"Attached new assistant ID: {new_assistant_id} to thread ID: {thread_id}")
-
-            # Poll the status of the run
-            while True:
-                run_status = self.client.beta.threads.runs.retrieve(thread_id=thread_id, run_id=run.id)
-                status = run_status.status
-                self.logger.info(f"Current status of run {run.id} for thread {thread_id}: {status}")
-
-                if status == "requires_action":
-                    self.handle_requires_action(run, new_assistant_id, thread_id)
-                elif status in ["completed", "failed", "cancelled"]:
-                    self.logger.info(f"Final status of run {run.id} for thread {thread_id}: {status}")
-                    return run_status
-                elif status in ["queued", "in_progress", "cancelling"]:
-                    self.logger.info(f"Run {run.id} is in progress. Current status: {status}")
+            with self.track_run('assistant_transformer', new_assistant_id, thread_id) as metrics:
+                # Attach the new assistant to the thread
+                self.logger.info(f"Attaching new assistant ID: {new_assistant_id} to thread ID: {thread_id}")
+                run = self._create_run(thread_id, new_assistant_id, metrics)
+                self.logger.info(f"Attached new assistant ID: {new_assistant_id} to thread ID: {thread_id}")
+
+                # Poll the status of the run
+                run = self.monitor_run(run, new_assistant_id, thread_id, metrics)
+                metrics.finish(run)
+                if run.status in ["completed", "failed", "cancelled"]:
+                    self.logger.info(f"Final status of run {run.id} for thread {thread_id}: {run.status}")
                 else:
-                    self.logger.warning(f"Encountered an unknown status for run {run.id}: {status}")
-
-                time.sleep(1)  # Wait for 1 second before checking again
+                    self.logger.warning(f"Encountered an unknown status for run {run.id}: {run.status}")
+                return run
 
         except OpenAIError as e:
             self.logger.error(f"Failed to run thread ID {thread_id} with new assistant ID {new_assistant_id}: {str(e)}", exc_info=True)
@@ -0,0 +1,272 @@
+# flexiai/core/flexi_managers/run_metrics.py
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+
+
+class RunMetrics:
+    """
+    RunMetrics holds the latency breakdown of a single run, from the moment its entry point was
+    called until the run reached its final status.
+
+    Durations are in seconds. The queued and in progress durations are measured locally, from the
+    statuses observed while polling (or streaming) the run, so their resolution is the polling interval.
+
+    Attributes:
+        entry_point (str): The RunManager method the run was started with.
+        assistant_id (str): The ID of the assistant.
+        thread_id (str): The ID of the thread.
+        run_id (str): The ID of the run, once created.
+        status (str): The final status of the run, or 'error' if the entry point raised.
+        error (str): The error raised by the entry point, if any.
+        started_at (float): The wall clock time the entry point was called at.
+        message_time (float): The time spent adding the user message to the thread.
+        create_time (float): The latency of the run creation request.
+        status_times (dict): The time spent in each run status.
+        requires_action_rounds (int): How many times the run required tool outputs.
+        dispatch_modes (list): How the tool calls of each round were dispatched, 'sequential' or 'parallel'.
+        tool_calls (list): One dictionary per tool call with its `function_name`, `duration` and `succeeded` flag.
+        submit_times (list): The latency of each tool output submission.
+        poll_count (int): The number of status checks issued while monitoring the run.
+        usage (dict): The `prompt_tokens`, `completion_tokens` and `total_tokens` of the final run, if reported.
+        total_time (float): The time from the entry point call to the final status.
+    """
+
+    def __init__(self, entry_point, assistant_id, thread_id):
+        self.entry_point = entry_point
+        self.assistant_id = assistant_id
+        self.thread_id = thread_id
+        self.run_id = None
+        self.status = None
+        self.error = None
+        self.started_at = time.time()
+        self.message_time = 0.0
+        self.create_time = 0.0
+        self.status_times = {}
+        self.requires_action_rounds = 0
+        self.dispatch_modes = []
+        self.tool_calls = []
+        self.submit_times = []
+        self.poll_count = 0
+        self.usage = None
+        self.total_time = None
+        self._started = time.perf_counter()
+        self._status = None
+        self._status_since = None
+        self._lock = threading.Lock()
+
+
+    @property
+    def queued_time(self):
+        return self.status_times.get('queued', 0.0)
+
+
+    @property
+    def in_progress_time(self):
+        return self.status_times.get('in_progress', 0.0)
+
+
+    @property
+    def tool_time(self):
+        return sum(call['duration'] for call in self.tool_calls)
+
+
+    @property
+    def submit_time(self):
+        return sum(self.submit_times)
+
+
+    def observe_status(self, status):
+        """
+        Records the status a run was seen in, charging the time since the previous observation
+        to the previous status.
+
+        Args:
+            status (str): The observed run status.
+        """
+        now = time.perf_counter()
+        if self._status is not None:
+            self.status_times[self._status] = self.status_times.get(self._status, 0.0) + (now - self._status_since)
+        self._status = status
+        self._status_since = now
+
+
+    def record_tool(self, function_name, duration, succeeded=True):
+        """
+        Records the execution of a tool call. Safe to call from concurrent tool calls.
+
+        Args:
+            function_name (str): The name of the function.
+            duration (float): The execution time in seconds.
+            succeeded (bool, optional): Whether the call returned a result. Defaults to True.
+        """
+        with self._lock:
+            self.tool_calls.append({'function_name': function_name, 'duration': duration, 'succeeded': succeeded})
+
+
+    def finish(self, run=None, error=None):
+        """
+        Closes the record once the run reached its final status or the entry point failed.
+
+        Args:
+            run (Run, optional): The final run object.
+            error (BaseException, optional): The error raised by the entry point.
+        """
+        if run is not None:
+            self.run_id = run.id
+            self.status = run.status
+            self.observe_status(run.status)
+            usage = getattr(run, 'usage', None)
+            if usage is not None:
+                self.usage = {
+                    'prompt_tokens': usage.prompt_tokens,
+                    'completion_tokens': usage.completion_tokens,
+                    'total_tokens': usage.total_tokens
+                }
+        if error is not None:
+            self.status = 'error'
+            self.error = str(error)
+        self.total_time = time.perf_counter() - self._started
+
+
+    def to_dict(self):
+        """
+        Returns the record as a dictionary, including the aggregated durations.
+
+        Returns:
+            dict: The metrics of the run.
+        """
+        return {
+            'entry_point': self.entry_point,
+            'assistant_id': self.assistant_id,
+            'thread_id': self.thread_id,
+            'run_id': self.run_id,
+            'status': self.status,
+            'error': self.error,
+            'started_at': self.started_at,
+            'message_time': self.message_time,
+            'create_time': self.create_time,
+            'queued_time': self.queued_time,
+            'in_progress_time': self.in_progress_time,
+            'status_times': dict(self.status_times),
+            'requires_action_rounds': self.requires_action_rounds,
+            'dispatch_modes': list(self.dispatch_modes),
+            'tool_calls': list(self.tool_calls),
+            'tool_time': self.tool_time,
+            'submit_times': list(self.submit_times),
+            'submit_time': self.submit_time,
+            'poll_count': self.poll_count,
+            'usage': dict(self.usage) if self.usage else None,
+            'total_time': self.total_time
+        }
+
+
+class MetricsSink(ABC):
+    """
+    Abstract base class for metrics sinks, which receive the RunMetrics of every finished run.
+    Subclass it to ship the records elsewhere (a log, a time series database, ...).
+    """
+
+    @abstractmethod
+    def record(self, metrics):
+        """
+        Receives the metrics of a finished run. Called from the thread that executed the run,
+        so implementations should return quickly.
+
+        Args:
+            metrics (RunMetrics): The metrics of the run.
+        """
+        pass
+
+
+class InMemoryMetricsSink(MetricsSink):
+    """
+    InMemoryMetricsSink keeps the most recent run metrics in a ring buffer and aggregates
+    percentiles over them.
+
+    Attributes:
+        capacity (int): The maximum number of records kept.
+    """
+
+    def __init__(self, capacity=1000):
+        """
+        Initializes the InMemoryMetricsSink.
+
+        Args:
+            capacity (int, optional): The maximum number of records kept. Defaults to 1000.
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1.")
+        self.capacity = capacity
+        self._records = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+
+
+    def record(self, metrics):
+        with self._lock:
+            self._records.append(metrics)
+
+
+    def get_records(self):
+        """
+        Returns the kept records, oldest first.
+
+        Returns:
+            list: The RunMetrics records.
+        """
+        with self._lock:
+            return list(self._records)
+
+
+    def clear(self):
+        """
+        Drops every kept record.
+        """
+        with self._lock:
+            self._records.clear()
+
+
+    def percentiles(self, field, percentiles=(50, 90, 99)):
+        """
+        Computes percentiles of a numeric field over the kept records, using the nearest-rank method.
+        Records without a value for the field are ignored.
+
+        Args:
+            field (str): The name of a numeric key of `RunMetrics.to_dict()`, or 'total_tokens',
+                'prompt_tokens' or 'completion_tokens' for the token usage.
+            percentiles (tuple, optional): The percentiles to compute. Defaults to (50, 90, 99).
+
+        Returns:
+            dict: The value per percentile, empty if no record has a value for the field.
+        """
+        values = sorted(value for value in (self._value(record, field) for record in self.get_records()) if value is not None)
+        if not values:
+            return {}
+        return {p: values[max(0, math.ceil(p / 100 * len(values)) - 1)] for p in percentiles}
+
+
+    def summary(self, percentiles=(50, 90, 99)):
+        """
+        Computes the percentiles of the main latency and usage fields.
+
+        Args:
+            percentiles (tuple, optional): The percentiles to compute. Defaults to (50, 90, 99).
+
+        Returns:
+            dict: The number of `runs` and the percentiles per field.
+        """
+        fields = ('total_time', 'message_time', 'create_time', 'queued_time', 'in_progress_time',
+                  'tool_time', 'submit_time', 'poll_count', 'requires_action_rounds', 'total_tokens')
+        summary = {'runs': len(self.get_records())}
+        for field in fields:
+            summary[field] = self.percentiles(field, percentiles)
+        return summary
+
+
+    @staticmethod
+    def _value(record, field):
+        if field in ('prompt_tokens', 'completion_tokens', 'total_tokens'):
+            return record.usage.get(field) if record.usage else None
+        return getattr(record, field, None)
@@ -0,0 +1,527 @@
+# flexiai/core/flexi_managers/run_monitor.py
+import asyncio
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+from openai import OpenAIError, RateLimitError
+from flexiai.core.flexi_managers.rate_limiter import TokenBucket
+from flexiai.core.flexi_managers.run_registry import ACTIVE_RUN_STATUSES, BLOCKING_RUN_STATUSES, ActiveRunRegistry, is_active_run_error
+from flexiai.core.utils.tracing import create_tracer
+
+
+class PollingPolicy:
+    """
+    PollingPolicy computes the delay before the next status check of a run.
+
+    The first check happens after a short initial interval, then the delay grows
+    exponentially up to a cap. A random jitter spreads the checks of concurrent runs
+    so they don't hit the API in lockstep.
+
+    Attributes:
+        initial_interval (float): Delay in seconds before the first check.
+        multiplier (float): Growth factor applied for every check without a status change.
+        max_interval (float): Upper bound for the delay in seconds.
+        jitter (float): Relative jitter applied to each delay (0.2 means +/- 20%).
+    """
+
+    def __init__(self, initial_interval=0.2, multiplier=1.6, max_interval=5.0, jitter=0.2):
+        if initial_interval <= 0 or max_interval < initial_interval:
+            raise ValueError("initial_interval must be positive and not greater than max_interval.")
+        if multiplier < 1:
+            raise ValueError("multiplier must be greater than or equal to 1.")
+        if not 0 <= jitter < 1:
+            raise ValueError("jitter must be in the range [0, 1).")
+
+        self.initial_interval = initial_interval
+        self.multiplier = multiplier
+        self.max_interval = max_interval
+        self.jitter = jitter
+
+
+    def next_interval(self, attempt):
+        """
+        Returns the delay before the next check.
+
+        Args:
+            attempt (int): The number of checks since the status last changed.
+
+        Returns:
+            float: The delay in seconds.
+        """
+        interval = min(self.max_interval, self.initial_interval * (self.multiplier ** attempt))
+        if self.jitter:
+            interval *= random.uniform(1 - self.jitter, 1 + self.jitter)
+        return min(interval, self.max_interval)
+
+
+class RunWatch:
+    """
+    RunWatch holds the polling state of a single run.
+
+    Attributes:
+        run (Run): The last known run object.
+        thread_id (str): The ID of the thread the run belongs to.
+        polls (int): The number of status checks issued so far.
+        attempt (int): The number of checks since the status last changed.
+    """
+
+    def __init__(self, run, thread_id):
+        self.run = run
+        self.thread_id = thread_id
+        self.polls = 0
+        self.attempt = 0
+
+
+    @property
+    def status(self):
+        return self.run.status
+
+
+    @property
+    def is_active(self):
+        return self.run.status in ACTIVE_RUN_STATUSES
+
+
+    def update(self, run):
+        """
+        Stores a freshly retrieved run and resets the backoff if its status changed.
+
+        Args:
+            run (Run): The retrieved run object.
+        """
+        self.polls += 1
+        if run.status != self.run.status:
+            self.attempt = 0
+        else:
+            self.attempt += 1
+        self.run = run
+
+
+    def reset(self):
+        """
+        Resets the backoff so the next check happens after the initial interval.
+        """
+        self.attempt = 0
+
+
+class RunMonitor:
+    """
+    RunMonitor polls runs and threads with an adaptive backoff and keeps track of
+    how many status checks each run needed.
+
+    Attributes:
+        client (OpenAI or AzureOpenAI): The client for interacting with OpenAI or Azure OpenAI services.
+        logger (logging.Logger): The logger for logging information and errors.
+        policy (PollingPolicy): The policy used to compute the delay between checks.
+        registry (ActiveRunRegistry): The last known run status per thread.
+        rate_limiter (TokenBucket): The limiter shared with the other users of the client, if any.
+        tracer (Tracer): Records the status checks and the final status of the runs.
+        poll_counts (OrderedDict): The number of checks per run ID, most recent runs last.
+    """
+
+    def __init__(self, client, logger, policy=None, history_size=1000, registry=None, rate_limiter=None, tracer=None):
+        """
+        Initializes the RunMonitor.
+
+        Args:
+            client (object): The OpenAI client instance.
+            logger (logging.Logger): The logger instance.
+            policy (PollingPolicy, optional): The polling policy. Defaults to PollingPolicy().
+            history_size (int, optional): How many per-run poll counts to keep. Defaults to 1000.
+            registry (ActiveRunRegistry, optional): The registry of run states. Defaults to ActiveRunRegistry().
+            rate_limiter (TokenBucket, optional): Throttles the status checks. Defaults to no throttling.
+            tracer (Tracer, optional): Records the status checks. Defaults to a tracer logging to `logger`.
+        """
+        self.client = client
+        self.logger = logger
+        self.policy = policy or PollingPolicy()
+        self.registry = registry or ActiveRunRegistry()
+        self.rate_limiter = rate_limiter
+        self.tracer = tracer or create_tracer(logger)
+        self.history_size = history_size
+        self.poll_counts = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def poll(self, watch):
+        """
+        Retrieves the current state of a watched run.
+
+        Args:
+            watch (RunWatch): The watch of the run to refresh.
+
+        Returns:
+            Run: The retrieved run object.
+        """
+        self.throttle()
+        try:
+            run = self.client.beta.threads.runs.retrieve(thread_id=watch.thread_id, run_id=watch.run.id)
+        except RateLimitError as e:
+            if not self.absorb_rate_limit(e):
+                raise
+            return watch.run
+        watch.update(run)
+        self.registry.record(watch.thread_id, run.id, run.status)
+        return run
+
+
+    def cancel(self, watch):
+        """
+        Cancels a watched run whose deadline has passed. A run that finished in the meantime
+        can't be cancelled anymore, which is logged and otherwise ignored.
+
+        Args:
+            watch (RunWatch): The watch of the run to cancel.
+        """
+        self.logger.warning(f"Run {watch.run.id} in thread {watch.thread_id} passed its deadline, cancelling it")
+        self.throttle()
+        try:
+            run = self.client.beta.threads.runs.cancel(thread_id=watch.thread_id, run_id=watch.run.id)
+        except OpenAIError as e:
+            self.logger.warning(f"Failed to cancel run {watch.run.id}: {str(e)}")
+            return
+        watch.update(run)
+        self.registry.record(watch.thread_id, run.id, run.status)
+
+
+    def monitor_run(self, run, thread_id, on_requires_action=None, deadline=None, metrics=None):
+        """
+        Polls a run until it leaves the active statuses.
+
+        Args:
+            run (Run): The run object returned when the run was created.
+            thread_id (str): The ID of the thread the run belongs to.
+            on_requires_action (callable, optional): Called with the run whenever it requires action.
+                It is expected to submit the tool outputs.
+            deadline (float, optional): The time.monotonic() value after which the run is cancelled.
+            metrics (RunMetrics, optional): Receives the observed statuses and the poll count.
+
+        Returns:
+            Run: The final run object.
+
+        Raises:
+            OpenAIError: If any API call fails.
+        """
+        watch = RunWatch(run, thread_id)
+        self.registry.record(thread_id, run.id, run.status)
+        if metrics is not None:
+            metrics.observe_status(run.status)
+        cancel_requested = False
+        while watch.is_active:
+            self.tracer.event('run.poll', run_id=watch.run.id, status=watch.status)
+            if not cancel_requested and deadline is not None and time.monotonic() >= deadline:
+                cancel_requested = True
+                self.cancel(watch)
+                continue
+            if watch.status == 'requires_action' and on_requires_action is not None and not cancel_requested:
+                on_requires_action(watch.run)
+                # Tool outputs were just submitted, so the status is about to change.
+                watch.reset()
+            time.sleep(self.policy.next_interval(watch.attempt))
+            self.poll(watch)
+            if metrics is not None:
+                metrics.observe_status(watch.status)
+
+        self.record_poll_count(watch.run.id, watch.polls)
+        if metrics is not None:
+            metrics.poll_count += watch.polls
+        self.tracer.event('run.finished', logging.INFO, run_id=watch.run.id, status=watch.status, polls=watch.polls)
+        return watch.run
+
+
+    def wait_for_idle_thread(self, thread_id):
+        """
+        Waits until no run in the thread is queued, in progress or cancelling. The runs are only
+        listed when the local run registry can't tell that the thread is idle.
+
+        Args:
+            thread_id (str): The ID of the thread.
+
+        Returns:
+            int: The number of run listings issued.
+
+        Raises:
+            OpenAIError: If any API call fails.
+        """
+        if self.registry.is_idle(thread_id):
+            self.tracer.event('thread.idle', thread_id=thread_id, checks=0)
+            return 0
+
+        polls = 0
+        attempt = 0
+        last_seen = None
+        while True:
+            self.throttle()
+            try:
+                runs = self.client.beta.threads.runs.list(thread_id=thread_id)
+            except RateLimitError as e:
+                if not self.absorb_rate_limit(e):
+                    raise
+                continue
+            polls += 1
+            active_runs = [run for run in runs.data if run.status in BLOCKING_RUN_STATUSES]
+            if not active_runs:
+                self.registry.mark_idle(thread_id)
+                self.tracer.event('thread.idle', thread_id=thread_id, checks=polls)
+                return polls
+
+            current = (active_runs[0].id, active_runs[0].status)
+            attempt = 0 if current != last_seen else attempt + 1
+            last_seen = current
+            self.tracer.event('thread.wait', thread_id=thread_id, run_id=current[0], status=current[1])
+            time.sleep(self.policy.next_interval(attempt))
+
+
+    def call_on_idle_thread(self, thread_id, request, attempts=3):
+        """
+        Issues a request that the service rejects while a run is active in the thread, such as
+        creating a run or adding a message. If it is rejected because another process started a
+        run since the thread was last seen idle, the recorded state of the thread is dropped and
+        the request is issued again once the runs listed for the thread are finished.
+
+        Args:
+            thread_id (str): The ID of the thread.
+            request (callable): Issues the request and returns its result.
+            attempts (int, optional): How many times the request is issued at most. Defaults to 3.
+
+        Returns:
+            object: The result of the request.
+
+        Raises:
+            OpenAIError: If the request fails for another reason or on its last attempt.
+        """
+        for attempt in range(1, attempts + 1):
+            try:
+                return request()
+            except OpenAIError as e:
+                if attempt == attempts or not is_active_run_error(e):
+                    raise
+                self.logger.warning(f"Another run became active in thread {thread_id}, waiting for it: {str(e)}")
+                self.registry.forget(thread_id)
+                self.wait_for_idle_thread(thread_id)
+
+
+    def throttle(self):
+        """
+        Waits for the shared rate limiter, if any, before an API request.
+        """
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+
+
+    def absorb_rate_limit(self, error):
+        """
+        Pauses the shared rate limiter after a 429 so every user of the client backs off together.
+
+        Args:
+            error (RateLimitError): The error raised by the client.
+
+        Returns:
+            bool: True if the request can be retried once the limiter allows it, False without a rate limiter.
+        """
+        if self.rate_limiter is None:
+            return False
+        delay = TokenBucket.retry_after(error)
+        self.logger.warning(f"Rate limited by the API, pausing requests for {delay:.1f} seconds")
+        self.rate_limiter.pause(delay)
+        return True
+
+
+    def record_poll_count(self, run_id, polls):
+        """
+        Records how many checks a run needed, evicting the oldest entries beyond the history size.
+
+        Args:
+            run_id (str): The ID of the run.
+            polls (int): The number of checks.
+        """
+        with self._lock:
+            self.poll_counts[run_id] = polls
+            self.poll_counts.move_to_end(run_id)
+            while len(self.poll_counts) > self.history_size:
+                self.poll_counts.popitem(last=False)
+
+
+    def get_poll_count(self, run_id):
+        """
+        Returns how many checks a monitored run needed.
+
+        Args:
+            run_id (str): The ID of the run.
+
+        Returns:
+            int: The number of checks, or None if the run is unknown.
+        """
+        with self._lock:
+            return self.poll_counts.get(run_id)
+
+
+class AsyncRunMonitor(RunMonitor):
+    """
+    AsyncRunMonitor is the asyncio counterpart of RunMonitor. It uses an asynchronous
+    client and awaits between checks instead of blocking the calling thread.
+    """
+
+    async def call_on_idle_thread(self, thread_id, request, attempts=3):
+        """
+        Issues a request that the service rejects while a run is active in the thread, and issues
+        it again once the thread is idle if another process started a run in the meantime.
+
+        Args:
+            thread_id (str): The ID of the thread.
+            request (callable): Coroutine function issuing the request and returning its result.
+            attempts (int, optional): How many times the request is issued at most. Defaults to 3.
+
+        Returns:
+            object: The result of the request.
+
+        Raises:
+            OpenAIError: If the request fails for another reason or on its last attempt.
+        """
+        for attempt in range(1, attempts + 1):
+            try:
+                return await request()
+            except OpenAIError as e:
+                if attempt == attempts or not is_active_run_error(e):
+                    raise
+                self.logger.warning(f"Another run became active in thread {thread_id}, waiting for it: {str(e)}")
+                self.registry.forget(thread_id)
+                await self.wait_for_idle_thread(thread_id)
+
+
+    async def throttle(self):
+        """
+        Waits for the shared rate limiter, if any, before an API request.
+        """
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire_async()
+
+
+    async def poll(self, watch):
+        """
+        Retrieves the current state of a watched run.
+
+        Args:
+            watch (RunWatch): The watch of the run to refresh.
+
+        Returns:
+            Run: The retrieved run object.
+        """
+        await self.throttle()
+        try:
+            run = await self.client.beta.threads.runs.retrieve(thread_id=watch.thread_id, run_id=watch.run.id)
+        except RateLimitError as e:
+            if not self.absorb_rate_limit(e):
+                raise
+            return watch.run
+        watch.update(run)
+        self.registry.record(watch.thread_id, run.id, run.status)
+        return run
+
+
+    async def cancel(self, watch):
+        """
+        Cancels a watched run whose deadline has passed. A run that finished in the meantime
+        can't be cancelled anymore, which is logged and otherwise ignored.
+
+        Args:
+            watch (RunWatch): The watch of the run to cancel.
+        """
+        self.logger.warning(f"Run {watch.run.id} in thread {watch.thread_id} passed its deadline, cancelling it")
+        await self.throttle()
+        try:
+            run = await self.client.beta.threads.runs.cancel(thread_id=watch.thread_id, run_id=watch.run.id)
+        except OpenAIError as e:
+            self.logger.warning(f"Failed to cancel run {watch.run.id}: {str(e)}")
+            return
+        watch.update(run)
+        self.registry.record(watch.thread_id, run.id, run.status)
+
+
+    async def monitor_run(self, run, thread_id, on_requires_action=None, deadline=None, metrics=None):
+        """
+        Polls a run until it leaves the active statuses.
+
+        Args:
+            run (Run): The run object returned when the run was created.
+            thread_id (str): The ID of the thread the run belongs to.
+            on_requires_action (callable, optional): Coroutine function called with the run whenever
+                it requires action. It is expected to submit the tool outputs.
+            deadline (float, optional): The time.monotonic() value after which the run is cancelled.
+            metrics (RunMetrics, optional): Receives the observed statuses and the poll count.
+
+        Returns:
+            Run: The final run object.
+
+        Raises:
+            OpenAIError: If any API call fails.
+        """
+        watch = RunWatch(run, thread_id)
+        self.registry.record(thread_id, run.id, run.status)
+        if metrics is not None:
+            metrics.observe_status(run.status)
+        cancel_requested = False
+        while watch.is_active:
+            self.tracer.event('run.poll', run_id=watch.run.id, status=watch.status)
+            if not cancel_requested and deadline is not None and time.monotonic() >= deadline:
+                cancel_requested = True
+                await self.cancel(watch)
+                continue
+            if watch.status == 'requires_action' and on_requires_action is not None and not cancel_requested:
+                await on_requires_action(watch.run)
+                watch.reset()
+            await asyncio.sleep(self.policy.next_interval(watch.attempt))
+            await self.poll(watch)
+            if metrics is not None:
+                metrics.observe_status(watch.status)
+
+        self.record_poll_count(watch.run.id, watch.polls)
+        if metrics is not None:
+            metrics.poll_count += watch.polls
+        self.tracer.event('run.finished', logging.INFO, run_id=watch.run.id, status=watch.status, polls=watch.polls)
+        return watch.run
+
+
+    async def wait_for_idle_thread(self, thread_id):
+        """
+        Waits until no run in the thread is queued, in progress or cancelling. The runs are only
+        listed when the local run registry can't tell that the thread is idle.
+
+        Args:
+            thread_id (str): The ID of the thread.
+
+        Returns:
+            int: The number of run listings issued.
+
+        Raises:
+            OpenAIError: If any API call fails.
+        """
+        if self.registry.is_idle(thread_id):
+            self.tracer.event('thread.idle', thread_id=thread_id, checks=0)
+            return 0
+
+        polls = 0
+        attempt = 0
+        last_seen = None
+        while True:
+            await self.throttle()
+            try:
+                runs = await self.client.beta.threads.runs.list(thread_id=thread_id)
+            except RateLimitError as e:
+                if not self.absorb_rate_limit(e):
+                    raise
+                continue
+            polls += 1
+            active_runs = [run for run in runs.data if run.status in BLOCKING_RUN_STATUSES]
+            if not active_runs:
+                self.registry.mark_idle(thread_id)
+                self.tracer.event('thread.idle', thread_id=thread_id, checks=polls)
+                return polls
+
+            current = (active_runs[0].id, active_runs[0].status)
+            attempt = 0 if current != last_seen else attempt + 1
+            last_seen = current
+            self.tracer.event('thread.wait', thread_id=thread_id, run_id=current[0], status=current[1])
+            await asyncio.sleep(self.policy.next_interval(attempt))
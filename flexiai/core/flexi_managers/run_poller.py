@@ -0,0 +1,288 @@
+# flexiai/core/flexi_managers/run_poller.py
+import heapq
+import itertools
+import logging
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError, ThreadPoolExecutor
+from flexiai.core.flexi_managers.run_monitor import RunWatch
+
+
+class PolledRun:
+    """
+    PolledRun holds the state of a run tracked by the RunPoller.
+
+    Attributes:
+        watch (RunWatch): The polling state of the run.
+        future (Future): Resolves to the final run object.
+        on_requires_action (callable): Called with the run whenever it requires action.
+        deadline (float): The time.monotonic() value after which the run is cancelled.
+        metrics (RunMetrics): Receives the observed statuses and the poll count.
+        cancel_requested (bool): Whether the run was cancelled after its deadline.
+    """
+
+    def __init__(self, watch, on_requires_action=None, deadline=None, metrics=None):
+        self.watch = watch
+        self.future = Future()
+        self.on_requires_action = on_requires_action
+        self.deadline = deadline
+        self.metrics = metrics
+        self.cancel_requested = False
+
+
+class RunPoller:
+    """
+    RunPoller monitors many in-flight runs from a single scheduling thread.
+
+    Every tracked run has its next status check on a shared timer (a heap ordered by due time),
+    following the backoff of the monitor's polling policy. Due checks are issued by a small pool
+    of poll workers, so a slow request doesn't delay the other runs. When a run requires action,
+    the handler runs on a separate pool of action workers, which hand the tool calls over to the
+    tool executor. When a run reaches a terminal status, its future is resolved.
+
+    Blocking callers wait on the future instead of polling in their own loop, and callers that
+    don't want to block attach a callback with `future.add_done_callback`.
+
+    Attributes:
+        monitor (RunMonitor): Issues the status checks, shares the polling policy, rate limiter and run registry.
+        logger (logging.Logger): The logger for logging information and errors.
+        max_pollers (int): The number of threads issuing status checks.
+        max_handlers (int): The number of threads handling required actions.
+    """
+
+    def __init__(self, monitor, logger, max_pollers=4, max_handlers=32):
+        """
+        Initializes the RunPoller. The threads are started when the first run is tracked.
+
+        Args:
+            monitor (RunMonitor): The monitor issuing the status checks.
+            logger (logging.Logger): The logger instance.
+            max_pollers (int, optional): The number of threads issuing status checks. Defaults to 4.
+            max_handlers (int, optional): The number of threads handling required actions. Defaults to 32.
+        """
+        self.monitor = monitor
+        self.logger = logger
+        self.max_pollers = max_pollers
+        self.max_handlers = max_handlers
+        self._timers = []
+        self._sequence = itertools.count()
+        self._tracked = set()
+        self._closed = False
+        self._condition = threading.Condition()
+        self._local = threading.local()
+        self._thread = None
+        self._poll_pool = None
+        self._action_pool = None
+
+
+    def watch(self, run, thread_id, on_requires_action=None, deadline=None, metrics=None):
+        """
+        Starts tracking a run.
+
+        Args:
+            run (Run): The run object returned when the run was created.
+            thread_id (str): The ID of the thread the run belongs to.
+            on_requires_action (callable, optional): Called with the run whenever it requires action.
+                It is expected to submit the tool outputs. Runs on an action worker.
+            deadline (float, optional): The time.monotonic() value after which the run is cancelled.
+            metrics (RunMetrics, optional): Receives the observed statuses and the poll count.
+
+        Returns:
+            Future: Resolves to the final run object, or to the exception raised while monitoring
+                or handling the required actions.
+
+        Raises:
+            RuntimeError: If the poller was shut down.
+        """
+        polled_run = PolledRun(RunWatch(run, thread_id), on_requires_action, deadline, metrics)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("The run poller was shut down.")
+            self._start()
+            self._tracked.add(polled_run)
+
+        self.monitor.registry.record(thread_id, run.id, run.status)
+        if metrics is not None:
+            metrics.observe_status(run.status)
+        self._advance(polled_run)
+        return polled_run.future
+
+
+    def in_action_handler(self):
+        """
+        Tells whether the current thread is handling the required actions of a tracked run.
+
+        Returns:
+            bool: True if called from an action worker.
+        """
+        return getattr(self._local, 'handling', False)
+
+
+    def get_stats(self):
+        """
+        Returns the state of the poller.
+
+        Returns:
+            dict: The number of `tracked` runs and of runs waiting for their next check (`scheduled`).
+        """
+        with self._condition:
+            return {'tracked': len(self._tracked), 'scheduled': len(self._timers)}
+
+
+    def shutdown(self, wait=True):
+        """
+        Stops the poller. The futures of the runs still tracked are cancelled.
+
+        Args:
+            wait (bool, optional): Whether to wait for the status checks and handlers in progress. Defaults to True.
+        """
+        with self._condition:
+            self._closed = True
+            tracked, self._tracked = self._tracked, set()
+            self._timers.clear()
+            self._condition.notify_all()
+            thread, poll_pool, action_pool = self._thread, self._poll_pool, self._action_pool
+
+        for polled_run in tracked:
+            polled_run.future.cancel()
+        if thread is not None and thread is not threading.current_thread():
+            thread.join()
+        for pool in (poll_pool, action_pool):
+            if pool is not None:
+                pool.shutdown(wait=wait, cancel_futures=True)
+
+
+    def _start(self):
+        # Called with the condition held
+        if self._thread is not None:
+            return
+        self._poll_pool = ThreadPoolExecutor(max_workers=self.max_pollers, thread_name_prefix="flexiai-poll")
+        self._action_pool = ThreadPoolExecutor(
+            max_workers=self.max_handlers, thread_name_prefix="flexiai-action", initializer=self._mark_action_worker
+        )
+        self._thread = threading.Thread(target=self._run, name="flexiai-run-poller", daemon=True)
+        self._thread.start()
+
+
+    def _mark_action_worker(self):
+        self._local.handling = True
+
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed and (not self._timers or self._timers[0][0] > time.monotonic()):
+                    timeout = self._timers[0][0] - time.monotonic() if self._timers else None
+                    self._condition.wait(timeout)
+                if self._closed:
+                    return
+                due = []
+                now = time.monotonic()
+                while self._timers and self._timers[0][0] <= now:
+                    due.append(heapq.heappop(self._timers)[2])
+
+            for polled_run in due:
+                self._submit(self._poll_pool, self._check, polled_run)
+
+
+    def _schedule(self, polled_run, delay):
+        with self._condition:
+            if self._closed:
+                return
+            heapq.heappush(self._timers, (time.monotonic() + delay, next(self._sequence), polled_run))
+            self._condition.notify()
+
+
+    def _submit(self, pool, func, polled_run):
+        try:
+            pool.submit(func, polled_run)
+        except RuntimeError:
+            # The pool was shut down, the future was cancelled along with it
+            pass
+
+
+    def _advance(self, polled_run):
+        # Decides what happens next to a run after its status was updated
+        watch = polled_run.watch
+        if polled_run.future.cancelled():
+            self._untrack(polled_run)
+            return
+
+        if not watch.is_active:
+            self._complete(polled_run)
+            return
+
+        self.monitor.tracer.event('run.poll', run_id=watch.run.id, status=watch.status)
+        deadline = polled_run.deadline
+        if not polled_run.cancel_requested and deadline is not None and time.monotonic() >= deadline:
+            polled_run.cancel_requested = True
+            self._submit(self._poll_pool, self._cancel, polled_run)
+            return
+
+        if watch.status == 'requires_action' and polled_run.on_requires_action is not None and not polled_run.cancel_requested:
+            self._submit(self._action_pool, self._handle, polled_run)
+            return
+
+        delay = self.monitor.policy.next_interval(watch.attempt)
+        if deadline is not None and not polled_run.cancel_requested:
+            delay = min(delay, max(deadline - time.monotonic(), 0))
+        self._schedule(polled_run, delay)
+
+
+    def _check(self, polled_run):
+        try:
+            self.monitor.poll(polled_run.watch)
+        except BaseException as e:
+            self._fail(polled_run, e)
+            return
+        if polled_run.metrics is not None:
+            polled_run.metrics.observe_status(polled_run.watch.status)
+        self._advance(polled_run)
+
+
+    def _cancel(self, polled_run):
+        try:
+            self.monitor.cancel(polled_run.watch)
+        except BaseException as e:
+            self._fail(polled_run, e)
+            return
+        self._advance(polled_run)
+
+
+    def _handle(self, polled_run):
+        try:
+            polled_run.on_requires_action(polled_run.watch.run)
+        except BaseException as e:
+            self._fail(polled_run, e)
+            return
+        # Tool outputs were just submitted, so the status is about to change.
+        polled_run.watch.reset()
+        self._schedule(polled_run, self.monitor.policy.next_interval(0))
+
+
+    def _complete(self, polled_run):
+        watch = polled_run.watch
+        self.monitor.record_poll_count(watch.run.id, watch.polls)
+        if polled_run.metrics is not None:
+            polled_run.metrics.poll_count += watch.polls
+        self.monitor.tracer.event('run.finished', logging.INFO, run_id=watch.run.id, status=watch.status, polls=watch.polls)
+        self._untrack(polled_run)
+        try:
+            polled_run.future.set_result(watch.run)
+        except InvalidStateError:
+            # The caller cancelled the future
+            pass
+
+
+    def _fail(self, polled_run, error):
+        self.logger.error(f"Monitoring run {polled_run.watch.run.id} failed: {str(error)}")
+        self._untrack(polled_run)
+        try:
+            polled_run.future.set_exception(error)
+        except InvalidStateError:
+            pass
+
+
+    def _untrack(self, polled_run):
+        with self._condition:
+            self._tracked.discard(polled_run)
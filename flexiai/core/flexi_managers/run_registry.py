@@ -0,0 +1,135 @@
+# flexiai/core/flexi_managers/run_registry.py
+import threading
+import time
+from collections import OrderedDict
+from openai import BadRequestError
+
+
+# Statuses for which a run is still owned by the service and must be polled again.
+ACTIVE_RUN_STATUSES = ('queued', 'in_progress', 'cancelling', 'requires_action')
+
+# Statuses for which another run can't be started on the same thread yet.
+BLOCKING_RUN_STATUSES = ('queued', 'in_progress', 'cancelling')
+
+# How long an idle mark is trusted when other processes share the threads, through a shared state backend.
+SHARED_THREADS_TTL = 2.0
+
+
+def is_active_run_error(error):
+    """
+    Tells whether the service rejected a request because a run is active in the thread, which
+    happens when another process started a run after the thread was last seen idle.
+
+    Args:
+        error (Exception): The error raised by the client.
+
+    Returns:
+        bool: True for the errors raised when creating a run or adding a message during an active run.
+    """
+    if not isinstance(error, BadRequestError):
+        return False
+    message = str(error).lower()
+    return 'active run' in message or 'while a run' in message
+
+
+class ActiveRunRegistry:
+    """
+    ActiveRunRegistry remembers, per thread, the last run this process launched or observed
+    and its last known status.
+
+    It lets the run managers skip listing the runs of a thread before starting a new one when
+    the local state says the thread is idle. An entry that wasn't refreshed for longer than the
+    time to live is considered unknown, since another process may have started a run on the
+    thread in the meantime. When other processes share the threads, the time to live must stay
+    short, see SHARED_THREADS_TTL.
+
+    Attributes:
+        ttl (float): How long, in seconds, a recorded state can be trusted.
+        max_threads (int): How many threads are tracked before the least recently updated are forgotten.
+    """
+
+    def __init__(self, ttl=300.0, max_threads=10000, clock=time.monotonic):
+        """
+        Initializes the ActiveRunRegistry.
+
+        Args:
+            ttl (float, optional): How long, in seconds, a recorded state can be trusted. Defaults to 300.
+            max_threads (int, optional): How many threads are tracked at most. Defaults to 10000.
+            clock (callable, optional): Returns the current time in seconds. Defaults to time.monotonic.
+        """
+        self.ttl = ttl
+        self.max_threads = max_threads
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+
+    def record(self, thread_id, run_id, status):
+        """
+        Records the last known status of a run of a thread.
+
+        Args:
+            thread_id (str): The ID of the thread.
+            run_id (str): The ID of the run, or None if the thread has no run.
+            status (str): The status of the run, or 'idle' if the thread has no run.
+        """
+        with self._lock:
+            self._entries[thread_id] = {'run_id': run_id, 'status': status, 'updated_at': self._clock()}
+            self._entries.move_to_end(thread_id)
+            while len(self._entries) > self.max_threads:
+                self._entries.popitem(last=False)
+
+
+    def mark_idle(self, thread_id):
+        """
+        Records that a thread has no active run, for example because it was just created.
+
+        Args:
+            thread_id (str): The ID of the thread.
+        """
+        self.record(thread_id, None, 'idle')
+
+
+    def forget(self, thread_id):
+        """
+        Drops the state of a thread so the next check goes to the API.
+
+        Args:
+            thread_id (str): The ID of the thread.
+        """
+        with self._lock:
+            self._entries.pop(thread_id, None)
+
+
+    def get(self, thread_id):
+        """
+        Returns the recorded state of a thread.
+
+        Args:
+            thread_id (str): The ID of the thread.
+
+        Returns:
+            dict: A copy of the entry with `run_id`, `status` and `updated_at`, or None if the thread is unknown.
+        """
+        with self._lock:
+            entry = self._entries.get(thread_id)
+            return dict(entry) if entry else None
+
+
+    def is_idle(self, thread_id):
+        """
+        Tells whether the recorded state proves the thread has no active run.
+
+        Args:
+            thread_id (str): The ID of the thread.
+
+        Returns:
+            bool: True if the state is fresh and its run is finished, False if it is active, unknown or stale.
+        """
+        with self._lock:
+            entry = self._entries.get(thread_id)
+            if entry is None:
+                return False
+            if self._clock() - entry['updated_at'] > self.ttl:
+                return False
+            return entry['status'] not in ACTIVE_RUN_STATUSES
@@ -0,0 +1,183 @@
+# flexiai/core/flexi_managers/run_scheduler.py
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+
+class RunScheduler:
+    """
+    RunScheduler executes run requests for many (assistant_id, thread_id) pairs concurrently.
+
+    At most `max_in_flight` runs are executed at the same time. Excess requests are queued per
+    (assistant_id, thread_id) pair and the queues are served round-robin, so a pair with many
+    pending requests can't starve the others. A thread never has two runs in flight at once,
+    since the Assistants API rejects a new run while another one is active on the thread.
+
+    Requests go through `RunManager.create_and_monitor_run`, so they share the manager's rate
+    limiter, tool executor and run registry.
+
+    Attributes:
+        run_manager (RunManager): The manager executing the runs.
+        logger (logging.Logger): The logger for logging information and errors.
+        max_in_flight (int): The maximum number of runs executed at the same time.
+    """
+
+    def __init__(self, run_manager, logger, max_in_flight=8):
+        """
+        Initializes the RunScheduler.
+
+        Args:
+            run_manager (RunManager): The manager executing the runs.
+            logger (logging.Logger): The logger instance.
+            max_in_flight (int, optional): The maximum number of runs executed at the same time. Defaults to 8.
+        """
+        if max_in_flight < 1:
+            raise ValueError("max_in_flight must be at least 1.")
+        self.run_manager = run_manager
+        self.logger = logger
+        self.max_in_flight = max_in_flight
+        self._queues = OrderedDict()
+        self._parked = {}
+        self._busy_threads = set()
+        self._in_flight = 0
+        self._closed = False
+        self._stopped = False
+        self._lock = threading.Lock()
+        self._drained = threading.Condition(self._lock)
+        self._pool = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="flexiai-run")
+
+
+    def submit(self, assistant_id, thread_id, user_message=None, role=None, metadata=None):
+        """
+        Queues a run request.
+
+        Args:
+            assistant_id (str): The ID of the assistant.
+            thread_id (str): The ID of the thread.
+            user_message (str, optional): The user's message content to add before creating the run.
+            role (str, optional): The role of the message sender. Defaults to 'user'.
+            metadata (dict, optional): Metadata to include with the message.
+
+        Returns:
+            Future: Resolves to the final run object, or to the exception raised while executing the run.
+
+        Raises:
+            RuntimeError: If the scheduler was shut down.
+        """
+        future = Future()
+        request = {
+            'assistant_id': assistant_id,
+            'thread_id': thread_id,
+            'user_message': user_message,
+            'role': role,
+            'metadata': metadata
+        }
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The run scheduler was shut down.")
+            key = (assistant_id, thread_id)
+            queue = self._parked.get(key)
+            if queue is None:
+                queue = self._queues.setdefault(key, deque())
+            queue.append((future, request))
+            self.logger.info(f"Queued a run for thread {thread_id} with assistant {assistant_id}")
+            self._dispatch()
+        return future
+
+
+    def get_stats(self):
+        """
+        Returns the state of the scheduler.
+
+        Returns:
+            dict: The number of `queued` and `in_flight` runs.
+        """
+        with self._lock:
+            return {
+                'queued': sum(len(queue) for queue in list(self._queues.values()) + list(self._parked.values())),
+                'in_flight': self._in_flight
+            }
+
+
+    def shutdown(self, wait=True, cancel_pending=False):
+        """
+        Stops accepting requests. Without `wait`, the requests still queued are cancelled, since
+        nothing executes them once the scheduler is shut down.
+
+        Args:
+            wait (bool, optional): Whether to execute the queued requests and wait for the runs in flight to finish. Defaults to True.
+            cancel_pending (bool, optional): Whether to cancel the queued requests instead of executing them. Defaults to False.
+        """
+        with self._lock:
+            self._closed = True
+            if cancel_pending:
+                self._cancel_queued()
+
+        if wait:
+            # Queued requests are dispatched as the runs in flight finish
+            with self._drained:
+                self._drained.wait_for(lambda: not self._queues and self._in_flight == 0)
+        with self._lock:
+            self._stopped = True
+            self._cancel_queued()
+        self._pool.shutdown(wait=wait)
+
+
+    def _cancel_queued(self):
+        # Called with the lock held
+        for queue in list(self._queues.values()) + list(self._parked.values()):
+            for future, _ in queue:
+                future.cancel()
+        self._queues.clear()
+        self._parked.clear()
+
+
+    def _dispatch(self):
+        # Called with the lock held. Each pass hands at most one request per pair to the pool.
+        if self._stopped:
+            return
+        progressed = True
+        while progressed and self._in_flight < self.max_in_flight:
+            progressed = False
+            for key in list(self._queues.keys()):
+                if self._in_flight >= self.max_in_flight:
+                    return
+                assistant_id, thread_id = key
+                if thread_id in self._busy_threads:
+                    continue
+
+                queue = self._queues.pop(key)
+                future, request = queue.popleft()
+                progressed = True
+
+                if not future.set_running_or_notify_cancel():
+                    if queue:
+                        self._queues[key] = queue
+                    continue
+
+                # The rest of the pair's requests wait aside until this run is done, then go to the back of the line
+                self._parked[key] = queue
+                self._in_flight += 1
+                self._busy_threads.add(thread_id)
+                self._pool.submit(self._execute, key, future, request)
+
+
+    def _execute(self, key, future, request):
+        try:
+            run = self.run_manager.create_and_monitor_run(
+                request['assistant_id'], request['thread_id'], request['user_message'], request['role'], request['metadata']
+            )
+            future.set_result(run)
+        except BaseException as e:
+            self.logger.error(f"Scheduled run for thread {request['thread_id']} failed: {str(e)}")
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+                self._busy_threads.discard(request['thread_id'])
+                queue = self._parked.pop(key, None)
+                if queue:
+                    self._queues[key] = queue
+                self._dispatch()
+                if not self._queues and self._in_flight == 0:
+                    self._drained.notify_all()
@@ -0,0 +1,523 @@
+# flexiai/core/flexi_managers/state_backend.py
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from flexiai.core.flexi_managers.content_store import ProcessedContentStore
+
+
+class StateBackend(ABC):
+    """
+    Abstract base class for state backends, which store the state of the MultiAgentSystemManager:
+    the thread of each assistant with its status, and the processed content assistants leave for each
+    other. Subclass it to keep that state elsewhere; every method must be safe to call from several
+    threads at once, and `close` is the only one with a default implementation.
+
+    Attributes:
+        shared (bool): Whether other processes see the same state, and so run the same threads.
+    """
+
+    shared = False
+
+    @abstractmethod
+    def get_thread(self, assistant_id):
+        """
+        Returns the thread of an assistant.
+
+        Args:
+            assistant_id (str): The ID of the assistant.
+
+        Returns:
+            dict: The `thread_id` and `status` of the thread, or None if the assistant has none.
+        """
+        pass
+
+
+    @abstractmethod
+    def add_thread(self, assistant_id, thread_id, status):
+        """
+        Records the thread of an assistant, unless it already has one.
+
+        Args:
+            assistant_id (str): The ID of the assistant.
+            thread_id (str): The ID of the thread.
+            status (str): The status of the thread.
+
+        Returns:
+            dict: The `thread_id` and `status` of the thread of the assistant, which is not the given
+                one if another caller recorded a thread first.
+        """
+        pass
+
+
+    @abstractmethod
+    def set_thread_status(self, assistant_id, status):
+        """
+        Updates the status of the thread of an assistant.
+
+        Args:
+            assistant_id (str): The ID of the assistant.
+            status (str): The new status.
+
+        Returns:
+            bool: False if the assistant has no thread.
+        """
+        pass
+
+
+    @abstractmethod
+    def get_threads(self):
+        """
+        Returns the threads of every assistant.
+
+        Returns:
+            dict: The `thread_id` and `status` of the thread, per assistant ID.
+        """
+        pass
+
+
+    @abstractmethod
+    def save_content(self, from_assistant_id, to_assistant_id, content):
+        """
+        Appends processed content directed from one assistant to another.
+
+        Args:
+            from_assistant_id (str): The ID of the assistant the content originates from.
+            to_assistant_id (str): The ID of the assistant the content is directed to.
+            content (object): The content.
+
+        Returns:
+            bool: False if the backend rejected the content, for example because it exceeds a size limit.
+        """
+        pass
+
+
+    @abstractmethod
+    def pop_content(self, from_assistant_id, to_assistant_id):
+        """
+        Removes and returns the content directed from one assistant to another, atomically.
+
+        Args:
+            from_assistant_id (str): The ID of the assistant the content originates from.
+            to_assistant_id (str): The ID of the assistant the content is directed to.
+
+        Returns:
+            list: The content, in the order it was saved.
+        """
+        pass
+
+
+    @abstractmethod
+    def pop_all_content(self, to_assistant_id):
+        """
+        Removes and returns the content directed to an assistant from every other one, atomically.
+
+        Args:
+            to_assistant_id (str): The ID of the assistant the content is directed to.
+
+        Returns:
+            list: The content, grouped by sender in the order the senders first saved content.
+        """
+        pass
+
+
+    @abstractmethod
+    def get_contents(self):
+        """
+        Returns the content not loaded yet.
+
+        Returns:
+            dict: The content, per (from_assistant_id, to_assistant_id).
+        """
+        pass
+
+
+    @abstractmethod
+    def get_stats(self):
+        """
+        Returns the metrics of the backend.
+
+        Returns:
+            dict: The number of `threads` and of pieces of content stored (`items`), and the metrics
+                specific to the backend.
+        """
+        pass
+
+
+    def close(self):
+        """
+        Releases the resources of the backend.
+        """
+
+
+class InMemoryStateBackend(StateBackend):
+    """
+    InMemoryStateBackend keeps the state in the memory of the process, the default backend. The
+    processed content is kept by a ProcessedContentStore, sharded by to_assistant_id and optionally
+    bounded in memory and time.
+
+    Attributes:
+        content_store (ProcessedContentStore): Keeps the processed content.
+    """
+
+    def __init__(self, content_store=None):
+        """
+        Initializes the InMemoryStateBackend.
+
+        Args:
+            content_store (ProcessedContentStore, optional): Keeps the processed content. Defaults to an unbounded store.
+        """
+        # Structure: {assistant_id: {'thread_id': str, 'status': str}}
+        self._threads = {}
+        self._threads_lock = threading.Lock()
+        self.content_store = content_store or ProcessedContentStore(logging.getLogger(__name__))
+
+
+    def get_thread(self, assistant_id):
+        with self._threads_lock:
+            thread = self._threads.get(assistant_id)
+            return dict(thread) if thread is not None else None
+
+
+    def add_thread(self, assistant_id, thread_id, status):
+        with self._threads_lock:
+            thread = self._threads.setdefault(assistant_id, {'thread_id': thread_id, 'status': status})
+            return dict(thread)
+
+
+    def set_thread_status(self, assistant_id, status):
+        with self._threads_lock:
+            if assistant_id not in self._threads:
+                return False
+            self._threads[assistant_id]['status'] = status
+            return True
+
+
+    def get_threads(self):
+        with self._threads_lock:
+            return {assistant_id: dict(thread) for assistant_id, thread in self._threads.items()}
+
+
+    def save_content(self, from_assistant_id, to_assistant_id, content):
+        return self.content_store.save(from_assistant_id, to_assistant_id, content)
+
+
+    def pop_content(self, from_assistant_id, to_assistant_id):
+        return self.content_store.pop(from_assistant_id, to_assistant_id)
+
+
+    def pop_all_content(self, to_assistant_id):
+        return self.content_store.pop_all(to_assistant_id)
+
+
+    def get_contents(self):
+        return self.content_store.snapshot()
+
+
+    def get_stats(self):
+        stats = self.content_store.get_stats()
+        with self._threads_lock:
+            stats['threads'] = len(self._threads)
+        return stats
+
+
+    def close(self):
+        self.content_store.close()
+
+
+class SQLiteStateBackend(StateBackend):
+    """
+    SQLiteStateBackend keeps the state in a SQLite database file, which the worker processes of a
+    server share and which survives restarts: the threads of the assistants, warmed up once, are
+    found again instead of being created and initialized by every worker.
+
+    The database is in WAL mode, so readers don't block the writer. Loading content selects and
+    deletes it in one write transaction, so a piece of content is loaded by exactly one worker.
+    The content is stored as JSON, so it must be serializable.
+
+    The processed content can be bounded like the one kept in memory: saving content deletes the
+    content older than `ttl` and the oldest content beyond the size caps, measured on the JSON
+    text, and rejects content that alone exceeds a cap. Expired content is never returned.
+
+    Attributes:
+        path (str): The path of the database file.
+        timeout (float): How long, in seconds, to wait for the lock of the database.
+        logger (logging.Logger): The logger for logging information and errors.
+        max_key_bytes (int): The size cap of the content of a (from_assistant_id, to_assistant_id) pair.
+        max_total_bytes (int): The size cap of all the content.
+        ttl (float): The time, in seconds, after which saved content expires.
+    """
+
+    shared = True
+
+    def __init__(self, path, timeout=30.0, logger=None, max_key_bytes=None, max_total_bytes=None, ttl=None):
+        """
+        Initializes the SQLiteStateBackend and creates its tables if needed. Every limit is disabled by default.
+
+        Args:
+            path (str): The path of the database file.
+            timeout (float, optional): How long to wait for the lock of the database. Defaults to 30.
+            logger (logging.Logger, optional): The logger instance. Defaults to the logger of the module.
+            max_key_bytes (int, optional): The size cap of the content of a pair of assistants.
+            max_total_bytes (int, optional): The size cap of all the content.
+            ttl (float, optional): The time after which saved content expires.
+        """
+        self.path = path
+        self.timeout = timeout
+        self.logger = logger or logging.getLogger(__name__)
+        self.max_key_bytes = max_key_bytes
+        self.max_total_bytes = max_total_bytes
+        self.ttl = ttl
+        self._local = threading.local()
+        self._connections = []
+        self._connections_lock = threading.Lock()
+        # Counted by this process only
+        self._stats = {'expired': 0, 'evicted': 0, 'rejected': 0}
+        self._stats_lock = threading.Lock()
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._transaction() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS threads (assistant_id TEXT PRIMARY KEY, thread_id TEXT NOT NULL, status TEXT)"
+            )
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS processed_content ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, from_assistant_id TEXT NOT NULL, "
+                "to_assistant_id TEXT NOT NULL, content TEXT NOT NULL, saved_at REAL)"
+            )
+            columns = [row[1] for row in connection.execute("PRAGMA table_info(processed_content)")]
+            if 'saved_at' not in columns:
+                # Databases created before the time to live: their content never expires
+                connection.execute("ALTER TABLE processed_content ADD COLUMN saved_at REAL")
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS processed_content_recipient ON processed_content (to_assistant_id, from_assistant_id, id)"
+            )
+
+
+    def get_thread(self, assistant_id):
+        row = self._connection().execute(
+            "SELECT thread_id, status FROM threads WHERE assistant_id = ?", (assistant_id,)
+        ).fetchone()
+        return {'thread_id': row[0], 'status': row[1]} if row is not None else None
+
+
+    def add_thread(self, assistant_id, thread_id, status):
+        with self._transaction() as connection:
+            connection.execute(
+                "INSERT OR IGNORE INTO threads (assistant_id, thread_id, status) VALUES (?, ?, ?)", (assistant_id, thread_id, status)
+            )
+            row = connection.execute("SELECT thread_id, status FROM threads WHERE assistant_id = ?", (assistant_id,)).fetchone()
+        return {'thread_id': row[0], 'status': row[1]}
+
+
+    def set_thread_status(self, assistant_id, status):
+        with self._transaction() as connection:
+            cursor = connection.execute("UPDATE threads SET status = ? WHERE assistant_id = ?", (status, assistant_id))
+        return cursor.rowcount > 0
+
+
+    def get_threads(self):
+        rows = self._connection().execute("SELECT assistant_id, thread_id, status FROM threads").fetchall()
+        return {row[0]: {'thread_id': row[1], 'status': row[2]} for row in rows}
+
+
+    def save_content(self, from_assistant_id, to_assistant_id, content):
+        # JSON is ASCII encoded by default, so its length is its size in bytes
+        payload = json.dumps(content)
+        caps = [cap for cap in (self.max_key_bytes, self.max_total_bytes) if cap is not None]
+        if caps and len(payload) > min(caps):
+            self._count('rejected', 1)
+            self.logger.warning(
+                f"Rejected processed content from {from_assistant_id} to {to_assistant_id}: "
+                f"its {len(payload)} bytes exceed the {min(caps)} bytes size cap."
+            )
+            return False
+
+        with self._transaction() as connection:
+            connection.execute(
+                "INSERT INTO processed_content (from_assistant_id, to_assistant_id, content, saved_at) VALUES (?, ?, ?, ?)",
+                (from_assistant_id, to_assistant_id, payload, time.time())
+            )
+            expired = self._expire(connection)
+            evicted = 0
+            if self.max_key_bytes is not None:
+                evicted += self._evict(
+                    connection, self.max_key_bytes, "WHERE to_assistant_id = ? AND from_assistant_id = ?", (to_assistant_id, from_assistant_id)
+                )
+            if self.max_total_bytes is not None:
+                evicted += self._evict(connection, self.max_total_bytes, "", ())
+        self._count('expired', expired)
+        self._count('evicted', evicted)
+        if evicted:
+            self.logger.warning(f"Dropped {evicted} pieces of processed content past the size caps of the processed content.")
+        return True
+
+
+    def pop_content(self, from_assistant_id, to_assistant_id):
+        with self._transaction() as connection:
+            expired = self._expire(connection)
+            rows = connection.execute(
+                "SELECT id, content FROM processed_content WHERE to_assistant_id = ? AND from_assistant_id = ? ORDER BY id",
+                (to_assistant_id, from_assistant_id)
+            ).fetchall()
+            self._delete(connection, rows)
+        self._count('expired', expired)
+        return [json.loads(row[1]) for row in rows]
+
+
+    def pop_all_content(self, to_assistant_id):
+        with self._transaction() as connection:
+            expired = self._expire(connection)
+            rows = connection.execute(
+                "SELECT id, content, from_assistant_id FROM processed_content WHERE to_assistant_id = ? ORDER BY id",
+                (to_assistant_id,)
+            ).fetchall()
+            self._delete(connection, rows)
+        self._count('expired', expired)
+
+        # Grouped by sender, in the order the senders first saved content
+        grouped = {}
+        for row in rows:
+            grouped.setdefault(row[2], []).append(json.loads(row[1]))
+        return [content for contents in grouped.values() for content in contents]
+
+
+    def get_contents(self):
+        rows = self._connection().execute(
+            "SELECT from_assistant_id, to_assistant_id, content FROM processed_content "
+            "WHERE saved_at IS NULL OR saved_at > ? ORDER BY id",
+            (self._expiry(),)
+        ).fetchall()
+        snapshot = {}
+        for row in rows:
+            snapshot.setdefault((row[0], row[1]), []).append(json.loads(row[2]))
+        return snapshot
+
+
+    def get_stats(self):
+        connection = self._connection()
+        threads = connection.execute("SELECT COUNT(*) FROM threads").fetchone()[0]
+        items, disk_bytes = connection.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(content)), 0) FROM processed_content").fetchone()
+        with self._stats_lock:
+            return dict(self._stats, threads=threads, items=items, disk_bytes=disk_bytes)
+
+
+    def close(self):
+        with self._connections_lock:
+            connections, self._connections = self._connections, []
+        for connection in connections:
+            connection.close()
+        self._local = threading.local()
+
+
+    def _connection(self):
+        # One connection per thread, SQLite connections can't be shared between threads
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=self.timeout, isolation_level=None, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+            with self._connections_lock:
+                self._connections.append(connection)
+        return connection
+
+
+    def _transaction(self):
+        return _Transaction(self._connection())
+
+
+    def _delete(self, connection, rows):
+        connection.executemany("DELETE FROM processed_content WHERE id = ?", [(row[0],) for row in rows])
+
+
+    def _expiry(self):
+        # The time.time() value up to which saved content has expired
+        return time.time() - self.ttl if self.ttl is not None else float('-inf')
+
+
+    def _expire(self, connection):
+        # Called in a transaction: deletes the expired content
+        if self.ttl is None:
+            return 0
+        expired = connection.execute("DELETE FROM processed_content WHERE saved_at <= ?", (self._expiry(),)).rowcount
+        if expired:
+            self.logger.warning(f"Dropped {expired} pieces of processed content past their {self.ttl} seconds time to live.")
+        return expired
+
+
+    def _evict(self, connection, cap, where, parameters):
+        # Called in a transaction: deletes the oldest content of the selection beyond the cap
+        rows = connection.execute(f"SELECT id, LENGTH(content) FROM processed_content {where} ORDER BY id DESC", parameters).fetchall()
+        size, evicted = 0, []
+        for row in rows:
+            size += row[1]
+            if size > cap:
+                evicted.append(row)
+        self._delete(connection, evicted)
+        return len(evicted)
+
+
+    def _count(self, reason, count):
+        if count:
+            with self._stats_lock:
+                self._stats[reason] += count
+
+
+class _Transaction:
+    # Runs the statements of a `with` block in a write transaction, taken when it starts
+    def __init__(self, connection):
+        self.connection = connection
+
+
+    def __enter__(self):
+        self.connection.execute("BEGIN IMMEDIATE")
+        return self.connection
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.connection.execute("COMMIT" if exc_type is None else "ROLLBACK")
+
+
+def create_state_backend(config, logger):
+    """
+    Creates the state backend of the configuration: a SQLiteStateBackend when STATE_BACKEND_PATH is
+    set, otherwise an InMemoryStateBackend whose content store has the PROCESSED_CONTENT_* limits
+    (0 disables a limit). The SQLite database applies the size caps and the time to live; the
+    compression and spilling settings only concern memory and are ignored, with a warning.
+
+    Args:
+        config (Config): The configuration.
+        logger (logging.Logger): The logger of the content store.
+
+    Returns:
+        StateBackend: The state backend.
+    """
+    if config.STATE_BACKEND_PATH:
+        ignored = [
+            name for name in ('PROCESSED_CONTENT_COMPRESS_BYTES', 'PROCESSED_CONTENT_SPILL_BYTES', 'PROCESSED_CONTENT_SPILL_DIR')
+            if getattr(config, name)
+        ]
+        if ignored:
+            logger.warning(f"{', '.join(ignored)} only apply to the content kept in memory, ignored with STATE_BACKEND_PATH set.")
+        return SQLiteStateBackend(
+            config.STATE_BACKEND_PATH,
+            logger=logger,
+            max_key_bytes=config.PROCESSED_CONTENT_MAX_KEY_BYTES or None,
+            max_total_bytes=config.PROCESSED_CONTENT_MAX_BYTES or None,
+            ttl=config.PROCESSED_CONTENT_TTL or None
+        )
+    content_store = ProcessedContentStore(
+        logger,
+        max_key_bytes=config.PROCESSED_CONTENT_MAX_KEY_BYTES or None,
+        max_total_bytes=config.PROCESSED_CONTENT_MAX_BYTES or None,
+        ttl=config.PROCESSED_CONTENT_TTL or None,
+        compress_threshold=config.PROCESSED_CONTENT_COMPRESS_BYTES or None,
+        spill_threshold=config.PROCESSED_CONTENT_SPILL_BYTES or None,
+        spill_dir=config.PROCESSED_CONTENT_SPILL_DIR or None
+    )
+    return InMemoryStateBackend(content_store)
@@ -0,0 +1,349 @@
+# flexiai/core/flexi_managers/thread_lease.py
+import threading
+import time
+from collections import deque
+
+
+class ThreadLease:
+    """
+    ThreadLease gives its owner exclusive use of one thread of an assistant until it is released.
+    It can be used as a context manager, which releases it on exit.
+
+    Attributes:
+        assistant_id (str): The ID of the assistant the thread belongs to.
+        thread_id (str): The ID of the leased thread.
+        owner (str): The session or task the lease is bound to, None for an anonymous lease.
+        acquired_at (float): The time.monotonic() value the lease was acquired at.
+        renewed_at (float): The time.monotonic() value the lease was last acquired or renewed at.
+        released (bool): Whether the lease was released or expired.
+    """
+
+    def __init__(self, manager, assistant_id, thread_id, owner=None):
+        self.manager = manager
+        self.assistant_id = assistant_id
+        self.thread_id = thread_id
+        self.owner = owner
+        self.acquired_at = time.monotonic()
+        self.renewed_at = self.acquired_at
+        self.released = False
+
+
+    def release(self, discard=False):
+        """
+        Ends the lease. The thread is kept for the owner, or goes back to the pool of the assistant for an anonymous lease.
+
+        Args:
+            discard (bool, optional): Whether to delete the thread instead of reusing it. Defaults to False.
+        """
+        self.manager.release(self, discard)
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.release()
+
+
+class _AssistantThreads:
+    # The threads of one assistant
+    def __init__(self):
+        self.idle = deque()
+        self.leases = {}
+        # The threads kept for their owner between leases, by owner and by thread ID
+        self.parked = {}
+        self.parked_owners = {}
+        self.creating = 0
+        self.waiting = 0
+        self.stats = {
+            'acquired': 0, 'created': 0, 'reused': 0, 'resumed': 0, 'released': 0, 'expired': 0, 'timeouts': 0
+        }
+
+
+    @property
+    def size(self):
+        # The parked threads aren't in use, and can't be handed to another caller either
+        return len(self.idle) + len(self.leases) + self.creating
+
+
+    def park(self, owner, thread_id):
+        self.parked[owner] = thread_id
+        self.parked_owners[thread_id] = owner
+
+
+    def unpark(self, owner):
+        thread_id = self.parked.pop(owner)
+        del self.parked_owners[thread_id]
+        return thread_id
+
+
+class ThreadLeaseManager:
+    """
+    ThreadLeaseManager lets one assistant serve many conversations at once: every assistant has a
+    bounded pool of threads, and each caller leases its own thread instead of sharing a single one
+    and queueing behind the runs of the others.
+
+    A lease is bound to an owner, such as a session or a task: while it is held, acquiring again
+    for the same owner returns the same lease. Once released, the thread of an owner is kept for it,
+    and its next lease resumes the same conversation; only the threads of anonymous leases go back
+    to the pool and are handed to the next caller. A thread is deleted only when its lease is
+    released with `discard`. When `max_threads_per_assistant` threads of an assistant are leased or
+    idle, callers wait for a release; the threads kept for their owners don't count against it.
+
+    With a `lease_ttl`, a lease that wasn't acquired again or renewed for that long expires, which
+    frees its place in the pool as a release would. Its thread is still kept for its owner.
+
+    Attributes:
+        thread_manager (ThreadManager): Creates and deletes the threads.
+        logger (logging.Logger): The logger for logging information and errors.
+        max_threads_per_assistant (int): The maximum number of leased or idle threads of an assistant. None for no limit.
+        lease_ttl (float): The time, in seconds, after which an unused lease expires. None to never expire.
+        on_thread_created (callable): Called with the ID of every thread created for a lease.
+    """
+
+    def __init__(self, thread_manager, logger, max_threads_per_assistant=16, lease_ttl=None, on_thread_created=None):
+        """
+        Initializes the ThreadLeaseManager.
+
+        Args:
+            thread_manager (ThreadManager): The manager creating and deleting the threads.
+            logger (logging.Logger): The logger instance.
+            max_threads_per_assistant (int, optional): The maximum number of leased or idle threads of an assistant.
+                None for no limit. Defaults to 16.
+            lease_ttl (float, optional): The time after which an unused lease expires. Defaults to never.
+            on_thread_created (callable, optional): Called with the ID of every thread created for a lease.
+        """
+        if max_threads_per_assistant is not None and max_threads_per_assistant < 1:
+            raise ValueError("max_threads_per_assistant must be at least 1.")
+        self.thread_manager = thread_manager
+        self.logger = logger
+        self.max_threads_per_assistant = max_threads_per_assistant
+        self.lease_ttl = lease_ttl
+        self.on_thread_created = on_thread_created
+        self._assistants = {}
+        self._owners = {}
+        self._condition = threading.Condition()
+
+
+    def acquire(self, assistant_id, owner=None, timeout=None, thread_id=None):
+        """
+        Leases a thread of an assistant.
+
+        Args:
+            assistant_id (str): The ID of the assistant.
+            owner (str, optional): The session or task the lease is bound to. The lease it already
+                holds is returned and renewed, and the thread kept for it is leased again. Defaults
+                to a new anonymous lease.
+            timeout (float, optional): How long to wait for a thread when the pool is exhausted. Defaults to no limit.
+            thread_id (str, optional): The thread the owner already uses, such as the one stored in its
+                session, leased instead of a new one when no thread is kept for the owner. Ignored for
+                anonymous leases and for threads leased or kept for another owner.
+
+        Returns:
+            ThreadLease: The lease.
+
+        Raises:
+            TimeoutError: If no thread became available within `timeout`.
+            OpenAIError: If the API call to create a new thread fails.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        timed_out = False
+        with self._condition:
+            threads = self._assistants.setdefault(assistant_id, _AssistantThreads())
+            while True:
+                self._expire(threads)
+                lease = self._owners.get((assistant_id, owner)) if owner is not None else None
+                if lease is not None:
+                    lease.renewed_at = time.monotonic()
+                    break
+                resumed = self._owned_thread(threads, owner, thread_id)
+                if resumed is not None and (resumed in threads.idle or self._has_room(threads)):
+                    if resumed in threads.parked_owners:
+                        threads.unpark(owner)
+                    elif resumed in threads.idle:
+                        threads.idle.remove(resumed)
+                    lease = self._lease(threads, assistant_id, resumed, owner)
+                    threads.stats['resumed'] += 1
+                    break
+                if resumed is None and threads.idle:
+                    lease = self._lease(threads, assistant_id, threads.idle.popleft(), owner)
+                    threads.stats['reused'] += 1
+                    break
+                if resumed is None and self._has_room(threads):
+                    threads.creating += 1
+                    break
+
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    threads.stats['timeouts'] += 1
+                    timed_out = True
+                    break
+                threads.waiting += 1
+                try:
+                    self._condition.wait(self._wait_time(threads, remaining))
+                finally:
+                    threads.waiting -= 1
+
+        if timed_out:
+            raise TimeoutError(f"No thread of assistant {assistant_id} became available within {timeout} seconds.")
+        if lease is not None:
+            return lease
+        return self._create(threads, assistant_id, owner)
+
+
+    def renew(self, lease):
+        """
+        Keeps a lease from expiring.
+
+        Args:
+            lease (ThreadLease): The lease.
+
+        Returns:
+            bool: False if the lease was already released or expired.
+        """
+        with self._condition:
+            if lease.released:
+                return False
+            lease.renewed_at = time.monotonic()
+            return True
+
+
+    def release(self, lease, discard=False):
+        """
+        Ends a lease. Releasing a lease twice has no effect.
+
+        Args:
+            lease (ThreadLease): The lease.
+            discard (bool, optional): Whether to delete the thread instead of reusing it. Defaults to False.
+        """
+        with self._condition:
+            if lease.released:
+                return
+            threads = self._assistants[lease.assistant_id]
+            self._unlease(threads, lease)
+            threads.stats['released'] += 1
+            if not discard:
+                self._return(threads, lease)
+            self._condition.notify_all()
+
+        if discard:
+            try:
+                self.thread_manager.delete_thread(lease.thread_id)
+            except Exception as e:
+                self.logger.warning(f"Failed to delete the released thread {lease.thread_id}: {str(e)}")
+
+
+    def get_stats(self, assistant_id=None):
+        """
+        Returns the state of the thread pools.
+
+        Args:
+            assistant_id (str, optional): The ID of an assistant. Defaults to every assistant.
+
+        Returns:
+            dict: Per assistant ID, the number of `threads` in the pool, `leased` and `idle` ones, of threads
+                `parked` for their owner, of callers `waiting` for one, and the counts of leases `acquired`,
+                `released` and `expired`, of threads `created`, `reused` from the pool and `resumed` by their
+                owner, and of acquisitions that ran into their `timeouts`.
+        """
+        with self._condition:
+            stats = {}
+            for key, threads in self._assistants.items():
+                if assistant_id is not None and key != assistant_id:
+                    continue
+                stats[key] = dict(
+                    threads.stats, threads=threads.size, leased=len(threads.leases), idle=len(threads.idle),
+                    parked=len(threads.parked), waiting=threads.waiting
+                )
+            return stats
+
+
+    def _create(self, threads, assistant_id, owner):
+        try:
+            thread_id = self.thread_manager.create_thread().id
+        except BaseException:
+            with self._condition:
+                threads.creating -= 1
+                self._condition.notify_all()
+            raise
+
+        if self.on_thread_created is not None:
+            self.on_thread_created(thread_id)
+        with self._condition:
+            threads.creating -= 1
+            threads.stats['created'] += 1
+            lease = self._owners.get((assistant_id, owner)) if owner is not None else None
+            if lease is not None:
+                # Leased concurrently for the same owner, the new thread goes to the pool
+                threads.idle.append(thread_id)
+                self._condition.notify_all()
+                return lease
+            lease = self._lease(threads, assistant_id, thread_id, owner)
+        self.logger.info(f"Leased new thread {thread_id} of assistant ID: {assistant_id} to {owner or 'an anonymous caller'}.")
+        return lease
+
+
+    def _lease(self, threads, assistant_id, thread_id, owner):
+        # Called with the condition held
+        lease = ThreadLease(self, assistant_id, thread_id, owner)
+        threads.leases[thread_id] = lease
+        threads.stats['acquired'] += 1
+        if owner is not None:
+            self._owners[(assistant_id, owner)] = lease
+        return lease
+
+
+    def _unlease(self, threads, lease):
+        # Called with the condition held
+        lease.released = True
+        threads.leases.pop(lease.thread_id, None)
+        if self._owners.get((lease.assistant_id, lease.owner)) is lease:
+            del self._owners[(lease.assistant_id, lease.owner)]
+
+
+    def _return(self, threads, lease):
+        # Called with the condition held: the thread is kept for its owner, or goes back to the pool
+        if lease.owner is None:
+            threads.idle.append(lease.thread_id)
+        else:
+            threads.park(lease.owner, lease.thread_id)
+
+
+    def _owned_thread(self, threads, owner, thread_id):
+        # Called with the condition held: the thread to lease again to the owner, None for any thread
+        if owner is None:
+            return None
+        if owner in threads.parked:
+            return threads.parked[owner]
+        if thread_id is None or thread_id in threads.leases or thread_id in threads.parked_owners:
+            return None
+        return thread_id
+
+
+    def _has_room(self, threads):
+        # Called with the condition held
+        return self.max_threads_per_assistant is None or threads.size < self.max_threads_per_assistant
+
+
+    def _expire(self, threads):
+        # Called with the condition held: the threads of the expired leases are kept for their owner
+        if self.lease_ttl is None:
+            return
+        now = time.monotonic()
+        expired = [lease for lease in threads.leases.values() if now - lease.renewed_at >= self.lease_ttl]
+        for lease in expired:
+            self._unlease(threads, lease)
+            self._return(threads, lease)
+            threads.stats['expired'] += 1
+            self.logger.info(f"Lease of thread {lease.thread_id} held by {lease.owner or 'an anonymous caller'} expired.")
+        if expired:
+            self._condition.notify_all()
+
+
+    def _wait_time(self, threads, remaining):
+        # Called with the condition held: wakes up when the next lease expires
+        if self.lease_ttl is not None and threads.leases:
+            next_expiry = min(lease.renewed_at for lease in threads.leases.values()) + self.lease_ttl - time.monotonic()
+            remaining = next_expiry if remaining is None else min(remaining, next_expiry)
+        return None if remaining is None else max(remaining, 0)
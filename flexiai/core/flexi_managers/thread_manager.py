@@ -9,16 +9,27 @@ class ThreadManager:
     Attributes:
         client (OpenAI or AzureOpenAI): The client for interacting with OpenAI or Azure OpenAI services.
         logger (logging.Logger): The logger for logging information and errors.
+        thread_pool (WarmThreadPool): The pool of threads created ahead of time, if any.
+        rate_limiter (TokenBucket): The limiter shared with the other users of the client, if any.
     """
 
-    def __init__(self, client, logger):
+    def __init__(self, client, logger, thread_pool=None, rate_limiter=None):
         self.client = client
         self.logger = logger
+        self.thread_pool = thread_pool
+        self.rate_limiter = rate_limiter
+
+
+    def _throttle(self):
+        # Waits for the shared rate limiter, if any, before an API request
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
 
 
     def create_thread(self):
         """
-        Creates a new thread.
+        Creates a new thread. With a thread pool, an unused thread is taken from the pool
+        and a thread is only created when the pool is empty.
 
         Returns:
             object: The thread object.
@@ -28,7 +39,14 @@ class ThreadManager:
             Exception: If an unexpected error occurs.
         """
         try:
+            if self.thread_pool is not None:
+                thread = self.thread_pool.acquire()
+                if thread is not None:
+                    self.logger.info(f"Took thread with ID: {thread.id} from the thread pool")
+                    return thread
+
             self.logger.info("Creating a new thread")
+            self._throttle()
             thread = self.client.beta.threads.create()
             self.logger.info(f"Created thread with ID: {thread.id}")
             return thread
@@ -56,6 +74,7 @@ class ThreadManager:
         """
         try:
             self.logger.info(f"Retrieving details for thread ID: {thread_id}")
+            self._throttle()
             thread = self.client.beta.threads.retrieve(thread_id=thread_id)
             self.logger.info(f"Retrieved details for thread ID: {thread.id}")
             return thread
@@ -85,6 +104,7 @@ class ThreadManager:
         """
         try:
             self.logger.info(f"Updating thread ID: {thread_id} with metadata: {metadata} and tool_resources: {tool_resources}")
+            self._throttle()
             thread = self.client.beta.threads.update(thread_id=thread_id, metadata=metadata, tool_resources=tool_resources)
             self.logger.info(f"Updated thread ID: {thread.id}")
             return thread
@@ -112,6 +132,7 @@ class ThreadManager:
         """
         try:
             self.logger.info(f"Deleting thread ID: {thread_id}")
+            self._throttle()
             self.client.beta.threads.delete(thread_id=thread_id)
             self.logger.info(f"Deleted thread ID: {thread_id}")
             return True
@@ -140,6 +161,7 @@ class ThreadManager:
         """
         try:
             self.logger.info(f"Attaching assistant ID: {assistant_id} to thread ID: {thread_id}")
+            self._throttle()
             run = self.client.beta.threads.runs.create(thread_id=thread_id, assistant_id=assistant_id)
             self.logger.info(f"Attached assistant ID: {assistant_id} to thread ID: {thread_id}")
             return run
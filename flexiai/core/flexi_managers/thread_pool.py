@@ -0,0 +1,203 @@
+# flexiai/core/flexi_managers/thread_pool.py
+import threading
+import time
+from collections import deque
+
+
+class WarmThreadPool:
+    """
+    WarmThreadPool keeps empty threads created ahead of time, so a new conversation gets its
+    thread ID without waiting for a `threads.create` round trip.
+
+    A background worker creates threads until the pool holds `size` of them whenever it falls
+    below `low_water`, and deletes the ones that stayed unused for longer than `max_age`. The
+    threads are handed out oldest first. When the pool is empty, `acquire` returns None and the
+    caller creates its thread as usual.
+
+    Attributes:
+        client (OpenAI or AzureOpenAI): The client for interacting with OpenAI or Azure OpenAI services.
+        logger (logging.Logger): The logger for logging information and errors.
+        size (int): The number of threads the pool is refilled to.
+        low_water (int): The refill starts when fewer threads than this are available.
+        max_age (float): The time, in seconds, after which an unused thread is deleted.
+        retry_interval (float): The time, in seconds, to wait before refilling again after a failure.
+        rate_limiter (TokenBucket): The limiter shared with the other users of the client, if any.
+    """
+
+    def __init__(self, client, logger, size=4, low_water=None, max_age=3600.0, retry_interval=5.0, rate_limiter=None):
+        """
+        Initializes the WarmThreadPool. The worker is started by `start`.
+
+        Args:
+            client (OpenAI or AzureOpenAI): The client instance.
+            logger (logging.Logger): The logger instance.
+            size (int, optional): The number of threads the pool is refilled to. Defaults to 4.
+            low_water (int, optional): The refill threshold. Defaults to half of `size`, at least 1.
+            max_age (float, optional): The age, in seconds, after which an unused thread is deleted. Defaults to 3600.
+            retry_interval (float, optional): The wait, in seconds, after a failed creation. Defaults to 5.
+            rate_limiter (TokenBucket, optional): Throttles the creations and deletions. Defaults to no throttling.
+        """
+        if size < 1:
+            raise ValueError("size must be at least 1.")
+        if low_water is None:
+            low_water = max(size // 2, 1)
+        if not 1 <= low_water <= size:
+            raise ValueError("low_water must be between 1 and size.")
+        self.client = client
+        self.logger = logger
+        self.size = size
+        self.low_water = low_water
+        self.max_age = max_age
+        self.retry_interval = retry_interval
+        self.rate_limiter = rate_limiter
+        self._threads = deque()
+        self._refilling = False
+        self._closed = False
+        self._stats = {'hits': 0, 'misses': 0, 'created': 0, 'expired': 0, 'failures': 0}
+        self._condition = threading.Condition()
+        self._worker = None
+
+
+    def start(self):
+        """
+        Starts the background worker, which fills the pool right away.
+
+        Raises:
+            RuntimeError: If the pool was shut down.
+        """
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("The thread pool was shut down.")
+            if self._worker is not None:
+                return
+            self._refilling = True
+            self._worker = threading.Thread(target=self._run, name="flexiai-thread-pool", daemon=True)
+            self._worker.start()
+
+
+    def acquire(self):
+        """
+        Takes an unused thread out of the pool.
+
+        Returns:
+            object: The thread object, or None if the pool is empty.
+        """
+        with self._condition:
+            # Expired threads are left for the worker to delete
+            now = time.monotonic()
+            thread = None
+            for position, (created, candidate) in enumerate(self._threads):
+                if now - created < self.max_age:
+                    thread = candidate
+                    del self._threads[position]
+                    break
+
+            self._stats['hits' if thread is not None else 'misses'] += 1
+            if len(self._threads) < self.low_water and not self._refilling:
+                self._refilling = True
+                self._condition.notify()
+            return thread
+
+
+    def get_stats(self):
+        """
+        Returns the state of the pool.
+
+        Returns:
+            dict: The threads `available`, the `hits` and `misses` of `acquire`, and the number of
+                threads `created`, deleted after they `expired` and of failed creations (`failures`).
+        """
+        with self._condition:
+            return dict(self._stats, available=len(self._threads))
+
+
+    def shutdown(self, delete_threads=True):
+        """
+        Stops the worker.
+
+        Args:
+            delete_threads (bool, optional): Whether to delete the threads still in the pool. Defaults to True.
+        """
+        with self._condition:
+            self._closed = True
+            threads = [thread for _, thread in self._threads]
+            self._threads.clear()
+            self._condition.notify_all()
+            worker = self._worker
+
+        if worker is not None and worker is not threading.current_thread():
+            worker.join()
+        if delete_threads:
+            for thread in threads:
+                self._delete(thread)
+
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed and not self._refilling and not self._expired():
+                    timeout = self._threads[0][0] + self.max_age - time.monotonic() if self._threads else None
+                    self._condition.wait(timeout)
+                if self._closed:
+                    return
+                expired = []
+                now = time.monotonic()
+                while self._threads and now - self._threads[0][0] >= self.max_age:
+                    expired.append(self._threads.popleft()[1])
+                self._stats['expired'] += len(expired)
+                if len(self._threads) < self.low_water:
+                    self._refilling = True
+
+            for thread in expired:
+                self._delete(thread)
+            if self._refilling and not self._refill():
+                with self._condition:
+                    self._condition.wait_for(lambda: self._closed, self.retry_interval)
+
+
+    def _refill(self):
+        # Creates threads until the pool is full, False if a creation failed
+        while True:
+            with self._condition:
+                if self._closed or len(self._threads) >= self.size:
+                    self._refilling = False
+                    return True
+            try:
+                self._throttle()
+                thread = self.client.beta.threads.create()
+            except Exception as e:
+                # Any failure, not only API errors, must leave the worker alive to retry
+                self.logger.error(f"Failed to create a thread for the thread pool: {str(e)}", exc_info=True)
+                with self._condition:
+                    self._stats['failures'] += 1
+                return False
+
+            with self._condition:
+                if self._closed:
+                    closed = True
+                else:
+                    closed = False
+                    self._threads.append((time.monotonic(), thread))
+                    self._stats['created'] += 1
+            if closed:
+                self._delete(thread)
+                return True
+
+
+    def _expired(self):
+        # Called with the condition held
+        return bool(self._threads) and time.monotonic() - self._threads[0][0] >= self.max_age
+
+
+    def _delete(self, thread):
+        try:
+            self._throttle()
+            self.client.beta.threads.delete(thread_id=thread.id)
+        except Exception as e:
+            self.logger.warning(f"Failed to delete unused thread {thread.id}: {str(e)}")
+
+
+    def _throttle(self):
+        # Waits for the shared rate limiter, if any, before an API request
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
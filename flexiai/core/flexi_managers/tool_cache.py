@@ -0,0 +1,233 @@
+# flexiai/core/flexi_managers/tool_cache.py
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class ToolResultCache:
+    """
+    ToolResultCache memoizes the results of the functions called by assistants.
+
+    Caching is opt-in per function: only functions configured with `configure` are cached, each
+    with its own time to live and LRU size limit. Entries are keyed on the function name and the
+    canonical JSON encoding of the arguments. Identical calls issued while a call is still running
+    wait for that call instead of executing again. Failed calls are never cached.
+
+    Only enable caching for functions whose result depends on their arguments alone; functions
+    with side effects (such as `load_processed_content`, which consumes what it returns) would
+    otherwise be skipped on repeated calls.
+
+    Attributes:
+        logger (logging.Logger): The logger for logging information and errors.
+    """
+
+    def __init__(self, logger, clock=time.monotonic):
+        """
+        Initializes the ToolResultCache.
+
+        Args:
+            logger (logging.Logger): The logger instance.
+            clock (callable, optional): Returns the current time in seconds. Defaults to time.monotonic.
+        """
+        self.logger = logger
+        self._clock = clock
+        self._settings = {}
+        self._entries = {}
+        self._in_flight = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+
+
+    def configure(self, function_name, ttl=None, max_size=128):
+        """
+        Enables caching for a function.
+
+        Args:
+            function_name (str): The name of the function.
+            ttl (float, optional): How long, in seconds, a result stays valid. None keeps results until evicted.
+            max_size (int, optional): How many distinct argument sets are cached for the function. Defaults to 128.
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1.")
+        with self._lock:
+            self._settings[function_name] = {'ttl': ttl, 'max_size': max_size}
+            self._entries.setdefault(function_name, OrderedDict())
+            self._stats.setdefault(function_name, {'hits': 0, 'misses': 0, 'coalesced': 0})
+        self.logger.info(f"Result caching enabled for function {function_name} (ttl: {ttl}, max_size: {max_size})")
+
+
+    def disable(self, function_name):
+        """
+        Disables caching for a function and drops its cached results.
+
+        Args:
+            function_name (str): The name of the function.
+        """
+        with self._lock:
+            self._settings.pop(function_name, None)
+            self._entries.pop(function_name, None)
+        self.logger.info(f"Result caching disabled for function {function_name}")
+
+
+    def is_enabled(self, function_name):
+        """
+        Tells whether caching is enabled for a function.
+
+        Args:
+            function_name (str): The name of the function.
+
+        Returns:
+            bool: True if the results of the function are cached.
+        """
+        return function_name in self._settings
+
+
+    def invalidate(self, function_name=None):
+        """
+        Drops the cached results of a function, or of all functions.
+
+        Args:
+            function_name (str, optional): The name of the function. All functions if omitted.
+        """
+        with self._lock:
+            for name, entries in self._entries.items():
+                if function_name is None or name == function_name:
+                    entries.clear()
+
+
+    def get_stats(self):
+        """
+        Returns the cache counters.
+
+        Returns:
+            dict: The `hits`, `misses` and `coalesced` totals, and the same counters per function under `functions`.
+        """
+        with self._lock:
+            functions = {name: dict(counters) for name, counters in self._stats.items()}
+        totals = {key: sum(counters[key] for counters in functions.values()) for key in ('hits', 'misses', 'coalesced')}
+        totals['functions'] = functions
+        return totals
+
+
+    def get_or_call(self, function_name, arguments, call):
+        """
+        Returns the cached result of a call, or executes it.
+
+        Args:
+            function_name (str): The name of the function.
+            arguments (dict): The arguments of the call.
+            call (callable): Executes the call and returns its result when it isn't cached.
+
+        Returns:
+            object: The result of the call.
+
+        Raises:
+            Exception: Any exception raised by the call.
+        """
+        if not self.is_enabled(function_name):
+            return call()
+
+        key = self._make_key(arguments)
+        state, value = self._lookup(function_name, key)
+        if state == 'hit':
+            return value
+        if state == 'coalesced':
+            return value.result()
+
+        future = value
+        try:
+            result = call()
+        except BaseException as e:
+            self._finish(function_name, key, future, error=e)
+            raise
+        self._finish(function_name, key, future, result=result)
+        return result
+
+
+    async def get_or_call_async(self, function_name, arguments, call):
+        """
+        Returns the cached result of a call, or awaits it.
+
+        Args:
+            function_name (str): The name of the function.
+            arguments (dict): The arguments of the call.
+            call (callable): Coroutine function executing the call when it isn't cached.
+
+        Returns:
+            object: The result of the call.
+
+        Raises:
+            Exception: Any exception raised by the call.
+        """
+        if not self.is_enabled(function_name):
+            return await call()
+
+        key = self._make_key(arguments)
+        state, value = self._lookup(function_name, key)
+        if state == 'hit':
+            return value
+        if state == 'coalesced':
+            return await asyncio.wrap_future(value)
+
+        future = value
+        try:
+            result = await call()
+        except BaseException as e:
+            self._finish(function_name, key, future, error=e)
+            raise
+        self._finish(function_name, key, future, result=result)
+        return result
+
+
+    def _make_key(self, arguments):
+        return json.dumps(arguments, sort_keys=True, separators=(',', ':'), default=str)
+
+
+    def _lookup(self, function_name, key):
+        """
+        Returns ('hit', result), ('coalesced', future of the running call) or ('miss', future to complete).
+        """
+        with self._lock:
+            entries = self._entries.get(function_name)
+            stats = self._stats[function_name]
+
+            entry = entries.get(key) if entries is not None else None
+            if entry is not None:
+                expires_at, result = entry
+                if expires_at is None or expires_at > self._clock():
+                    entries.move_to_end(key)
+                    stats['hits'] += 1
+                    return 'hit', result
+                del entries[key]
+
+            future = self._in_flight.get((function_name, key))
+            if future is not None:
+                stats['coalesced'] += 1
+                return 'coalesced', future
+
+            stats['misses'] += 1
+            future = Future()
+            future.set_running_or_notify_cancel()
+            self._in_flight[(function_name, key)] = future
+            return 'miss', future
+
+
+    def _finish(self, function_name, key, future, result=None, error=None):
+        with self._lock:
+            self._in_flight.pop((function_name, key), None)
+            settings = self._settings.get(function_name)
+            entries = self._entries.get(function_name)
+            if error is None and settings is not None and entries is not None:
+                expires_at = self._clock() + settings['ttl'] if settings['ttl'] is not None else None
+                entries[key] = (expires_at, result)
+                entries.move_to_end(key)
+                while len(entries) > settings['max_size']:
+                    entries.popitem(last=False)
+
+        if error is None:
+            future.set_result(result)
+        else:
+            future.set_exception(error)
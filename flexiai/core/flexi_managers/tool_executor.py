@@ -0,0 +1,532 @@
+# flexiai/core/flexi_managers/tool_executor.py
+import asyncio
+import concurrent.futures
+import contextlib
+import contextvars
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+
+# Monotonic time by which the tool calls of the current run must be done, if any.
+_run_deadline = contextvars.ContextVar('flexiai_run_deadline', default=None)
+
+
+class ToolTimeoutError(TimeoutError):
+    """
+    Raised when a tool call doesn't complete within its timeout or before the run deadline.
+    """
+
+    def __init__(self, function_name, timeout):
+        super().__init__(f"Function {function_name} timed out after {timeout:.1f} seconds.")
+        self.function_name = function_name
+        self.timeout = timeout
+
+
+class ToolFunction:
+    """
+    ToolFunction wraps a function registered in a function mapping to choose how it is executed.
+
+    Functions marked with `executor="process"` run in a warm pool of worker processes instead of the
+    thread pool, so CPU-heavy work (parsing, scoring, report generation, ...) doesn't hold the GIL of
+    the process running the assistants. Their arguments and results are pickled: the function must be
+    a module-level function or a method of a picklable object, and it can't call other tools.
+
+    Example:
+        user_personal_functions = {
+            'score_report': ToolFunction(user_functions_manager.score_report, executor="process"),
+        }
+
+    Attributes:
+        func (callable): The wrapped function or coroutine function.
+        executor (str): Either 'thread' or 'process'.
+    """
+
+    EXECUTORS = ('thread', 'process')
+
+    def __init__(self, func, executor='thread'):
+        if executor not in self.EXECUTORS:
+            raise ValueError(f"executor must be one of {self.EXECUTORS}, got {executor!r}.")
+        self.func = func
+        self.executor = executor
+        functools.update_wrapper(self, func)
+
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+
+def _call_in_process(func, arguments):
+    # Runs in a worker process: coroutine functions get their own loop there
+    result = func(**arguments)
+    if asyncio.iscoroutine(result):
+        result = asyncio.run(result)
+    return result
+
+
+def _noop():
+    return None
+
+
+class ToolExecutor:
+    """
+    ToolExecutor runs the functions called by assistants, both from synchronous code and from coroutines.
+
+    Regular functions run in a bounded thread pool and coroutine functions are awaited natively.
+    A global limit caps how many tool calls run at the same time across all runs, and optional
+    per-function limits protect downstream systems that can't take much parallel load.
+
+    Each call is bounded by its function timeout (or the default timeout) and by the deadline of
+    the run it belongs to, see `deadline_scope`; waiting for a concurrency slot counts against the
+    deadline, and a call can't wait for a slot longer than it may run. Timed out coroutines are cancelled. Threads can't
+    be interrupted, so a timed out regular function is abandoned: the caller stops waiting and the
+    function keeps its concurrency slot until it returns, so hung calls can't pile up threads.
+
+    Tool calls made from inside another tool call (for example a function that talks to another
+    assistant, whose run requires actions of its own) run inline and bypass the limits, so nested
+    calls can't deadlock on slots held by their parents.
+
+    Functions wrapped in a ToolFunction with `executor="process"` run in a process pool, started
+    on first use and reused afterwards, with the same limits, timeouts and error handling. A timed
+    out process call is abandoned like a thread, since a single pool task can't be interrupted.
+
+    Attributes:
+        logger (logging.Logger): The logger for logging information and errors.
+        max_workers (int): The size of the thread pool.
+        max_concurrency (int): The maximum number of tool calls running at the same time.
+        function_limits (dict): The maximum number of concurrent calls per function name.
+        default_timeout (float): The timeout, in seconds, of functions without their own timeout. None waits forever.
+        function_timeouts (dict): The timeout, in seconds, per function name.
+        max_processes (int): The size of the process pool.
+    """
+
+    def __init__(self, logger, max_workers=16, max_concurrency=None, function_limits=None, default_timeout=None, function_timeouts=None,
+                 max_processes=None, mp_context=None):
+        """
+        Initializes the ToolExecutor.
+
+        Args:
+            logger (logging.Logger): The logger instance.
+            max_workers (int, optional): The size of the thread pool. Defaults to 16.
+            max_concurrency (int, optional): The global concurrency limit. Defaults to max_workers.
+            function_limits (dict, optional): Per-function concurrency limits, keyed by function name.
+            default_timeout (float, optional): The timeout of functions without their own timeout. Defaults to None.
+            function_timeouts (dict, optional): Per-function timeouts, keyed by function name.
+            max_processes (int, optional): The size of the process pool. Defaults to the number of CPUs.
+            mp_context (multiprocessing.context.BaseContext, optional): The context the worker processes
+                are started with. Defaults to the multiprocessing default.
+        """
+        self.logger = logger
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency or max_workers
+        self.function_limits = {}
+        self.default_timeout = default_timeout
+        self.function_timeouts = dict(function_timeouts or {})
+        self.max_processes = max_processes or os.cpu_count() or 1
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="flexiai-tool")
+        # Coroutines wait for busy slots here: waiting in the tool pool could starve the calls holding them
+        self._wait_pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="flexiai-tool-wait")
+        self._mp_context = mp_context
+        self._process_pool = None
+        self._global_semaphore = threading.BoundedSemaphore(self.max_concurrency)
+        self._function_semaphores = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stats = {'timeouts': 0, 'abandoned': 0}
+
+        for function_name, limit in (function_limits or {}).items():
+            self.set_function_limit(function_name, limit)
+
+
+    def set_function_limit(self, function_name, limit):
+        """
+        Sets the maximum number of concurrent calls of a function.
+
+        Args:
+            function_name (str): The name of the function.
+            limit (int): The limit, or None to remove it.
+        """
+        with self._lock:
+            if limit is None:
+                self.function_limits.pop(function_name, None)
+                self._function_semaphores.pop(function_name, None)
+            else:
+                if limit < 1:
+                    raise ValueError("A function limit must be at least 1.")
+                self.function_limits[function_name] = limit
+                self._function_semaphores[function_name] = threading.BoundedSemaphore(limit)
+        self.logger.info(f"Concurrency limit for function {function_name} set to {limit}")
+
+
+    def set_function_timeout(self, function_name, timeout):
+        """
+        Sets the timeout of a function.
+
+        Args:
+            function_name (str): The name of the function.
+            timeout (float): The timeout in seconds, or None to fall back to the default timeout.
+        """
+        if timeout is None:
+            self.function_timeouts.pop(function_name, None)
+        else:
+            if timeout <= 0:
+                raise ValueError("A function timeout must be positive.")
+            self.function_timeouts[function_name] = timeout
+        self.logger.info(f"Timeout for function {function_name} set to {timeout}")
+
+
+    def get_timeout(self, function_name):
+        """
+        Returns how long a call of a function may take from now, considering the run deadline.
+
+        Args:
+            function_name (str): The name of the function.
+
+        Returns:
+            float: The timeout in seconds, or None if the call isn't bounded.
+        """
+        timeout = self.function_timeouts.get(function_name, self.default_timeout)
+        deadline = _run_deadline.get()
+        if deadline is not None:
+            remaining = max(deadline - time.monotonic(), 0)
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        return timeout
+
+
+    @contextlib.contextmanager
+    def deadline_scope(self, deadline):
+        """
+        Bounds the tool calls issued within the scope by a run deadline. Coroutines started
+        within the scope inherit it.
+
+        Args:
+            deadline (float): The time.monotonic() value by which the calls must be done, or None.
+        """
+        token = _run_deadline.set(deadline)
+        try:
+            yield
+        finally:
+            _run_deadline.reset(token)
+
+
+    def get_stats(self):
+        """
+        Returns the timeout counters.
+
+        Returns:
+            dict: The number of timed out calls (`timeouts`) and of threads abandoned while still running (`abandoned`).
+        """
+        with self._lock:
+            return dict(self._stats)
+
+
+    def in_tool_call(self):
+        """
+        Tells whether the current thread is executing a tool call.
+
+        Returns:
+            bool: True if called from inside a tool function.
+        """
+        return getattr(self._local, 'depth', 0) > 0
+
+
+    def execute(self, function_name, func, arguments, run_coroutine=None, inline=False, timing=None):
+        """
+        Executes a tool function and blocks until it returns or times out.
+
+        Inline calls run regular functions on the calling thread instead of handing them to the
+        thread pool, which saves the dispatch cost for cheap functions. The calling thread can't
+        stop waiting for them, so the run deadline and the default timeout are only checked once
+        they return. Functions with a timeout of their own always run in the pool, so that timeout
+        keeps its meaning.
+
+        Args:
+            function_name (str): The name the function is registered under.
+            func (callable): The function or coroutine function to execute.
+            arguments (dict): The keyword arguments to pass to the function.
+            run_coroutine (callable, optional): Runs a coroutine to completion on an existing event loop.
+                Coroutine functions get a fresh loop in a worker thread when omitted.
+            inline (bool, optional): Whether to run a regular function on the calling thread. Defaults to False.
+            timing (dict, optional): Receives the time, in seconds, the function itself ran under
+                `duration`, excluding the time spent waiting for a concurrency slot.
+
+        Returns:
+            object: The result of the function.
+
+        Raises:
+            ToolTimeoutError: If the call times out, or doesn't get a concurrency slot in time.
+            Exception: Any exception raised by the function.
+        """
+        func, in_process = self._resolve(func)
+        nested = self.in_tool_call()
+        awaited_on_loop = run_coroutine is not None and asyncio.iscoroutinefunction(func) and not in_process
+        if nested and not in_process:
+            if awaited_on_loop:
+                return run_coroutine(self._await_with_timeout(function_name, func(**arguments), None, timing))
+            return self._call(func, arguments, timing)
+
+        # Nested process calls can't deadlock on their parents, they only skip the limits
+        semaphores = [] if nested else self._semaphores_for(function_name)
+        self._acquire(function_name, semaphores)
+
+        timeout = self.get_timeout(function_name)
+        if awaited_on_loop:
+            try:
+                return run_coroutine(self._await_with_timeout(function_name, func(**arguments), timeout, timing))
+            finally:
+                self._release(semaphores)
+
+        if inline and not in_process and function_name not in self.function_timeouts:
+            try:
+                started = time.monotonic()
+                result = self._call(func, arguments, timing)
+            finally:
+                self._release(semaphores)
+            if timeout is not None and time.monotonic() - started > timeout:
+                with self._lock:
+                    self._stats['timeouts'] += 1
+                self.logger.warning(f"Function {function_name} ran inline past its timeout of {timeout:.1f} seconds, discarding its result")
+                raise ToolTimeoutError(function_name, timeout)
+            return result
+
+        try:
+            future = self._submit(func, arguments, in_process, timing)
+        except BaseException:
+            self._release(semaphores)
+            raise
+        # The slots are handed back when the function returns, even if the caller stopped waiting
+        future.add_done_callback(lambda _: self._release(semaphores))
+
+        done, _ = concurrent.futures.wait([future], timeout=timeout)
+        if not done:
+            self._abandon(function_name, future, timeout)
+        return future.result()
+
+
+    async def execute_async(self, function_name, func, arguments, nested=False, timing=None):
+        """
+        Executes a tool function from a coroutine. Coroutine functions are awaited on the running
+        event loop, regular functions run in the thread pool and process functions in the process pool.
+
+        Args:
+            function_name (str): The name the function is registered under.
+            func (callable): The function or coroutine function to execute.
+            arguments (dict): The keyword arguments to pass to the function.
+            nested (bool, optional): Whether the call was issued from inside another tool call.
+                Nested calls bypass the limits and don't take slots of the bounded pool.
+            timing (dict, optional): Receives the time, in seconds, the function itself ran under
+                `duration`, excluding the time spent waiting for a concurrency slot.
+
+        Returns:
+            object: The result of the function.
+
+        Raises:
+            ToolTimeoutError: If the call times out, or doesn't get a concurrency slot in time.
+            Exception: Any exception raised by the function.
+        """
+        loop = asyncio.get_running_loop()
+        func, in_process = self._resolve(func)
+        if nested and not in_process:
+            if asyncio.iscoroutinefunction(func):
+                return await self._await_with_timeout(function_name, func(**arguments), None, timing)
+            return await loop.run_in_executor(None, functools.partial(self._call, func, arguments, timing))
+
+        semaphores = [] if nested else self._semaphores_for(function_name)
+        acquired = []
+        wait_timeout = self.get_timeout(function_name)
+        wait_deadline = time.monotonic() + wait_timeout if wait_timeout is not None else None
+        try:
+            for semaphore in semaphores:
+                remaining = max(wait_deadline - time.monotonic(), 0) if wait_deadline is not None else None
+                if not await self._acquire_async(semaphore, remaining):
+                    self._slot_timeout(function_name, wait_timeout)
+                acquired.append(semaphore)
+        except BaseException:
+            self._release(acquired)
+            raise
+
+        timeout = self.get_timeout(function_name)
+        if asyncio.iscoroutinefunction(func) and not in_process:
+            try:
+                return await self._await_with_timeout(function_name, func(**arguments), timeout, timing)
+            finally:
+                self._release(acquired)
+
+        try:
+            future = self._submit(func, arguments, in_process, timing)
+        except BaseException:
+            self._release(acquired)
+            raise
+        future.add_done_callback(lambda _: self._release(acquired))
+
+        wrapped = asyncio.wrap_future(future)
+        done, _ = await asyncio.wait({wrapped}, timeout=timeout)
+        if not done:
+            wrapped.cancel()
+            self._abandon(function_name, future, timeout)
+        return wrapped.result()
+
+
+    def warm_up(self, wait=False):
+        """
+        Starts the worker processes of the process pool ahead of the first process call.
+
+        Args:
+            wait (bool, optional): Whether to wait until every worker has started. Defaults to False.
+        """
+        pool = self._get_process_pool()
+        futures = [pool.submit(_noop) for _ in range(self.max_processes)]
+        if wait:
+            concurrent.futures.wait(futures)
+
+
+    def shutdown(self, wait=True):
+        """
+        Shuts down the thread pool and the process pool. Queued calls that haven't started yet are cancelled.
+
+        Args:
+            wait (bool, optional): Whether to wait for running tool calls to finish. Defaults to True.
+        """
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+        self._wait_pool.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            process_pool, self._process_pool = self._process_pool, None
+        if process_pool is not None:
+            process_pool.shutdown(wait=wait, cancel_futures=True)
+
+
+    def _resolve(self, func):
+        if isinstance(func, ToolFunction):
+            return func.func, func.executor == 'process'
+        return func, False
+
+
+    def _submit(self, func, arguments, in_process, timing=None):
+        if not in_process:
+            return self._pool.submit(self._call, func, arguments, timing)
+
+        # The worker process can't report back when it starts: time the call from its submission
+        submitted = time.perf_counter()
+        pool = self._get_process_pool()
+        try:
+            future = pool.submit(_call_in_process, func, arguments)
+        except BrokenProcessPool:
+            self._discard_process_pool(pool)
+            future = self._get_process_pool().submit(_call_in_process, func, arguments)
+        # A worker that died breaks the whole pool: start a new one for the next calls
+        future.add_done_callback(
+            lambda done: self._discard_process_pool(pool) if not done.cancelled() and isinstance(done.exception(), BrokenProcessPool) else None
+        )
+        if timing is not None:
+            future.add_done_callback(lambda _: timing.update(duration=time.perf_counter() - submitted))
+        return future
+
+
+    def _get_process_pool(self):
+        with self._lock:
+            if self._process_pool is None:
+                self._process_pool = ProcessPoolExecutor(max_workers=self.max_processes, mp_context=self._mp_context)
+                self.logger.info("Started the process pool of the tool executor")
+            return self._process_pool
+
+
+    def _discard_process_pool(self, pool):
+        with self._lock:
+            if self._process_pool is not pool:
+                return
+            self._process_pool = None
+        self.logger.warning("The process pool of the tool executor broke, a new one will be started")
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+    def _call(self, func, arguments, timing=None):
+        self._local.depth = getattr(self._local, 'depth', 0) + 1
+        started = time.perf_counter()
+        try:
+            result = func(**arguments)
+            if asyncio.iscoroutine(result):
+                # Coroutine functions called from synchronous code get their own loop in this worker thread
+                result = asyncio.run(result)
+            return result
+        finally:
+            self._local.depth -= 1
+            if timing is not None:
+                timing['duration'] = time.perf_counter() - started
+
+
+    async def _await_with_timeout(self, function_name, coroutine, timeout, timing=None):
+        started = time.perf_counter()
+        task = asyncio.ensure_future(coroutine)
+        try:
+            done, _ = await asyncio.wait({task}, timeout=timeout)
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        finally:
+            if timing is not None:
+                timing['duration'] = time.perf_counter() - started
+        if not done:
+            task.cancel()
+            with self._lock:
+                self._stats['timeouts'] += 1
+            self.logger.warning(f"Function {function_name} timed out after {timeout:.1f} seconds and was cancelled")
+            raise ToolTimeoutError(function_name, timeout)
+        return task.result()
+
+
+    def _abandon(self, function_name, future, timeout):
+        with self._lock:
+            self._stats['timeouts'] += 1
+            if not future.cancel():
+                self._stats['abandoned'] += 1
+        self.logger.warning(f"Function {function_name} timed out after {timeout:.1f} seconds, abandoning the call")
+        raise ToolTimeoutError(function_name, timeout)
+
+
+    def _semaphores_for(self, function_name):
+        with self._lock:
+            function_semaphore = self._function_semaphores.get(function_name)
+        # Always take the function slot before the global one so waiting calls don't hold global slots
+        return [function_semaphore, self._global_semaphore] if function_semaphore else [self._global_semaphore]
+
+
+    def _acquire(self, function_name, semaphores):
+        # Takes the slots of a call, waiting at most as long as the call may run
+        timeout = self.get_timeout(function_name)
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        acquired = []
+        for semaphore in semaphores:
+            remaining = max(deadline - time.monotonic(), 0) if deadline is not None else None
+            if not semaphore.acquire(timeout=remaining):
+                self._release(acquired)
+                self._slot_timeout(function_name, timeout)
+            acquired.append(semaphore)
+
+
+    def _slot_timeout(self, function_name, timeout):
+        with self._lock:
+            self._stats['timeouts'] += 1
+        self.logger.warning(f"Function {function_name} waited {timeout:.1f} seconds for a concurrency slot, giving up")
+        raise ToolTimeoutError(function_name, timeout)
+
+
+    def _release(self, semaphores):
+        for semaphore in reversed(semaphores):
+            semaphore.release()
+
+
+    async def _acquire_async(self, semaphore, timeout):
+        # Returns False if no slot freed up within the timeout
+        if semaphore.acquire(blocking=False):
+            return True
+
+        future = asyncio.get_running_loop().run_in_executor(self._wait_pool, functools.partial(semaphore.acquire, timeout=timeout))
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # The blocking acquire can't be interrupted: hand the slot back as soon as it is obtained
+            future.add_done_callback(lambda done: semaphore.release() if not done.cancelled() and done.exception() is None and done.result() else None)
+            raise
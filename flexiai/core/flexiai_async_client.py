@@ -0,0 +1,494 @@
+# flexiai/core/flexiai_async_client.py
+import logging
+from flexiai.assistant.functions_registry import FunctionRegistry
+from flexiai.credentials.credential_manager import CredentialManager
+from flexiai.core.flexi_managers.message_manager import MessageManager
+from flexiai.core.flexi_managers.message_cache import MessageCache
+from flexiai.core.flexi_managers.run_manager import RunManager
+from flexiai.core.flexi_managers.thread_manager import ThreadManager
+from flexiai.core.flexi_managers.multi_agent_system import MultiAgentSystemManager
+from flexiai.core.flexi_managers.state_backend import create_state_backend
+from flexiai.core.flexi_managers.tool_executor import ToolExecutor
+from flexiai.core.flexi_managers.run_registry import SHARED_THREADS_TTL, ActiveRunRegistry
+from flexiai.core.flexi_managers.tool_cache import ToolResultCache
+from flexiai.core.flexi_managers.rate_limiter import TokenBucket
+from flexiai.core.flexi_managers.async_thread_manager import AsyncThreadManager
+from flexiai.core.flexi_managers.async_message_manager import AsyncMessageManager
+from flexiai.core.flexi_managers.async_run_manager import AsyncRunManager
+from flexiai.core.flexi_managers.async_embedding_manager import AsyncEmbeddingManager
+from flexiai.core.flexi_managers.async_completions_manager import AsyncCompletionsManager
+from flexiai.core.flexi_managers.async_vector_store_manager import AsyncVectorStoreManager
+from flexiai.config.config import Config
+
+
+class AsyncFlexiAI:
+    """
+    AsyncFlexiAI is the asyncio counterpart of FlexiAI. Its managers use the asynchronous
+    OpenAI or Azure OpenAI client, so one event loop can drive many conversations at once.
+
+    Instances must be created with the `create` factory, which awaits the function registry:
+
+        flexiai = await AsyncFlexiAI.create()
+
+    The core agent-to-agent functions (save/load processed content, communicate with an assistant)
+    are synchronous. They run in worker threads during tool calls, so the multi-agent system is
+    wired to synchronous managers sharing the same credentials.
+    """
+
+    def __init__(self, credential_manager=None):
+        """
+        Initializes the AsyncFlexiAI class and its associated managers.
+        The function registry is initialized by `create`.
+
+        Args:
+            credential_manager (CredentialManager, optional): Provides the clients. Defaults to one built from the configuration.
+        """
+        self.logger = logging.getLogger(__name__)
+        self.config = Config()
+        self.logger.info("Configuration loaded successfully.")
+
+        self.credential_manager = credential_manager or CredentialManager()
+        self.client = self.credential_manager.get_async_client()
+
+        # The asynchronous and synchronous clients share one request budget
+        requests_per_minute = self.config.OPENAI_REQUESTS_PER_MINUTE
+        rate_limiter = TokenBucket(requests_per_minute) if requests_per_minute > 0 else None
+
+        self.thread_manager = AsyncThreadManager(self.client, self.logger, rate_limiter=rate_limiter)
+        self.message_manager = AsyncMessageManager(self.client, self.logger, rate_limiter=rate_limiter)
+        self.tool_executor = ToolExecutor(self.logger)
+        state_backend = create_state_backend(self.config, self.logger)
+        # Other workers run the threads of a shared backend too, so the local idle marks are only trusted briefly
+        self.run_registry = ActiveRunRegistry(ttl=SHARED_THREADS_TTL) if state_backend.shared else ActiveRunRegistry()
+        self.tool_cache = ToolResultCache(self.logger)
+        self.run_manager = AsyncRunManager(
+            self.client, self.logger, self.message_manager,
+            tool_executor=self.tool_executor, run_registry=self.run_registry, tool_cache=self.tool_cache,
+            rate_limiter=rate_limiter
+        )
+        self.embedding_manager = AsyncEmbeddingManager(self.client, self.logger)
+        self.completions_manager = AsyncCompletionsManager(self.client, self.logger)
+        self.vector_store_manager = AsyncVectorStoreManager(self.client, self.logger)
+
+        # Synchronous side used by the core functions executed in worker threads
+        sync_client = self.credential_manager.client
+        # The AsyncRunManager doesn't mark the threads it runs as stale, so reads always sync
+        sync_message_manager = MessageManager(sync_client, self.logger, MessageCache(max_age=0), rate_limiter=rate_limiter)
+        self.multi_agent_system = MultiAgentSystemManager(
+            sync_client, self.logger, ThreadManager(sync_client, self.logger, rate_limiter=rate_limiter), None, sync_message_manager,
+            max_threads_per_assistant=self.config.THREAD_LEASE_MAX_THREADS or None, lease_ttl=self.config.THREAD_LEASE_TTL or None,
+            state_backend=state_backend
+        )
+        self.function_registry = FunctionRegistry(self.multi_agent_system, self.run_manager)
+        self.multi_agent_system.run_manager = RunManager(
+            sync_client, self.logger, sync_message_manager, self.function_registry,
+            tool_executor=self.tool_executor, run_registry=self.run_registry, tool_cache=self.tool_cache,
+            rate_limiter=rate_limiter
+        )
+
+
+    @classmethod
+    async def create(cls, credential_manager=None):
+        """
+        Creates an AsyncFlexiAI instance and awaits the initialization of its function registry.
+
+        Args:
+            credential_manager (CredentialManager, optional): Provides the clients. Defaults to one built from the configuration.
+
+        Returns:
+            AsyncFlexiAI: The initialized instance.
+        """
+        flexiai = cls(credential_manager)
+        await flexiai.function_registry.initialize_registry()
+
+        # Nested runs started by the core functions dispatch tool calls with the same mappings
+        flexiai.multi_agent_system.run_manager.update_function_mappings(
+            flexiai.function_registry.get_combined_personal_functions(),
+            flexiai.function_registry.get_combined_assistant_functions()
+        )
+        flexiai.logger.info("AsyncFlexiAI initialized successfully.")
+        return flexiai
+
+
+    async def close(self):
+        """
+        Closes the underlying asynchronous HTTP client, the event loop of the synchronous
+        RunManager used by nested runs, the tool executor's thread pool and the state backend.
+        """
+        await self.client.close()
+        self.multi_agent_system.run_manager.close()
+        self.multi_agent_system.state_backend.close()
+        self.tool_executor.shutdown(wait=False)
+
+
+    async def create_thread(self):
+        """
+        Creates a new thread using the AsyncThreadManager.
+
+        Returns:
+            object: The thread object.
+        """
+        thread = await self.thread_manager.create_thread()
+        self.run_manager.mark_thread_idle(thread.id)
+        return thread
+
+
+    async def retrieve_thread(self, thread_id):
+        """
+        Retrieves details of a specific thread by its ID using the AsyncThreadManager.
+
+        Args:
+            thread_id (str): The ID of the thread to retrieve.
+
+        Returns:
+            object: The thread object.
+        """
+        return await self.thread_manager.retrieve_thread(thread_id)
+
+
+    async def update_thread(self, thread_id, metadata=None, tool_resources=None):
+        """
+        Updates a thread with the given details using the AsyncThreadManager.
+
+        Args:
+            thread_id (str): The ID of the thread to update.
+            metadata (dict, optional): Metadata to update for the thread.
+            tool_resources (dict, optional): Tool resources to update for the thread.
+
+        Returns:
+            object: The updated thread object.
+        """
+        return await self.thread_manager.update_thread(thread_id, metadata, tool_resources)
+
+
+    async def delete_thread(self, thread_id):
+        """
+        Deletes a thread by its ID using the AsyncThreadManager.
+
+        Args:
+            thread_id (str): The ID of the thread to delete.
+
+        Returns:
+            bool: True if the thread was deleted successfully.
+        """
+        return await self.thread_manager.delete_thread(thread_id)
+
+
+    async def add_user_message(self, thread_id, user_message):
+        """
+        Adds a user message to a specified thread using the AsyncMessageManager.
+
+        Args:
+            thread_id (str): The ID of the thread.
+            user_message (str): The content of the user's message.
+
+        Returns:
+            object: The message object that was added to the thread.
+        """
+        return await self.message_manager.add_user_message(thread_id, user_message)
+
+
+    async def add_messages_dynamically(self, thread_id, messages, role=None, metadata=None):
+        """
+        Adds multiple messages to a specified thread dynamically with optional metadata.
+
+        Args:
+            thread_id (str): The ID of the thread.
+            messages (list): A list of dictionaries containing the message content and optional metadata.
+            role (str, optional): The role of the message sender. Defaults to None.
+            metadata (dict, optional): Default metadata to include with each message.
+
+        Returns:
+            list: A list of message objects that were added to the thread.
+        """
+        return await self.message_manager.add_messages_dynamically(thread_id, messages, role=role, metadata=metadata)
+
+
+    async def add_messages_bulk(self, thread_id, messages, role=None, metadata=None, max_concurrency=8):
+        """
+        Adds many messages to a thread concurrently, keeping their order. Without a thread ID, a new
+        thread is created with its first messages in a single call. Failed messages don't abort the batch.
+
+        Args:
+            thread_id (str): The ID of the thread, or None to create a new thread.
+            messages (list): A list of dictionaries with the `content` and optional `metadata` of each message.
+            role (str, optional): The role of the message sender. Defaults to 'user'.
+            metadata (dict, optional): Default metadata to include with each message.
+            max_concurrency (int, optional): The maximum number of requests in flight. Defaults to 8.
+
+        Returns:
+            dict: The `thread_id`, the added `messages` in order, the `errors` with the `index` of each failed message
+                and whether the messages are known to be in order (`ordered`).
+        """
+        return await self.message_manager.add_messages_bulk(thread_id, messages, role=role, metadata=metadata, max_concurrency=max_concurrency)
+
+
+    async def retrieve_messages(self, thread_id, order='desc', limit=20):
+        """
+        Retrieves messages from a specified thread using the AsyncMessageManager.
+
+        Args:
+            thread_id (str): The ID of the thread.
+            order (str, optional): The order in which to retrieve messages, either 'asc' or 'desc'. Defaults to 'desc'.
+            limit (int, optional): The number of messages to retrieve. Defaults to 20.
+
+        Returns:
+            list: A list of dictionaries containing the message ID, role, and content of each message.
+        """
+        return await self.message_manager.retrieve_messages(thread_id, order, limit)
+
+
+    async def retrieve_message_object(self, thread_id, order='asc', limit=20):
+        """
+        Retrieves message objects from a specified thread using the AsyncMessageManager.
+
+        Args:
+            thread_id (str): The ID of the thread.
+            order (str, optional): The order in which to retrieve messages, either 'asc' or 'desc'. Defaults to 'asc'.
+            limit (int, optional): The number of messages to retrieve. Defaults to 20.
+
+        Returns:
+            list: A list of message objects.
+        """
+        return await self.message_manager.retrieve_message_object(thread_id, order, limit)
+
+
+    async def retrieve_messages_dynamically(self, thread_id, order='asc', limit=20, retrieve_all=False, last_retrieved_id=None):
+        """
+        Retrieves messages from a specified thread dynamically using the AsyncMessageManager.
+
+        Args:
+            thread_id (str): The ID of the thread from which to retrieve messages.
+            order (str, optional): The order in which to retrieve messages, either 'asc' or 'desc'. Defaults to 'asc'.
+            limit (int, optional): The maximum number of messages to retrieve in a single request. Defaults to 20.
+            retrieve_all (bool, optional): Whether to retrieve all messages in the thread. Defaults to False.
+            last_retrieved_id (str, optional): The ID of the last retrieved message to fetch messages after it. Defaults to None.
+
+        Returns:
+            list: A list of message objects retrieved from the thread.
+        """
+        return await self.message_manager.retrieve_messages_dynamically(thread_id, order, limit, retrieve_all, last_retrieved_id)
+
+
+    def iter_messages(self, thread_id, order='asc', page_size=100, after=None, max_items=None, max_bytes=None):
+        """
+        Iterates over the messages of a thread page by page, prefetching the next page while the
+        current one is processed, instead of loading the whole history at once.
+
+        Args:
+            thread_id (str): The ID of the thread.
+            order (str, optional): The order of the messages, either 'asc' or 'desc'. Defaults to 'asc'.
+            page_size (int, optional): The number of messages per request, at most 100. Defaults to 100.
+            after (str, optional): Start after this message ID.
+            max_items (int, optional): Stop after this many messages. Defaults to no limit.
+            max_bytes (int, optional): Stop once the text of the messages yielded reaches this many bytes.
+                The message reaching it is still yielded. Defaults to no limit.
+
+        Returns:
+            AsyncIterator: The message objects, in the requested order.
+        """
+        return self.message_manager.iter_messages(thread_id, order, page_size, after, max_items, max_bytes)
+
+
+    async def wait_for_run_completion(self, thread_id):
+        """
+        Waits for the completion of a run on a specified thread using the AsyncRunManager.
+
+        Args:
+            thread_id (str): The ID of the thread to wait for run completion.
+        """
+        await self.run_manager.wait_for_run_completion(thread_id)
+
+
+    async def create_run(self, assistant_id, thread_id):
+        """
+        Creates a new run for a specified assistant and thread using the AsyncRunManager.
+
+        Args:
+            assistant_id (str): The ID of the assistant.
+            thread_id (str): The ID of the thread.
+
+        Returns:
+            object: The run object if successful, None otherwise.
+        """
+        return await self.run_manager.create_run(assistant_id, thread_id)
+
+
+    async def create_advanced_run(self, assistant_id, thread_id, user_message):
+        """
+        Creates an advanced run with a user message for a specified assistant and thread using the AsyncRunManager.
+
+        Args:
+            assistant_id (str): The ID of the assistant.
+            thread_id (str): The ID of the thread.
+            user_message (str): The user's message content.
+
+        Returns:
+            object: The final run object.
+        """
+        return await self.run_manager.create_advanced_run(assistant_id, thread_id, user_message)
+
+
+    async def create_and_monitor_run(self, assistant_id, thread_id, user_message=None, role=None, metadata=None):
+        """
+        Creates and runs a thread with the specified assistant, optionally adding a user message,
+        and monitors its status until completion or failure using the AsyncRunManager.
+
+        Args:
+            assistant_id (str): The ID of the assistant.
+            thread_id (str): The ID of the thread.
+            user_message (str, optional): The user's message content to add before creating the run.
+            role (str, optional): The role of the message sender. Defaults to 'user'.
+            metadata (dict, optional): Metadata to include with the message.
+
+        Returns:
+            object: The final run object.
+        """
+        return await self.run_manager.create_and_monitor_run(assistant_id, thread_id, user_message, role, metadata)
+
+
+    async def assistant_transformer(self, thread_id, new_assistant_id):
+        """
+        Attaches a new assistant to an existing thread and runs the thread using the AsyncRunManager.
+
+        Args:
+            thread_id (str): The ID of the existing thread.
+            new_assistant_id (str): The ID of the new assistant to attach.
+
+        Returns:
+            object: The final run object indicating the result of the interaction.
+        """
+        return await self.run_manager.assistant_transformer(thread_id, new_assistant_id)
+
+
+    def cache_tool_results(self, function_name, ttl=None, max_size=128):
+        """
+        Enables result caching for a tool or assistant function, for both the asynchronous
+        runs and the nested runs started by the core functions.
+
+        Args:
+            function_name (str): The name of the function.
+            ttl (float, optional): How long, in seconds, a result stays valid. None keeps results until evicted.
+            max_size (int, optional): How many distinct argument sets are cached. Defaults to 128.
+        """
+        self.tool_cache.configure(function_name, ttl=ttl, max_size=max_size)
+
+
+    def get_tool_cache_stats(self):
+        """
+        Returns the hit, miss and coalesced call counters of the tool result cache.
+
+        Returns:
+            dict: The counters in total and per function.
+        """
+        return self.tool_cache.get_stats()
+
+
+    async def create_embeddings(self, text, model="text-embedding-ada-002", chunk_size=1000):
+        """
+        Creates embeddings for the given text using the AsyncEmbeddingManager.
+
+        Args:
+            text (str): The text to create embeddings for.
+            model (str): The model to use for creating embeddings.
+            chunk_size (int): The maximum number of tokens in each chunk.
+
+        Returns:
+            np.ndarray: The combined embedding for the text.
+        """
+        return await self.embedding_manager.create_embeddings(text, model, chunk_size)
+
+
+    async def create_embeddings_for_faiss(self, texts, model="text-embedding-ada-002", chunk_size=1000):
+        """
+        Creates embeddings for a list of texts and adds them to a FAISS index using the AsyncEmbeddingManager.
+
+        Args:
+            texts (list of str): List of texts to create embeddings for.
+            model (str): The model to use for creating embeddings.
+            chunk_size (int): The maximum number of tokens in each chunk.
+
+        Returns:
+            tuple: A tuple containing the FAISS index and the list of successfully embedded texts.
+        """
+        return await self.embedding_manager.create_embeddings_for_faiss(texts, model, chunk_size)
+
+
+    async def simple_chat_completion(self, model, messages):
+        """
+        Performs a simple chat completion using the AsyncCompletionsManager.
+
+        Args:
+            model (str): The OpenAI model to use for the completion.
+            messages (list): A list of message dictionaries to send to the model.
+
+        Returns:
+            str: The content of the model's response.
+        """
+        return await self.completions_manager.simple_chat_completion(model, messages)
+
+
+    async def structured_chat_completion(self, model, messages, schema_name, schema):
+        """
+        Performs a structured chat completion using the AsyncCompletionsManager.
+
+        Args:
+            model (str): The OpenAI model to use for the completion.
+            messages (list): A list of dictionaries representing the conversation history.
+            schema_name (str): The name of the schema defining the response structure.
+            schema (dict): The JSON schema that outlines the structure of the expected response.
+
+        Returns:
+            dict: The structured output returned by the model.
+        """
+        return await self.completions_manager.structured_chat_completion(model, messages, schema_name, schema)
+
+
+    async def create_vector_store(self, name):
+        """
+        Creates a new vector store with a specified name using the AsyncVectorStoreManager.
+
+        Args:
+            name (str): The name of the vector store.
+
+        Returns:
+            object: The newly created vector store object.
+        """
+        return await self.vector_store_manager.create_vector_store(name)
+
+
+    async def upload_files_and_poll(self, vector_store_id, file_paths):
+        """
+        Uploads files to a vector store and polls the file batch for completion using the AsyncVectorStoreManager.
+
+        Args:
+            vector_store_id (str): The ID of the vector store.
+            file_paths (list): A list of file paths to upload.
+
+        Returns:
+            object: The file batch object after upload and completion.
+        """
+        return await self.vector_store_manager.upload_files_and_poll(vector_store_id, file_paths)
+
+
+    async def list_vector_stores(self):
+        """
+        Retrieves a list of all existing vector stores using the AsyncVectorStoreManager.
+
+        Returns:
+            list: A list of vector store objects.
+        """
+        return await self.vector_store_manager.list_vector_stores()
+
+
+    async def delete_vector_store(self, vector_store_id):
+        """
+        Deletes a vector store using the AsyncVectorStoreManager.
+
+        Args:
+            vector_store_id (str): The ID of the vector store.
+
+        Returns:
+            bool: True if the vector store was deleted successfully.
+        """
+        return await self.vector_store_manager.delete_vector_store(vector_store_id)
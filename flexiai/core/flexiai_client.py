@@ -1,15 +1,19 @@
 # flexiai/core/flexiai_client.py
-import asyncio
 import logging
 from flexiai.assistant.functions_registry import FunctionRegistry
 from flexiai.credentials.credential_manager import CredentialManager
 from flexiai.core.flexi_managers.message_manager import MessageManager
 from flexiai.core.flexi_managers.run_manager import RunManager
+from flexiai.core.flexi_managers.run_registry import SHARED_THREADS_TTL, ActiveRunRegistry
+from flexiai.core.flexi_managers.run_scheduler import RunScheduler
+from flexiai.core.flexi_managers.rate_limiter import TokenBucket
 from flexiai.core.flexi_managers.session_manager import SessionManager
 from flexiai.core.flexi_managers.thread_manager import ThreadManager
+from flexiai.core.flexi_managers.thread_pool import WarmThreadPool
 from flexiai.core.flexi_managers.vector_store_manager import VectorStoreManager
 from flexiai.core.flexi_managers.local_vector_store_manager import LocalVectorStoreManager
 from flexiai.core.flexi_managers.multi_agent_system import MultiAgentSystemManager
+from flexiai.core.flexi_managers.state_backend import create_state_backend
 from flexiai.core.flexi_managers.embedding_manager import EmbeddingManager
 from flexiai.core.flexi_managers.images_manager import ImagesManager
 from flexiai.core.flexi_managers.completions_manager import CompletionsManager
@@ -30,39 +34,62 @@ class FlexiAI:
     vector store management, and image generation.
     """
 
-    def __init__(self):
+    def __init__(self, credential_manager=None):
         """
         Initializes the FlexiAI class and its associated managers.
+
+        Args:
+            credential_manager (CredentialManager, optional): Provides the client. Defaults to one built from the configuration.
         """
         self.logger = logging.getLogger(__name__)
         self.config = Config()  # Load configuration
         self.logger.info("Configuration loaded successfully.")
 
         # Phase 1: Create core components
-        self.credential_manager = CredentialManager()
+        self.credential_manager = credential_manager or CredentialManager()
         self.client = self.credential_manager.client
 
+        # The thread, message and run API calls share one request budget
+        requests_per_minute = self.config.OPENAI_REQUESTS_PER_MINUTE
+        rate_limiter = TokenBucket.for_client(self.client, requests_per_minute) if requests_per_minute > 0 else None
+
         # Initialize managers that don't depend on run_manager yet
-        self.thread_manager = ThreadManager(self.client, self.logger)
-        self.message_manager = MessageManager(self.client, self.logger)
+        self.thread_pool = None
+        if self.config.THREAD_POOL_SIZE > 0:
+            self.thread_pool = WarmThreadPool(
+                self.client, self.logger, size=self.config.THREAD_POOL_SIZE, max_age=self.config.THREAD_POOL_MAX_AGE,
+                rate_limiter=rate_limiter
+            )
+            self.thread_pool.start()
+        self.thread_manager = ThreadManager(self.client, self.logger, self.thread_pool, rate_limiter=rate_limiter)
+        self.message_manager = MessageManager(self.client, self.logger, rate_limiter=rate_limiter)
         self.completions_manager = CompletionsManager(self.client, self.logger)
         self.assistant_manager = AssistantManager(self.client, self.logger)
 
         # Initialize the multi-agent system manager and function registry without run_manager for now
+        state_backend = create_state_backend(self.config, self.logger)
         self.multi_agent_system = MultiAgentSystemManager(
-            self.client, self.logger, self.thread_manager, None, self.message_manager
+            self.client, self.logger, self.thread_manager, None, self.message_manager,
+            max_threads_per_assistant=self.config.THREAD_LEASE_MAX_THREADS or None, lease_ttl=self.config.THREAD_LEASE_TTL or None,
+            state_backend=state_backend
         )
         self.function_registry = FunctionRegistry(self.multi_agent_system, None)
 
         # Phase 2: Now create RunManager and inject dependencies into function_registry and multi_agent_system
-        self.run_manager = RunManager(self.client, self.logger, self.message_manager, self.function_registry)
+        # Other workers run the threads of a shared backend too, so the local idle marks are only trusted briefly
+        run_registry = ActiveRunRegistry(ttl=SHARED_THREADS_TTL) if state_backend.shared else None
+        self.run_manager = RunManager(
+            self.client, self.logger, self.message_manager, self.function_registry,
+            run_registry=run_registry, rate_limiter=rate_limiter
+        )
+        self.run_scheduler = RunScheduler(self.run_manager, self.logger)
 
         # Inject run_manager back into the other components
         self.function_registry.run_manager = self.run_manager
         self.multi_agent_system.run_manager = self.run_manager
 
         # Phase 3: Initialize the function registry after all dependencies are set
-        asyncio.run(self.function_registry.initialize_registry())
+        self.run_manager.run_coroutine(self.function_registry.initialize_registry())
 
         # Initialize other managers
         self.embedding_manager = EmbeddingManager(self.client, self.logger)
@@ -78,6 +105,19 @@ class FlexiAI:
         self.logger.info("FlexiAI initialized successfully.")
 
 
+    def close(self):
+        """
+        Cancels the queued scheduled runs, waits for the ones in flight and stops
+        the background event loop of the RunManager and its tool executor. The unused
+        threads of the thread pool are deleted and the state backend is closed.
+        """
+        self.run_scheduler.shutdown(cancel_pending=True)
+        self.run_manager.close()
+        self.multi_agent_system.state_backend.close()
+        if self.thread_pool is not None:
+            self.thread_pool.shutdown()
+
+
     def create_thread(self):
         """
         Creates a new thread.
@@ -89,7 +129,9 @@ class FlexiAI:
             OpenAIError: If the API call to create a new thread fails.
             Exception: If an unexpected error occurs.
         """
-        return self.thread_manager.create_thread()
+        thread = self.thread_manager.create_thread()
+        self.run_manager.mark_thread_idle(thread.id)
+        return thread
 
 
     def retrieve_thread(self, thread_id):
@@ -195,7 +237,7 @@ class FlexiAI:
             user_message (str): The user's message content.
 
         Returns:
-            object: The run object if successful, None otherwise.
+            object: The final run object.
         """
         return self.run_manager.create_advanced_run(assistant_id, thread_id, user_message)
 
@@ -213,11 +255,114 @@ class FlexiAI:
             metadata (dict, optional): Metadata to include with the message.
 
         Returns:
-            None
+            object: The final run object.
         """
         return self.run_manager.create_and_monitor_run(assistant_id, thread_id, user_message, role, metadata)
 
 
+    def stream_run(self, assistant_id, thread_id, user_message=None, role=None, metadata=None):
+        """
+        Creates a streamed run with the specified assistant, optionally adding a user message,
+        and yields its events as they arrive using the RunManager.
+
+        Args:
+            assistant_id (str): The ID of the assistant.
+            thread_id (str): The ID of the thread.
+            user_message (str, optional): The user's message content to add before creating the run.
+            role (str, optional): The role of the message sender. Defaults to 'user'.
+            metadata (dict, optional): Metadata to include with the message.
+
+        Yields:
+            dict: Run events with a `type` of 'text_delta', 'run_step', 'requires_action', 'status' or 'error'.
+        """
+        return self.run_manager.stream_run(assistant_id, thread_id, user_message, role, metadata)
+
+
+    def submit_run(self, assistant_id, thread_id, user_message=None, role=None, metadata=None):
+        """
+        Queues a run with the RunScheduler, which executes runs of many threads concurrently
+        under a cap on the number of runs in flight.
+
+        Args:
+            assistant_id (str): The ID of the assistant.
+            thread_id (str): The ID of the thread.
+            user_message (str, optional): The user's message content to add before creating the run.
+            role (str, optional): The role of the message sender. Defaults to 'user'.
+            metadata (dict, optional): Metadata to include with the message.
+
+        Returns:
+            Future: Resolves to the final run object.
+        """
+        return self.run_scheduler.submit(assistant_id, thread_id, user_message, role, metadata)
+
+
+    def get_poll_count(self, run_id):
+        """
+        Returns how many status checks a monitored run needed using the RunManager.
+
+        Args:
+            run_id (str): The ID of the run.
+
+        Returns:
+            int: The number of checks, or None if the run wasn't monitored.
+        """
+        return self.run_manager.get_poll_count(run_id)
+
+
+    def cache_tool_results(self, function_name, ttl=None, max_size=128):
+        """
+        Enables result caching for a tool or assistant function using the RunManager's ToolResultCache.
+
+        Args:
+            function_name (str): The name of the function.
+            ttl (float, optional): How long, in seconds, a result stays valid. None keeps results until evicted.
+            max_size (int, optional): How many distinct argument sets are cached. Defaults to 128.
+        """
+        self.run_manager.tool_cache.configure(function_name, ttl=ttl, max_size=max_size)
+
+
+    def set_tool_timeout(self, function_name, timeout):
+        """
+        Sets how long a call of a tool or assistant function may take before an error output is submitted instead.
+
+        Args:
+            function_name (str): The name of the function.
+            timeout (float): The timeout in seconds, or None to remove it.
+        """
+        self.run_manager.tool_executor.set_function_timeout(function_name, timeout)
+
+
+    def set_run_timeout(self, timeout):
+        """
+        Sets how long a monitored run may take before it is cancelled through the API.
+
+        Args:
+            timeout (float): The timeout in seconds, or None to never cancel runs.
+        """
+        self.run_manager.run_timeout = timeout
+
+
+    def get_tool_cache_stats(self):
+        """
+        Returns the hit, miss and coalesced call counters of the tool result cache.
+
+        Returns:
+            dict: The counters in total and per function.
+        """
+        return self.run_manager.tool_cache.get_stats()
+
+
+    def get_run_metrics(self):
+        """
+        Returns the sink receiving the latency breakdown (RunMetrics) of every run started by the RunManager.
+        The default InMemoryMetricsSink keeps the most recent records and computes percentiles with `summary()`.
+
+        Returns:
+            MetricsSink: The metrics sink.
+        """
+        return self.run_manager.get_run_metrics()
+
+
     def retrieve_messages(self, thread_id, order='desc', limit=20):
         """
         Retrieves messages from a specified thread using the MessageManager.
@@ -431,6 +576,25 @@ class FlexiAI:
         return self.message_manager.add_messages_dynamically(thread_id, messages, role=role, metadata=metadata)
 
 
+    def add_messages_bulk(self, thread_id, messages, role=None, metadata=None, max_concurrency=8):
+        """
+        Adds many messages to a thread concurrently, keeping their order. Without a thread ID, a new
+        thread is created with its first messages in a single call. Failed messages don't abort the batch.
+
+        Args:
+            thread_id (str): The ID of the thread, or None to create a new thread.
+            messages (list): A list of dictionaries with the `content` and optional `metadata` of each message.
+            role (str, optional): The role of the message sender. Defaults to 'user'.
+            metadata (dict, optional): Default metadata to include with each message.
+            max_concurrency (int, optional): The maximum number of requests in flight. Defaults to 8.
+
+        Returns:
+            dict: The `thread_id`, the added `messages` in order, the `errors` with the `index` of each failed message
+                and whether the messages are known to be in order (`ordered`).
+        """
+        return self.message_manager.add_messages_bulk(thread_id, messages, role=role, metadata=metadata, max_concurrency=max_concurrency)
+
+
     def retrieve_messages_dynamically(self, thread_id, order='asc', limit=20, retrieve_all=False, last_retrieved_id=None):
         """
         Retrieves messages from a specified thread dynamically.
@@ -451,6 +615,48 @@ class FlexiAI:
         """
         return self.message_manager.retrieve_messages_dynamically(thread_id, order, limit, retrieve_all, last_retrieved_id)
 
+
+    def retrieve_message_records(self, thread_id, order='asc', limit=20, retrieve_all=False, last_retrieved_id=None):
+        """
+        Retrieves the MessageRecords of a specified thread (ID, role, creation time, run ID and text),
+        from the message cache when it holds them.
+
+        Args:
+            thread_id (str): The ID of the thread from which to retrieve messages.
+            order (str, optional): The order in which to retrieve messages, either 'asc' or 'desc'. Defaults to 'asc'.
+            limit (int, optional): The maximum number of messages to retrieve. Defaults to 20.
+            retrieve_all (bool, optional): Whether to retrieve all messages in the thread. Defaults to False.
+            last_retrieved_id (str, optional): The ID of the last retrieved message to fetch messages after it. Defaults to None.
+
+        Returns:
+            list: A list of MessageRecords.
+
+        Raises:
+            OpenAIError: If the API call to retrieve messages fails.
+            Exception: If an unexpected error occurs.
+        """
+        return self.message_manager.retrieve_message_records(thread_id, order, limit, retrieve_all, last_retrieved_id)
+
+
+    def iter_messages(self, thread_id, order='asc', page_size=100, after=None, max_items=None, max_bytes=None):
+        """
+        Iterates over the messages of a thread page by page, prefetching the next page while the
+        current one is processed, instead of loading the whole history at once.
+
+        Args:
+            thread_id (str): The ID of the thread.
+            order (str, optional): The order of the messages, either 'asc' or 'desc'. Defaults to 'asc'.
+            page_size (int, optional): The number of messages per request, at most 100. Defaults to 100.
+            after (str, optional): Start after this message ID.
+            max_items (int, optional): Stop after this many messages. Defaults to no limit.
+            max_bytes (int, optional): Stop once the text of the messages yielded reaches this many bytes.
+                The message reaching it is still yielded. Defaults to no limit.
+
+        Returns:
+            Iterator: The message objects, in the requested order.
+        """
+        return self.message_manager.iter_messages(thread_id, order, page_size, after, max_items, max_bytes)
+
     
     def save_processed_content(self, from_assistant_id, to_assistant_id, processed_content):
         """
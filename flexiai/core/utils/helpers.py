@@ -3,6 +3,7 @@ import os
 import json
 import logging
 import platform
+from flexiai.core.flexi_managers.message_record import extract_text
 
 
 class HelperFunctions:
@@ -47,18 +48,12 @@ class HelperFunctions:
     @staticmethod
     def pretty_print_obj(messages):
         """
-        Pretty print a list of message objects.
+        Pretty print a list of message objects or MessageRecords.
         """
         print("=" * 100)
         for msg in messages:
-            role = msg.role
-            content_blocks = msg.content
-            content_value = " ".join([
-                block.text.value for block in content_blocks if hasattr(block, 'text') and hasattr(block.text, 'value')
-            ])
-
-            role_name = "User" if role == "user" else "Assistant"
-            print(f"{role_name}: {content_value}")
+            role_name = "User" if msg.role == "user" else "Assistant"
+            print(f"{role_name}: {extract_text(msg)}")
         print("=" * 100)
         print()
 
@@ -130,8 +125,6 @@ class HelperFunctions:
 
         for msg in all_messages:
             role = ASSISTANT_ROLE_NAME if msg.role == "assistant" else USER_ROLE_NAME
-            content_value = " ".join([
-                block.text.value for block in msg.content if hasattr(block, 'text') and hasattr(block.text, 'value')
-            ]) if msg.content else "No content"
+            content_value = extract_text(msg) or "No content"
             print(f"{role}: {content_value}")
 
@@ -0,0 +1,276 @@
+# flexiai/core/utils/tracing.py
+import logging
+import reprlib
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+
+
+# Containers summarized with a bounded repr when an event is formatted, other values are cut
+_CONTAINER_TYPES = (list, tuple, dict, set, frozenset, deque)
+
+
+class TraceEvent:
+    """
+    TraceEvent is a structured event recorded by a Tracer. The fields are the values that were
+    passed, not copies of them; they are only cut or summarized when a sink formats the event.
+
+    Attributes:
+        timestamp (float): The wall clock time the event was recorded at.
+        name (str): The name of the event, such as 'run.poll' or 'tool.completed'.
+        level (int): The logging level of the event.
+        fields (dict): The structured payload of the event.
+    """
+
+    __slots__ = ('timestamp', 'name', 'level', 'fields')
+
+    def __init__(self, name, level, fields):
+        self.timestamp = time.time()
+        self.name = name
+        self.level = level
+        self.fields = fields
+
+
+    def format(self, max_field_length=256):
+        """
+        Formats the event as `name key=value ...`. Values longer than `max_field_length` are cut,
+        and containers are summarized with a bounded repr, which only walks their first items.
+
+        Args:
+            max_field_length (int, optional): The maximum length of a formatted value. Defaults to 256.
+
+        Returns:
+            str: The formatted event.
+        """
+        summary = None
+        if max_field_length is not None:
+            summary = reprlib.Repr()
+            summary.maxstring = summary.maxother = max_field_length
+        parts = [self.name]
+        for key, value in self.fields.items():
+            if isinstance(value, str):
+                text = value
+            elif summary is not None and isinstance(value, _CONTAINER_TYPES):
+                text = summary.repr(value)
+            else:
+                text = repr(value)
+            if max_field_length is not None and len(text) > max_field_length:
+                text = f"{text[:max_field_length]}...(+{len(text) - max_field_length} chars)"
+            parts.append(f"{key}={text}")
+        return " ".join(parts)
+
+
+    def to_dict(self):
+        """
+        Returns the event as a dictionary.
+
+        Returns:
+            dict: The `timestamp`, `name`, `level` and `fields` of the event.
+        """
+        return {'timestamp': self.timestamp, 'name': self.name, 'level': self.level, 'fields': dict(self.fields)}
+
+
+    def __str__(self):
+        return self.format()
+
+
+class TraceSink(ABC):
+    """
+    Abstract base class for trace sinks, which consume the events recorded by a Tracer.
+    Subclass it to ship the events elsewhere.
+    """
+
+    @abstractmethod
+    def consume(self, event):
+        """
+        Receives an event. Called synchronously from the thread that recorded it, so it must be quick.
+
+        Args:
+            event (TraceEvent): The recorded event.
+        """
+        pass
+
+
+class _LazyMessage:
+    # Defers the formatting of an event until a logging handler actually emits it, once for all the handlers
+    __slots__ = ('event', 'max_field_length', 'text')
+
+    def __init__(self, event, max_field_length):
+        self.event = event
+        self.max_field_length = max_field_length
+        self.text = None
+
+
+    def __str__(self):
+        if self.text is None:
+            self.text = self.event.format(self.max_field_length)
+        return self.text
+
+
+class LoggingTraceSink(TraceSink):
+    """
+    LoggingTraceSink forwards events to a logger at their own level. Events below the level
+    the logger is enabled for are dropped before any formatting happens.
+
+    Attributes:
+        logger (logging.Logger): The logger receiving the events.
+        max_field_length (int): The maximum length of a formatted value.
+    """
+
+    def __init__(self, logger, max_field_length=256):
+        self.logger = logger
+        self.max_field_length = max_field_length
+
+
+    def consume(self, event):
+        if self.logger.isEnabledFor(event.level):
+            self.logger.log(event.level, "%s", _LazyMessage(event, self.max_field_length))
+
+
+class Tracer:
+    """
+    Tracer records structured events of the managers into a fixed size ring buffer and hands
+    them to its sinks.
+
+    Recording an event does no formatting: the event keeps references to the values passed as
+    its fields, so tool arguments and results aren't copied, and nothing is turned into text
+    until a sink formats the event (for instance a LoggingTraceSink whose logger is enabled for
+    the event level). The ring buffer holds at most `capacity` events, and with them the values
+    they refer to. Repetitive events can be sampled: with a sample rate of N, only one event of
+    that name out of N is recorded.
+
+    Attributes:
+        capacity (int): The number of events kept in the ring buffer.
+        sinks (list): The TraceSinks receiving every recorded event.
+        sample_rates (dict): Record one event out of N, per event name.
+    """
+
+    def __init__(self, capacity=10000, sinks=None, sample_rates=None):
+        """
+        Initializes the Tracer.
+
+        Args:
+            capacity (int, optional): The number of events kept in the ring buffer. Defaults to 10000.
+            sinks (list, optional): The TraceSinks receiving the events. Defaults to none.
+            sample_rates (dict, optional): Record one event out of N, per event name. Defaults to every event.
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1.")
+        self.capacity = capacity
+        self.sinks = list(sinks or [])
+        self.sample_rates = {}
+        self._events = deque(maxlen=capacity)
+        self._counters = {}
+        self._recorded = 0
+        self._sampled_out = 0
+        self._lock = threading.Lock()
+
+        for name, rate in (sample_rates or {}).items():
+            self.set_sample_rate(name, rate)
+
+
+    def event(self, name, level=logging.DEBUG, **fields):
+        """
+        Records an event.
+
+        Args:
+            name (str): The name of the event.
+            level (int, optional): The logging level of the event. Defaults to logging.DEBUG.
+            **fields: The structured payload of the event, kept as is.
+
+        Returns:
+            TraceEvent: The recorded event, or None if it was sampled out.
+        """
+        rate = self.sample_rates.get(name)
+        with self._lock:
+            if rate is not None:
+                count = self._counters.get(name, 0)
+                self._counters[name] = count + 1
+                if count % rate:
+                    self._sampled_out += 1
+                    return None
+            self._recorded += 1
+
+        event = TraceEvent(name, level, fields)
+        self._events.append(event)
+        for sink in self.sinks:
+            sink.consume(event)
+        return event
+
+
+    def set_sample_rate(self, name, rate):
+        """
+        Samples the events of a name.
+
+        Args:
+            name (str): The name of the event.
+            rate (int): Record one event out of `rate`, or None to record every event.
+        """
+        if rate is None:
+            self.sample_rates.pop(name, None)
+            return
+        if rate < 1:
+            raise ValueError("A sample rate must be at least 1.")
+        self.sample_rates[name] = rate
+
+
+    def add_sink(self, sink):
+        """
+        Adds a sink receiving the events recorded from now on.
+
+        Args:
+            sink (TraceSink): The sink.
+        """
+        self.sinks.append(sink)
+
+
+    def get_events(self, name=None):
+        """
+        Returns the events in the ring buffer, oldest first.
+
+        Args:
+            name (str, optional): Only return the events of this name.
+
+        Returns:
+            list: The TraceEvents.
+        """
+        events = list(self._events)
+        if name is not None:
+            events = [event for event in events if event.name == name]
+        return events
+
+
+    def clear(self):
+        """
+        Empties the ring buffer.
+        """
+        self._events.clear()
+
+
+    def get_stats(self):
+        """
+        Returns the event counters.
+
+        Returns:
+            dict: The number of events `recorded`, `sampled_out` and currently `buffered`.
+        """
+        with self._lock:
+            return {'recorded': self._recorded, 'sampled_out': self._sampled_out, 'buffered': len(self._events)}
+
+
+def create_tracer(logger, capacity=10000, poll_sample_rate=10):
+    """
+    Creates the tracer the managers use by default: events go to the logger at their own level
+    and only one status check event ('run.poll', 'thread.wait') out of `poll_sample_rate` is recorded.
+
+    Args:
+        logger (logging.Logger): The logger receiving the events.
+        capacity (int, optional): The number of events kept in the ring buffer. Defaults to 10000.
+        poll_sample_rate (int, optional): Record one status check event out of N. Defaults to 10.
+
+    Returns:
+        Tracer: The tracer.
+    """
+    sample_rates = {'run.poll': poll_sample_rate, 'thread.wait': poll_sample_rate}
+    return Tracer(capacity, sinks=[LoggingTraceSink(logger)], sample_rates=sample_rates)
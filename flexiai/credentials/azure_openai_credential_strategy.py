@@ -1,6 +1,6 @@
 # flexiai/credentials/azure_openai_credential_strategy.py
 import os
-from openai import AzureOpenAI
+from openai import AsyncAzureOpenAI, AzureOpenAI
 from flexiai.config.config import config
 from flexiai.credentials.credential_strategy import CredentialStrategy
 
@@ -25,6 +25,23 @@ class AzureOpenAICredentialStrategy(CredentialStrategy):
         Raises:
             ValueError: If the Azure OpenAI API key, endpoint, or API version is not set.
         """
+        return AzureOpenAI(**self._get_credentials(), http_client=self.http_client)
+
+
+    def get_async_client(self):
+        """
+        Get the asynchronous Azure OpenAI client, configured exactly like the one returned by `get_client`.
+
+        Returns:
+            AsyncAzureOpenAI: The initialized asynchronous Azure OpenAI client.
+
+        Raises:
+            ValueError: If the Azure OpenAI API key, endpoint, or API version is not set.
+        """
+        return AsyncAzureOpenAI(**self._get_credentials(), http_client=self.async_http_client)
+
+
+    def _get_credentials(self):
         api_key = os.getenv("AZURE_OPENAI_API_KEY", config.AZURE_OPENAI_API_KEY)
         azure_endpoint = os.getenv("AZURE_OPENAI_ENDPOINT", config.AZURE_OPENAI_ENDPOINT)
         api_version = os.getenv("AZURE_OPENAI_API_VERSION", config.AZURE_OPENAI_API_VERSION)
@@ -32,8 +49,8 @@ class AzureOpenAICredentialStrategy(CredentialStrategy):
         if not api_key or not azure_endpoint or not api_version:
             raise ValueError("Azure OpenAI API key, endpoint, or API version is not set.")
         
-        return AzureOpenAI(
-            api_key=api_key,
-            api_version=api_version,
-            azure_endpoint=azure_endpoint
-        )
+        return {
+            "api_key": api_key,
+            "api_version": api_version,
+            "azure_endpoint": azure_endpoint
+        }
@@ -7,16 +7,33 @@ class CredentialManager:
     """
     Manages the credentials and provides the appropriate client based on the credential type.
     """
-    def __init__(self):
+    def __init__(self, http_client=None, async_http_client=None):
+        """
+        Initializes the CredentialManager.
+
+        Args:
+            http_client (httpx.Client, optional): The HTTP client used by the synchronous client,
+                e.g. one with a custom transport. Defaults to the one created by the OpenAI library.
+            async_http_client (httpx.AsyncClient, optional): The HTTP client used by the asynchronous client.
+        """
         self.credential_type = config.CREDENTIAL_TYPE
+        self.http_client = http_client
+        self.async_http_client = async_http_client
         self.client = self._get_client()
 
-    def _get_client(self):
+    def _get_strategy(self):
         if self.credential_type == 'openai':
-            strategy = OpenAICredentialStrategy()
+            return OpenAICredentialStrategy(self.http_client, self.async_http_client)
         elif self.credential_type == 'azure':
-            strategy = AzureOpenAICredentialStrategy()
+            return AzureOpenAICredentialStrategy(self.http_client, self.async_http_client)
         else:
             raise ValueError(f"Unsupported credential type: {self.credential_type}")
 
-        return strategy.get_client()
+    def _get_client(self):
+        return self._get_strategy().get_client()
+
+    def get_async_client(self):
+        """
+        Returns a new asynchronous client for the configured credential type.
+        """
+        return self._get_strategy().get_async_client()
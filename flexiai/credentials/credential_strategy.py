@@ -6,7 +6,19 @@ class CredentialStrategy(ABC):
     Abstract base class for credential strategies. This class defines the interface
     for different credential strategies to get their respective API clients.
     """
-    
+
+    def __init__(self, http_client=None, async_http_client=None):
+        """
+        Initializes the strategy.
+
+        Args:
+            http_client (httpx.Client, optional): The HTTP client of the synchronous client. Defaults to the library's own.
+            async_http_client (httpx.AsyncClient, optional): The HTTP client of the asynchronous client. Defaults to the library's own.
+        """
+        self.http_client = http_client
+        self.async_http_client = async_http_client
+
+
     @abstractmethod
     def get_client(self):
         """
@@ -19,3 +31,19 @@ class CredentialStrategy(ABC):
             Client: The API client for the specific credential strategy.
         """
         pass
+
+
+    def get_async_client(self):
+        """
+        Method to get the asynchronous API client.
+
+        Strategies that support asyncio should override this method to return the
+        asynchronous counterpart of the client returned by `get_client`.
+
+        Returns:
+            AsyncClient: The asynchronous API client for the specific credential strategy.
+
+        Raises:
+            NotImplementedError: If the strategy doesn't provide an asynchronous client.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not provide an asynchronous client.")
@@ -1,6 +1,6 @@
 # flexiai/credentials/openai_credential_strategy.py
 import os
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 from flexiai.config.config import config
 from flexiai.credentials.credential_strategy import CredentialStrategy
 
@@ -26,6 +26,30 @@ class OpenAICredentialStrategy(CredentialStrategy):
         Raises:
             ValueError: If the OpenAI API key is not set.
         """
+        api_key, headers = self._get_credentials()
+        return OpenAI(api_key=api_key, default_headers=headers, base_url=self._get_base_url(), http_client=self.http_client)
+
+
+    def get_async_client(self):
+        """
+        Get the asynchronous OpenAI client, configured exactly like the one returned by `get_client`.
+
+        Returns:
+            AsyncOpenAI: The initialized asynchronous OpenAI client.
+
+        Raises:
+            ValueError: If the OpenAI API key is not set.
+        """
+        api_key, headers = self._get_credentials()
+        return AsyncOpenAI(api_key=api_key, default_headers=headers, base_url=self._get_base_url(), http_client=self.async_http_client)
+
+
+    def _get_base_url(self):
+        # An empty OPENAI_BASE_URL means the OpenAI API, the library would take it as a relative URL
+        return os.getenv("OPENAI_BASE_URL") or config.OPENAI_BASE_URL or "https://api.openai.com/v1"
+
+
+    def _get_credentials(self):
         api_key = os.getenv("OPENAI_API_KEY", config.OPENAI_API_KEY)
         organization_id = os.getenv("OPENAI_ORGANIZATION_ID", config.OPENAI_ORGANIZATION_ID)
         project_id = os.getenv("OPENAI_PROJECT_ID", config.OPENAI_PROJECT_ID)
@@ -43,5 +67,5 @@ class OpenAICredentialStrategy(CredentialStrategy):
             "OpenAI-Version": api_version,
             "OpenAI-Beta": f"assistants={assistant_version}"
         }
-        
-        return OpenAI(api_key=api_key, default_headers=headers)
+
+        return api_key, headers
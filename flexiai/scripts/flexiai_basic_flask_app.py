@@ -51,9 +51,10 @@ def write_file_content(project_root):
         project_root (str): The root directory of the project.
     """
     files_content = {
-        'routes/api.py': '''import uuid
+        'routes/api.py': '''import json
+import uuid
 from flexiai import FlexiAI
-from flask import Blueprint, request, jsonify, session as flask_session
+from flask import Blueprint, Response, request, jsonify, stream_with_context, session as flask_session
 from utils.markdown_converter import convert_markdown_to_html
 
 # Create a Blueprint for the API routes
@@ -79,36 +80,40 @@ def run():
     if not session_id:
         session_id = str(uuid.uuid4())
         flask_session['session_id'] = session_id
-        flexiai.session_manager.create_session(session_id, {"thread_id": thread_id, "seen_message_ids": []})
+        flexiai.session_manager.create_session(session_id, {"thread_id": thread_id, "last_message_id": None})
     else:
         session_data = flexiai.session_manager.get_session(session_id)
         thread_id = session_data.get("thread_id", thread_id)
 
-    if not thread_id:
-        thread_id = flexiai.multi_agent_system.thread_initialization(assistant_id)
-        flexiai.session_manager.create_session(session_id, {"thread_id": thread_id, "seen_message_ids": []})
+    # Each session leases its own thread of the assistant for the duration of the request,
+    # the same one on every request
+    try:
+        lease = flexiai.multi_agent_system.acquire_thread_lease(assistant_id, owner=session_id, timeout=30, thread_id=thread_id)
+    except TimeoutError:
+        return jsonify({'success': False, 'message': "The assistant is busy, please try again."}), 503
+    if lease.thread_id != thread_id:
+        thread_id = lease.thread_id
+        flexiai.session_manager.create_session(session_id, {"thread_id": thread_id, "last_message_id": None})
 
-    last_retrieved_id = None
-    flexiai.create_advanced_run(assistant_id, thread_id, user_message)
-    messages = flexiai.retrieve_messages_dynamically(thread_id, limit=20, retrieve_all=False, last_retrieved_id=last_retrieved_id)
+    with lease:
+        flexiai.create_advanced_run(assistant_id, thread_id, user_message)
 
-    session_data = flexiai.session_manager.get_session(session_id)
-    seen_message_ids = set(session_data.get("seen_message_ids", []))
+        # Only the messages after the last one sent to this session, served from the message cache
+        session_data = flexiai.session_manager.get_session(session_id)
+        last_message_id = session_data.get("last_message_id")
+        messages = flexiai.retrieve_message_records(thread_id, order='asc', retrieve_all=True, last_retrieved_id=last_message_id)
 
     filtered_messages = []
-    new_seen_message_ids = list(seen_message_ids)
-
     for msg in messages:
-        if msg.id not in seen_message_ids:
-            content = " ".join([block.text.value for block in msg.content if hasattr(block, 'text') and hasattr(block.text, 'value')])
-            html_content = convert_markdown_to_html(content)
-            filtered_messages.append({
-                "role": "You" if msg.role == "user" else "Assistant",
-                "message": html_content
-            })
-            new_seen_message_ids.append(msg.id)
+        html_content = convert_markdown_to_html(msg.text)
+        filtered_messages.append({
+            "role": "You" if msg.role == "user" else "Assistant",
+            "message": html_content
+        })
+    if messages:
+        last_message_id = messages[-1].id
 
-    flexiai.session_manager.create_session(session_id, {"thread_id": thread_id, "seen_message_ids": new_seen_message_ids})
+    flexiai.session_manager.create_session(session_id, {"thread_id": thread_id, "last_message_id": last_message_id})
 
     response_data = {
         'success': True,
@@ -118,6 +123,51 @@ def run():
 
     flexiai.logger.debug(f"Sending response data: {response_data}")
     return jsonify(response_data)
+
+@api_bp.route('/stream', methods=['POST'])
+def stream():
+    data = request.json
+    user_message = data['message']
+    assistant_id = 'asst_XXXXXXXXXXXXXXXXXXXXXXXXXXXXXXX'
+    thread_id = data.get('thread_id')
+
+    session_id = flask_session.get('session_id')
+    if not session_id:
+        session_id = str(uuid.uuid4())
+        flask_session['session_id'] = session_id
+        flexiai.session_manager.create_session(session_id, {"thread_id": thread_id, "last_message_id": None})
+    else:
+        session_data = flexiai.session_manager.get_session(session_id)
+        thread_id = session_data.get("thread_id", thread_id)
+
+    # Each session leases its own thread of the assistant for the duration of the request,
+    # the same one on every request
+    try:
+        lease = flexiai.multi_agent_system.acquire_thread_lease(assistant_id, owner=session_id, timeout=30, thread_id=thread_id)
+    except TimeoutError:
+        return jsonify({'success': False, 'message': "The assistant is busy, please try again."}), 503
+    if lease.thread_id != thread_id:
+        thread_id = lease.thread_id
+        flexiai.session_manager.create_session(session_id, {"thread_id": thread_id, "last_message_id": None})
+
+    def generate():
+        try:
+            for event in flexiai.stream_run(assistant_id, thread_id, user_message):
+                if event['type'] == 'text_delta':
+                    payload = {'type': 'delta', 'thread_id': thread_id, 'text': event['text']}
+                elif event['type'] == 'status':
+                    payload = {'type': 'status', 'thread_id': thread_id, 'status': event['status']}
+                else:
+                    continue
+                yield f"data: {json.dumps(payload)}\\n\\n"
+        except Exception as e:
+            flexiai.logger.error(f"Error while streaming run for thread {thread_id}: {str(e)}", exc_info=True)
+            yield f"data: {json.dumps({'type': 'error', 'thread_id': thread_id, 'message': str(e)})}\\n\\n"
+
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    # The lease lasts until the whole stream was sent, or the client went away
+    response.call_on_close(lease.release)
+    return response
 ''',
 
         'static/css/styles.css': '''/* Base Styles */
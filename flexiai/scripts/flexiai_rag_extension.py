@@ -41,6 +41,7 @@ def create_user_flexiai_rag_folder(project_root):
         '__init__.py': "# user_flexiai_rag/__init__.py\n",
         'user_functions_mapping.py': '''# user_flexiai_rag/user_functions_mapping.py
 import logging
+from flexiai import ToolFunction
 from user_flexiai_rag.user_functions_manager import FunctionsManager
 
 logger = logging.getLogger(__name__)
@@ -59,6 +60,8 @@ async def map_user_functions():
     # Map user-defined personal and assistant functions
     user_personal_functions = {
         'search_youtube': user_functions_manager.search_youtube,
+        # CPU-heavy functions can run in a pool of worker processes (arguments and results must be picklable):
+        # 'score_report': ToolFunction(user_functions_manager.score_report, executor="process"),
     }
 
     user_assistant_functions = {
@@ -191,6 +194,34 @@ def create_env_file(project_root):
                 "# ============================================================================================ #\n"
                 "# Set this to 'openai' if you are using OpenAI, or 'azure' if you are using Azure OpenAI.\n"
                 "CREDENTIAL_TYPE=openai\n\n"
+                "# Maximum number of run API requests per minute shared by everything using the same client.\n"
+                "# Set to 0 to disable the limiter.\n"
+                "OPENAI_REQUESTS_PER_MINUTE=0\n\n"
+                "# Alternative endpoint for the OpenAI client, e.g. the local fake server of flexiai.testing.\n"
+                "# Leave empty to use the OpenAI API.\n"
+                "OPENAI_BASE_URL=\n\n"
+                "# Number of empty threads created ahead of time, so new conversations don't wait for one.\n"
+                "# Unused threads are deleted after THREAD_POOL_MAX_AGE seconds. Set to 0 to disable the pool.\n"
+                "THREAD_POOL_SIZE=0\n"
+                "THREAD_POOL_MAX_AGE=3600\n\n"
+                "# Maximum number of threads of an assistant leased at once to sessions or tasks; further callers wait for one.\n"
+                "# Set to 0 for no limit. A lease unused for THREAD_LEASE_TTL seconds expires (0 to never expire);\n"
+                "# the thread of a session is kept for it either way.\n"
+                "THREAD_LEASE_MAX_THREADS=0\n"
+                "THREAD_LEASE_TTL=1800\n\n"
+                "# SQLite database file keeping the threads of the assistants and the processed content they exchange,\n"
+                "# shared by the worker processes of a server and kept across restarts. Leave empty to keep them in memory.\n"
+                "STATE_BACKEND_PATH=\n\n"
+                "# Limits of the processed content the assistants leave for each other. 0 disables a limit.\n"
+                "# Size caps in bytes, for all the content and per pair of assistants; the oldest content is evicted beyond them.\n"
+                "PROCESSED_CONTENT_MAX_BYTES=0\n"
+                "PROCESSED_CONTENT_MAX_KEY_BYTES=0\n"
+                "# Time to live of the content not loaded, in seconds.\n"
+                "PROCESSED_CONTENT_TTL=0\n"
+                "# Sizes in bytes from which content kept in memory is compressed, and written to PROCESSED_CONTENT_SPILL_DIR (a temporary directory if empty).\n"
+                "PROCESSED_CONTENT_COMPRESS_BYTES=0\n"
+                "PROCESSED_CONTENT_SPILL_BYTES=0\n"
+                "PROCESSED_CONTENT_SPILL_DIR=\n\n"
                 "# ============================================================================================ #\n"
                 "#                                      User Project Configuration                              #\n"
                 "# ============================================================================================ #\n"
@@ -229,7 +260,6 @@ def create_requirements_file(project_root):
                 "MarkupSafe==2.1.5\n"
                 "msal==1.30.0\n"
                 "msal-extensions==1.2.0\n"
-                "nest-asyncio==1.6.0\n"
                 "openai==1.40.2\n"
                 "packaging==24.1\n"
                 "platformdirs==3.7.0\n"
@@ -0,0 +1,4 @@
+# flexiai/testing/__init__.py
+from flexiai.testing.fake_openai import FakeOpenAIBackend, FakeOpenAIServer, constant, lognormal, uniform
+
+__all__ = ['FakeOpenAIBackend', 'FakeOpenAIServer', 'constant', 'lognormal', 'uniform']
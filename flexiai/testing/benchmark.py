@@ -0,0 +1,234 @@
+# flexiai/testing/benchmark.py
+"""
+Throughput and latency benchmark of the RunManager against the FakeOpenAIBackend.
+
+Usage:
+    python -m flexiai.testing.benchmark --runs 200 --concurrency 16 --output results.json
+    python -m flexiai.testing.benchmark --save-baseline baseline.json
+    python -m flexiai.testing.benchmark --baseline baseline.json --max-regression 0.1
+
+Each scenario reports the runs per second, the p50/p95/p99 end-to-end latency, the API calls
+per run and the CPU time per run. The CPU time is the one of the whole process, so it includes
+the simulated backend. With `--baseline`, the results are compared to a stored run and the exit
+code is 1 when the throughput or the p95 latency regressed by more than `--max-regression`.
+"""
+import argparse
+import json
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from flexiai.core.flexi_managers.message_manager import MessageManager
+from flexiai.core.flexi_managers.run_manager import RunManager
+from flexiai.core.flexi_managers.run_metrics import InMemoryMetricsSink
+from flexiai.core.flexi_managers.run_monitor import PollingPolicy
+from flexiai.testing.fake_openai import FakeOpenAIBackend, lognormal
+
+
+def _tool_step(count):
+    return [{'name': 'benchmark_tool', 'arguments': {'index': index}} for index in range(count)]
+
+
+# Scenario name -> (RunManager entry point, tool calls per required action, number of required actions)
+SCENARIOS = {
+    'create_and_monitor_run': ('create_and_monitor_run', 0, 0),
+    'create_advanced_run': ('create_advanced_run', 0, 0),
+    'requires_action_sequential': ('create_and_monitor_run', 2, 2),
+    'requires_action_parallel': ('create_and_monitor_run', 4, 2),
+    'assistant_transformer': ('assistant_transformer', 0, 0),
+}
+
+
+def run_scenario(name, runs=100, concurrency=8, latency=0.02, run_duration=0.05, tool_latency=0.01, policy=None, seed=0):
+    """
+    Runs one benchmark scenario.
+
+    Args:
+        name (str): The scenario name, a key of SCENARIOS.
+        runs (int, optional): The number of runs. Defaults to 100.
+        concurrency (int, optional): The number of runs in flight, each on its own thread. Defaults to 8.
+        latency (float, optional): The median latency of the simulated API requests, in seconds. Defaults to 0.02.
+        run_duration (float, optional): How long a simulated run stays in progress before each step. Defaults to 0.05.
+        tool_latency (float, optional): How long the benchmark tool takes, in seconds. Defaults to 0.01.
+        policy (PollingPolicy, optional): The polling policy of the RunManager.
+        seed (int, optional): The seed of the simulated backend. Defaults to 0.
+
+    Returns:
+        dict: The results of the scenario.
+    """
+    entry_point, calls_per_step, steps = SCENARIOS[name]
+    backend = FakeOpenAIBackend(
+        latency=lognormal(latency, 0.3), run_duration=run_duration, seed=seed,
+        tool_call_scripts={'*': [_tool_step(calls_per_step) for _ in range(steps)]}
+    )
+    client = backend.client(max_retries=0)
+    logger = logging.getLogger(__name__)
+    sink = InMemoryMetricsSink(capacity=runs)
+    run_manager = RunManager(
+        client, logger, MessageManager(client, logger), None, polling_policy=policy, metrics_sink=sink
+    )
+
+    def benchmark_tool(index):
+        time.sleep(tool_latency)
+        return index
+
+    run_manager.update_function_mappings({'benchmark_tool': benchmark_tool}, {})
+    assistant_id = client.beta.assistants.create(model="gpt-4o", name="benchmark").id
+    thread_ids = [client.beta.threads.create().id for _ in range(concurrency)]
+    for thread_id in thread_ids:
+        run_manager.mark_thread_idle(thread_id)
+    setup_calls = sum(backend.get_stats()['requests'].values())
+
+    def worker(slot):
+        thread_id = thread_ids[slot]
+        for index in range(slot, runs, concurrency):
+            if entry_point == 'create_and_monitor_run':
+                run_manager.create_and_monitor_run(assistant_id, thread_id, f"Benchmark message {index}")
+            elif entry_point == 'create_advanced_run':
+                run_manager.create_advanced_run(assistant_id, thread_id, f"Benchmark message {index}")
+            else:
+                run_manager.assistant_transformer(thread_id, assistant_id)
+
+    started, cpu_started = time.perf_counter(), time.process_time()
+    try:
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            for future in [pool.submit(worker, slot) for slot in range(concurrency)]:
+                future.result()
+    finally:
+        run_manager.close()
+    elapsed, cpu = time.perf_counter() - started, time.process_time() - cpu_started
+
+    records = sink.get_records()
+    latencies = sink.percentiles('total_time', (50, 95, 99))
+    return {
+        'runs': len(records),
+        'failed_runs': sum(1 for record in records if record.status != 'completed'),
+        'runs_per_sec': len(records) / elapsed if elapsed else 0.0,
+        'latency': {f"p{p}": value for p, value in latencies.items()},
+        'api_calls_per_run': (sum(backend.get_stats()['requests'].values()) - setup_calls) / max(len(records), 1),
+        'cpu_per_run': cpu / max(len(records), 1),
+    }
+
+
+def compare(results, baseline, max_regression=0.1):
+    """
+    Compares benchmark results with a baseline.
+
+    Args:
+        results (dict): The results of `run_benchmark`.
+        baseline (dict): The stored results to compare with.
+        max_regression (float, optional): The tolerated relative regression of the throughput and p95 latency. Defaults to 0.1.
+
+    Returns:
+        tuple: The comparison per scenario (dict) and the list of regressions (list of str).
+    """
+    comparison, regressions = {}, []
+    for name, current in results['scenarios'].items():
+        previous = baseline.get('scenarios', {}).get(name)
+        if previous is None:
+            continue
+        deltas = {
+            'runs_per_sec': _relative(current['runs_per_sec'], previous['runs_per_sec']),
+            'p95': _relative(current['latency'].get('p95'), previous['latency'].get('p95')),
+            'api_calls_per_run': _relative(current['api_calls_per_run'], previous['api_calls_per_run']),
+            'cpu_per_run': _relative(current['cpu_per_run'], previous['cpu_per_run']),
+        }
+        comparison[name] = deltas
+        if deltas['runs_per_sec'] is not None and deltas['runs_per_sec'] < -max_regression:
+            regressions.append(f"{name}: throughput {deltas['runs_per_sec']:+.1%}")
+        if deltas['p95'] is not None and deltas['p95'] > max_regression:
+            regressions.append(f"{name}: p95 latency {deltas['p95']:+.1%}")
+    return comparison, regressions
+
+
+def run_benchmark(scenarios=None, **options):
+    """
+    Runs the benchmark scenarios.
+
+    Args:
+        scenarios (list, optional): The scenario names. Defaults to all of them.
+        **options: The options of `run_scenario`.
+
+    Returns:
+        dict: The `config` of the benchmark and the results per scenario (`scenarios`).
+    """
+    config = {key: value for key, value in options.items() if key != 'policy'}
+    return {
+        'config': config,
+        'scenarios': {name: run_scenario(name, **options) for name in (scenarios or SCENARIOS)}
+    }
+
+
+def _relative(current, previous):
+    if current is None or not previous:
+        return None
+    return (current - previous) / previous
+
+
+def _print_results(results, comparison=None):
+    print(f"{'scenario':<30} {'runs/s':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'calls/run':>10} {'cpu/run':>9}")
+    for name, result in results['scenarios'].items():
+        latency = result['latency']
+        print(
+            f"{name:<30} {result['runs_per_sec']:>8.1f} {latency.get('p50', 0):>8.3f} {latency.get('p95', 0):>8.3f} "
+            f"{latency.get('p99', 0):>8.3f} {result['api_calls_per_run']:>10.1f} {result['cpu_per_run'] * 1000:>7.1f}ms"
+        )
+        if comparison and name in comparison:
+            deltas = comparison[name]
+            print("  vs baseline: " + ", ".join(
+                f"{key} {value:+.1%}" for key, value in deltas.items() if value is not None
+            ))
+
+
+def main(argv=None):
+    """
+    Runs the benchmark from the command line.
+
+    Args:
+        argv (list, optional): The command line arguments. Defaults to sys.argv.
+
+    Returns:
+        int: The exit code, 1 if a regression beyond the threshold was found.
+    """
+    parser = argparse.ArgumentParser(description="Benchmark the FlexiAI RunManager against a simulated Assistants backend.")
+    parser.add_argument('--scenario', action='append', choices=list(SCENARIOS), help="Scenario to run, can be repeated. Defaults to all.")
+    parser.add_argument('--runs', type=int, default=100, help="Runs per scenario.")
+    parser.add_argument('--concurrency', type=int, default=8, help="Runs in flight at once.")
+    parser.add_argument('--latency', type=float, default=0.02, help="Median simulated API latency in seconds.")
+    parser.add_argument('--run-duration', type=float, default=0.05, help="Simulated run duration per step in seconds.")
+    parser.add_argument('--tool-latency', type=float, default=0.01, help="Duration of the benchmark tool in seconds.")
+    parser.add_argument('--poll-interval', type=float, default=0.2, help="Initial polling interval in seconds.")
+    parser.add_argument('--max-poll-interval', type=float, default=5.0, help="Maximum polling interval in seconds.")
+    parser.add_argument('--seed', type=int, default=0, help="Seed of the simulated backend.")
+    parser.add_argument('--output', help="Write the results to this JSON file.")
+    parser.add_argument('--save-baseline', help="Write the results to this JSON file as the new baseline.")
+    parser.add_argument('--baseline', help="Compare the results with this baseline JSON file.")
+    parser.add_argument('--max-regression', type=float, default=0.1, help="Tolerated relative regression when comparing.")
+    args = parser.parse_args(argv)
+
+    logging.getLogger('flexiai').setLevel(logging.WARNING)
+    policy = PollingPolicy(initial_interval=args.poll_interval, max_interval=args.max_poll_interval)
+    results = run_benchmark(
+        args.scenario, runs=args.runs, concurrency=args.concurrency, latency=args.latency,
+        run_duration=args.run_duration, tool_latency=args.tool_latency, policy=policy, seed=args.seed
+    )
+    results['config'].update(poll_interval=args.poll_interval, max_poll_interval=args.max_poll_interval)
+
+    comparison, regressions = None, []
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            comparison, regressions = compare(results, json.load(f), args.max_regression)
+    _print_results(results, comparison)
+
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(results, f, indent=2)
+
+    for regression in regressions:
+        print(f"Regression: {regression}")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
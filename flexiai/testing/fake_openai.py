@@ -0,0 +1,1032 @@
+# flexiai/testing/fake_openai.py
+import asyncio
+import base64
+import hashlib
+import itertools
+import json
+import random
+import re
+import struct
+import threading
+import time
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+import httpx
+
+
+TERMINAL_RUN_STATUSES = ('completed', 'failed', 'cancelled', 'expired', 'incomplete')
+
+
+def constant(seconds):
+    """
+    Returns a latency distribution that always yields the same value.
+
+    Args:
+        seconds (float): The latency in seconds.
+
+    Returns:
+        callable: The distribution, called with a random.Random instance.
+    """
+    return lambda rng: seconds
+
+
+def uniform(low, high):
+    """
+    Returns a latency distribution uniform between two bounds.
+
+    Args:
+        low (float): The lower bound in seconds.
+        high (float): The upper bound in seconds.
+
+    Returns:
+        callable: The distribution, called with a random.Random instance.
+    """
+    return lambda rng: rng.uniform(low, high)
+
+
+def lognormal(median, sigma=0.5):
+    """
+    Returns a log-normal latency distribution, the usual shape of API latencies with a long tail.
+
+    Args:
+        median (float): The median latency in seconds.
+        sigma (float, optional): The standard deviation of the underlying normal distribution. Defaults to 0.5.
+
+    Returns:
+        callable: The distribution, called with a random.Random instance.
+    """
+    return lambda rng: median * rng.lognormvariate(0, sigma)
+
+
+class FakeResponse:
+    """
+    FakeResponse is the transport-agnostic answer of the FakeOpenAIBackend.
+
+    Attributes:
+        status (int): The HTTP status code.
+        headers (dict): The response headers.
+        body (bytes): The response body, empty for streamed responses.
+        chunks (list): For streamed responses, (delay, bytes) pairs sent in order after waiting the delay.
+        delay (float): The simulated latency to wait before answering.
+    """
+
+    def __init__(self, status=200, body=b"", headers=None, chunks=None, delay=0.0):
+        self.status = status
+        self.body = body
+        self.headers = headers or {}
+        self.chunks = chunks
+        self.delay = delay
+
+
+class FakeOpenAIBackend:
+    """
+    FakeOpenAIBackend is an in-memory stand-in for the OpenAI endpoints used by the FlexiAI managers:
+    assistants, threads, messages, runs (including required actions, tool output submission and
+    streaming), embeddings, chat completions, vector stores, files, audio and images.
+
+    It plugs into the clients either as an httpx transport (`transport`, `async_transport`, or the
+    ready-made `client`, `async_client` and `credential_manager`) or as a localhost HTTP server
+    (`serve`) that clients reach through OPENAI_BASE_URL.
+
+    Runs are simulated in real time: a run stays queued for `queue_duration`, in progress for
+    `run_duration`, then either requires the next step of its tool call script or completes with an
+    assistant reply. Latencies, durations, rate limit (429) and failure (500) injection are driven by
+    a seeded random generator so load tests are reproducible.
+
+    Latencies and durations are given as seconds, as a callable taking a random.Random instance
+    (see `constant`, `uniform` and `lognormal`), or as a dictionary keyed by operation name
+    (e.g. 'runs.retrieve', see `get_stats`) with an optional '*' default.
+
+    Attributes:
+        latency (object): The latency added to every request.
+        queue_duration (object): How long a new run stays queued.
+        run_duration (object): How long a run stays in progress before each step.
+        tool_call_scripts (dict): Per assistant ID (or '*' for any assistant), a list of steps. Each
+            step is a list of tool calls, given as dictionaries with a `name` and `arguments`.
+        rate_limit_rate (float): The probability of answering a request with a 429.
+        failure_rate (float): The probability of answering a request with a 500.
+        run_failure_rate (float): The probability of a run ending with the 'failed' status.
+        retry_after (float): The value of the retry-after header of injected 429 responses.
+        embedding_dimensions (int): The size of the returned embeddings, unless the request sets `dimensions`.
+    """
+
+    def __init__(self, latency=0.0, queue_duration=0.0, run_duration=0.0, tool_call_scripts=None,
+                 rate_limit_rate=0.0, failure_rate=0.0, run_failure_rate=0.0, retry_after=1.0,
+                 embedding_dimensions=1536, seed=0):
+        """
+        Initializes the FakeOpenAIBackend.
+
+        Args:
+            latency (object, optional): The latency added to every request. Defaults to 0.
+            queue_duration (object, optional): How long a new run stays queued. Defaults to 0.
+            run_duration (object, optional): How long a run stays in progress before each step. Defaults to 0.
+            tool_call_scripts (dict, optional): The tool calls required by the runs, per assistant ID.
+            rate_limit_rate (float, optional): The probability of a 429 response. Defaults to 0.
+            failure_rate (float, optional): The probability of a 500 response. Defaults to 0.
+            run_failure_rate (float, optional): The probability of a failed run. Defaults to 0.
+            retry_after (float, optional): The retry-after header of injected 429 responses. Defaults to 1 second.
+            embedding_dimensions (int, optional): The default size of the embeddings. Defaults to 1536.
+            seed (int, optional): The seed of the random generator. Defaults to 0.
+        """
+        self.latency = latency
+        self.queue_duration = queue_duration
+        self.run_duration = run_duration
+        self.tool_call_scripts = dict(tool_call_scripts or {})
+        self.rate_limit_rate = rate_limit_rate
+        self.failure_rate = failure_rate
+        self.run_failure_rate = run_failure_rate
+        self.retry_after = retry_after
+        self.embedding_dimensions = embedding_dimensions
+
+        self._rng = random.Random(seed)
+        self._ids = itertools.count(1)
+        self._lock = threading.RLock()
+        self._injected = {}
+        self._stats = {'requests': {}, 'rate_limited': 0, 'failed': 0}
+
+        self.assistants = {}
+        self.threads = {}
+        self.messages = {}
+        self.runs = {}
+        self.files = {}
+        self.vector_stores = {}
+        self.file_batches = {}
+
+        self._routes = [
+            ('POST', r'/assistants', 'assistants.create', self._create_assistant),
+            ('GET', r'/assistants', 'assistants.list', self._list_assistants),
+            ('GET', r'/assistants/(?P<assistant_id>[^/]+)', 'assistants.retrieve', self._retrieve_assistant),
+            ('POST', r'/assistants/(?P<assistant_id>[^/]+)', 'assistants.update', self._update_assistant),
+            ('DELETE', r'/assistants/(?P<assistant_id>[^/]+)', 'assistants.delete', self._delete_assistant),
+            ('POST', r'/threads', 'threads.create', self._create_thread),
+            ('GET', r'/threads/(?P<thread_id>[^/]+)', 'threads.retrieve', self._retrieve_thread),
+            ('POST', r'/threads/(?P<thread_id>[^/]+)', 'threads.update', self._update_thread),
+            ('DELETE', r'/threads/(?P<thread_id>[^/]+)', 'threads.delete', self._delete_thread),
+            ('POST', r'/threads/(?P<thread_id>[^/]+)/messages', 'messages.create', self._create_message),
+            ('GET', r'/threads/(?P<thread_id>[^/]+)/messages', 'messages.list', self._list_messages),
+            ('GET', r'/threads/(?P<thread_id>[^/]+)/messages/(?P<message_id>[^/]+)', 'messages.retrieve', self._retrieve_message),
+            ('DELETE', r'/threads/(?P<thread_id>[^/]+)/messages/(?P<message_id>[^/]+)', 'messages.delete', self._delete_message),
+            ('POST', r'/threads/(?P<thread_id>[^/]+)/runs', 'runs.create', self._create_run),
+            ('GET', r'/threads/(?P<thread_id>[^/]+)/runs', 'runs.list', self._list_runs),
+            ('GET', r'/threads/(?P<thread_id>[^/]+)/runs/(?P<run_id>[^/]+)', 'runs.retrieve', self._retrieve_run),
+            ('POST', r'/threads/(?P<thread_id>[^/]+)/runs/(?P<run_id>[^/]+)/cancel', 'runs.cancel', self._cancel_run),
+            ('POST', r'/threads/(?P<thread_id>[^/]+)/runs/(?P<run_id>[^/]+)/submit_tool_outputs', 'runs.submit_tool_outputs', self._submit_tool_outputs),
+            ('POST', r'/embeddings', 'embeddings.create', self._create_embeddings),
+            ('POST', r'/chat/completions', 'chat.completions.create', self._create_chat_completion),
+            ('POST', r'/images/generations', 'images.generate', self._generate_images),
+            ('POST', r'/audio/speech', 'audio.speech.create', self._create_speech),
+            ('POST', r'/audio/transcriptions', 'audio.transcriptions.create', self._create_transcription),
+            ('POST', r'/audio/translations', 'audio.translations.create', self._create_transcription),
+            ('POST', r'/files', 'files.create', self._create_file),
+            ('GET', r'/files', 'files.list', self._list_files),
+            ('GET', r'/files/(?P<file_id>[^/]+)', 'files.retrieve', self._retrieve_file),
+            ('DELETE', r'/files/(?P<file_id>[^/]+)', 'files.delete', self._delete_file),
+            ('POST', r'/vector_stores', 'vector_stores.create', self._create_vector_store),
+            ('GET', r'/vector_stores', 'vector_stores.list', self._list_vector_stores),
+            ('GET', r'/vector_stores/(?P<vector_store_id>[^/]+)', 'vector_stores.retrieve', self._retrieve_vector_store),
+            ('DELETE', r'/vector_stores/(?P<vector_store_id>[^/]+)', 'vector_stores.delete', self._delete_vector_store),
+            ('GET', r'/vector_stores/(?P<vector_store_id>[^/]+)/files', 'vector_stores.files.list', self._list_vector_store_files),
+            ('POST', r'/vector_stores/(?P<vector_store_id>[^/]+)/file_batches', 'vector_stores.file_batches.create', self._create_file_batch),
+            ('GET', r'/vector_stores/(?P<vector_store_id>[^/]+)/file_batches/(?P<batch_id>[^/]+)', 'vector_stores.file_batches.retrieve', self._retrieve_file_batch),
+            ('GET', r'/vector_stores/(?P<vector_store_id>[^/]+)/file_batches/(?P<batch_id>[^/]+)/files', 'vector_stores.file_batches.list_files', self._list_file_batch_files),
+        ]
+        self._routes = [(method, re.compile(pattern + '$'), operation, handler) for method, pattern, operation, handler in self._routes]
+
+
+    # ------------------------------------------------------------------ plumbing
+
+    def handle(self, method, path, query=None, body=b"", content_type=""):
+        """
+        Answers a request.
+
+        Args:
+            method (str): The HTTP method.
+            path (str): The URL path. OpenAI (/v1) and Azure (/openai, /deployments/<name>) prefixes are ignored.
+            query (dict, optional): The query parameters.
+            body (bytes, optional): The request body.
+            content_type (str, optional): The content type of the body.
+
+        Returns:
+            FakeResponse: The response.
+        """
+        path = re.sub(r'^(/openai)?(/v1)?(/deployments/[^/]+)?', '', path) or '/'
+        for route_method, pattern, operation, handler in self._routes:
+            match = pattern.match(path)
+            if match and route_method == method:
+                break
+        else:
+            return self._error(404, f"Unknown endpoint {method} {path}", 'invalid_request_error')
+
+        with self._lock:
+            self._stats['requests'][operation] = self._stats['requests'].get(operation, 0) + 1
+            delay = self._sample(self.latency, operation)
+            fault = self._next_fault(operation)
+        if fault is not None:
+            fault.delay = delay
+            return fault
+
+        try:
+            payload = self._parse_body(body, content_type)
+            response = handler(query or {}, payload, **match.groupdict())
+        except _FakeAPIError as e:
+            response = self._error(e.status, e.message, e.error_type)
+        if not isinstance(response, FakeResponse):
+            response = self._json(response)
+        response.delay = delay
+        return response
+
+
+    def inject_error(self, operation, status=500, count=1):
+        """
+        Makes the next requests of an operation fail, regardless of the injection rates.
+
+        Args:
+            operation (str): The operation name, e.g. 'runs.retrieve', or '*' for any operation.
+            status (int, optional): The HTTP status to answer with, 429 or 500 typically. Defaults to 500.
+            count (int, optional): How many requests fail. Defaults to 1.
+        """
+        with self._lock:
+            self._injected.setdefault(operation, []).extend([status] * count)
+
+
+    def get_stats(self):
+        """
+        Returns the request counters.
+
+        Returns:
+            dict: The number of `requests` per operation, and the number of `rate_limited` and `failed` answers.
+        """
+        with self._lock:
+            return {'requests': dict(self._stats['requests']), 'rate_limited': self._stats['rate_limited'], 'failed': self._stats['failed']}
+
+
+    def transport(self):
+        """
+        Returns an httpx transport answering the requests of a synchronous client.
+
+        Returns:
+            httpx.MockTransport: The transport.
+        """
+        def handler(request):
+            response = self._handle_request(request)
+            time.sleep(response.delay)
+            content = response.body
+            if response.chunks is not None:
+                def content():
+                    for delay, chunk in response.chunks:
+                        time.sleep(delay)
+                        yield chunk
+                content = content()
+            return httpx.Response(response.status, headers=response.headers, content=content)
+
+        return httpx.MockTransport(handler)
+
+
+    def async_transport(self):
+        """
+        Returns an httpx transport answering the requests of an asynchronous client without blocking its event loop.
+
+        Returns:
+            httpx.MockTransport: The transport.
+        """
+        async def handler(request):
+            response = self._handle_request(request)
+            await asyncio.sleep(response.delay)
+            content = response.body
+            if response.chunks is not None:
+                async def content():
+                    for delay, chunk in response.chunks:
+                        await asyncio.sleep(delay)
+                        yield chunk
+                content = content()
+            return httpx.Response(response.status, headers=response.headers, content=content)
+
+        return httpx.MockTransport(handler)
+
+
+    def client(self, **kwargs):
+        """
+        Returns an OpenAI client wired to the backend through `transport`.
+
+        Args:
+            **kwargs: Extra arguments for the OpenAI client, e.g. max_retries.
+
+        Returns:
+            OpenAI: The client.
+        """
+        from openai import OpenAI
+        return OpenAI(api_key="fake-key", base_url="http://fake-openai/v1", http_client=httpx.Client(transport=self.transport()), **kwargs)
+
+
+    def async_client(self, **kwargs):
+        """
+        Returns an AsyncOpenAI client wired to the backend through `async_transport`.
+
+        Args:
+            **kwargs: Extra arguments for the AsyncOpenAI client, e.g. max_retries.
+
+        Returns:
+            AsyncOpenAI: The client.
+        """
+        from openai import AsyncOpenAI
+        return AsyncOpenAI(api_key="fake-key", base_url="http://fake-openai/v1", http_client=httpx.AsyncClient(transport=self.async_transport()), **kwargs)
+
+
+    def credential_manager(self):
+        """
+        Returns a CredentialManager whose clients talk to the backend, to pass to FlexiAI or AsyncFlexiAI.
+
+        Returns:
+            CredentialManager: The credential manager.
+        """
+        from flexiai.credentials.credential_manager import CredentialManager
+        return CredentialManager(
+            http_client=httpx.Client(transport=self.transport()),
+            async_http_client=httpx.AsyncClient(transport=self.async_transport())
+        )
+
+
+    def serve(self, host="127.0.0.1", port=0):
+        """
+        Starts a localhost HTTP server answering with this backend.
+
+        Args:
+            host (str, optional): The interface to bind. Defaults to 127.0.0.1.
+            port (int, optional): The port to bind, 0 picks a free one. Defaults to 0.
+
+        Returns:
+            FakeOpenAIServer: The started server. Point OPENAI_BASE_URL at its `base_url`.
+        """
+        return FakeOpenAIServer(self, host, port).start()
+
+
+    def _handle_request(self, request):
+        return self.handle(
+            request.method, request.url.path, dict(request.url.params), request.read(), request.headers.get('content-type', '')
+        )
+
+
+    def _next_fault(self, operation):
+        # Called with the lock held
+        for key in (operation, '*'):
+            queue = self._injected.get(key)
+            if queue:
+                return self._fault(queue.pop(0))
+        roll = self._rng.random()
+        if roll < self.rate_limit_rate:
+            return self._fault(429)
+        if roll < self.rate_limit_rate + self.failure_rate:
+            return self._fault(500)
+        return None
+
+
+    def _fault(self, status):
+        if status == 429:
+            self._stats['rate_limited'] += 1
+            response = self._error(429, "Rate limit reached for requests", 'requests', code='rate_limit_exceeded')
+            response.headers['retry-after'] = str(self.retry_after)
+            return response
+        self._stats['failed'] += 1
+        return self._error(status, "The server had an error while processing your request.", 'server_error')
+
+
+    def _sample(self, value, operation=None):
+        if isinstance(value, dict):
+            value = value.get(operation, value.get('*', 0.0))
+        if callable(value):
+            value = value(self._rng)
+        return max(float(value or 0.0), 0.0)
+
+
+    def _new_id(self, prefix):
+        return f"{prefix}{next(self._ids):08d}"
+
+
+    def _parse_body(self, body, content_type):
+        if not body:
+            return {}
+        if content_type.startswith('multipart/form-data'):
+            message = BytesParser().parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+            payload = {}
+            for part in message.get_payload():
+                name = part.get_param('name', header='content-disposition')
+                filename = part.get_filename()
+                data = part.get_payload(decode=True)
+                payload[name] = {'filename': filename, 'content': data} if filename else data.decode()
+            return payload
+        return json.loads(body)
+
+
+    def _json(self, data, status=200):
+        return FakeResponse(status, json.dumps(data).encode(), {'content-type': 'application/json'})
+
+
+    def _error(self, status, message, error_type, code=None):
+        return self._json({'error': {'message': message, 'type': error_type, 'param': None, 'code': code}}, status)
+
+
+    def _get(self, collection, object_id, kind):
+        if object_id not in collection:
+            raise _FakeAPIError(404, f"No {kind} found with id '{object_id}'.")
+        return collection[object_id]
+
+
+    def _page(self, items, query, default_order='desc'):
+        order = query.get('order', default_order)
+        limit = int(query.get('limit', 20))
+        items = list(items) if order == 'asc' else list(reversed(items))
+        ids = [item['id'] for item in items]
+        if query.get('after') in ids:
+            items = items[ids.index(query['after']) + 1:]
+        elif query.get('before') in ids:
+            items = items[:ids.index(query['before'])]
+        page = items[:limit]
+        return {
+            'object': 'list',
+            'data': page,
+            'first_id': page[0]['id'] if page else None,
+            'last_id': page[-1]['id'] if page else None,
+            'has_more': len(items) > limit
+        }
+
+
+    # ------------------------------------------------------------------ assistants
+
+    def _create_assistant(self, query, payload):
+        with self._lock:
+            assistant = {
+                'id': self._new_id('asst_'), 'object': 'assistant', 'created_at': int(time.time()),
+                'name': payload.get('name'), 'description': payload.get('description'),
+                'model': payload.get('model', 'gpt-4o'), 'instructions': payload.get('instructions'),
+                'tools': payload.get('tools', []), 'metadata': payload.get('metadata', {}),
+                'tool_resources': payload.get('tool_resources'), 'temperature': payload.get('temperature', 1.0),
+                'top_p': payload.get('top_p', 1.0), 'response_format': payload.get('response_format', 'auto')
+            }
+            self.assistants[assistant['id']] = assistant
+            return assistant
+
+
+    def _list_assistants(self, query, payload):
+        with self._lock:
+            return self._page(self.assistants.values(), query)
+
+
+    def _retrieve_assistant(self, query, payload, assistant_id):
+        with self._lock:
+            return self._get(self.assistants, assistant_id, 'assistant')
+
+
+    def _update_assistant(self, query, payload, assistant_id):
+        with self._lock:
+            assistant = self._get(self.assistants, assistant_id, 'assistant')
+            assistant.update({key: value for key, value in payload.items() if value is not None})
+            return assistant
+
+
+    def _delete_assistant(self, query, payload, assistant_id):
+        with self._lock:
+            self._get(self.assistants, assistant_id, 'assistant')
+            del self.assistants[assistant_id]
+            return {'id': assistant_id, 'object': 'assistant.deleted', 'deleted': True}
+
+
+    # ------------------------------------------------------------------ threads and messages
+
+    def _create_thread(self, query, payload):
+        with self._lock:
+            thread = {
+                'id': self._new_id('thread_'), 'object': 'thread', 'created_at': int(time.time()),
+                'metadata': payload.get('metadata', {}), 'tool_resources': payload.get('tool_resources')
+            }
+            self.threads[thread['id']] = thread
+            self.messages[thread['id']] = []
+            for message in payload.get('messages', []):
+                self._add_message(thread['id'], message.get('role', 'user'), message.get('content', ''), message.get('metadata'))
+            return thread
+
+
+    def _retrieve_thread(self, query, payload, thread_id):
+        with self._lock:
+            return self._get(self.threads, thread_id, 'thread')
+
+
+    def _update_thread(self, query, payload, thread_id):
+        with self._lock:
+            thread = self._get(self.threads, thread_id, 'thread')
+            thread.update({key: value for key, value in payload.items() if value is not None})
+            return thread
+
+
+    def _delete_thread(self, query, payload, thread_id):
+        with self._lock:
+            self._get(self.threads, thread_id, 'thread')
+            del self.threads[thread_id]
+            self.messages.pop(thread_id, None)
+            return {'id': thread_id, 'object': 'thread.deleted', 'deleted': True}
+
+
+    def _create_message(self, query, payload, thread_id):
+        with self._lock:
+            self._get(self.threads, thread_id, 'thread')
+            if self._active_run(thread_id) is not None:
+                raise _FakeAPIError(400, f"Can't add messages to {thread_id} while a run is active.")
+            return self._add_message(thread_id, payload.get('role', 'user'), payload.get('content', ''), payload.get('metadata'))
+
+
+    def _list_messages(self, query, payload, thread_id):
+        with self._lock:
+            self._get(self.threads, thread_id, 'thread')
+            return self._page(self.messages[thread_id], query)
+
+
+    def _retrieve_message(self, query, payload, thread_id, message_id):
+        with self._lock:
+            self._get(self.threads, thread_id, 'thread')
+            for message in self.messages[thread_id]:
+                if message['id'] == message_id:
+                    return message
+            raise _FakeAPIError(404, f"No message found with id '{message_id}'.")
+
+
+    def _delete_message(self, query, payload, thread_id, message_id):
+        with self._lock:
+            self._get(self.threads, thread_id, 'thread')
+            messages = self.messages[thread_id]
+            for position, message in enumerate(messages):
+                if message['id'] == message_id:
+                    del messages[position]
+                    return {'id': message_id, 'object': 'thread.message.deleted', 'deleted': True}
+            raise _FakeAPIError(404, f"No message found with id '{message_id}'.")
+
+
+    def _add_message(self, thread_id, role, content, metadata=None, assistant_id=None, run_id=None):
+        if isinstance(content, list):
+            content = "".join(part.get('text', '') for part in content if isinstance(part, dict))
+        message = {
+            'id': self._new_id('msg_'), 'object': 'thread.message', 'created_at': int(time.time()),
+            'thread_id': thread_id, 'role': role, 'status': 'completed',
+            'content': [{'type': 'text', 'text': {'value': content, 'annotations': []}}],
+            'assistant_id': assistant_id, 'run_id': run_id, 'attachments': [], 'metadata': metadata or {}
+        }
+        self.messages[thread_id].append(message)
+        return message
+
+
+    # ------------------------------------------------------------------ runs
+
+    def _create_run(self, query, payload, thread_id):
+        with self._lock:
+            self._get(self.threads, thread_id, 'thread')
+            active = self._active_run(thread_id)
+            if active is not None:
+                raise _FakeAPIError(400, f"Thread {thread_id} already has an active run {active['id']}.")
+
+            assistant_id = payload.get('assistant_id')
+            script = self.tool_call_scripts.get(assistant_id, self.tool_call_scripts.get('*', []))
+            now = time.monotonic()
+            queued_for = self._sample(self.queue_duration, 'runs.queue')
+            run = {
+                'id': self._new_id('run_'), 'object': 'thread.run', 'created_at': int(time.time()),
+                'assistant_id': assistant_id, 'thread_id': thread_id, 'status': 'queued',
+                'model': self.assistants.get(assistant_id, {}).get('model', 'gpt-4o'),
+                'instructions': payload.get('instructions', ''), 'tools': payload.get('tools', []),
+                'metadata': payload.get('metadata', {}), 'parallel_tool_calls': True,
+                'required_action': None, 'last_error': None, 'usage': None, 'incomplete_details': None,
+                'started_at': None, 'completed_at': None, 'cancelled_at': None, 'failed_at': None, 'expires_at': None,
+                'max_prompt_tokens': None, 'max_completion_tokens': None, 'truncation_strategy': None,
+                'tool_choice': 'auto', 'response_format': 'auto', 'temperature': 1.0, 'top_p': 1.0
+            }
+            self.runs[run['id']] = {
+                'run': run,
+                'steps': [list(step) for step in script],
+                'queued_until': now + queued_for,
+                'progress_until': now + queued_for + self._sample(self.run_duration, 'runs.step')
+            }
+            if payload.get('stream'):
+                return self._stream_run(run['id'], include_creation=True)
+            return dict(run)
+
+
+    def _list_runs(self, query, payload, thread_id):
+        with self._lock:
+            self._get(self.threads, thread_id, 'thread')
+            runs = [self._refresh_run(run_id) for run_id, state in self.runs.items() if state['run']['thread_id'] == thread_id]
+            return self._page(runs, query)
+
+
+    def _retrieve_run(self, query, payload, thread_id, run_id):
+        with self._lock:
+            self._get(self.runs, run_id, 'run')
+            return dict(self._refresh_run(run_id))
+
+
+    def _cancel_run(self, query, payload, thread_id, run_id):
+        with self._lock:
+            self._get(self.runs, run_id, 'run')
+            run = self._refresh_run(run_id)
+            if run['status'] in TERMINAL_RUN_STATUSES:
+                raise _FakeAPIError(400, f"Cannot cancel run with status '{run['status']}'.")
+            run.update(status='cancelling', required_action=None)
+            return dict(run)
+
+
+    def _submit_tool_outputs(self, query, payload, thread_id, run_id):
+        with self._lock:
+            state = self._get(self.runs, run_id, 'run')
+            run = self._refresh_run(run_id)
+            if run['status'] != 'requires_action':
+                raise _FakeAPIError(400, f"Runs in status '{run['status']}' do not accept tool outputs.")
+            expected = {call['id'] for call in run['required_action']['submit_tool_outputs']['tool_calls']}
+            submitted = {output.get('tool_call_id') for output in payload.get('tool_outputs', [])}
+            if expected != submitted:
+                raise _FakeAPIError(400, f"Expected tool outputs for {sorted(expected)}, got {sorted(submitted)}.")
+
+            run.update(status='in_progress', required_action=None)
+            state['progress_until'] = time.monotonic() + self._sample(self.run_duration, 'runs.step')
+            if payload.get('stream'):
+                return self._stream_run(run_id)
+            return dict(run)
+
+
+    def _active_run(self, thread_id):
+        for run_id, state in self.runs.items():
+            if state['run']['thread_id'] == thread_id and self._refresh_run(run_id)['status'] not in TERMINAL_RUN_STATUSES:
+                return state['run']
+        return None
+
+
+    def _refresh_run(self, run_id):
+        # Moves a run forward according to the time elapsed since its last change
+        state = self.runs[run_id]
+        run = state['run']
+        now = time.monotonic()
+        if run['status'] == 'cancelling':
+            run.update(status='cancelled', cancelled_at=int(time.time()))
+        if run['status'] == 'queued' and now >= state['queued_until']:
+            run.update(status='in_progress', started_at=int(time.time()))
+        if run['status'] == 'in_progress' and now >= state['progress_until']:
+            if state['steps']:
+                step = state['steps'].pop(0)
+                tool_calls = [
+                    {'id': self._new_id('call_'), 'type': 'function',
+                     'function': {'name': call['name'], 'arguments': json.dumps(call.get('arguments', {}))}}
+                    for call in step
+                ]
+                run.update(status='requires_action', required_action={
+                    'type': 'submit_tool_outputs', 'submit_tool_outputs': {'tool_calls': tool_calls}
+                })
+            elif self._rng.random() < self.run_failure_rate:
+                run.update(status='failed', failed_at=int(time.time()),
+                           last_error={'code': 'server_error', 'message': 'Injected run failure.'})
+            else:
+                self._complete_run(run)
+        return run
+
+
+    def _complete_run(self, run):
+        thread_messages = self.messages.get(run['thread_id'], [])
+        last_user = next((m for m in reversed(thread_messages) if m['role'] == 'user'), None)
+        prompt = last_user['content'][0]['text']['value'] if last_user else ""
+        reply = f"Echo: {prompt}"
+        self._add_message(run['thread_id'], 'assistant', reply, assistant_id=run['assistant_id'], run_id=run['id'])
+        prompt_tokens = sum(len(m['content'][0]['text']['value'].split()) for m in thread_messages)
+        completion_tokens = len(reply.split())
+        run.update(status='completed', completed_at=int(time.time()), usage={
+            'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+            'total_tokens': prompt_tokens + completion_tokens
+        })
+
+
+    def _stream_run(self, run_id, include_creation=False):
+        # Called with the lock held. The run is played forward to its next stop right away and the
+        # stream replays the events with the delays the run would have taken.
+        state = self.runs[run_id]
+        run = state['run']
+        chunks = []
+
+        def send(event, data, delay=0.0):
+            chunks.append((delay, f"event: {event}\ndata: {json.dumps(data)}\n\n".encode()))
+
+        now = time.monotonic()
+        queued_wait = max(state['queued_until'] - now, 0.0)
+        progress_wait = max(state['progress_until'] - now, 0.0) - queued_wait
+
+        if include_creation:
+            send('thread.run.created', dict(run))
+            send('thread.run.queued', dict(run))
+            state['queued_until'], state['progress_until'] = now, float('inf')
+            self._refresh_run(run_id)
+            send('thread.run.in_progress', dict(run), queued_wait)
+
+        state['progress_until'] = now
+        self._refresh_run(run_id)
+        if run['status'] == 'requires_action':
+            send('thread.run.requires_action', dict(run), progress_wait)
+        else:
+            if run['status'] == 'completed':
+                message = self.messages[run['thread_id']][-1]
+                text = message['content'][0]['text']['value']
+                send('thread.message.created', dict(message, status='in_progress', content=[]), progress_wait)
+                send('thread.message.delta', {
+                    'id': message['id'], 'object': 'thread.message.delta',
+                    'delta': {'content': [{'index': 0, 'type': 'text', 'text': {'value': text, 'annotations': []}}]}
+                })
+                send('thread.message.completed', message)
+            else:
+                chunks.append((progress_wait, b""))
+            send(f"thread.run.{run['status']}", dict(run))
+        chunks.append((0.0, b"event: done\ndata: [DONE]\n\n"))
+        return FakeResponse(200, headers={'content-type': 'text/event-stream'}, chunks=chunks)
+
+
+    # ------------------------------------------------------------------ embeddings, completions, images, audio
+
+    def _create_embeddings(self, query, payload):
+        inputs = payload.get('input', [])
+        if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+            inputs = [inputs]
+        dimensions = payload.get('dimensions') or self.embedding_dimensions
+        data = []
+        for index, text in enumerate(inputs):
+            vector = self._embed(str(text), dimensions)
+            if payload.get('encoding_format') == 'base64':
+                vector = base64.b64encode(struct.pack(f'<{dimensions}f', *vector)).decode()
+            data.append({'object': 'embedding', 'index': index, 'embedding': vector})
+        tokens = sum(len(str(text).split()) for text in inputs)
+        return {
+            'object': 'list', 'data': data, 'model': payload.get('model', 'text-embedding-3-small'),
+            'usage': {'prompt_tokens': tokens, 'total_tokens': tokens}
+        }
+
+
+    def _embed(self, text, dimensions):
+        # Deterministic unit vector derived from the text
+        rng = random.Random(hashlib.sha256(text.encode()).digest())
+        vector = [rng.uniform(-1, 1) for _ in range(dimensions)]
+        norm = sum(value * value for value in vector) ** 0.5 or 1.0
+        return [value / norm for value in vector]
+
+
+    def _create_chat_completion(self, query, payload):
+        messages = payload.get('messages', [])
+        prompt = str(messages[-1].get('content', '')) if messages else ""
+        content = f"Echo: {prompt}"
+        if (payload.get('response_format') or {}).get('type') == 'json_object':
+            content = json.dumps({'echo': prompt})
+        prompt_tokens = sum(len(str(message.get('content', '')).split()) for message in messages)
+        completion_tokens = len(content.split())
+        with self._lock:
+            completion_id = self._new_id('chatcmpl-')
+        return {
+            'id': completion_id, 'object': 'chat.completion', 'created': int(time.time()),
+            'model': payload.get('model', 'gpt-4o'),
+            'choices': [{'index': 0, 'finish_reason': 'stop', 'logprobs': None,
+                         'message': {'role': 'assistant', 'content': content}}],
+            'usage': {'prompt_tokens': prompt_tokens, 'completion_tokens': completion_tokens,
+                      'total_tokens': prompt_tokens + completion_tokens}
+        }
+
+
+    def _generate_images(self, query, payload):
+        with self._lock:
+            image_ids = [self._new_id('img_') for _ in range(payload.get('n') or 1)]
+        if payload.get('response_format') == 'b64_json':
+            data = [{'b64_json': base64.b64encode(_PNG_PIXEL).decode(), 'revised_prompt': payload.get('prompt')} for _ in image_ids]
+        else:
+            data = [{'url': f"http://fake-openai/images/{image_id}.png", 'revised_prompt': payload.get('prompt')} for image_id in image_ids]
+        return {'created': int(time.time()), 'data': data}
+
+
+    def _create_speech(self, query, payload):
+        return FakeResponse(200, b"ID3" + bytes(len(payload.get('input', ''))), {'content-type': 'audio/mpeg'})
+
+
+    def _create_transcription(self, query, payload):
+        audio = payload.get('file') or {}
+        return {'text': f"Fake transcription of {audio.get('filename') or 'audio'}"}
+
+
+    # ------------------------------------------------------------------ files and vector stores
+
+    def _create_file(self, query, payload):
+        upload = payload.get('file') or {}
+        with self._lock:
+            file = {
+                'id': self._new_id('file-'), 'object': 'file', 'created_at': int(time.time()),
+                'filename': upload.get('filename'), 'bytes': len(upload.get('content') or b""),
+                'purpose': payload.get('purpose', 'assistants'), 'status': 'processed', 'status_details': None
+            }
+            self.files[file['id']] = file
+            return file
+
+
+    def _list_files(self, query, payload):
+        with self._lock:
+            return self._page(self.files.values(), query)
+
+
+    def _retrieve_file(self, query, payload, file_id):
+        with self._lock:
+            return self._get(self.files, file_id, 'file')
+
+
+    def _delete_file(self, query, payload, file_id):
+        with self._lock:
+            self._get(self.files, file_id, 'file')
+            del self.files[file_id]
+            return {'id': file_id, 'object': 'file', 'deleted': True}
+
+
+    def _create_vector_store(self, query, payload):
+        with self._lock:
+            vector_store = {
+                'id': self._new_id('vs_'), 'object': 'vector_store', 'created_at': int(time.time()),
+                'name': payload.get('name'), 'status': 'completed', 'usage_bytes': 0,
+                'file_counts': {'in_progress': 0, 'completed': 0, 'failed': 0, 'cancelled': 0, 'total': 0},
+                'metadata': payload.get('metadata', {}), 'expires_after': None, 'expires_at': None,
+                'last_active_at': int(time.time()), 'file_ids': []
+            }
+            self.vector_stores[vector_store['id']] = vector_store
+            for file_id in payload.get('file_ids', []):
+                self._attach_file(vector_store, file_id)
+            return self._public_vector_store(vector_store)
+
+
+    def _list_vector_stores(self, query, payload):
+        with self._lock:
+            return self._page([self._public_vector_store(store) for store in self.vector_stores.values()], query)
+
+
+    def _retrieve_vector_store(self, query, payload, vector_store_id):
+        with self._lock:
+            return self._public_vector_store(self._get(self.vector_stores, vector_store_id, 'vector store'))
+
+
+    def _delete_vector_store(self, query, payload, vector_store_id):
+        with self._lock:
+            self._get(self.vector_stores, vector_store_id, 'vector store')
+            del self.vector_stores[vector_store_id]
+            return {'id': vector_store_id, 'object': 'vector_store.deleted', 'deleted': True}
+
+
+    def _list_vector_store_files(self, query, payload, vector_store_id):
+        with self._lock:
+            vector_store = self._get(self.vector_stores, vector_store_id, 'vector store')
+            return self._page([self._vector_store_file(vector_store, file_id) for file_id in vector_store['file_ids']], query)
+
+
+    def _create_file_batch(self, query, payload, vector_store_id):
+        with self._lock:
+            vector_store = self._get(self.vector_stores, vector_store_id, 'vector store')
+            file_ids = payload.get('file_ids', [])
+            for file_id in file_ids:
+                self._attach_file(vector_store, file_id)
+            batch = {
+                'id': self._new_id('vsfb_'), 'object': 'vector_store.files_batch', 'created_at': int(time.time()),
+                'vector_store_id': vector_store_id, 'status': 'completed',
+                'file_counts': {'in_progress': 0, 'completed': len(file_ids), 'failed': 0, 'cancelled': 0, 'total': len(file_ids)},
+                'file_ids': file_ids
+            }
+            self.file_batches[batch['id']] = batch
+            return self._public_batch(batch)
+
+
+    def _retrieve_file_batch(self, query, payload, vector_store_id, batch_id):
+        with self._lock:
+            return self._public_batch(self._get(self.file_batches, batch_id, 'file batch'))
+
+
+    def _list_file_batch_files(self, query, payload, vector_store_id, batch_id):
+        with self._lock:
+            vector_store = self._get(self.vector_stores, vector_store_id, 'vector store')
+            batch = self._get(self.file_batches, batch_id, 'file batch')
+            return self._page([self._vector_store_file(vector_store, file_id) for file_id in batch['file_ids']], query)
+
+
+    def _attach_file(self, vector_store, file_id):
+        file = self._get(self.files, file_id, 'file')
+        if file_id not in vector_store['file_ids']:
+            vector_store['file_ids'].append(file_id)
+            vector_store['usage_bytes'] += file['bytes']
+            vector_store['file_counts']['completed'] += 1
+            vector_store['file_counts']['total'] += 1
+
+
+    def _public_vector_store(self, vector_store):
+        return {key: value for key, value in vector_store.items() if key != 'file_ids'}
+
+
+    def _public_batch(self, batch):
+        return {key: value for key, value in batch.items() if key != 'file_ids'}
+
+
+    def _vector_store_file(self, vector_store, file_id):
+        return {
+            'id': file_id, 'object': 'vector_store.file', 'created_at': self.files.get(file_id, {}).get('created_at', 0),
+            'vector_store_id': vector_store['id'], 'status': 'completed', 'last_error': None,
+            'usage_bytes': self.files.get(file_id, {}).get('bytes', 0)
+        }
+
+
+class FakeOpenAIServer:
+    """
+    FakeOpenAIServer exposes a FakeOpenAIBackend on a localhost HTTP server, for clients that
+    can't be given a custom transport (other processes, load generators, ...).
+
+    Attributes:
+        backend (FakeOpenAIBackend): The backend answering the requests.
+        base_url (str): The URL to use as OPENAI_BASE_URL once the server is started.
+    """
+
+    def __init__(self, backend, host="127.0.0.1", port=0):
+        self.backend = backend
+        self.host = host
+        self.port = port
+        self.base_url = None
+        self._server = None
+        self._thread = None
+
+
+    def start(self):
+        """
+        Starts serving in a background thread.
+
+        Returns:
+            FakeOpenAIServer: The server itself.
+        """
+        backend = self.backend
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def _dispatch(self):
+                url = urlsplit(self.path)
+                length = int(self.headers.get('content-length') or 0)
+                body = self.rfile.read(length) if length else b""
+                response = backend.handle(self.command, url.path, dict(parse_qsl(url.query)), body, self.headers.get('content-type', ''))
+                time.sleep(response.delay)
+
+                self.send_response(response.status)
+                for name, value in response.headers.items():
+                    self.send_header(name, value)
+                if response.chunks is None:
+                    self.send_header('content-length', str(len(response.body)))
+                    self.end_headers()
+                    self.wfile.write(response.body)
+                    return
+
+                # Streamed responses end when the connection is closed
+                self.send_header('connection', 'close')
+                self.end_headers()
+                self.close_connection = True
+                for delay, chunk in response.chunks:
+                    time.sleep(delay)
+                    self.wfile.write(chunk)
+                    self.wfile.flush()
+
+            do_GET = do_POST = do_DELETE = _dispatch
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        host, port = self._server.server_address[:2]
+        self.base_url = f"http://{host}:{port}/v1"
+        self._thread = threading.Thread(target=self._server.serve_forever, name="flexiai-fake-openai", daemon=True)
+        self._thread.start()
+        return self
+
+
+    def stop(self):
+        """
+        Stops the server.
+        """
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._thread.join()
+            self._server = None
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+
+class _FakeAPIError(Exception):
+    def __init__(self, status, message, error_type='invalid_request_error'):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+        self.error_type = error_type
+
+
+# A 1x1 transparent PNG, returned for b64_json image requests
+_PNG_PIXEL = base64.b64decode(
+    "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAYAAAAfFcSJAAAADUlEQVR42mNkYPhfDwAChwGA60e6kgAAAABJRU5ErkJggg=="
+)
@@ -0,0 +1,73 @@
+# flexiai/tests/test_content_store.py
+import logging
+import os
+import time
+from flexiai.core.flexi_managers.content_store import ProcessedContentStore
+
+
+def test_memory_caps_evict_the_oldest_content():
+    store = ProcessedContentStore(logging.getLogger(__name__), max_key_bytes=10, max_total_bytes=20)
+    store.save("asst_a", "asst_c", "aaaa")
+    store.save("asst_b", "asst_c", "bbbbbbbb")
+    store.save("asst_a", "asst_c", "aaaaaa")
+    # The content of the pair exceeds its cap: the oldest one is evicted
+    store.save("asst_a", "asst_c", "AA")
+    assert store.snapshot() == {("asst_b", "asst_c"): ["bbbbbbbb"], ("asst_a", "asst_c"): ["aaaaaa", "AA"]}
+    # All the content exceeds the global cap
+    store.save("asst_a", "asst_d", "ddddddd")
+    assert store.pop_all("asst_c") == ["aaaaaa", "AA"]
+    assert store.pop("asst_a", "asst_d") == ["ddddddd"]
+
+    stats = store.get_stats()
+    assert stats['evicted'] == 2 and stats['loaded'] == 3
+    assert stats['items'] == 0 and stats['memory_bytes'] == 0
+
+
+def test_content_larger_than_a_cap_is_rejected(tmp_path):
+    store = ProcessedContentStore(logging.getLogger(__name__), max_key_bytes=10, max_total_bytes=20)
+    assert store.save("asst_a", "asst_b", "aaaa")
+    assert not store.save("asst_a", "asst_b", "x" * 11)
+    # The content already saved is kept
+    assert store.snapshot() == {("asst_a", "asst_b"): ["aaaa"]}
+    assert store.get_stats()['rejected'] == 1 and store.get_stats()['evicted'] == 0
+
+    # Spilled content doesn't use memory, so it fits
+    spilling = ProcessedContentStore(logging.getLogger(__name__), max_key_bytes=10, spill_threshold=11, spill_dir=str(tmp_path))
+    assert spilling.save("asst_a", "asst_b", "x" * 11)
+    assert spilling.pop("asst_a", "asst_b") == ["x" * 11]
+
+
+def test_expired_content_is_swept_and_never_returned():
+    store = ProcessedContentStore(logging.getLogger(__name__), ttl=0.05, sweep_interval=0.02)
+    store.save("asst_a", "asst_b", "old")
+    store.save("asst_a", "asst_c", "old")
+    time.sleep(0.06)
+    store.save("asst_a", "asst_b", "new")
+    assert store.pop("asst_a", "asst_b") == ["new"]
+
+    deadline = time.monotonic() + 5
+    while store.get_stats()['items']:
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+    assert store.pop_all("asst_c") == []
+    assert store.get_stats()['expired'] == 2
+    store.close()
+
+
+def test_large_content_is_compressed_or_spilled_to_disk(tmp_path):
+    spill_dir = tmp_path / "spill"
+    store = ProcessedContentStore(
+        logging.getLogger(__name__), compress_threshold=100, spill_threshold=10000, spill_dir=str(spill_dir)
+    )
+    text, rows = "x" * 1000, [{"row": index, "value": f"{index:020d}"} for index in range(500)]
+    store.save("asst_a", "asst_b", text)
+    store.save("asst_a", "asst_b", rows)
+
+    stats = store.get_stats()
+    assert stats['compressed'] == 2 and stats['spilled'] == 1
+    assert 0 < stats['memory_bytes'] < 1000 and stats['disk_bytes'] > 10000
+    assert len(os.listdir(spill_dir)) == 1
+
+    assert store.pop("asst_a", "asst_b") == [text, rows]
+    assert os.listdir(spill_dir) == []
+    assert store.get_stats()['disk_bytes'] == 0
@@ -0,0 +1,60 @@
+# flexiai/tests/test_dispatch_policy.py
+import json
+import logging
+import pytest
+import threading
+from types import SimpleNamespace
+from flexiai.core.flexi_managers.dispatch_policy import DispatchPolicy
+from flexiai.core.flexi_managers.run_manager import RunManager
+from flexiai.core.flexi_managers.run_metrics import RunMetrics
+
+
+def make_run(*function_names):
+    tool_calls = [
+        SimpleNamespace(id=f"call_{index}", function=SimpleNamespace(name=name, arguments=json.dumps({})))
+        for index, name in enumerate(function_names)
+    ]
+    return SimpleNamespace(id="run_1", required_action=SimpleNamespace(submit_tool_outputs=SimpleNamespace(tool_calls=tool_calls)))
+
+
+def test_dispatch_policy_learns_latencies():
+    policy = DispatchPolicy(logging.getLogger(__name__), default_latency=0.05, alpha=0.5)
+
+    assert policy.choose(["unknown", "unknown"])['mode'] == DispatchPolicy.PARALLEL
+    assert policy.choose(["unknown"])['mode'] == DispatchPolicy.SEQUENTIAL
+
+    for _ in range(5):
+        policy.record("lookup", 0.00001)
+    policy.record("fetch", 0.2)
+    policy.record("fetch", 0.4)
+
+    assert policy.estimate("fetch") == pytest.approx(0.3)
+    assert policy.choose(["lookup"] * 10)['mode'] == DispatchPolicy.SEQUENTIAL
+    assert policy.choose(["fetch", "fetch"])['mode'] == DispatchPolicy.PARALLEL
+    stats = policy.get_stats()
+    assert stats['observations'] == {'lookup': 5, 'fetch': 2}
+    assert stats['decisions'] == {'sequential': 2, 'parallel': 2}
+
+
+def test_run_manager_dispatches_batches_by_observed_latency(mocker):
+    policy = DispatchPolicy(logging.getLogger(__name__))
+    policy.record("fetch", 0.5)
+    policy.record("lookup", 0.00001)
+    run_manager = RunManager(mocker.MagicMock(), logging.getLogger(__name__), mocker.Mock(), mocker.Mock(), dispatch_policy=policy)
+    run_manager.update_function_mappings({"fetch": lambda: "page", "lookup": lambda: threading.current_thread().name}, {})
+    parallel = mocker.spy(run_manager, 'call_parallel_functions')
+    metrics = RunMetrics('create_and_monitor_run', "asst_1", "thread_1")
+
+    try:
+        slow = run_manager.collect_tool_outputs(make_run("fetch", "fetch"), "asst_1", "thread_1", metrics=metrics)
+        fast = run_manager.collect_tool_outputs(make_run(*["lookup"] * 10), "asst_1", "thread_1", metrics=metrics)
+    finally:
+        run_manager.close()
+
+    assert parallel.call_count == 1
+    assert metrics.dispatch_modes == ['parallel', 'sequential']
+    assert [json.loads(output['output'])['result'] for output in slow] == ["page", "page"]
+    # The sequential batch ran on the calling thread
+    assert [json.loads(output['output'])['result'] for output in fast] == [threading.current_thread().name] * 10
+    # The batches fed the history back
+    assert policy.get_stats()['observations'] == {'fetch': 3, 'lookup': 11}
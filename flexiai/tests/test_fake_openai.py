@@ -0,0 +1,100 @@
+# flexiai/tests/test_fake_openai.py
+import logging
+import openai
+import pytest
+from flexiai.core.flexi_managers.message_manager import MessageManager
+from flexiai.core.flexi_managers.run_manager import RunManager
+from flexiai.core.flexi_managers.run_monitor import PollingPolicy
+from flexiai.testing import FakeOpenAIBackend
+
+
+@pytest.fixture
+def backend():
+    return FakeOpenAIBackend(run_duration=0.02, tool_call_scripts={'*': [[{'name': 'add', 'arguments': {'a': 1, 'b': 2}}]]})
+
+
+def test_run_manager_against_fake_backend(backend):
+    client = backend.client(max_retries=0)
+    logger = logging.getLogger(__name__)
+    policy = PollingPolicy(initial_interval=0.01, multiplier=1.5, max_interval=0.05, jitter=0)
+    run_manager = RunManager(client, logger, MessageManager(client, logger), None, polling_policy=policy)
+    run_manager.update_function_mappings({'add': lambda a, b: a + b}, {})
+
+    thread = client.beta.threads.create()
+    run_manager.mark_thread_idle(thread.id)
+    try:
+        run = run_manager.create_and_monitor_run("asst_1", thread.id, "Hello there")
+        events = list(run_manager.stream_run("asst_1", thread.id, "Again"))
+    finally:
+        run_manager.close()
+
+    assert run.status == "completed" and run.usage.total_tokens > 0
+    assert [event['type'] for event in events] == ['requires_action', 'text_delta', 'status']
+    messages = client.beta.threads.messages.list(thread_id=thread.id, order='asc').data
+    assert [message.content[0].text.value for message in messages] == ["Hello there", "Echo: Hello there", "Again", "Echo: Again"]
+    assert backend.get_stats()['requests']['runs.submit_tool_outputs'] == 2
+
+
+def test_streamed_run_is_cancelled_past_its_deadline():
+    backend = FakeOpenAIBackend(run_duration=0.3, tool_call_scripts={'*': [[{'name': 'add', 'arguments': {'a': 1, 'b': 2}}]]})
+    client = backend.client(max_retries=0)
+    logger = logging.getLogger(__name__)
+    policy = PollingPolicy(initial_interval=0.01, multiplier=1.5, max_interval=0.05, jitter=0)
+    run_manager = RunManager(client, logger, MessageManager(client, logger), None, polling_policy=policy, run_timeout=0.1)
+    add = []
+    run_manager.update_function_mappings({'add': lambda a, b: add.append((a, b))}, {})
+
+    thread = client.beta.threads.create()
+    run_manager.mark_thread_idle(thread.id)
+    try:
+        events = list(run_manager.stream_run("asst_1", thread.id, "Hello there"))
+    finally:
+        run_manager.close()
+
+    # The run was cancelled before it asked for the tool outputs
+    assert [event['type'] for event in events] == ['status']
+    assert events[0]['status'] == 'cancelled' and add == []
+    assert backend.get_stats()['requests']['runs.cancel'] == 1
+    assert run_manager.get_run_metrics().summary()['runs'] == 1
+
+
+def test_fake_backend_injects_rate_limits_and_serves_other_endpoints(backend):
+    client = backend.client(max_retries=0)
+    backend.inject_error('embeddings.create', status=429)
+
+    with pytest.raises(openai.RateLimitError):
+        client.embeddings.create(input="hello", model="text-embedding-3-small")
+    embedding = client.embeddings.create(input=["hello", "hello"], model="text-embedding-3-small", dimensions=8).data
+    completion = client.chat.completions.create(model="gpt-4o", messages=[{"role": "user", "content": "Hi"}])
+
+    assert embedding[0].embedding == pytest.approx(embedding[1].embedding) and len(embedding[0].embedding) == 8
+    assert completion.choices[0].message.content == "Echo: Hi"
+    assert backend.get_stats()['rate_limited'] == 1
+
+
+def test_fake_server_answers_over_http(backend):
+    with backend.serve() as server:
+        client = openai.OpenAI(api_key="fake-key", base_url=server.base_url, max_retries=0)
+        vector_store = client.beta.vector_stores.create(name="docs")
+
+        assert client.beta.vector_stores.retrieve(vector_store.id).name == "docs"
+
+
+def test_benchmark_reports_and_compares_with_baseline():
+    from flexiai.testing.benchmark import compare, run_benchmark
+
+    policy = PollingPolicy(initial_interval=0.01, multiplier=1.5, max_interval=0.05, jitter=0)
+    results = run_benchmark(
+        ['create_and_monitor_run', 'requires_action_parallel'], runs=4, concurrency=2,
+        latency=0.001, run_duration=0.01, tool_latency=0, policy=policy
+    )
+
+    parallel = results['scenarios']['requires_action_parallel']
+    assert parallel['runs'] == 4 and parallel['failed_runs'] == 0
+    assert parallel['api_calls_per_run'] > results['scenarios']['create_and_monitor_run']['api_calls_per_run']
+    assert set(parallel['latency']) == {'p50', 'p95', 'p99'}
+
+    slower = {'scenarios': {name: dict(result, runs_per_sec=result['runs_per_sec'] * 2) for name, result in results['scenarios'].items()}}
+    comparison, regressions = compare(results, slower, max_regression=0.1)
+    assert comparison['create_and_monitor_run']['runs_per_sec'] == pytest.approx(-0.5)
+    assert len(regressions) == 2
@@ -0,0 +1,90 @@
+# flexiai/tests/test_message_cache.py
+import logging
+from types import SimpleNamespace
+from flexiai.core.flexi_managers.message_cache import MessageCache
+from flexiai.core.flexi_managers.message_manager import MessageManager
+from flexiai.core.flexi_managers.message_record import MessageRecord, extract_text
+from flexiai.testing import FakeOpenAIBackend
+
+
+def make_message(message_id, status='completed'):
+    text = SimpleNamespace(value=f"text of {message_id}")
+    return SimpleNamespace(id=message_id, role='user', status=status, content=[SimpleNamespace(text=text)])
+
+
+def test_message_manager_syncs_incrementally():
+    backend = FakeOpenAIBackend()
+    client = backend.client(max_retries=0)
+    message_manager = MessageManager(client, logging.getLogger(__name__), MessageCache(max_age=0))
+    thread_id = message_manager.add_messages_bulk(None, [{'content': f"Context {index}"} for index in range(5)])['thread_id']
+    # Written by someone else
+    client.beta.threads.messages.create(thread_id=thread_id, role='user', content="External")
+    message_manager.add_user_message(thread_id, "Hello")
+
+    history = message_manager.retrieve_messages(thread_id)
+    assert [message['content'] for message in history] == [f"Context {index}" for index in range(5)] + ["External", "Hello"]
+
+    listings = backend.get_stats()['requests']['messages.list']
+    newest = message_manager.retrieve_message_records(thread_id, last_retrieved_id=history[4]['message_id'])
+    oldest = message_manager.retrieve_message_records(thread_id, limit=2)
+    assert [record.text for record in newest] == ["External", "Hello"]
+    assert [record.text for record in oldest] == ["Context 0", "Context 1"]
+    # One incremental listing per read
+    assert backend.get_stats()['requests']['messages.list'] == listings + 2
+    stats = message_manager.message_cache.get_stats()
+    assert stats['threads'] == 1 and stats['synced_messages'] == 7
+
+
+def test_message_cache_skips_incomplete_messages_and_is_bounded():
+    cache = MessageCache(max_threads=2, max_messages=3)
+    cache.load("thread_1", [make_message("msg_1"), make_message("msg_2", status='in_progress')], complete=True)
+    assert cache.get_cursor("thread_1") == (True, "msg_1")
+
+    cache.add_written("thread_1", make_message("msg_4"))
+    cache.merge("thread_1", [make_message("msg_2"), make_message("msg_3"), make_message("msg_4")])
+    messages, complete = cache.get_messages("thread_1")
+    assert [message.id for message in messages] == ["msg_2", "msg_3", "msg_4"]
+    assert not complete
+    assert [message.id for message in cache.get_messages("thread_1", after="msg_2")[0]] == ["msg_3", "msg_4"]
+
+    cache.load("thread_2", [], complete=True)
+    cache.load("thread_3", [], complete=True)
+    assert cache.get_messages("thread_1") is None
+    assert cache.get_stats()['evicted_threads'] == 1
+
+
+def test_message_record_extracts_text_once():
+    message = make_message("msg_1")
+    message.content.append(SimpleNamespace(type='image_file'))
+    record = MessageRecord.from_message(message)
+    assert record == MessageRecord("msg_1", "user", text="text of msg_1")
+    assert {record, MessageRecord("msg_1", "user", text="text of msg_1")} == {record}
+    assert extract_text(record) == extract_text(message) == "text of msg_1"
+    assert record.to_dict()['content'] == "text of msg_1"
+    assert not hasattr(record, '__dict__')
+
+    cache = MessageCache()
+    cache.load("thread_1", [message], complete=True)
+    assert cache.get_messages("thread_1")[0][0] == record
+
+
+def test_fresh_threads_are_read_without_listing():
+    backend = FakeOpenAIBackend()
+    client = backend.client(max_retries=0)
+    message_manager = MessageManager(client, logging.getLogger(__name__), MessageCache(max_age=60))
+    thread = client.beta.threads.create()
+    message_manager.add_user_message(thread.id, "Hello")
+
+    message_manager.retrieve_messages(thread.id)
+    listings = backend.get_stats()['requests']['messages.list']
+    message_manager.retrieve_messages(thread.id)
+    message_manager.retrieve_message_records(thread.id)
+    assert backend.get_stats()['requests']['messages.list'] == listings
+
+    # A run marks the thread as stale, and the next read sees its messages
+    client.beta.threads.messages.create(thread_id=thread.id, role='assistant', content="Reply")
+    message_manager.message_cache.mark_stale(thread.id)
+    history = message_manager.retrieve_messages(thread.id)
+    assert [message['content'] for message in history] == ["Hello", "Reply"]
+    assert backend.get_stats()['requests']['messages.list'] == listings + 1
+    assert message_manager.message_cache.get_stats()['fresh_reads'] == 2
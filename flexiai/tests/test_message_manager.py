@@ -0,0 +1,115 @@
+# flexiai/tests/test_message_manager.py
+import itertools
+import logging
+import time
+import pytest
+from openai import InternalServerError
+from types import SimpleNamespace
+from flexiai.core.flexi_managers.message_manager import MessageManager
+from flexiai.testing import FakeOpenAIBackend, constant
+
+
+def message_texts(client, thread_id):
+    messages = client.beta.threads.messages.list(thread_id=thread_id, order='asc', limit=100).data
+    return [message.content[0].text.value for message in messages]
+
+
+def test_add_messages_bulk_keeps_order_and_reports_failures():
+    backend = FakeOpenAIBackend(latency=constant(0.01))
+    client = backend.client(max_retries=0)
+    message_manager = MessageManager(client, logging.getLogger(__name__))
+    messages = [{'content': f"Context {index}"} for index in range(40)]
+
+    fresh = message_manager.add_messages_bulk(None, messages, stagger=0.001)
+    assert fresh['errors'] == [] and fresh['ordered']
+    assert message_texts(client, fresh['thread_id']) == [message['content'] for message in messages]
+    # 32 messages came with the thread; on a busy machine some of the other 8 may have been moved
+    requests = backend.get_stats()['requests']
+    assert requests['messages.create'] == 8 + requests.get('messages.delete', 0)
+
+    thread_id = client.beta.threads.create().id
+    backend.inject_error('messages.create', status=500, count=1)
+    result = message_manager.add_messages_bulk(thread_id, messages[:10], stagger=0.001)
+    [error] = result['errors']
+    assert len(result['messages']) == 9
+    assert message_texts(client, thread_id) == [message['content'] for index, message in enumerate(messages[:10]) if index != error['index']]
+
+
+def test_add_messages_bulk_re_adds_misplaced_messages(mocker):
+    client = mocker.MagicMock()
+    retries = itertools.count(4)
+    created = set()
+
+    def create(**kwargs):
+        # The first attempt of message N gets msg_N, whatever order the requests run in
+        message_id = f"msg_{kwargs['content']}" if kwargs['content'] not in created else f"msg_{next(retries)}"
+        created.add(kwargs['content'])
+        return SimpleNamespace(id=message_id, content=kwargs['content'])
+
+    client.beta.threads.messages.create.side_effect = create
+    # The second and third messages landed swapped
+    listing = [SimpleNamespace(id=message_id) for message_id in ("msg_3", "msg_1", "msg_2", "msg_0")]
+    client.beta.threads.messages.list.return_value = SimpleNamespace(data=listing, has_more=False, last_id="msg_0")
+    message_manager = MessageManager(client, logging.getLogger(__name__))
+
+    result = message_manager.add_messages_bulk("thread_1", [{'content': str(index)} for index in range(4)], stagger=0)
+
+    deleted = [call.args[0] for call in client.beta.threads.messages.delete.call_args_list]
+    assert deleted == ["msg_1", "msg_2", "msg_3"]
+    assert [message.content for message in result['messages']] == ["0", "1", "2", "3"]
+    assert [message.id for message in result['messages']] == ["msg_0", "msg_4", "msg_5", "msg_6"]
+    assert result['ordered'] and result['errors'] == []
+
+
+def test_misplaced_messages_are_kept_when_they_cant_be_added_again(mocker):
+    client = mocker.MagicMock()
+    client.beta.threads.messages.create.side_effect = [
+        SimpleNamespace(id="msg_0"), SimpleNamespace(id="msg_1"), SimpleNamespace(id="msg_2"), RuntimeError("Service unavailable")
+    ]
+    listing = [SimpleNamespace(id=message_id) for message_id in ("msg_1", "msg_2", "msg_0")]
+    client.beta.threads.messages.list.return_value = SimpleNamespace(data=listing, has_more=False, last_id="msg_0")
+    message_manager = MessageManager(client, logging.getLogger(__name__))
+
+    result = message_manager.add_messages_bulk("thread_1", [{'content': str(index)} for index in range(3)], max_concurrency=1, stagger=0)
+
+    # Nothing is deleted without its copy, the messages are only reported out of order
+    client.beta.threads.messages.delete.assert_not_called()
+    assert not result['ordered'] and result['errors'] == []
+    assert [message.id for message in result['messages']] == ["msg_0", "msg_1", "msg_2"]
+
+
+def test_add_messages_dynamically_stops_at_the_first_failure():
+    backend = FakeOpenAIBackend()
+    client = backend.client(max_retries=0)
+    message_manager = MessageManager(client, logging.getLogger(__name__))
+    thread_id = client.beta.threads.create().id
+
+    backend.inject_error('messages.create', status=500, count=1)
+    with pytest.raises(InternalServerError):
+        message_manager.add_messages_dynamically(thread_id, [{'content': str(index)} for index in range(3)])
+    assert message_texts(client, thread_id) == []
+    assert backend.get_stats()['requests']['messages.create'] == 1
+
+
+def test_iter_messages_prefetches_pages_and_honours_max_items():
+    backend = FakeOpenAIBackend(latency=constant(0.02))
+    client = backend.client(max_retries=0)
+    message_manager = MessageManager(client, logging.getLogger(__name__))
+    thread_id = message_manager.add_messages_bulk(None, [{'content': str(index)} for index in range(25)])['thread_id']
+    listings = backend.get_stats()['requests']['messages.list']
+
+    iterator = message_manager.iter_messages(thread_id, page_size=10)
+    first = next(iterator)
+    # The second page is requested as soon as the first one is handed out
+    time.sleep(0.01)
+    assert backend.get_stats()['requests']['messages.list'] == listings + 2
+    assert [first.content[0].text.value] + [message.content[0].text.value for message in iterator] == [str(index) for index in range(25)]
+
+    newest = list(message_manager.iter_messages(thread_id, order='desc', page_size=10, max_items=12))
+    assert [message.content[0].text.value for message in newest] == [str(index) for index in range(24, 12, -1)]
+    assert backend.get_stats()['requests']['messages.list'] == listings + 3 + 2
+
+    # "24" to "20" are 10 bytes, "19" reaches 12: no second page is fetched
+    budgeted = list(message_manager.iter_messages(thread_id, order='desc', page_size=10, max_bytes=11))
+    assert [message.content[0].text.value for message in budgeted] == [str(index) for index in range(24, 18, -1)]
+    assert backend.get_stats()['requests']['messages.list'] == listings + 3 + 2 + 1
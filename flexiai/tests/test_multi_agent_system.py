@@ -0,0 +1,109 @@
+# flexiai/tests/test_multi_agent_system.py
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+import pytest
+from flexiai.core.flexi_managers.multi_agent_system import MultiAgentSystemManager
+from flexiai.core.flexi_managers.state_backend import InMemoryStateBackend, SQLiteStateBackend, StateBackend
+from flexiai.core.flexi_managers.thread_manager import ThreadManager
+from flexiai.testing import FakeOpenAIBackend
+
+
+def make_system(state_backend=None, client=None, run_manager=None):
+    logger = logging.getLogger(__name__)
+    thread_manager = ThreadManager(client, logger) if client is not None else None
+    return MultiAgentSystemManager(client, logger, thread_manager, run_manager, None, state_backend=state_backend)
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def state_backend(request, tmp_path):
+    backend = InMemoryStateBackend() if request.param == 'memory' else SQLiteStateBackend(str(tmp_path / "state.db"))
+    yield backend
+    backend.close()
+
+
+def test_processed_content_is_loaded_per_sender_or_for_every_sender(state_backend):
+    system = make_system(state_backend)
+    for sender, content in [("asst_a", "a1"), ("asst_b", "b1"), ("asst_a", "a2"), ("asst_c", "to other")]:
+        system.save_processed_content(sender, "asst_c" if content != "to other" else "asst_d", content)
+
+    assert system.load_processed_content("asst_b", "asst_c") == ["b1"]
+    assert system.load_processed_content("asst_b", "asst_c") == []
+    system.save_processed_content("asst_b", "asst_c", "b2")
+    assert system.load_processed_content("asst_x", "asst_c", multiple_retrieval=True) == ["a1", "a2", "b2"]
+    assert system.load_processed_content("asst_a", "asst_c", multiple_retrieval=True) == []
+    assert system.processed_content_map == {("asst_c", "asst_d"): ["to other"]}
+
+
+def test_concurrent_producers_and_consumers_lose_nothing(state_backend):
+    system = make_system(state_backend)
+    recipients = [f"asst_{index}" for index in range(8)]
+
+    def produce(index):
+        for sequence in range(50):
+            system.save_processed_content(f"producer_{index}", recipients[index % 8], f"{index}:{sequence}")
+
+    def consume(recipient):
+        return system.load_processed_content("any", recipient, multiple_retrieval=True)
+
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        consumed = pool.map(consume, recipients * 20)
+        list(pool.map(produce, range(16)))
+        consumed = [item for items in consumed for item in items]
+    consumed += [item for recipient in recipients for item in consume(recipient)]
+
+    assert sorted(consumed) == sorted(f"{index}:{sequence}" for index in range(16) for sequence in range(50))
+    assert system.processed_content_map == {}
+
+
+def test_workers_sharing_a_sqlite_backend_share_threads_and_content(tmp_path, mocker):
+    backend = FakeOpenAIBackend()
+    client = backend.client(max_retries=0)
+    path = str(tmp_path / "state.db")
+    first = make_system(SQLiteStateBackend(path), client, mocker.Mock())
+    second = make_system(SQLiteStateBackend(path), client, mocker.Mock())
+
+    thread_id = first.thread_initialization("asst_1")
+    assert second.thread_initialization("asst_1") == thread_id
+    second.change_thread_status("asst_1", "updated")
+    assert first.check_for_thread_and_status("asst_1") == (thread_id, "updated")
+
+    first.save_processed_content("asst_2", "asst_1", {"rows": [1, 2]})
+    assert second.load_processed_content("asst_2", "asst_1") == [{"rows": [1, 2]}]
+    assert first.load_processed_content("asst_2", "asst_1") == []
+
+    # A restarted worker finds the initialized thread
+    first.state_backend.close()
+    restarted = make_system(SQLiteStateBackend(path), client, mocker.Mock())
+    assert restarted.active_threads == {"asst_1": {'thread_id': thread_id, 'status': "updated"}}
+    assert backend.get_stats()['requests']['threads.create'] == 1
+
+
+def test_sqlite_backend_bounds_the_processed_content(tmp_path):
+    state_backend = SQLiteStateBackend(str(tmp_path / "state.db"), max_key_bytes=10, max_total_bytes=20, ttl=60)
+    # Each payload is its JSON text: "aaaaa" takes 7 bytes with its quotes
+    assert state_backend.save_content("asst_a", "asst_c", "aaaaa")
+    assert state_backend.save_content("asst_b", "asst_c", "bbbbbb")
+    assert state_backend.save_content("asst_a", "asst_c", "AA")
+    assert state_backend.get_contents() == {("asst_a", "asst_c"): ["AA"], ("asst_b", "asst_c"): ["bbbbbb"]}
+    assert not state_backend.save_content("asst_a", "asst_c", "x" * 20)
+    assert state_backend.save_content("asst_a", "asst_d", "dddddddd")
+    assert state_backend.get_contents() == {("asst_a", "asst_c"): ["AA"], ("asst_a", "asst_d"): ["dddddddd"]}
+
+    state_backend.ttl = 0.01
+    time.sleep(0.02)
+    assert state_backend.get_contents() == {}
+    assert state_backend.pop_all_content("asst_c") == []
+    stats = state_backend.get_stats()
+    assert stats['evicted'] == 2 and stats['rejected'] == 1 and stats['expired'] == 2
+    assert stats['items'] == 0
+    state_backend.close()
+
+
+def test_incomplete_state_backends_cant_be_created():
+    class ThreadsOnly(StateBackend):
+        def get_thread(self, assistant_id):
+            return None
+
+    with pytest.raises(TypeError):
+        ThreadsOnly()
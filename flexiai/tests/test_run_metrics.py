@@ -0,0 +1,92 @@
+# flexiai/tests/test_run_metrics.py
+import json
+import logging
+import pytest
+from types import SimpleNamespace
+from flexiai.core.flexi_managers.run_manager import RunManager
+from flexiai.core.flexi_managers.run_metrics import InMemoryMetricsSink, MetricsSink, RunMetrics
+from flexiai.core.flexi_managers.run_monitor import PollingPolicy
+
+
+def make_run(status, tool_calls=None, usage=None):
+    required_action = None
+    if tool_calls:
+        required_action = SimpleNamespace(submit_tool_outputs=SimpleNamespace(tool_calls=tool_calls))
+    return SimpleNamespace(id="run_1", status=status, required_action=required_action, usage=usage)
+
+
+def make_tool_call(call_id, name, arguments):
+    return SimpleNamespace(id=call_id, function=SimpleNamespace(name=name, arguments=json.dumps(arguments)))
+
+
+def test_run_manager_records_run_metrics(mocker):
+    mocker.patch('flexiai.core.flexi_managers.run_monitor.time.sleep')
+    client = mocker.MagicMock()
+    usage = SimpleNamespace(prompt_tokens=12, completion_tokens=5, total_tokens=17)
+    client.beta.threads.runs.create.return_value = make_run("queued")
+    client.beta.threads.runs.retrieve.side_effect = [
+        make_run("requires_action", [make_tool_call("call_1", "add", {"a": 1, "b": 2})]),
+        make_run("in_progress"),
+        make_run("completed", usage=usage),
+    ]
+    sink = InMemoryMetricsSink(capacity=10)
+    policy = PollingPolicy(initial_interval=0.1, multiplier=2, max_interval=1, jitter=0)
+    run_manager = RunManager(client, logging.getLogger(__name__), mocker.Mock(), mocker.Mock(), polling_policy=policy, metrics_sink=sink)
+    run_manager.update_function_mappings({"add": lambda a, b: a + b}, {})
+    run_manager.mark_thread_idle("thread_1")
+
+    try:
+        run_manager.create_and_monitor_run("asst_1", "thread_1", "Hello")
+    finally:
+        run_manager.close()
+
+    [metrics] = sink.get_records()
+    assert metrics.entry_point == 'create_and_monitor_run'
+    assert metrics.run_id == "run_1" and metrics.status == "completed"
+    assert metrics.requires_action_rounds == 1
+    assert [call['function_name'] for call in metrics.tool_calls] == ["add"]
+    assert len(metrics.submit_times) == 1
+    assert metrics.poll_count == 3
+    assert metrics.usage == {'prompt_tokens': 12, 'completion_tokens': 5, 'total_tokens': 17}
+    assert set(metrics.status_times) == {'queued', 'requires_action', 'in_progress', 'completed'}
+    assert metrics.total_time >= metrics.tool_time
+
+
+def test_run_manager_records_failed_runs(mocker):
+    client = mocker.MagicMock()
+    client.beta.threads.runs.create.side_effect = RuntimeError("boom")
+    sink = InMemoryMetricsSink()
+    run_manager = RunManager(client, logging.getLogger(__name__), mocker.Mock(), mocker.Mock(), metrics_sink=sink)
+    run_manager.mark_thread_idle("thread_1")
+
+    try:
+        run_manager.create_run("asst_1", "thread_1")
+    except RuntimeError:
+        pass
+    finally:
+        run_manager.close()
+
+    [metrics] = sink.get_records()
+    assert metrics.status == 'error' and metrics.error == "boom"
+
+
+def test_in_memory_sink_keeps_recent_records_and_computes_percentiles():
+    sink = InMemoryMetricsSink(capacity=100)
+    for i in range(1, 151):
+        metrics = RunMetrics('create_run', "asst_1", "thread_1")
+        metrics.finish()
+        metrics.total_time = float(i)
+        sink.record(metrics)
+
+    assert len(sink.get_records()) == 100
+    assert sink.percentiles('total_time') == {50: 100.0, 90: 140.0, 99: 149.0}
+    assert sink.percentiles('total_tokens') == {}
+    assert sink.summary()['runs'] == 100
+
+
+def test_metrics_sinks_must_record_metrics():
+    class Silent(MetricsSink):
+        pass
+
+    with pytest.raises(TypeError):
+        Silent()
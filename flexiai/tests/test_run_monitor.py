@@ -0,0 +1,154 @@
+# flexiai/tests/test_run_monitor.py
+import logging
+import pytest
+from types import SimpleNamespace
+from flexiai.core.flexi_managers.run_monitor import PollingPolicy, RunMonitor
+from flexiai.core.flexi_managers.run_poller import RunPoller
+from flexiai.core.flexi_managers.run_registry import ActiveRunRegistry
+from flexiai.testing import FakeOpenAIBackend
+
+
+def make_run(status, run_id="run_1"):
+    return SimpleNamespace(id=run_id, status=status)
+
+
+@pytest.fixture
+def client(mocker):
+    return mocker.MagicMock()
+
+
+@pytest.fixture
+def sleep(mocker):
+    return mocker.patch('flexiai.core.flexi_managers.run_monitor.time.sleep')
+
+
+@pytest.fixture
+def monitor(client, sleep):
+    policy = PollingPolicy(initial_interval=0.1, multiplier=2, max_interval=1, jitter=0)
+    return RunMonitor(client, logging.getLogger(__name__), policy)
+
+
+def test_policy_grows_exponentially_up_to_cap():
+    policy = PollingPolicy(initial_interval=0.1, multiplier=2, max_interval=1, jitter=0)
+    assert [policy.next_interval(attempt) for attempt in range(5)] == pytest.approx([0.1, 0.2, 0.4, 0.8, 1])
+
+
+def test_policy_jitter_stays_within_bounds():
+    policy = PollingPolicy(initial_interval=1, multiplier=1, max_interval=2, jitter=0.5)
+    for _ in range(100):
+        assert 0.5 <= policy.next_interval(0) <= 1.5
+
+
+def test_monitor_run_counts_polls_and_resets_on_status_change(client, monitor, sleep):
+    client.beta.threads.runs.retrieve.side_effect = [
+        make_run("queued"), make_run("in_progress"), make_run("in_progress"), make_run("completed"),
+    ]
+
+    run = monitor.monitor_run(make_run("queued"), "thread_1")
+
+    assert run.status == "completed"
+    assert monitor.get_poll_count("run_1") == 4
+    delays = [call.args[0] for call in sleep.call_args_list]
+    assert delays == pytest.approx([0.1, 0.2, 0.1, 0.2])
+
+
+def test_monitor_run_dispatches_requires_action(client, monitor, mocker):
+    handler = mocker.Mock()
+    client.beta.threads.runs.retrieve.side_effect = [make_run("in_progress"), make_run("completed")]
+
+    monitor.monitor_run(make_run("requires_action"), "thread_1", on_requires_action=handler)
+
+    handler.assert_called_once()
+    assert handler.call_args.args[0].status == "requires_action"
+
+
+def test_wait_for_idle_thread_polls_until_no_active_run(client, monitor):
+    client.beta.threads.runs.list.side_effect = [
+        SimpleNamespace(data=[make_run("in_progress")]),
+        SimpleNamespace(data=[make_run("completed")]),
+    ]
+
+    assert monitor.wait_for_idle_thread("thread_1") == 2
+
+
+def test_wait_for_idle_thread_skips_listing_after_a_monitored_run(client, monitor):
+    client.beta.threads.runs.retrieve.side_effect = [make_run("completed")]
+
+    monitor.monitor_run(make_run("queued"), "thread_1")
+
+    assert monitor.wait_for_idle_thread("thread_1") == 0
+    client.beta.threads.runs.list.assert_not_called()
+
+
+def test_registry_entries_expire_after_ttl():
+    now = [0.0]
+    registry = ActiveRunRegistry(ttl=10, clock=lambda: now[0])
+    registry.mark_idle("thread_1")
+    registry.record("thread_2", "run_2", "in_progress")
+
+    assert registry.is_idle("thread_1")
+    assert not registry.is_idle("thread_2")
+    now[0] = 11
+    assert not registry.is_idle("thread_1")
+
+
+def test_monitor_run_cancels_run_past_its_deadline(client, monitor, mocker):
+    client.beta.threads.runs.cancel.return_value = make_run("cancelling")
+    client.beta.threads.runs.retrieve.side_effect = [make_run("cancelled")]
+    on_requires_action = mocker.Mock()
+
+    run = monitor.monitor_run(make_run("requires_action"), "thread_1", on_requires_action, deadline=0)
+
+    assert run.status == "cancelled"
+    client.beta.threads.runs.cancel.assert_called_once_with(thread_id="thread_1", run_id="run_1")
+    on_requires_action.assert_not_called()
+
+
+def test_poller_tracks_many_runs_and_dispatches_required_actions(client, mocker):
+    statuses = {}
+
+    def retrieve(thread_id, run_id):
+        remaining = statuses[run_id]
+        return make_run(remaining.pop(0) if len(remaining) > 1 else remaining[0], run_id)
+
+    client.beta.threads.runs.retrieve.side_effect = retrieve
+    policy = PollingPolicy(initial_interval=0.01, multiplier=1, max_interval=0.01, jitter=0)
+    poller = RunPoller(RunMonitor(client, logging.getLogger(__name__), policy), logging.getLogger(__name__))
+    handler = mocker.Mock()
+
+    futures = []
+    for i in range(50):
+        run_id = f"run_{i}"
+        statuses[run_id] = ["in_progress", "requires_action", "in_progress", "completed"] if i % 2 else ["in_progress", "completed"]
+        futures.append(poller.watch(make_run("queued", run_id), f"thread_{i}", on_requires_action=handler))
+
+    try:
+        results = [future.result(timeout=5) for future in futures]
+    finally:
+        poller.shutdown()
+
+    assert all(run.status == "completed" for run in results)
+    assert handler.call_count == 25
+    assert poller.get_stats() == {'tracked': 0, 'scheduled': 0}
+
+
+def test_run_started_by_another_process_is_waited_for():
+    backend = FakeOpenAIBackend(run_duration=0.05)
+    client = backend.client(max_retries=0)
+    other_worker = backend.client(max_retries=0)
+    policy = PollingPolicy(initial_interval=0.01, multiplier=1, max_interval=0.01, jitter=0)
+    monitor = RunMonitor(client, logging.getLogger(__name__), policy)
+    assistant_id = other_worker.beta.assistants.create(model="gpt-4o").id
+    thread_id = client.beta.threads.create().id
+
+    # The thread looks idle locally while another worker has just started a run on it
+    monitor.registry.mark_idle(thread_id)
+    other_run = other_worker.beta.threads.runs.create(thread_id=thread_id, assistant_id=assistant_id)
+    assert monitor.wait_for_idle_thread(thread_id) == 0
+
+    run = monitor.call_on_idle_thread(
+        thread_id, lambda: client.beta.threads.runs.create(thread_id=thread_id, assistant_id=assistant_id)
+    )
+    assert run.id != other_run.id
+    assert backend.get_stats()['requests']['runs.create'] == 3
+    assert backend.get_stats()['requests']['runs.list'] >= 1
@@ -0,0 +1,100 @@
+# flexiai/tests/test_run_scheduler.py
+import logging
+import threading
+import time
+import pytest
+from concurrent.futures import CancelledError
+from flexiai.core.flexi_managers.message_manager import MessageManager
+from flexiai.core.flexi_managers.rate_limiter import TokenBucket
+from flexiai.core.flexi_managers.run_scheduler import RunScheduler
+from flexiai.core.flexi_managers.thread_manager import ThreadManager
+from flexiai.testing import FakeOpenAIBackend
+
+
+class FakeRunManager:
+    def __init__(self, duration=0.02, gate=None):
+        self.duration = duration
+        self.gate = gate
+        self.lock = threading.Lock()
+        self.running = set()
+        self.peak = 0
+        self.order = []
+        self.overlapping_threads = False
+
+    def create_and_monitor_run(self, assistant_id, thread_id, user_message=None, role=None, metadata=None):
+        if self.gate is not None:
+            self.gate.wait()
+        with self.lock:
+            self.overlapping_threads |= thread_id in self.running
+            self.running.add(thread_id)
+            self.peak = max(self.peak, len(self.running))
+            self.order.append(thread_id)
+        time.sleep(self.duration)
+        with self.lock:
+            self.running.discard(thread_id)
+        return f"{thread_id}:{user_message}"
+
+
+def test_scheduler_caps_in_flight_runs_and_serializes_threads():
+    run_manager = FakeRunManager()
+    scheduler = RunScheduler(run_manager, logging.getLogger(__name__), max_in_flight=2)
+
+    futures = [scheduler.submit("asst", f"thread_{i % 4}", str(i)) for i in range(12)]
+    results = [future.result(timeout=5) for future in futures]
+    scheduler.shutdown()
+
+    assert results == [f"thread_{i % 4}:{i}" for i in range(12)]
+    assert run_manager.peak == 2
+    assert not run_manager.overlapping_threads
+
+
+def test_scheduler_serves_pairs_round_robin():
+    blocker = threading.Event()
+    run_manager = FakeRunManager(duration=0.01, gate=blocker)
+    scheduler = RunScheduler(run_manager, logging.getLogger(__name__), max_in_flight=1)
+
+    futures = [scheduler.submit("asst", "busy") for _ in range(3)] + [scheduler.submit("asst", "other")]
+    blocker.set()
+    for future in futures:
+        future.result(timeout=5)
+    scheduler.shutdown()
+
+    assert run_manager.order == ["busy", "other", "busy", "busy"]
+
+
+def test_shutdown_without_waiting_cancels_queued_runs():
+    blocker = threading.Event()
+    run_manager = FakeRunManager(duration=0, gate=blocker)
+    scheduler = RunScheduler(run_manager, logging.getLogger(__name__), max_in_flight=1)
+
+    futures = [scheduler.submit("asst", f"thread_{i}") for i in range(3)]
+    scheduler.shutdown(wait=False)
+    blocker.set()
+
+    assert futures[0].result(timeout=5) == "thread_0:None"
+    for future in futures[1:]:
+        with pytest.raises(CancelledError):
+            future.result(timeout=5)
+    assert scheduler.get_stats()['queued'] == 0
+
+
+def test_token_bucket_spaces_requests_after_burst():
+    now = [0.0]
+    bucket = TokenBucket(requests_per_minute=60, burst=2, clock=lambda: now[0])
+
+    assert [bucket.reserve() for _ in range(4)] == pytest.approx([0, 0, 1, 2])
+    bucket.pause(5)
+    assert bucket.reserve() == pytest.approx(5)
+
+
+def test_thread_and_message_calls_draw_from_the_rate_limiter():
+    backend = FakeOpenAIBackend()
+    client = backend.client(max_retries=0)
+    logger = logging.getLogger(__name__)
+    bucket = TokenBucket(requests_per_minute=60, burst=2, clock=lambda: 0.0)
+
+    thread = ThreadManager(client, logger, rate_limiter=bucket).create_thread()
+    MessageManager(client, logger, rate_limiter=bucket).add_user_message(thread.id, "Hello")
+
+    # Both requests took their token, the next one has to wait
+    assert bucket.reserve() == pytest.approx(1)
@@ -0,0 +1,70 @@
+# flexiai/tests/test_thread_lease.py
+import logging
+import threading
+import time
+import pytest
+from flexiai.core.flexi_managers.thread_lease import ThreadLeaseManager
+from flexiai.core.flexi_managers.thread_manager import ThreadManager
+from flexiai.testing import FakeOpenAIBackend
+
+
+def make_lease_manager(**options):
+    backend = FakeOpenAIBackend()
+    logger = logging.getLogger(__name__)
+    return backend, ThreadLeaseManager(ThreadManager(backend.client(max_retries=0), logger), logger, **options)
+
+
+def test_sessions_get_their_own_threads_and_keep_them():
+    backend, leases = make_lease_manager(max_threads_per_assistant=2)
+    first = leases.acquire("asst_1", owner="session_1")
+    second = leases.acquire("asst_1", owner="session_2")
+    assert first.thread_id != second.thread_id
+    assert leases.acquire("asst_1", owner="session_1") is first
+
+    with pytest.raises(TimeoutError):
+        leases.acquire("asst_1", owner="session_3", timeout=0.05)
+
+    # A waiting caller gets the place freed by another session, not its thread
+    threading.Timer(0.05, first.release).start()
+    third = leases.acquire("asst_1", owner="session_3", timeout=5)
+    assert third.thread_id not in (first.thread_id, second.thread_id)
+    third.release()
+    assert leases.acquire("asst_1", owner="session_1").thread_id == first.thread_id
+
+    second.release(discard=True)
+    with leases.acquire("asst_1") as task_lease:
+        task_thread_id = task_lease.thread_id
+    # The thread of an anonymous lease goes back to the pool
+    assert leases.acquire("asst_1").thread_id == task_thread_id
+
+    stats = leases.get_stats("asst_1")["asst_1"]
+    assert stats['created'] == 4 and stats['resumed'] == 1 and stats['reused'] == 1 and stats['timeouts'] == 1
+    assert stats['threads'] == 2 and stats['leased'] == 2 and stats['parked'] == 1
+    assert backend.get_stats()['requests']['threads.delete'] == 1
+
+
+def test_expired_leases_keep_their_thread_for_the_owner():
+    backend, leases = make_lease_manager(max_threads_per_assistant=1, lease_ttl=0.05)
+    abandoned = leases.acquire("asst_1", owner="session_1")
+    time.sleep(0.06)
+
+    lease = leases.acquire("asst_1", owner="session_2", timeout=1)
+    assert abandoned.released and not leases.renew(abandoned)
+    # The thread of an expired lease isn't handed to another owner, nor deleted
+    assert lease.thread_id != abandoned.thread_id
+    lease.release()
+    assert leases.acquire("asst_1", owner="session_1", timeout=1).thread_id == abandoned.thread_id
+    assert leases.get_stats()["asst_1"]['expired'] == 1
+    assert backend.get_stats()['requests'].get('threads.delete', 0) == 0
+
+
+def test_unbounded_pool_adopts_the_thread_of_a_session():
+    backend, leases = make_lease_manager(max_threads_per_assistant=None)
+    held = [leases.acquire("asst_1", owner=f"session_{index}") for index in range(20)]
+    assert len({lease.thread_id for lease in held}) == 20
+
+    # A session the manager doesn't know yet, e.g. after a restart, keeps its stored thread
+    stored = backend.client(max_retries=0).beta.threads.create().id
+    assert leases.acquire("asst_1", owner="session_restored", thread_id=stored).thread_id == stored
+    # The thread of another session isn't adopted
+    assert leases.acquire("asst_1", owner="session_other", thread_id=held[0].thread_id).thread_id != held[0].thread_id
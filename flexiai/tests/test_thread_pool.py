@@ -0,0 +1,66 @@
+# flexiai/tests/test_thread_pool.py
+import logging
+import time
+from flexiai.core.flexi_managers.thread_manager import ThreadManager
+from flexiai.core.flexi_managers.thread_pool import WarmThreadPool
+from flexiai.testing import FakeOpenAIBackend
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_thread_manager_takes_threads_from_the_pool_and_refills_it():
+    backend = FakeOpenAIBackend()
+    client = backend.client(max_retries=0)
+    logger = logging.getLogger(__name__)
+    pool = WarmThreadPool(client, logger, size=4, low_water=2)
+    pool.start()
+    wait_until(lambda: pool.get_stats()['available'] == 4)
+
+    thread_manager = ThreadManager(client, logger, pool)
+    threads = [thread_manager.create_thread() for _ in range(3)]
+    assert len({thread.id for thread in threads}) == 3
+    # Below the low-water mark, refilled in the background
+    wait_until(lambda: pool.get_stats()['available'] == 4)
+    stats = pool.get_stats()
+    assert stats['hits'] == 3 and stats['created'] == 7
+
+    pool.shutdown()
+    assert backend.get_stats()['requests']['threads.delete'] == 4
+    # Without threads in the pool, ThreadManager creates its own
+    assert thread_manager.create_thread().id not in {thread.id for thread in threads}
+    assert pool.get_stats()['misses'] == 1
+
+
+def test_thread_pool_deletes_expired_threads():
+    backend = FakeOpenAIBackend()
+    client = backend.client(max_retries=0)
+    pool = WarmThreadPool(client, logging.getLogger(__name__), size=2, max_age=0.05)
+    pool.start()
+    # Expired threads are replaced by new ones
+    wait_until(lambda: pool.get_stats()['expired'] >= 2 and pool.get_stats()['created'] >= 4)
+    pool.shutdown(delete_threads=False)
+    assert backend.get_stats()['requests']['threads.delete'] >= 2
+
+
+def test_thread_pool_keeps_refilling_after_unexpected_errors():
+    backend = FakeOpenAIBackend()
+    client = backend.client(max_retries=0)
+    create = client.beta.threads.create
+    failures = [RuntimeError("unexpected response")]
+
+    def flaky_create(**kwargs):
+        if failures:
+            raise failures.pop()
+        return create(**kwargs)
+
+    client.beta.threads.create = flaky_create
+    pool = WarmThreadPool(client, logging.getLogger(__name__), size=2, retry_interval=0.01)
+    pool.start()
+    wait_until(lambda: pool.get_stats()['available'] == 2)
+    assert pool.get_stats()['failures'] == 1
+    pool.shutdown()
@@ -0,0 +1,77 @@
+# flexiai/tests/test_tool_cache.py
+import asyncio
+import logging
+import pytest
+from flexiai.core.flexi_managers.tool_cache import ToolResultCache
+
+
+@pytest.fixture
+def cache(mocker):
+    return ToolResultCache(mocker.Mock())
+
+
+def test_uncached_functions_always_execute(cache, mocker):
+    call = mocker.Mock(return_value=1)
+
+    cache.get_or_call("lookup", {"q": "a"}, call)
+    cache.get_or_call("lookup", {"q": "a"}, call)
+
+    assert call.call_count == 2
+    assert cache.get_stats()['misses'] == 0
+
+
+def test_hits_ignore_argument_order(cache, mocker):
+    cache.configure("lookup")
+    call = mocker.Mock(return_value=1)
+
+    cache.get_or_call("lookup", {"a": 1, "b": 2}, call)
+    cache.get_or_call("lookup", {"b": 2, "a": 1}, call)
+
+    assert call.call_count == 1
+    assert cache.get_stats()['functions']['lookup'] == {'hits': 1, 'misses': 1, 'coalesced': 0}
+
+
+def test_entries_expire_and_are_evicted():
+    now = [0.0]
+    cache = ToolResultCache(logging.getLogger(__name__), clock=lambda: now[0])
+    cache.configure("lookup", ttl=10, max_size=1)
+    calls = []
+
+    def call(value):
+        calls.append(value)
+        return value
+
+    cache.get_or_call("lookup", {"q": 1}, lambda: call(1))
+    now[0] = 11
+    cache.get_or_call("lookup", {"q": 1}, lambda: call(1))
+    cache.get_or_call("lookup", {"q": 2}, lambda: call(2))
+    cache.get_or_call("lookup", {"q": 1}, lambda: call(1))
+
+    assert calls == [1, 1, 2, 1]
+
+
+def test_concurrent_identical_calls_are_coalesced(cache):
+    cache.configure("lookup")
+    calls = []
+
+    async def lookup():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def run_batch():
+        return await asyncio.gather(*(cache.get_or_call_async("lookup", {"q": "a"}, lookup) for _ in range(3)))
+
+    assert asyncio.run(run_batch()) == ["result"] * 3
+    assert len(calls) == 1
+    assert cache.get_stats()['coalesced'] == 2
+
+
+def test_failures_are_not_cached(cache, mocker):
+    cache.configure("lookup")
+    call = mocker.Mock(side_effect=[ValueError("boom"), 1])
+
+    with pytest.raises(ValueError):
+        cache.get_or_call("lookup", {}, call)
+
+    assert cache.get_or_call("lookup", {}, call) == 1
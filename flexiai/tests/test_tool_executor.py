@@ -0,0 +1,203 @@
+# flexiai/tests/test_tool_executor.py
+import asyncio
+import os
+import threading
+import time
+import pytest
+from flexiai.core.flexi_managers.tool_executor import ToolExecutor, ToolFunction, ToolTimeoutError
+
+
+def current_pid(fail=False, delay=0):
+    time.sleep(delay)
+    if fail:
+        raise ValueError("bad input")
+    return os.getpid()
+
+
+@pytest.fixture
+def executor(mocker):
+    tool_executor = ToolExecutor(mocker.Mock(), max_workers=4)
+    yield tool_executor
+    tool_executor.shutdown()
+
+
+def test_sync_functions_run_concurrently_in_the_pool(executor):
+    def slow(value):
+        time.sleep(0.2)
+        return value * 2
+
+    async def run_all():
+        return await asyncio.gather(*(executor.execute_async("slow", slow, {"value": i}) for i in range(4)))
+
+    start = time.monotonic()
+    results = asyncio.run(run_all())
+
+    assert results == [0, 2, 4, 6]
+    assert time.monotonic() - start < 0.6
+
+
+def test_coroutine_functions_are_awaited_on_the_sequential_path(executor):
+    async def double(value):
+        await asyncio.sleep(0)
+        return value * 2
+
+    assert executor.execute("double", double, {"value": 21}) == 42
+
+
+def test_inline_calls_run_on_the_calling_thread(executor):
+    timing = {}
+
+    assert executor.execute("name", lambda: threading.current_thread().name, {}, inline=True, timing=timing) == threading.current_thread().name
+    assert executor.execute("name", lambda: threading.current_thread().name, {}).startswith("flexiai-tool")
+    assert timing['duration'] >= 0
+
+    # An inline call that overruns the run deadline is reported as timed out once it returns
+    with executor.deadline_scope(time.monotonic() + 0.05):
+        with pytest.raises(ToolTimeoutError):
+            executor.execute("slow", current_pid, {"delay": 0.1}, inline=True)
+
+    # A function with its own timeout stays interruptible
+    executor.set_function_timeout("hung", 0.05)
+    with pytest.raises(ToolTimeoutError):
+        executor.execute("hung", current_pid, {"delay": 0.5}, inline=True)
+    assert executor.get_stats() == {'timeouts': 2, 'abandoned': 1}
+
+
+def test_timing_excludes_the_wait_for_a_slot(executor):
+    executor.set_function_limit("guarded", 1)
+    timings = [{}, {}]
+
+    async def run_all():
+        await asyncio.gather(*(executor.execute_async("guarded", current_pid, {"delay": 0.1}, timing=timing) for timing in timings))
+
+    asyncio.run(run_all())
+
+    assert all(0.1 <= timing['duration'] < 0.18 for timing in timings)
+
+
+def test_function_limit_caps_concurrent_calls(executor):
+    executor.set_function_limit("guarded", 1)
+    lock = threading.Lock()
+    running = {"now": 0, "peak": 0}
+
+    def guarded():
+        with lock:
+            running["now"] += 1
+            running["peak"] = max(running["peak"], running["now"])
+        time.sleep(0.05)
+        with lock:
+            running["now"] -= 1
+
+    async def run_all():
+        await asyncio.gather(*(executor.execute_async("guarded", guarded, {}) for _ in range(3)))
+
+    asyncio.run(run_all())
+
+    assert running["peak"] == 1
+
+
+def test_nested_calls_run_inline(executor):
+    executor.set_function_limit("outer", 1)
+
+    def inner():
+        return threading.current_thread().name
+
+    def outer():
+        return threading.current_thread().name, executor.execute("outer", inner, {})
+
+    outer_thread, inner_thread = executor.execute("outer", outer, {})
+
+    assert outer_thread == inner_thread
+
+
+def test_coroutines_run_on_the_given_loop(executor):
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+
+    async def loop_thread_name():
+        return threading.current_thread().name
+
+    try:
+        result = executor.execute(
+            "name", loop_thread_name, {},
+            run_coroutine=lambda coroutine: asyncio.run_coroutine_threadsafe(coroutine, loop).result()
+        )
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join()
+        loop.close()
+
+    assert result == thread.name
+
+
+def test_hung_function_times_out_and_is_abandoned(executor):
+    executor.set_function_timeout("hung", 0.05)
+    release = threading.Event()
+
+    with pytest.raises(ToolTimeoutError):
+        executor.execute("hung", release.wait, {})
+
+    assert executor.get_stats() == {'timeouts': 1, 'abandoned': 1}
+    release.set()
+
+
+def test_waiting_for_a_slot_counts_against_the_deadline(executor):
+    executor.set_function_limit("guarded", 1)
+    holder = threading.Thread(target=executor.execute, args=("guarded", current_pid, {"delay": 0.5}))
+    holder.start()
+    time.sleep(0.05)
+
+    started = time.monotonic()
+    with executor.deadline_scope(time.monotonic() + 0.1):
+        with pytest.raises(ToolTimeoutError):
+            executor.execute("guarded", current_pid, {})
+
+        async def wait_for_slot():
+            return await executor.execute_async("guarded", current_pid, {})
+
+        with pytest.raises(ToolTimeoutError):
+            asyncio.run(wait_for_slot())
+    assert time.monotonic() - started < 0.4
+    assert executor.get_stats()['timeouts'] == 2
+
+    holder.join()
+    # The slot is free again
+    assert executor.execute("guarded", current_pid, {}) == os.getpid()
+
+
+def test_run_deadline_cancels_coroutines(executor):
+    async def hung():
+        await asyncio.sleep(10)
+
+    async def run_with_deadline():
+        with executor.deadline_scope(time.monotonic() + 0.05):
+            return await asyncio.gather(executor.execute_async("hung", hung, {}), return_exceptions=True)
+
+    start = time.monotonic()
+    results = asyncio.run(run_with_deadline())
+
+    assert isinstance(results[0], ToolTimeoutError)
+    assert time.monotonic() - start < 1
+
+
+def test_process_functions_run_in_worker_processes(mocker):
+    executor = ToolExecutor(mocker.Mock(), max_workers=2, max_processes=2)
+    try:
+        func = ToolFunction(current_pid, executor="process")
+
+        assert executor.execute("current_pid", func, {}) != os.getpid()
+        assert asyncio.run(executor.execute_async("current_pid", func, {})) != os.getpid()
+        with pytest.raises(ValueError, match="bad input"):
+            executor.execute("current_pid", func, {"fail": True})
+    finally:
+        executor.shutdown()
+
+
+def test_process_function_timeout(mocker):
+    executor = ToolExecutor(mocker.Mock(), max_processes=1, function_timeouts={"current_pid": 0.2})
+    try:
+        with pytest.raises(ToolTimeoutError):
+            executor.execute("current_pid", ToolFunction(current_pid, executor="process"), {"delay": 2})
+    finally:
+        executor.shutdown(wait=False)
@@ -0,0 +1,56 @@
+# flexiai/tests/test_tracing.py
+import logging
+import pytest
+from flexiai.core.utils.tracing import LoggingTraceSink, TraceSink, Tracer, create_tracer
+
+
+class CountingPayload:
+    def __init__(self):
+        self.formatted = 0
+
+    def __repr__(self):
+        self.formatted += 1
+        return "x" * 1000
+
+
+def test_tracer_samples_and_keeps_small_fields(caplog):
+    logger = logging.getLogger("flexiai.tests.tracing")
+    tracer = Tracer(capacity=5, sinks=[LoggingTraceSink(logger, max_field_length=10)], sample_rates={'run.poll': 3})
+    payload = CountingPayload()
+    arguments = CountingPayload()
+    result = "z" * 1000
+
+    for _ in range(9):
+        tracer.event('run.poll', run_id="run_1", status="in_progress")
+    with caplog.at_level(logging.INFO, logger="flexiai.tests.tracing"):
+        tracer.event('tool.completed', function_name="fetch", arguments=arguments, result=result)
+        tracer.event('run.finished', logging.INFO, run_id="run_1", polls=3, result=payload)
+
+    assert tracer.get_stats() == {'recorded': 5, 'sampled_out': 6, 'buffered': 5}
+    assert len(tracer.get_events('run.poll')) == 3
+    # The buffered events refer to the payloads, which are only formatted by a sink emitting them
+    [completed] = tracer.get_events('tool.completed')
+    assert completed.fields['result'] is result and arguments.formatted == 0
+    assert completed.format().endswith("...(+744 chars)")
+    assert payload.formatted == 1
+    assert caplog.messages == ["run.finished run_id=run_1 polls=3 result=xxxxxxxxxx...(+990 chars)"]
+
+
+def test_trace_sinks_must_consume_events():
+    class IncompleteSink(TraceSink):
+        pass
+
+    with pytest.raises(TypeError):
+        IncompleteSink()
+
+
+def test_run_monitor_uses_the_managers_tracer(mocker):
+    from flexiai.core.flexi_managers.run_manager import RunManager
+
+    tracer = create_tracer(logging.getLogger(__name__), poll_sample_rate=1)
+    run_manager = RunManager(mocker.MagicMock(), logging.getLogger(__name__), mocker.Mock(), mocker.Mock(), tracer=tracer)
+    try:
+        assert run_manager.run_monitor.tracer is tracer
+        assert run_manager.run_poller.monitor.tracer is tracer
+    finally:
+        run_manager.close()
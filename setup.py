@@ -22,6 +22,7 @@ setup(
             'core/utils/*.py',
             'credentials/*.py',
             'scripts/*.py',
+            'testing/*.py',
             'tests/*.py'
         ],
     },
@@ -52,7 +53,6 @@ setup(
         'MarkupSafe==2.1.5',
         'msal==1.30.0',
         'msal-extensions==1.2.0',
-        'nest-asyncio==1.6.0',
         'openai==1.40.2',
         'packaging==24.1',
         'platformdirs==3.7.0',
@@ -1,5 +1,6 @@
 # user_flexiai_rag/user_functions_mapping.py
 import logging
+from flexiai import ToolFunction
 from user_flexiai_rag.user_functions_manager import FunctionsManager
 
 logger = logging.getLogger(__name__)
@@ -18,6 +19,8 @@ async def map_user_functions():
     # Map user-defined personal and assistant functions
     user_personal_functions = {
         'search_youtube': user_functions_manager.search_youtube,
+        # CPU-heavy functions can run in a pool of worker processes (arguments and results must be picklable):
+        # 'score_report': ToolFunction(user_functions_manager.score_report, executor="process"),
     }
 
     user_assistant_functions = {